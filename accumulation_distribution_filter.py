@@ -15,13 +15,14 @@ Signals:
 - DISTRIBUTION: Instituciones vendiendo
 - STRONG_DISTRIBUTION: Venta institucional agresiva
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 
+from yfinance_client import get_history, DataNotFoundError
+
 
 class AccumulationDistributionFilter:
     """Detecta acumulación/distribución institucional"""
@@ -30,7 +31,8 @@ class AccumulationDistributionFilter:
         self.cache_dir = Path('cache/ad_filter')
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def analyze_stock(self, ticker: str, period_days: int = 50, verbose: bool = False) -> Dict:
+    def analyze_stock(self, ticker: str, period_days: int = 50, verbose: bool = False,
+                      hist: Optional[pd.DataFrame] = None) -> Dict:
         """
         Analiza acumulación/distribución de un stock
 
@@ -38,6 +40,8 @@ class AccumulationDistributionFilter:
             ticker: Symbol del stock
             period_days: Días a analizar (default 50)
             verbose: Si imprimir detalles
+            hist: Historial diario ya descargado (solo se usan las últimas
+                  period_days velas). Si es None se pide a yfinance_client
 
         Returns:
             Dict con:
@@ -52,8 +56,11 @@ class AccumulationDistributionFilter:
 
         try:
             # Get data
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period='3mo')
+            if hist is None:
+                try:
+                    hist = get_history(ticker, period='3mo')
+                except DataNotFoundError:
+                    hist = pd.DataFrame()
 
             if hist.empty or len(hist) < period_days:
                 return {
@@ -4,11 +4,13 @@ BACKTESTING SYSTEM
 Sistema para trackear performance histórica de señales
 """
 import pandas as pd
+import numpy as np
 import yfinance as yf
 from pathlib import Path
 from datetime import datetime, timedelta
 import json
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from event_study import fetch_prices
 
 class BacktestSystem:
     """Sistema de backtesting para validar señales"""
@@ -130,39 +132,27 @@ class BacktestSystem:
         print(f"   Entry date: {entry_date.strftime('%Y-%m-%d')}")
         print(f"   Tickers: {len(df)}")
 
+        # Un solo panel de precios para todos los tickers y timeframes
+        # (antes: dos descargas por ticker y timeframe)
+        entry_price = pd.to_numeric(df['entry_price'], errors='coerce').to_numpy(dtype=float)
+        has_entry = ~np.isnan(entry_price)
+        tickers = df['ticker'].astype(str).to_numpy(dtype=object)
+        panel = fetch_prices(
+            tickers[has_entry].tolist(),
+            start=entry_date - timedelta(days=5),
+            end=entry_date + timedelta(days=max(timeframes, default=0) + 5),
+        )
+
         # Calcular returns para cada timeframe
         for days in timeframes:
             target_date = entry_date + timedelta(days=days)
 
-            print(f"\n   Calculando return {days}d (hasta {target_date.strftime('%Y-%m-%d')})...")
-
-            returns = []
-            for idx, row in df.iterrows():
-                ticker = row['ticker']
-                entry_price = row.get('entry_price')
-
-                if pd.isna(entry_price):
-                    returns.append(None)
-                    continue
+            print(f"   Return {days}d (hasta {target_date.strftime('%Y-%m-%d')})")
 
-                # Obtener precio en fecha objetivo
-                exit_price = self.get_historical_price(ticker, target_date)
-
-                if exit_price is None:
-                    returns.append(None)
-                else:
-                    ret = ((exit_price - entry_price) / entry_price) * 100
-                    returns.append(ret)
-
-                if (idx + 1) % 50 == 0:
-                    print(f"      Procesados: {idx + 1}/{len(df)}")
-
-            df[f'return_{days}d'] = returns
-            df[f'exit_price_{days}d'] = df.apply(
-                lambda r: self.get_historical_price(r['ticker'], target_date)
-                if not pd.isna(r['entry_price']) else None,
-                axis=1
-            )
+            exit_price = panel.nearest_close(tickers, [target_date] * len(df), tolerance_days=5)
+            exit_price[~has_entry] = np.nan
+            df[f'return_{days}d'] = (exit_price - entry_price) / entry_price * 100
+            df[f'exit_price_{days}d'] = exit_price
 
         # Guardar resultados
         results_file = self.results_dir / f"backtest_{snapshot_id}.csv"
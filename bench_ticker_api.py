@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark de /api/analyze sobre el universo cacheado.
+
+Recorre todos los tickers con registro en TICKER_INDEX (in_cache=True) y mide
+la latencia por petición — p50 / p90 / p99 / max — a través del test client
+de Flask (incluye jsonify y los hooks), o solo de _analyze_from_cache con
+--direct.
+
+Las llamadas a yfinance del camino cacheado — earnings (_live_earnings_days)
+y el snapshot de enriquecimiento (_build_search_live_snapshot) — se sustituyen
+por no-ops salvo con --live: lo que se mide es el camino de datos locales, no
+la red.
+
+Uso:
+    python3 bench_ticker_api.py
+    python3 bench_ticker_api.py --rounds 3 --limit 200 --direct
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def _percentiles(samples_ms):
+    arr = np.asarray(samples_ms)
+    return {
+        "n": int(arr.size),
+        "p50": float(np.percentile(arr, 50)),
+        "p90": float(np.percentile(arr, 90)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+def run(rounds=1, limit=None, direct=False, live=False):
+    # Sin hilo de recarga en segundo plano durante la medición
+    os.environ.setdefault("DATASET_RELOAD_SECONDS", "0")
+    import ticker_api as api
+
+    # El límite de 20/min por IP del endpoint cortaría la medición
+    api.limiter.enabled = False
+    if not live:
+        api._live_earnings_days = lambda ticker: (None, None)
+        api._build_search_live_snapshot = lambda ticker: {"ticker": ticker}
+
+    tickers = sorted(t for t, rec in api.TICKER_INDEX.items() if rec["in_cache"])
+    if limit:
+        tickers = tickers[:limit]
+    if not tickers:
+        return None
+
+    client = api.app.test_client()
+    samples = []
+    errors = 0
+    for _ in range(rounds):
+        for ticker in tickers:
+            t0 = time.perf_counter()
+            if direct:
+                api._analyze_from_cache(ticker)
+            else:
+                if client.get(f"/api/analyze/{ticker}").status_code != 200:
+                    errors += 1
+            samples.append((time.perf_counter() - t0) * 1000)
+
+    stats = _percentiles(samples)
+    stats["tickers"] = len(tickers)
+    stats["errors"] = errors
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de /api/analyze sobre el universo cacheado")
+    parser.add_argument("--rounds", type=int, default=1, help="Pasadas sobre el universo (default 1)")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de tickers")
+    parser.add_argument("--direct", action="store_true", help="Medir solo _analyze_from_cache (sin Flask)")
+    parser.add_argument("--live", action="store_true",
+                        help="Incluir las llamadas a yfinance (earnings y enriquecimiento)")
+    args = parser.parse_args()
+
+    stats = run(args.rounds, args.limit, args.direct, args.live)
+    if stats is None:
+        print("⚠️  Sin tickers cacheados en docs/ — nada que medir")
+        return
+    target = "_analyze_from_cache" if args.direct else "/api/analyze"
+    print(f"📊 {target}: {stats['n']} peticiones sobre {stats['tickers']} tickers")
+    print(f"   p50 {stats['p50']:.2f} ms | p90 {stats['p90']:.2f} ms | "
+          f"p99 {stats['p99']:.2f} ms | max {stats['max']:.2f} ms")
+    if stats["errors"]:
+        print(f"   ⚠️  {stats['errors']} respuestas != 200")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,8 @@ from typing import Any, Optional
 import pandas as pd
 import yfinance as yf
 
+from yfinance_client import OptionChains, option_chains
+
 DOCS = Path('docs')
 DOCS.mkdir(exist_ok=True)
 OUT = DOCS / 'earnings_options.json'
@@ -93,7 +95,7 @@ def _next_earnings_date(tk: yf.Ticker) -> Optional[date]:
         return None
 
 
-def _atm_straddle(tk: yf.Ticker, expiration: str, spot: float) -> Optional[dict]:
+def _atm_straddle(tk: OptionChains, expiration: str, spot: float) -> Optional[dict]:
     """Devuelve {strike, call_price, put_price, straddle, implied_move_pct, call_iv, put_iv}."""
     try:
         chain = tk.option_chain(expiration)
@@ -153,7 +155,7 @@ def _is_placeholder_iv(put_iv: float, call_iv: float) -> bool:
     return abs(put_iv - rounded) < 1e-6
 
 
-def _vol_skew(tk: yf.Ticker, expiration: str, spot: float) -> Optional[dict]:
+def _vol_skew(tk: OptionChains, expiration: str, spot: float) -> Optional[dict]:
     """5% OTM put IV - 5% OTM call IV. Positivo = miedo bajista. None si datos no fiables."""
     try:
         chain = tk.option_chain(expiration)
@@ -241,7 +243,7 @@ def _earnings_history(tk: yf.Ticker, n: int = 8) -> Optional[dict]:
     }
 
 
-def _expirations_post_earnings(tk: yf.Ticker, edate: date) -> list[str]:
+def _expirations_post_earnings(tk: OptionChains, edate: date) -> list[str]:
     """Lista las primeras 4 expiraciones después de earnings."""
     try:
         exps = tk.options
@@ -271,7 +273,9 @@ def _build_snapshot(ticker: str) -> Optional[dict]:
     if not spot:
         return None
 
-    exps = _expirations_post_earnings(tk, edate)
+    # straddle y skew leen la misma cadena: una sola descarga vía option store
+    chains = option_chains(ticker, tk)
+    exps = _expirations_post_earnings(chains, edate)
     if not exps:
         return {
             'ticker': ticker,
@@ -284,7 +288,7 @@ def _build_snapshot(ticker: str) -> Optional[dict]:
     # Term structure: straddles a 1w, 2w, 4w (las que existan)
     term: list[dict] = []
     for exp in exps:
-        s = _atm_straddle(tk, exp, spot)
+        s = _atm_straddle(chains, exp, spot)
         if s is None:
             continue
         s['expiration'] = exp
@@ -292,7 +296,7 @@ def _build_snapshot(ticker: str) -> Optional[dict]:
         term.append(s)
 
     # Skew sobre la primera exp post-earnings
-    skew = _vol_skew(tk, exps[0], spot) if exps else None
+    skew = _vol_skew(chains, exps[0], spot) if exps else None
 
     history = _earnings_history(tk)
 
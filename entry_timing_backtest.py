@@ -22,6 +22,14 @@ Uso:
     python3 entry_timing_backtest.py                # US VALUE, periodo limpio
     python3 entry_timing_backtest.py --all-history  # incluye el contaminado
     python3 entry_timing_backtest.py --horizonte 30d
+    python3 entry_timing_backtest.py --modo corte   # reconstrucción por fecha (verificación)
+
+Dos modos, mismo resultado:
+  - series (por defecto): los indicadores de cada ticker se calculan UNA vez
+    como series completas (technical_filter.indicator_series) y cada señal
+    lee su vela por índice. Lineal en la longitud del historial.
+  - corte: corta hist[hist.index <= fecha] y recalcula todo por señal.
+    Cuadrático para tickers con muchas señales; se conserva como referencia.
 """
 from __future__ import annotations
 
@@ -32,7 +40,7 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+from yfinance_client import get_history
 
 from technical_filter import (
     _compute_ma_signals,
@@ -41,6 +49,8 @@ from technical_filter import (
     _compute_trend,
     _compute_tech_stage,
     _entry_readiness,
+    indicator_series,
+    readiness_at,
 )
 
 DOCS = Path('docs')
@@ -59,7 +69,7 @@ def _historial(tickers: list[str], desde: str) -> dict[str, pd.DataFrame]:
     out: dict[str, pd.DataFrame] = {}
     for i, t in enumerate(tickers, 1):
         try:
-            h = yf.Ticker(t).history(start=desde, auto_adjust=True)
+            h = get_history(t, start=desde, auto_adjust=True)
             if len(h) >= MIN_VELAS:
                 # tz-naive para poder comparar con signal_date
                 h.index = pd.to_datetime(h.index).tz_localize(None)
@@ -101,6 +111,60 @@ def _spy_6m_en_fecha(spy: pd.DataFrame, fecha: pd.Timestamp) -> float:
     return (p1 - p0) / p0 * 100 if p0 > 0 else 0.0
 
 
+def _spy_6m_serie(spy: pd.DataFrame) -> pd.Series:
+    """_spy_6m_en_fecha para cada vela del benchmark, en una pasada."""
+    close = spy['Close'].astype(float)
+    n = np.arange(1, len(close) + 1)
+    first = float(close.iloc[0]) if len(close) else np.nan
+    p0 = np.where(n >= 126, close.shift(125).to_numpy(), first)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ret = np.where(p0 > 0, (close.to_numpy() - p0) / p0 * 100, 0.0)
+    return pd.Series(np.where(n >= 2, ret, 0.0), index=close.index)
+
+
+def _en_fecha(index: pd.Index, fechas) -> np.ndarray:
+    """Posición de la última vela <= cada fecha (-1 si no hay ninguna)."""
+    return index.searchsorted(pd.DatetimeIndex(fechas), side='right') - 1
+
+
+def _readiness_por_fechas(hist: pd.DataFrame, fechas, spy_6m) -> list[tuple[str | None, str | None]]:
+    """_readiness_en_fecha para varias fechas de un ticker, con los
+    indicadores calculados una sola vez. Misma regla de no look-ahead: la
+    señal del día `fecha` lee la última vela <= fecha."""
+    levels = indicator_series(hist['Close'], hist['High'], hist['Low'])
+    out = []
+    for pos, s6m in zip(_en_fecha(hist.index, fechas), spy_6m):
+        if pos + 1 < MIN_VELAS:
+            out.append((None, None))
+        else:
+            out.append(readiness_at(levels, pos, s6m))
+    return out
+
+
+def _reconstruir(d: pd.DataFrame, hist: dict[str, pd.DataFrame], spy: pd.DataFrame,
+                 modo: str = 'series') -> list[tuple[str | None, str | None]]:
+    """(entry_readiness, motivo) de cada fila de `d` (None si no hay datos)."""
+    tickers = d.ticker.astype(str).str.upper().to_numpy()
+    fechas = pd.DatetimeIndex(d.signal_date)
+    out: list[tuple[str | None, str | None]] = [(None, None)] * len(d)
+    if modo == 'corte':
+        for i, (t, fecha) in enumerate(zip(tickers, fechas)):
+            if t in hist:
+                out[i] = _readiness_en_fecha(hist[t], fecha, _spy_6m_en_fecha(spy, fecha))
+        return out
+
+    spy_6m = _spy_6m_serie(spy)
+    pos = _en_fecha(spy.index, fechas)
+    spy_en_fecha = np.where(pos >= 0, spy_6m.to_numpy()[np.maximum(pos, 0)], 0.0) if len(spy) else np.zeros(len(d))
+    for t in dict.fromkeys(tickers):
+        if t not in hist:
+            continue
+        filas = np.flatnonzero(tickers == t)
+        for i, res in zip(filas, _readiness_por_fechas(hist[t], fechas[filas], spy_en_fecha[filas])):
+            out[i] = res
+    return out
+
+
 def _resumen(d: pd.DataFrame, col: str, alpha_col: str) -> dict:
     v = d.dropna(subset=[col])
     if v.empty:
@@ -122,6 +186,8 @@ def main() -> None:
     ap.add_argument('--all-history', action='store_true',
                     help='incluye el periodo contaminado (más muestra, otra población)')
     ap.add_argument('--estrategia', default='VALUE')
+    ap.add_argument('--modo', default='series', choices=['series', 'corte'],
+                    help='series: indicadores una vez por ticker; corte: recalcula por señal')
     args = ap.parse_args()
 
     col, alpha_col = f'return_{args.horizonte}', f'alpha_{args.horizonte}'
@@ -145,19 +211,14 @@ def main() -> None:
     hist = _historial(tickers, desde)
     print(f'   {len(hist)}/{len(tickers)} con historial suficiente')
 
-    spy = yf.Ticker('SPY').history(start=desde, auto_adjust=True)
+    spy = get_history('SPY', start=desde, auto_adjust=True)
     spy.index = pd.to_datetime(spy.index).tz_localize(None)
 
     filas = []
-    for _, r in d.iterrows():
-        t = str(r.ticker).upper()
-        if t not in hist:
-            continue
-        readiness, motivo = _readiness_en_fecha(
-            hist[t], r.signal_date, _spy_6m_en_fecha(spy, r.signal_date))
+    for (_, r), (readiness, motivo) in zip(d.iterrows(), _reconstruir(d, hist, spy, args.modo)):
         if readiness is None:
             continue
-        filas.append({'ticker': t, 'signal_date': r.signal_date,
+        filas.append({'ticker': str(r.ticker).upper(), 'signal_date': r.signal_date,
                       'entry_readiness': readiness, 'motivo': motivo,
                       col: r[col], alpha_col: r.get(alpha_col)})
 
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+EVENT STUDY — motor común de backtest sobre los snapshots de docs/history/
+
+Soluciona:
+  - Cada backtest (mean reversion, value, momentum) releía los snapshots a su
+    manera, aplicaba el cooldown con un bucle iterrows y pedía precios ticker
+    a ticker (un yf.Ticker.history por señal o incluso por señal × periodo).
+
+Diseño:
+  - load_snapshots(): concatena el CSV de TODOS los snapshots en una pasada.
+  - apply_cooldown(): cooldown por ticker vectorizado. Es secuencial (una
+    señal cuenta los días desde la última señal CONSERVADA, no desde la
+    anterior), así que en vez de un diff simple avanza a saltos: cada ronda
+    hace un searchsorted para todos los tickers a la vez y hay tantas rondas
+    como señales conservadas tenga el ticker más repetido.
+  - PricePanel: las velas de todos los tickers en un solo panel largo
+    ordenado por (ticker, fecha), descargadas con UNA llamada a
+    get_history_batch (price store primero, tandas concurrentes).
+  - simulate_exits(): entrada al cierre de la primera vela en/tras la señal y
+    salida por stop / target / fin de periodo para VARIOS periodos a la vez,
+    con una matriz señales × días en lugar de un bucle por vela.
+  - tier_stats(): win rate, retorno medio y alpha vs benchmark por score tier.
+
+Uso:
+    python3 event_study.py --source value
+    python3 event_study.py --source momentum --periods 7 14 30 --cooldown 14
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+HISTORY_DIR = Path('docs/history')
+BENCHMARK = 'SPY'
+
+# Fuentes de señales conocidas: CSV del snapshot y columna de score
+EVENT_SOURCES = {
+    'mean_reversion': ('mean_reversion_opportunities.csv', 'reversion_score'),
+    'value': ('value_opportunities.csv', 'value_score'),
+    'eu_value': ('european_value_opportunities.csv', 'value_score'),
+    'momentum': ('momentum_opportunities.csv', 'momentum_score'),
+}
+
+# (score mínimo, etiqueta) de mayor a menor; por debajo del último → TIER_FLOOR
+SCORE_TIERS = ((90, '90-100'), (80, '80-89'), (70, '70-79'))
+TIER_FLOOR = '60-69'
+
+_KEY_SHIFT = 1 << 32
+
+
+# ── Snapshots ─────────────────────────────────────────────────────────────────
+
+def snapshot_dirs(history_dir: Path = HISTORY_DIR) -> list[Path]:
+    """Directorios de snapshot (YYYY-MM-DD) en orden cronológico."""
+    history_dir = Path(history_dir)
+    if not history_dir.exists():
+        return []
+    return sorted(d for d in history_dir.iterdir() if d.is_dir())
+
+
+def load_snapshots(csv_name: str, history_dir: Path = HISTORY_DIR) -> pd.DataFrame:
+    """El CSV `csv_name` de todos los snapshots, con columna snapshot_date."""
+    frames = []
+    for snap_dir in snapshot_dirs(history_dir):
+        csv = snap_dir / csv_name
+        if not csv.exists():
+            continue
+        try:
+            df = pd.read_csv(csv)
+        except Exception as e:
+            print(f"   ⚠️  Error leyendo {csv}: {e}")
+            continue
+        if df.empty:
+            continue
+        df['snapshot_date'] = snap_dir.name
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, ignore_index=True)
+    combined['snapshot_date'] = pd.to_datetime(combined['snapshot_date'], errors='coerce')
+    combined = combined[combined['snapshot_date'].notna()]
+    combined['ticker'] = combined['ticker'].astype(str).str.strip()
+    return combined.sort_values('snapshot_date', kind='stable').reset_index(drop=True)
+
+
+def _day_numbers(dates) -> np.ndarray:
+    return pd.DatetimeIndex(dates).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def apply_cooldown(events: pd.DataFrame, days: int, by: str = 'ticker',
+                   date_col: str = 'snapshot_date') -> pd.DataFrame:
+    """
+    Primera señal de cada `by` y después solo las que llegan ≥ `days` días
+    tras la última conservada. Devuelve las filas ordenadas por (by, fecha).
+    """
+    ev = events.sort_values([by, date_col], kind='stable').reset_index(drop=True)
+    if ev.empty or days <= 0:
+        return ev
+    group = ev.groupby(by, sort=False).ngroup().to_numpy(dtype=np.int64)
+    key = group * _KEY_SHIFT + _day_numbers(ev[date_col])
+    keep = np.zeros(len(ev), dtype=bool)
+    frontier = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    while frontier.size:
+        keep[frontier] = True
+        nxt = np.searchsorted(key, key[frontier] + days, side='left')
+        inside = nxt < len(ev)
+        nxt, src = nxt[inside], frontier[inside]
+        frontier = nxt[group[nxt] == group[src]]
+    return ev[keep].reset_index(drop=True)
+
+
+def score_tier(scores) -> np.ndarray:
+    """Etiqueta de SCORE_TIERS para cada score."""
+    s = np.asarray(scores, dtype=float)
+    return np.select([s >= floor for floor, _ in SCORE_TIERS],
+                     [label for _, label in SCORE_TIERS], default=TIER_FLOOR)
+
+
+# ── Price panel ───────────────────────────────────────────────────────────────
+
+@dataclass
+class PricePanel:
+    """Velas diarias de muchos tickers, contiguas por ticker y por fecha."""
+    tickers: np.ndarray     # ticker de cada fila
+    dates: np.ndarray       # datetime64[ns] naive (hora local del mercado)
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    codes: dict             # {ticker: código}; las filas de un código son contiguas
+    keys: np.ndarray        # código · 2^32 + día, ordenado
+    block_end: np.ndarray   # fila siguiente a la última de cada código
+
+    @classmethod
+    def from_frames(cls, frames: dict[str, pd.DataFrame]) -> 'PricePanel':
+        parts = []
+        for ticker in sorted(frames):
+            hist = frames[ticker]
+            if hist is None or hist.empty or 'Close' not in hist.columns:
+                continue
+            idx = pd.DatetimeIndex(hist.index)
+            if idx.tz is not None:
+                idx = idx.tz_localize(None)
+            close = hist['Close'].to_numpy(dtype=float)
+            part = pd.DataFrame({
+                'ticker': ticker,
+                'date': idx.normalize().astype('datetime64[ns]'),
+                'Open': hist['Open'].to_numpy(dtype=float) if 'Open' in hist else close,
+                'High': hist['High'].to_numpy(dtype=float) if 'High' in hist else close,
+                'Low': hist['Low'].to_numpy(dtype=float) if 'Low' in hist else close,
+                'Close': close,
+            }).sort_values('date', kind='stable')
+            parts.append(part.drop_duplicates('date', keep='last'))
+        long = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            {'ticker': [], 'date': pd.Series(dtype='datetime64[ns]'),
+             'Open': [], 'High': [], 'Low': [], 'Close': []})
+
+        tickers = long['ticker'].to_numpy(dtype=object)
+        codes = {t: i for i, t in enumerate(dict.fromkeys(tickers))}
+        code = np.array([codes[t] for t in tickers], dtype=np.int64)
+        return cls(
+            tickers=tickers,
+            dates=long['date'].to_numpy(dtype='datetime64[ns]'),
+            open=long['Open'].to_numpy(dtype=float),
+            high=long['High'].to_numpy(dtype=float),
+            low=long['Low'].to_numpy(dtype=float),
+            close=long['Close'].to_numpy(dtype=float),
+            codes=codes,
+            keys=code * _KEY_SHIFT + _day_numbers(long['date']),
+            block_end=np.searchsorted(code, np.arange(len(codes)), side='right'),
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def locate(self, tickers, dates) -> tuple[np.ndarray, np.ndarray]:
+        """(fila de la primera vela en/tras cada fecha, velas desde ella hasta
+        el final del ticker). Fila -1 y 0 velas si no hay ninguna."""
+        code = np.array([self.codes.get(t, -1) for t in tickers], dtype=np.int64)
+        pos = np.full(len(code), -1, dtype=np.int64)
+        remaining = np.zeros(len(code), dtype=np.int64)
+        known = code >= 0
+        if not known.any():
+            return pos, remaining
+        found = np.searchsorted(self.keys, code[known] * _KEY_SHIFT + _day_numbers(np.asarray(dates)[known]),
+                                side='left')
+        end = self.block_end[code[known]]
+        ok = found < end
+        pos[np.flatnonzero(known)[ok]] = found[ok]
+        remaining[np.flatnonzero(known)] = np.where(ok, end - found, 0)
+        return pos, remaining
+
+    def nearest_close(self, tickers, dates, tolerance_days: int = 5) -> np.ndarray:
+        """Cierre de la vela más próxima a cada fecha (± tolerance_days); NaN si no hay."""
+        n = len(tickers)
+        out = np.full(n, np.nan)
+        if n == 0 or len(self) == 0:
+            return out
+        left = pd.DataFrame({'ticker': np.asarray(tickers, dtype=object),
+                             'date': pd.DatetimeIndex(dates).astype('datetime64[ns]'),
+                             '_row': np.arange(n)}).sort_values('date', kind='stable')
+        right = pd.DataFrame({'ticker': self.tickers, 'date': self.dates,
+                              'Close': self.close}).sort_values('date', kind='stable')
+        merged = pd.merge_asof(left, right, on='date', by='ticker', direction='nearest',
+                               tolerance=pd.Timedelta(days=tolerance_days))
+        out[merged['_row'].to_numpy()] = merged['Close'].to_numpy(dtype=float)
+        return out
+
+
+def fetch_prices(tickers: Sequence[str], start, end=None) -> PricePanel:
+    """PricePanel de `tickers` entre start y end con una sola get_history_batch."""
+    from yfinance_client import get_history_batch
+
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return PricePanel.from_frames({})
+    fmt = lambda d: pd.Timestamp(d).strftime('%Y-%m-%d')
+    frames, errors = get_history_batch(tickers, period=None, start=fmt(start),
+                                       end=fmt(end if end is not None else datetime.now()))
+    if errors:
+        print(f"   ⚠️  {len(errors)} tickers sin historial")
+    return PricePanel.from_frames(frames)
+
+
+def regime_above_ma(panel: PricePanel, ticker: str = BENCHMARK, window: int = 50) -> pd.Series:
+    """{fecha: cierre > media de `window` sesiones} del benchmark (False sin media)."""
+    rows = panel.tickers == ticker
+    if rows.sum() < window:
+        return pd.Series(dtype=bool)
+    close = pd.Series(panel.close[rows], index=pd.DatetimeIndex(panel.dates[rows]))
+    return close > close.rolling(window).mean()
+
+
+# ── Simulation ────────────────────────────────────────────────────────────────
+
+def simulate_exits(panel: PricePanel, tickers, dates, periods: Sequence[int],
+                   stop_pct: float = 0.08, target_pct: float = 0.25,
+                   targets=None, min_target_pct: float = 0.05) -> dict[int, pd.DataFrame]:
+    """
+    Salida de cada señal para cada holding period.
+
+    Entrada al cierre de la primera vela en/tras la fecha de la señal (hacen
+    falta al menos 2 velas desde ella). Stop = entrada·(1-stop_pct); target =
+    `targets` si supera la entrada en más de min_target_pct, si no
+    entrada·(1+target_pct). En cada vela se mira primero el stop (mínimo) y
+    luego el target (máximo); sin toque se sale al cierre de la última vela
+    del periodo.
+
+    Devuelve {periodo: DataFrame} con una fila por señal simulable ('event'
+    es su posición en `tickers`).
+    """
+    periods = sorted({int(p) for p in periods if int(p) > 0})
+    pos, remaining = panel.locate(tickers, dates)
+    ev = np.flatnonzero(remaining >= 2)
+    if not periods or ev.size == 0:
+        return {p: pd.DataFrame() for p in periods}
+    pos, remaining = pos[ev], remaining[ev]
+
+    entry = panel.close[pos]
+    stop = entry * (1.0 - stop_pct)
+    target = entry * (1.0 + target_pct)
+    if targets is not None:
+        given = pd.to_numeric(pd.Series(np.asarray(targets, dtype=object)[ev]), errors='coerce').to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            target = np.where(given > entry * (1.0 + min_target_pct), given, target)
+
+    # Matriz señales × días (1..max periodo) con la primera vela que toca algo
+    offsets = np.arange(1, periods[-1] + 1)
+    inside = offsets[None, :] < remaining[:, None]
+    rows = np.where(inside, pos[:, None] + offsets[None, :], 0)
+    with np.errstate(invalid='ignore'):
+        stop_hit = inside & (panel.low[rows] <= stop[:, None])
+        target_hit = inside & (panel.high[rows] >= target[:, None])
+    touched = stop_hit | target_hit
+    first = np.where(touched.any(axis=1), touched.argmax(axis=1) + 1, np.iinfo(np.int64).max)
+    first_is_stop = stop_hit[np.arange(len(ev)), np.minimum(first, offsets[-1]) - 1]
+
+    out = {}
+    for period in periods:
+        last = np.minimum(period, remaining - 1)
+        hit = first <= last
+        holding = np.where(hit, first, last)
+        exit_row = pos + holding
+        reason = np.where(hit, np.where(first_is_stop, 'STOP_LOSS', 'TARGET'), 'HOLDING_PERIOD')
+        exit_price = np.where(hit, np.where(first_is_stop, stop, target), panel.close[exit_row])
+        out[period] = pd.DataFrame({
+            'event': ev,
+            'entry_date': panel.dates[pos],
+            'exit_date': panel.dates[exit_row],
+            'entry_price': entry,
+            'exit_price': exit_price,
+            'target': target,
+            'stop_loss': stop,
+            'holding_days': holding,
+            'exit_reason': reason,
+            'hit_target': hit & ~first_is_stop,
+            'hit_stop': hit & first_is_stop,
+            'profit_loss_pct': (exit_price - entry) / entry * 100,
+            'sufficient_data': remaining >= period,
+        })
+    return out
+
+
+def benchmark_returns(panel: PricePanel, entry_dates, exit_dates,
+                      ticker: str = BENCHMARK) -> np.ndarray:
+    """Retorno % del benchmark entre el último cierre en/antes de cada par de fechas."""
+    rows = np.flatnonzero(panel.tickers == ticker)
+    n = len(entry_dates)
+    if rows.size == 0:
+        return np.full(n, np.nan)
+    dates, close = panel.dates[rows], panel.close[rows]
+
+    def _asof(when):
+        i = np.searchsorted(dates, np.asarray(when, dtype='datetime64[ns]'), side='right') - 1
+        return np.where(i >= 0, close[np.maximum(i, 0)], np.nan)
+
+    return (_asof(exit_dates) / _asof(entry_dates) - 1) * 100
+
+
+# ── Stats ─────────────────────────────────────────────────────────────────────
+
+def tier_stats(trades: pd.DataFrame, tier_col: str = 'score_tier') -> pd.DataFrame:
+    """n, win rate, retorno medio/mediano y alpha medio por tier."""
+    if trades.empty:
+        return pd.DataFrame(columns=['n', 'win_rate', 'avg_return', 'median_return', 'avg_alpha'])
+    pnl = trades['profit_loss_pct'].astype(float)
+    frame = pd.DataFrame({
+        'tier': trades[tier_col], 'pnl': pnl, 'win': (pnl > 0).astype(float),
+        'alpha': trades['alpha_pct'].astype(float) if 'alpha_pct' in trades else np.nan,
+    })
+    stats = frame.groupby('tier', sort=False).agg(
+        n=('pnl', 'size'), win_rate=('win', 'mean'), avg_return=('pnl', 'mean'),
+        median_return=('pnl', 'median'), avg_alpha=('alpha', 'mean'))
+    stats['win_rate'] *= 100
+    order = [label for _, label in SCORE_TIERS] + [TIER_FLOOR]
+    return stats.reindex([t for t in order if t in stats.index] +
+                         [t for t in stats.index if t not in order])
+
+
+def run_event_study(events: pd.DataFrame, score_col: str, periods: Sequence[int] = (7, 14, 30),
+                    cooldown_days: int = 14, panel: Optional[PricePanel] = None,
+                    target_col: Optional[str] = None, **exit_kwargs) -> dict[int, pd.DataFrame]:
+    """
+    Señales → trades por holding period, con score_tier y alpha vs BENCHMARK.
+
+    `panel` permite reutilizar precios ya descargados; por defecto se baja uno
+    que cubre todas las señales más el benchmark.
+    """
+    events = apply_cooldown(events, cooldown_days)
+    if events.empty:
+        return {int(p): pd.DataFrame() for p in periods}
+    if panel is None:
+        panel = fetch_prices([*events['ticker'].unique(), BENCHMARK],
+                             start=events['snapshot_date'].min() - timedelta(days=1))
+    targets = events[target_col] if target_col and target_col in events.columns else None
+    sims = simulate_exits(panel, events['ticker'].to_numpy(dtype=object), events['snapshot_date'],
+                          periods, targets=targets, **exit_kwargs)
+    out = {}
+    for period, sim in sims.items():
+        if sim.empty:
+            out[period] = sim
+            continue
+        src = events.iloc[sim['event'].to_numpy()].reset_index(drop=True)
+        trades = src.drop(columns=[c for c in sim.columns if c in src.columns]).join(sim.drop(columns='event'))
+        trades['score_tier'] = score_tier(pd.to_numeric(trades[score_col], errors='coerce'))
+        trades['benchmark_return_pct'] = benchmark_returns(panel, trades['entry_date'], trades['exit_date'])
+        trades['alpha_pct'] = trades['profit_loss_pct'] - trades['benchmark_return_pct']
+        out[period] = trades
+    return out
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description='Event study sobre los snapshots de docs/history')
+    parser.add_argument('--source', choices=sorted(EVENT_SOURCES), default='value')
+    parser.add_argument('--periods', type=int, nargs='+', default=[7, 14, 30])
+    parser.add_argument('--cooldown', type=int, default=14, help='Días de cooldown por ticker')
+    parser.add_argument('--history', default=str(HISTORY_DIR))
+    parser.add_argument('--output', default=None, help='JSON de salida (opcional)')
+    args = parser.parse_args()
+
+    csv_name, score_col = EVENT_SOURCES[args.source]
+    events = load_snapshots(csv_name, Path(args.history))
+    if events.empty or score_col not in events.columns:
+        print(f"❌ Sin señales {args.source} en {args.history}")
+        return
+    print(f"📋 {len(events)} señales {args.source} en {events['snapshot_date'].nunique()} snapshots")
+
+    trades = run_event_study(events, score_col, args.periods, args.cooldown, target_col='target')
+    summary = {'source': args.source, 'cooldown_days': args.cooldown, 'periods': {}}
+    for period, df in trades.items():
+        if df.empty:
+            print(f"\n⏱️  {period}d: sin trades")
+            continue
+        stats = tier_stats(df)
+        print(f"\n⏱️  {period}d — {len(df)} trades  WR={(df['profit_loss_pct'] > 0).mean() * 100:.1f}%  "
+              f"avg={df['profit_loss_pct'].mean():+.2f}%  alpha={df['alpha_pct'].mean():+.2f}%")
+        for tier, row in stats.iterrows():
+            print(f"    [{tier}] n={int(row['n']):3d}  WR={row['win_rate']:.0f}%  "
+                  f"avg={row['avg_return']:+.1f}%  alpha={row['avg_alpha']:+.1f}%")
+        summary['periods'][str(period)] = {
+            tier: {k: (int(v) if k == 'n' else (None if pd.isna(v) else round(float(v), 2)))
+                   for k, v in row.items()}
+            for tier, row in stats.iterrows()
+        }
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n💾 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,11 +15,12 @@ Categories:
 - HIGH_FLOAT: 50M-200M shares (aceptable, menos volátil)
 - MEGA_FLOAT: >200M shares (difícil de mover)
 """
-import yfinance as yf
 import pandas as pd
-from typing import Dict
+from typing import Dict, Optional
 from pathlib import Path
 
+from yfinance_client import get_info, DataNotFoundError
+
 
 class FloatFilter:
     """Filtra stocks por float (shares outstanding)"""
@@ -28,13 +29,15 @@ class FloatFilter:
         self.cache_dir = Path('cache/float_filter')
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def check_stock(self, ticker: str, verbose: bool = False) -> Dict:
+    def check_stock(self, ticker: str, verbose: bool = False,
+                    info: Optional[Dict] = None) -> Dict:
         """
         Verifica el float de un stock
 
         Args:
             ticker: Symbol del stock
             verbose: Si imprimir detalles
+            info: ticker.info ya descargado. Si es None se pide a yfinance_client
 
         Returns:
             Dict con:
@@ -48,8 +51,11 @@ class FloatFilter:
 
         try:
             # Get stock info
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            if info is None:
+                try:
+                    info = get_info(ticker)
+                except DataNotFoundError:
+                    info = {}
 
             # Get shares outstanding (float)
             shares_outstanding = info.get('sharesOutstanding')
@@ -18,13 +18,18 @@ import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
+import heapq
+import os
+import threading
 import time
 import random
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, List, Optional
 
 from currency_normalizer import normalize_info
 from financial_cross_check import derive_from_statements, check_coherence
+from yfinance_client import RateLimitError, acquire_rate_budget, option_chains, report_rate_limited
 
 try:
     from ai_data_fetcher import fetch_missing_financials as _ai_fetch
@@ -38,8 +43,12 @@ def _yf_ticker_with_retry(ticker: str, max_retries: int = 4) -> yf.Ticker:
 
 
 def _yf_info_with_retry(stock: yf.Ticker, max_retries: int = 4) -> dict:
-    """Fetch .info with exponential backoff on 429 / rate-limit errors."""
+    """Fetch .info with exponential backoff on 429 / rate-limit errors.
+
+    Raises RateLimitError if still rate limited after max_retries; {} means
+    Yahoo answered but has no data for the ticker."""
     delay = 3.0
+    rate_limited = False
     for attempt in range(max_retries):
         try:
             info = stock.info
@@ -52,12 +61,16 @@ def _yf_info_with_retry(stock: yf.Ticker, max_retries: int = 4) -> dict:
         except Exception as e:
             msg = str(e).lower()
             if '429' in msg or 'too many' in msg or 'rate' in msg:
+                rate_limited = True
+                report_rate_limited()   # frena también a los demás workers
                 jitter = random.uniform(0, delay * 0.3)
                 print(f"   ⏳ Rate limited — waiting {delay:.0f}s (attempt {attempt+1}/{max_retries})")
                 time.sleep(delay + jitter)
                 delay = min(delay * 2, 60)
             else:
                 raise
+    if rate_limited:
+        raise RateLimitError(f"Rate limited fetching info after {max_retries} attempts")
     return {}
 
 def _company_name(info: dict, fallback: str) -> str:
@@ -68,6 +81,16 @@ def _company_name(info: dict, fallback: str) -> str:
     return str(info.get('longName') or info.get('shortName') or fallback).strip()
 
 
+# score_batch: workers concurrentes, llamadas a Yahoo que se reservan del
+# bucket por ticker (info, estados trimestrales/anuales, historial,
+# calendario) y reintentos por ticker. Las 2 de opciones las reserva
+# option_chains solo si la cadena no está ya en el option store.
+BATCH_WORKERS = 4
+BATCH_MAX_RETRIES = 2
+BATCH_RETRY_DELAY = 30.0
+CALLS_PER_TICKER = 6
+
+
 class FundamentalScorer:
     """Sistema de scoring fundamental completo"""
 
@@ -88,6 +111,9 @@ class FundamentalScorer:
         else:
             self.as_of_date_dt = datetime.now()
 
+        self._spy_cache = None
+        self._spy_lock = threading.Lock()
+
         # Weights para el fundamental score
         self.weights = {
             'earnings_quality': 0.30,    # 30% - Calidad de ganancias
@@ -110,8 +136,8 @@ class FundamentalScorer:
             stock = _yf_ticker_with_retry(ticker)
             info = _yf_info_with_retry(stock)
             if not info:
-                print(f"   ❌ Error: sin datos de yfinance (rate limit persistente)")
-                return self._get_empty_result(ticker)
+                print(f"   ❌ Error: sin datos en yfinance")
+                return self._get_empty_result(ticker, reason='no_data')
 
             # Los estados financieros pueden venir en otra divisa que la
             # cotización (ADR y bolsas europeas). Se normaliza ANTES de calcular
@@ -265,7 +291,7 @@ class FundamentalScorer:
                 **self._calculate_magic_formula_metrics(stock, info),
 
                 # IV vs Realized Volatility (options pricing signal)
-                **self._calculate_iv_metrics(stock, price_history),
+                **self._calculate_iv_metrics(stock, price_history, ticker),
 
                 # Timestamp
                 'analyzed_at': datetime.now().isoformat()
@@ -276,7 +302,8 @@ class FundamentalScorer:
 
         except Exception as e:
             print(f"   ❌ Error: {e}")
-            return self._get_empty_result(ticker)
+            return self._get_empty_result(
+                ticker, reason='rate_limit' if isinstance(e, RateLimitError) else 'exception')
 
     def _get_quarterly_earnings(self, stock) -> pd.DataFrame:
         """Obtiene earnings trimestrales (Net Income por quarter).
@@ -590,9 +617,8 @@ class FundamentalScorer:
                     'rs_line_at_new_high': None, 'rs_line_trend': None,
                 }
 
-            # Obtener SPY para comparación
-            spy = yf.Ticker('SPY')
-            spy_history = spy.history(period='1y')
+            # Obtener SPY para comparación (una vez por scorer, no por ticker)
+            spy_history = self._spy_history()
 
             if not spy_history.empty:
                 # Performance en diferentes periodos
@@ -872,10 +898,22 @@ class FundamentalScorer:
         else:
             return "🔴 Weak"
 
-    def _get_empty_result(self, ticker: str) -> Dict:
-        """Resultado vacío en caso de error"""
+    def _spy_history(self) -> pd.DataFrame:
+        """Historial 1y de SPY, descargado una sola vez (thread-safe)."""
+        with self._spy_lock:
+            if self._spy_cache is None:
+                try:
+                    self._spy_cache = yf.Ticker('SPY').history(period='1y')
+                except Exception:
+                    return pd.DataFrame()   # sin cachear: se reintenta
+            return self._spy_cache
+
+    def _get_empty_result(self, ticker: str, reason: str = 'exception') -> Dict:
+        """Resultado vacío en caso de error. reason: rate_limit | exception
+        (transitorios, score_batch los reintenta) | no_data (definitivo)"""
         return {
             'ticker': ticker,
+            'error_reason': reason,
             'company_name': ticker,
             'fundamental_score': 0.0,
             'tier': '❌ ERROR',
@@ -1378,7 +1416,8 @@ class FundamentalScorer:
 
         return result
 
-    def _calculate_iv_metrics(self, stock, price_history: pd.DataFrame) -> Dict:
+    def _calculate_iv_metrics(self, stock, price_history: pd.DataFrame,
+                              ticker: Optional[str] = None) -> Dict:
         """
         IV vs Realized Volatility metrics:
         - hv_30d: 30-day historical (realized) volatility annualized
@@ -1386,7 +1425,8 @@ class FundamentalScorer:
         - iv_ratio: atm_iv / hv_30d  (>1.3 = expensive, <0.8 = cheap)
         - iv_premium_pts: (atm_iv - hv_30d) * 100 in percentage points
 
-        Uses price_history already fetched — no extra yfinance call.
+        Uses price_history already fetched — no extra yfinance call. With
+        `ticker` the option chain comes from the shared option store.
         ATM IV may be None if market is closed or no liquid options.
         """
         result = {
@@ -1405,7 +1445,8 @@ class FundamentalScorer:
             return result
 
         try:
-            exps = stock.options
+            chains = option_chains(ticker, stock) if ticker else stock
+            exps = chains.options
             if not exps:
                 return result
 
@@ -1424,7 +1465,7 @@ class FundamentalScorer:
             if target_exp is None:
                 target_exp = exps[0]
 
-            chain = stock.option_chain(target_exp)
+            chain = chains.option_chain(target_exp)
             calls = chain.calls
             if calls.empty:
                 return result
@@ -1620,66 +1661,166 @@ class FundamentalScorer:
     def score_batch(
         self,
         tickers: List[str],
-        delay: float = 1.5
+        max_workers: int = BATCH_WORKERS,
+        max_retries: int = BATCH_MAX_RETRIES,
+        retry_delay: float = BATCH_RETRY_DELAY,
+        checkpoint: bool = True,
+        run_id: Optional[str] = None,
     ) -> pd.DataFrame:
         """
-        Score múltiples tickers en batch
+        Score múltiples tickers en batch, con `max_workers` en paralelo
+
+        - Ritmo: cada ticker reserva CALLS_PER_TICKER llamadas del token
+          bucket de yfinance_client antes de empezar, así que todos los
+          workers (y el resto del pipeline) gastan de un único presupuesto.
+          Un 429 frena el bucket para todos — sin pausas globales fijas.
+        - Reintentos por ticker: solo fallos transitorios (rate limit o
+          excepción) se reprograman para dentro de retry_delay × 2^intento,
+          sin bloquear al resto. Un "sin datos" (ticker sin info en Yahoo,
+          score vacío por datos ausentes) es definitivo: no se reintenta.
+        - Checkpoint: cada score bueno se añade a un JSONL en cache_dir. Si
+          la corrida se corta (rate limit, CI cancelado), la siguiente con el
+          mismo run_id y mismo as_of_date retoma desde ahí en vez de re-puntuar
+          todo — aunque medie la medianoche. Se borra al terminar sin fallos.
+          En CI se guarda con actions/cache aunque el job falle y run_id es
+          GITHUB_RUN_ID, común a todos los re-runs del mismo run.
 
         Args:
             tickers: Lista de tickers
-            delay: Delay entre requests
+            max_workers: Tickers puntuándose a la vez
+            max_retries: Reintentos por ticker tras un fallo transitorio
+            retry_delay: Espera base (s) antes del primer reintento
+            checkpoint: Guardar/retomar progreso en disco
+            run_id: Identifica la corrida a retomar. Por defecto GITHUB_RUN_ID;
+                sin él, 'local' (se retoma hasta que una corrida acabe sin fallos)
 
         Returns:
             DataFrame con resultados
         """
+        tickers = list(dict.fromkeys(tickers))
+        max_workers = max(1, max_workers)
         print(f"\n📊 FUNDAMENTAL SCORER - Batch Analysis")
-        print(f"Scoring {len(tickers)} tickers...")
+        print(f"Scoring {len(tickers)} tickers ({max_workers} workers)...")
         print("=" * 80)
 
-        # Initial pause so GitHub Actions runner IP isn't immediately blocked
-        print("⏳ Pausa inicial de 10s para evitar rate limit en batch...")
-        time.sleep(10)
-
-        results = []
-        consecutive_failures = 0
-
-        for i, ticker in enumerate(tickers, 1):
-            print(f"[{i}/{len(tickers)}] {ticker}")
+        run_key = self._checkpoint_run_key(run_id)
+        done: Dict[str, Dict] = {}
+        if checkpoint:
+            done = {t: r for t, r in self._load_checkpoint(run_key).items() if t in tickers}
+            if done:
+                print(f"♻️  Checkpoint: {len(done)} tickers ya puntuados en esta corrida — se retoman")
+
+        # (listo_en, orden, ticker, intento): el orden desempata y mantiene FIFO
+        schedule = [(0.0, i, t, 0) for i, t in enumerate(tickers) if t not in done]
+        heapq.heapify(schedule)
+        failed: Dict[str, Dict] = {}
+        finished = len(done)
+
+        def _score(ticker: str) -> Dict:
+            acquire_rate_budget(CALLS_PER_TICKER)
+            return self.score_ticker(ticker)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            while schedule or running:
+                now = time.monotonic()
+                while schedule and schedule[0][0] <= now and len(running) < max_workers:
+                    _, order, ticker, attempt = heapq.heappop(schedule)
+                    running[pool.submit(_score, ticker)] = (order, ticker, attempt)
+
+                # Pool lleno: solo un ticker que termine libera trabajo. Con
+                # hueco libre, despertar cuando toque el siguiente reintento.
+                if len(running) >= max_workers or not schedule:
+                    timeout = None
+                else:
+                    timeout = max(0.0, schedule[0][0] - now)
+                if not running:
+                    time.sleep(timeout)
+                    continue
+                completed, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in completed:
+                    order, ticker, attempt = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"   ❌ {ticker}: {e}")
+                        result = self._get_empty_result(ticker)
+
+                    if self._is_retryable_result(result) and attempt < max_retries:
+                        wait_s = retry_delay * (2 ** attempt)
+                        print(f"   ⏳ {ticker}: {result['error_reason']} — reintento {attempt + 1}/{max_retries} en {wait_s:.0f}s")
+                        heapq.heappush(schedule, (time.monotonic() + wait_s, order, ticker, attempt + 1))
+                        continue
+
+                    result.pop('error_reason', None)   # solo decide el reintento
+                    finished += 1
+                    print(f"[{finished}/{len(tickers)}] {ticker}")
+                    if self._is_failed_result(result):
+                        failed[ticker] = result
+                    else:
+                        done[ticker] = result
+                        if checkpoint:
+                            self._append_checkpoint(result, run_key)
 
-            result = self.score_ticker(ticker)
-            results.append(result)
+        if checkpoint and not failed:
+            self._checkpoint_path().unlink(missing_ok=True)
 
-            # Track consecutive failures — if all data is missing, back off harder.
-            # El marcador de "sin datos" es ahora fundamental_score vacío (antes
-            # era un 50.0 centinela); sin este cambio el backoff dejaría de
-            # dispararse en la racha de fallos que precisamente debe detectar.
-            is_empty = result.get('fundamental_score') is None
-            if is_empty:
-                consecutive_failures += 1
-            else:
-                consecutive_failures = 0
-
-            if consecutive_failures >= 5:
-                print(f"   ⏳ 5 fallos consecutivos — pausa larga de 30s para recuperar rate limit")
-                time.sleep(30)
-                consecutive_failures = 0
-            elif i < len(tickers):
-                jitter = random.uniform(0, 0.5)
-                time.sleep(delay + jitter)
-
-        # Convertir a DataFrame
+        # Convertir a DataFrame (orden de entrada; luego por score)
+        results = [done.get(t) or failed[t] for t in tickers]
         df = pd.DataFrame(results)
 
         # Ordenar por fundamental_score
         df = df.sort_values('fundamental_score', ascending=False)
 
-        print(f"\n✅ Scoring completado: {len(df)} tickers")
+        print(f"\n✅ Scoring completado: {len(df)} tickers ({len(failed)} sin datos)")
         print(f"   Promedio: {df['fundamental_score'].mean():.1f}/100")
         print(f"   Elite (≥80): {len(df[df['fundamental_score'] >= 80])}")
         print(f"   Excellent (≥70): {len(df[df['fundamental_score'] >= 70])}")
 
         return df
 
+    @staticmethod
+    def _is_failed_result(result: Dict) -> bool:
+        """Sin score o con el resultado de error: no entra al checkpoint"""
+        return result.get('fundamental_score') is None or result.get('tier') == '❌ ERROR'
+
+    @staticmethod
+    def _is_retryable_result(result: Dict) -> bool:
+        """Fallo transitorio (rate limit / excepción): merece reintento"""
+        return result.get('error_reason') in ('rate_limit', 'exception')
+
+    # ── Checkpoint de score_batch ─────────────────────────────────────────
+
+    def _checkpoint_path(self) -> Path:
+        return self.cache_dir / 'score_batch_checkpoint.jsonl'
+
+    def _checkpoint_run_key(self, run_id: Optional[str] = None) -> str:
+        """Un checkpoint solo vale para la misma corrida y el mismo as_of_date.
+        Sin fecha de reloj: una corrida que cruza medianoche sigue siendo la misma"""
+        run_id = run_id or os.environ.get('GITHUB_RUN_ID') or 'local'
+        return f"{run_id}|{self.as_of_date or 'live'}"
+
+    def _load_checkpoint(self, key: str) -> Dict[str, Dict]:
+        path = self._checkpoint_path()
+        if not path.exists():
+            return {}
+        results = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # línea a medias de una corrida cortada
+                if entry.get('run') == key and isinstance(entry.get('result'), dict):
+                    results[entry['result']['ticker']] = entry['result']
+        return results
+
+    def _append_checkpoint(self, result: Dict, key: str) -> None:
+        entry = {'run': key, 'result': self._convert_to_native(result)}
+        with open(self._checkpoint_path(), 'a') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+
     def save_results(self, df: pd.DataFrame, filename: str = 'fundamental_scores'):
         """Guarda resultados en CSV y JSON"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1739,6 +1880,8 @@ def main():
                        help='Score curated universe from curated_tickers.py (Tier 1+2+3, ~90 tickers)')
     parser.add_argument('--curated-all', action='store_true',
                        help='Score full curated universe including Tier 4 (~120 tickers)')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                       help=f'Tickers scored concurrently (default: {BATCH_WORKERS})')
     parser.add_argument('--as-of-date', type=str, default=None,
                        help='Historical date for scoring (YYYY-MM-DD). Only use earnings/financials reported before this date. '
                             'Prevents look-ahead bias in backtesting.')
@@ -1787,7 +1930,7 @@ def main():
         tier_label = 'T1+T2+T3+T4+HF' if include_t4 else 'T1+T2+T3+HF'
         print(f"🎯 Universo curado ({tier_label}): {len(tickers)} tickers")
         print(f"📊 Scoring {len(tickers)} tickers únicos...")
-        results_df = scorer.score_batch(tickers)
+        results_df = scorer.score_batch(tickers, max_workers=args.workers)
         scorer.save_results(results_df)
         print(f"\n{'='*80}")
         print(f"🏆 TOP 10 FUNDAMENTAL SCORES")
@@ -1854,7 +1997,7 @@ def main():
         print(f"\n📊 Scoring {len(tickers)} tickers únicos...")
 
         # Score batch
-        results_df = scorer.score_batch(tickers)
+        results_df = scorer.score_batch(tickers, max_workers=args.workers)
 
         # Guardar
         scorer.save_results(results_df)
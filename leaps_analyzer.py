@@ -41,7 +41,9 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 import yfinance as yf
-from scipy.stats import norm
+
+from options_math import chain_analytics, contract_metrics, greeks
+from yfinance_client import option_chains
 
 DOCS = Path('docs')
 OUTPUT = DOCS / 'leaps_opportunities.json'
@@ -96,45 +98,42 @@ def bs_call_delta(spot: float, strike: float, t_years: float,
     plazo, más se aleja el forward price del spot. Sin este ajuste el delta de
     LEAPS largos sobre dividenderas (bancos, energía) sale sobreestimado.
     """
-    if iv <= 0 or t_years <= 0 or spot <= 0 or strike <= 0:
-        return float('nan')
-    d1 = (math.log(spot / strike) + (rate - div_yield + 0.5 * iv * iv) * t_years) / (iv * math.sqrt(t_years))
-    return float(math.exp(-div_yield * t_years) * norm.cdf(d1))
+    return float(greeks(spot, strike, t_years, rate, iv, div_yield)['delta'])
+
+
+def _round_or_none(value, ndigits: int) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else round(value, ndigits)
+
+
+def _rounded_metrics(delta, m: dict) -> dict:
+    """Redondeo de salida de leaps_metrics (NaN → None)."""
+    return {
+        'delta': _round_or_none(delta, 3),
+        'intrinsic': round(float(m['intrinsic']), 2),
+        'extrinsic': round(float(m['extrinsic']), 2),
+        'extrinsic_pct': _round_or_none(m['extrinsic_pct'], 2),
+        'annual_carry_pct': _round_or_none(m['annual_carry_pct'], 2),
+        'forgone_dividend_pct': round(float(m['forgone_dividend_pct']), 2),
+        'total_annual_cost_pct': _round_or_none(m['total_annual_cost_pct'], 2),
+        'leverage': _round_or_none(m['leverage'], 2),
+        'breakeven': round(float(m['breakeven']), 2),
+        'breakeven_move_pct': _round_or_none(m['breakeven_move_pct'], 2),
+    }
 
 
 def leaps_metrics(spot: float, strike: float, t_years: float, premium: float,
                   iv: float, rate: float = FALLBACK_RF, div_yield: float = 0.0) -> dict:
     """Métricas de un contrato LEAPS call para uso como sustituto de acciones.
 
-    premium = precio medio del contrato (mid bid/ask), por acción.
+    premium = precio medio del contrato (mid bid/ask), por acción. Carry =
+    extrínseco anualizado como % del spot; total_annual_cost_pct le suma el
+    dividendo al que renuncias (la call no lo cobra: en CVX ~4.5% el carry
+    "0.8%/año" son en realidad ~5.3%/año). Leverage = (spot × delta) / prima.
+    La matemática (vectorizada, para cadenas enteras) vive en options_math.
     """
     delta = bs_call_delta(spot, strike, t_years, rate, iv, div_yield)
-    intrinsic = max(spot - strike, 0.0)
-    extrinsic = max(premium - intrinsic, 0.0)
-    extrinsic_pct = extrinsic / spot * 100 if spot > 0 else float('nan')
-    # Carry anualizado: coste temporal por año como % del spot
-    annual_carry_pct = extrinsic_pct / t_years if t_years > 0 else float('nan')
-    # Coste REAL de tener el LEAPS en vez de la acción: al carry hay que
-    # sumarle el dividendo al que renuncias (la call no lo cobra). En
-    # dividenderas (CVX ~4.5%) el carry "0.8%/año" son en realidad ~5.3%/año.
-    total_annual_cost_pct = (annual_carry_pct + div_yield * 100
-                             if not math.isnan(annual_carry_pct) else float('nan'))
-    # Apalancamiento efectivo: exposición controlada / capital invertido
-    leverage = (spot * delta) / premium if premium > 0 else float('nan')
-    breakeven = strike + premium
-    breakeven_move_pct = (breakeven - spot) / spot * 100 if spot > 0 else float('nan')
-    return {
-        'delta': round(delta, 3) if not math.isnan(delta) else None,
-        'intrinsic': round(intrinsic, 2),
-        'extrinsic': round(extrinsic, 2),
-        'extrinsic_pct': round(extrinsic_pct, 2) if not math.isnan(extrinsic_pct) else None,
-        'annual_carry_pct': round(annual_carry_pct, 2) if not math.isnan(annual_carry_pct) else None,
-        'forgone_dividend_pct': round(div_yield * 100, 2),
-        'total_annual_cost_pct': round(total_annual_cost_pct, 2) if not math.isnan(total_annual_cost_pct) else None,
-        'leverage': round(leverage, 2) if not math.isnan(leverage) else None,
-        'breakeven': round(breakeven, 2),
-        'breakeven_move_pct': round(breakeven_move_pct, 2) if not math.isnan(breakeven_move_pct) else None,
-    }
+    return _rounded_metrics(delta, contract_metrics(spot, strike, t_years, premium, delta, div_yield))
 
 
 def score_contract(metrics: dict, open_interest: int, spread_pct: float) -> float:
@@ -584,7 +583,8 @@ def analyze_ticker_leaps(ticker: str, sig: dict, rate: float) -> Optional[dict]:
         if not spot or spot <= 0:
             return None
 
-        all_exp = _fetch_with_retry(lambda: t.options) or []
+        chains = option_chains(ticker, t)
+        all_exp = _fetch_with_retry(lambda: chains.options) or []
         today = date.today()
         leaps_exp = []
         for e in all_exp:
@@ -623,7 +623,7 @@ def analyze_ticker_leaps(ticker: str, sig: dict, rate: float) -> Optional[dict]:
         candidates: list[dict] = []
         for dte, exp in leaps_exp:
             t_years = dte / 365.0
-            chain = _fetch_with_retry(lambda e=exp: t.option_chain(e))
+            chain = _fetch_with_retry(lambda e=exp: chains.option_chain(e))
             if chain is None:
                 continue
             calls = chain.calls
@@ -631,32 +631,31 @@ def analyze_ticker_leaps(ticker: str, sig: dict, rate: float) -> Optional[dict]:
                 continue
             # Deep ITM: strike por debajo del spot, con bid real
             cand = calls[(calls['strike'] < spot) & (calls['strike'] >= spot * 0.55) &
-                         (calls['bid'] > 0)].copy()
-            for _, row in cand.iterrows():
-                strike = float(row['strike'])
-                bid, ask = float(row['bid']), float(row.get('ask', 0) or 0)
-                if ask <= 0:
-                    continue
-                mid = (bid + ask) / 2
-                iv = float(row.get('impliedVolatility', 0) or 0)
-                oi = int(row.get('openInterest', 0) or 0)
-                if iv <= 0 or mid <= 0:
-                    continue
-                m = leaps_metrics(spot, strike, t_years, mid, iv, rate, div_yield)
+                         (calls['bid'] > 0)]
+            if cand.empty:
+                continue
+            # Greeks y métricas de toda la cadena de una vez; el bucle solo
+            # recorre los contratos que pasan los filtros vectorizados.
+            chain_m = chain_analytics(cand, spot, t_years, rate, div_yield)
+            oi_all = chain_m['openInterest'].fillna(0).to_numpy() if 'openInterest' in chain_m else np.zeros(len(chain_m))
+            mid_all = chain_m['mid'].to_numpy()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ret_all = (np.maximum(target - chain_m['strike'].to_numpy(dtype=float), 0.0) - mid_all) / mid_all * 100
+            keep = ((chain_m['iv'] > 0) & (chain_m['mid'] > 0) & (oi_all >= MIN_OPEN_INT)
+                    & (chain_m['spread_pct'] <= MAX_SPREAD_PCT) & (ret_all >= MIN_TARGET_RETURN_PCT))
+            for i in np.flatnonzero(keep.to_numpy()):
+                row = chain_m.iloc[i]
+                m = _rounded_metrics(row['delta'], row)
+                # Banda de delta y carry sobre los valores redondeados (los publicados)
                 if m['delta'] is None or not (DELTA_MIN <= m['delta'] <= DELTA_MAX):
                     continue
-                if oi < MIN_OPEN_INT:
-                    continue
-                spread_pct = (ask - bid) / mid * 100 if mid else 999
-                if spread_pct > MAX_SPREAD_PCT:
-                    continue
                 if m['annual_carry_pct'] is None or m['annual_carry_pct'] > MAX_CARRY_PCT:
                     continue
-                # Rendimiento apalancado en el escenario alcista (target analista)
-                ret_pct = (max(target - strike, 0.0) - mid) / mid * 100
-                if ret_pct < MIN_TARGET_RETURN_PCT:
-                    continue                  # este contrato no compensa ni al target
+                strike, bid, ask = float(row['strike']), float(row['bid']), float(row['ask'])
+                mid, iv, oi = float(row['mid']), float(row['iv']), int(oi_all[i])
+                spread_pct, ret_pct = float(row['spread_pct']), float(ret_all[i])
                 cscore = score_contract(m, oi, spread_pct)
+                volume = row.get('volume', 0)
                 candidates.append({
                     'expiry': exp,
                     'dte': dte,
@@ -668,7 +667,7 @@ def analyze_ticker_leaps(ticker: str, sig: dict, rate: float) -> Optional[dict]:
                     'cost_per_contract': round(mid * 100, 2),   # 1 contrato = 100 acciones
                     'iv_pct': round(iv * 100, 1),
                     'open_interest': oi,
-                    'volume': int(row.get('volume', 0) or 0),
+                    'volume': int(volume) if pd.notna(volume) else 0,
                     'spread_pct': round(spread_pct, 1),
                     # Lo que te cuesta cruzar el spread (entrar al ask, salir
                     # al bid), en $ por contrato — con volumen ~0 este número
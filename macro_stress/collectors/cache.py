@@ -0,0 +1,106 @@
+"""Run-scoped collector cache: each source is fetched and parsed once per run.
+
+Several signals (and several markets in drivers.yml) read the same source:
+every CFTC positioning signal used to download and parse the whole
+deacot.txt again. A `CollectorCache` lives for one radar run and is handed
+to every collector:
+
+- `get(key, loader)` memoizes the parsed result in memory. Concurrent
+  callers of the same key wait for the first one instead of fetching twice
+  (single-flight). Failures (None) are cached too: a dead source is logged
+  once per run, not once per signal.
+- `download(name, fetch)` optionally keeps the raw payload (text) on disk
+  for `ttl_seconds`, so back-to-back runs reuse it. Writes are atomic
+  (tmp + os.replace).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CollectorCache:
+    def __init__(self, disk_dir: Optional[Path] = None, ttl_seconds: float = 0.0):
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.ttl_seconds = float(ttl_seconds)
+        self._values: dict[str, Any] = {}
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0}
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """`loader()` once per key for the lifetime of the cache."""
+        with self._key_lock(key):
+            value = self._values.get(key, _MISSING)
+            if value is not _MISSING:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return value
+            value = loader()
+            self._values[key] = value
+            with self._lock:
+                self.stats["misses"] += 1
+            return value
+
+    # ── Disk layer ───────────────────────────────────────────────────────────
+
+    def _disk_path(self, name: str) -> Optional[Path]:
+        if self.disk_dir is None or self.ttl_seconds <= 0:
+            return None
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name)[:80]
+        digest = hashlib.sha1(name.encode()).hexdigest()[:10]
+        return self.disk_dir / f"{slug}-{digest}.txt"
+
+    def download(self, name: str, fetch: Callable[[], str]) -> str:
+        """Raw payload of `name`: from disk if younger than ttl_seconds,
+        otherwise `fetch()` (and stored). Exceptions from fetch propagate."""
+        path = self._disk_path(name)
+        if path is not None:
+            try:
+                if time.time() - path.stat().st_mtime < self.ttl_seconds:
+                    text = path.read_text(encoding="utf-8")
+                    with self._lock:
+                        self.stats["disk_hits"] += 1
+                    return text
+            except OSError:
+                pass
+        text = fetch()
+        if path is not None:
+            self._write(path, text)
+        return text
+
+    @staticmethod
+    def _write(path: Path, text: str) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".collector-", suffix=".txt")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("Collector cache write failed for %s: %s", path, e)
+
+
+def cached(cache: Optional[CollectorCache], key: str, loader: Callable[[], Any]) -> Any:
+    """`cache.get(key, loader)`, or just `loader()` without a cache."""
+    return cache.get(key, loader) if cache is not None else loader()
+
+
+def download(cache: Optional[CollectorCache], name: str, fetch: Callable[[], str]) -> str:
+    """`cache.download(name, fetch)`, or just `fetch()` without a cache."""
+    return cache.download(name, fetch) if cache is not None else fetch()
@@ -8,6 +8,8 @@ from typing import Optional
 import pandas as pd
 import requests
 
+from macro_stress.collectors.cache import CollectorCache, cached, download
+
 log = logging.getLogger(__name__)
 
 COT_URL = "https://www.cftc.gov/dea/newcot/deacot.txt"
@@ -20,14 +22,23 @@ CONTRACT_ALIASES = {
 }
 
 
-def _parse_cot() -> Optional[pd.DataFrame]:
-    try:
-        resp = requests.get(COT_URL, timeout=20)
-        resp.raise_for_status()
-        return pd.read_csv(io.StringIO(resp.text), engine="python", on_bad_lines="skip")
-    except Exception as e:
-        log.warning("CFTC fetch/parse failed: %s", e)
-        return None
+def _download_cot() -> str:
+    resp = requests.get(COT_URL, timeout=20)
+    resp.raise_for_status()
+    return resp.text
+
+
+def _parse_cot(cache: Optional[CollectorCache] = None) -> Optional[pd.DataFrame]:
+    """The whole deacot.txt as a DataFrame — once per run with a cache."""
+    def _load() -> Optional[pd.DataFrame]:
+        try:
+            text = download(cache, "cftc_deacot.txt", _download_cot)
+            return pd.read_csv(io.StringIO(text), engine="python", on_bad_lines="skip")
+        except Exception as e:
+            log.warning("CFTC fetch/parse failed: %s", e)
+            return None
+
+    return cached(cache, "cftc_cot", _load)
 
 
 def _find_col(columns: list[str], tokens: list[str]) -> Optional[str]:
@@ -38,13 +49,13 @@ def _find_col(columns: list[str], tokens: list[str]) -> Optional[str]:
     return None
 
 
-def fetch(contract: str) -> Optional[dict]:
+def fetch(contract: str, cache: Optional[CollectorCache] = None) -> Optional[dict]:
     aliases = CONTRACT_ALIASES.get(contract)
     if not aliases:
         log.warning("Unknown COT contract alias: %s", contract)
         return None
 
-    df = _parse_cot()
+    df = _parse_cot(cache)
     if df is None or df.empty:
         return None
 
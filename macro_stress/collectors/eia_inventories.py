@@ -4,6 +4,7 @@ Requires env var EIA_API_KEY (free signup at https://www.eia.gov/opendata/).
 """
 from __future__ import annotations
 
+import json
 import logging
 import os
 from typing import Optional
@@ -11,16 +12,23 @@ from typing import Optional
 import pandas as pd
 import requests
 
+from macro_stress.collectors.cache import CollectorCache, cached, download
+
 log = logging.getLogger(__name__)
 
 EIA_BASE = "https://api.eia.gov/v2/seriesid"
 
 
-def fetch(series_id: str, weeks: int = 260) -> Optional[pd.DataFrame]:
+def fetch(series_id: str, weeks: int = 260, cache: Optional[CollectorCache] = None) -> Optional[pd.DataFrame]:
     """Return weekly series with `[date, value, pct_change_vs_5y_avg, zscore_52w]`.
 
     Returns None (never fake data) if the key is missing or the request fails.
+    With a cache the series is requested and computed once per run.
     """
+    return cached(cache, f"eia:{series_id}:{weeks}", lambda: _fetch(series_id, weeks, cache))
+
+
+def _fetch(series_id: str, weeks: int, cache: Optional[CollectorCache]) -> Optional[pd.DataFrame]:
     api_key = os.environ.get("EIA_API_KEY")
     if not api_key:
         log.warning("EIA_API_KEY not set; skipping %s", series_id)
@@ -28,10 +36,15 @@ def fetch(series_id: str, weeks: int = 260) -> Optional[pd.DataFrame]:
 
     url = f"{EIA_BASE}/{series_id}"
     params = {"api_key": api_key, "length": weeks}
-    try:
+
+    def _download() -> str:
         resp = requests.get(url, params=params, timeout=15)
         resp.raise_for_status()
-        payload = resp.json()
+        return resp.text
+
+    try:
+        # The on-disk name never includes the API key
+        payload = json.loads(download(cache, f"eia_{series_id}_{weeks}.json", _download))
     except Exception as e:
         log.warning("EIA fetch failed for %s: %s", series_id, e)
         return None
@@ -7,6 +7,8 @@ from typing import Optional
 import pandas as pd
 import yfinance as yf
 
+from macro_stress.collectors.cache import CollectorCache, cached
+
 log = logging.getLogger(__name__)
 
 
@@ -15,7 +17,12 @@ def _strip_tz(index: pd.Index) -> pd.Index:
     return dt_index.tz_localize(None) if getattr(dt_index, "tz", None) is not None else dt_index
 
 
-def _history_close(ticker: str, period: str = "max") -> Optional[pd.Series]:
+def _history_close(ticker: str, period: str = "max",
+                   cache: Optional[CollectorCache] = None) -> Optional[pd.Series]:
+    return cached(cache, f"curve:{ticker}:{period}", lambda: _download_close(ticker, period))
+
+
+def _download_close(ticker: str, period: str) -> Optional[pd.Series]:
     try:
         hist = yf.Ticker(ticker).history(period=period, interval="1d", auto_adjust=False)
         if hist.empty or "Close" not in hist.columns:
@@ -28,7 +35,7 @@ def _history_close(ticker: str, period: str = "max") -> Optional[pd.Series]:
         return None
 
 
-def fetch(symbols: list[str]) -> Optional[dict]:
+def fetch(symbols: list[str], cache: Optional[CollectorCache] = None) -> Optional[dict]:
     """Return current curve metrics plus a historical spread series.
 
     Positive spread = backwardation = tighter physical market.
@@ -38,8 +45,8 @@ def fetch(symbols: list[str]) -> Optional[dict]:
         return None
 
     front, deferred = symbols[0], symbols[1]
-    front_h = _history_close(front)
-    deferred_h = _history_close(deferred)
+    front_h = _history_close(front, cache=cache)
+    deferred_h = _history_close(deferred, cache=cache)
     if front_h is None or deferred_h is None or front_h.empty or deferred_h.empty:
         return None
 
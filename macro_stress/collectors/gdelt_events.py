@@ -1,11 +1,14 @@
 """GDELT 2.0 DOC API collector — free, no key required."""
 from __future__ import annotations
 
+import json
 import logging
 from typing import Optional
 
 import requests
 
+from macro_stress.collectors.cache import CollectorCache, cached, download
+
 log = logging.getLogger(__name__)
 
 GDELT_URL = "https://api.gdeltproject.org/api/v2/doc/doc"
@@ -28,7 +31,11 @@ def _build_query(regions: list[str], keywords: list[str]) -> str:
     return region_q or kw_q
 
 
-def _fetch_artlist(query: str, timespan: str) -> Optional[list]:
+def _fetch_artlist(query: str, timespan: str, cache: Optional[CollectorCache] = None) -> Optional[list]:
+    return cached(cache, f"gdelt:{timespan}:{query}", lambda: _download_artlist(query, timespan, cache))
+
+
+def _download_artlist(query: str, timespan: str, cache: Optional[CollectorCache]) -> Optional[list]:
     params = {
         "query": query,
         "mode": "ArtList",
@@ -37,11 +44,16 @@ def _fetch_artlist(query: str, timespan: str) -> Optional[list]:
         "timespan": timespan,
         "sort": "DateDesc",
     }
-    try:
+
+    def _download() -> str:
         resp = requests.get(GDELT_URL, params=params, timeout=15)
         resp.raise_for_status()
-        # GDELT sometimes returns HTML on errors; guard JSON decode
-        data = resp.json()
+        # GDELT sometimes returns HTML on errors; guard JSON decode before caching
+        json.loads(resp.text)
+        return resp.text
+
+    try:
+        data = json.loads(download(cache, f"gdelt_{timespan}_{query}", _download))
     except ValueError:
         log.warning("GDELT non-JSON response for query=%s", query[:80])
         return None
@@ -51,14 +63,14 @@ def _fetch_artlist(query: str, timespan: str) -> Optional[list]:
     return data.get("articles", []) or []
 
 
-def fetch(regions: list[str], keywords: list[str]) -> Optional[dict]:
+def fetch(regions: list[str], keywords: list[str], cache: Optional[CollectorCache] = None) -> Optional[dict]:
     """Return `{event_count_24h, tone_avg, escalation_score}` or None on failure."""
     query = _build_query(regions, keywords)
     if not query:
         return None
 
-    recent = _fetch_artlist(query, "1d")
-    baseline = _fetch_artlist(query, "1m")
+    recent = _fetch_artlist(query, "1d", cache)
+    baseline = _fetch_artlist(query, "1m", cache)
     if recent is None or baseline is None:
         return None
 
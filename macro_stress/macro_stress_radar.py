@@ -4,6 +4,8 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -11,6 +13,7 @@ from typing import Any
 import yaml
 
 from macro_stress.collectors import cftc_cot, eia_inventories, futures_curves, gdelt_events
+from macro_stress.collectors.cache import CollectorCache
 from macro_stress.scoring import regime_detector, stress_score
 
 log = logging.getLogger("macro_stress")
@@ -21,28 +24,51 @@ OUTPUT_PATH = DOCS / "macro_stress.json"
 LATEST_PATH = DOCS / "macro_stress" / "latest.json"
 HISTORY_DIR = DOCS / "macro_stress" / "history"
 CONFIG_PATH = Path(__file__).resolve().parent / "drivers.yml"
+# Raw source payloads kept between runs (only with --cache-ttl > 0)
+CACHE_DIR = ROOT / "data" / "cache" / "macro_stress"
 
 COLLECTOR_DISPATCH = {
-    "eia": lambda cfg: eia_inventories.fetch(cfg["endpoint"], weeks=max(int(cfg.get("lookback_periods", 260)) + 52, 260)),
-    "futures_curves": lambda cfg: futures_curves.fetch(cfg["symbols"]),
-    "gdelt": lambda cfg: gdelt_events.fetch(cfg.get("regions", []), cfg.get("event_types", [])),
-    "cftc_cot": lambda cfg: cftc_cot.fetch(cfg["report"]),
+    "eia": lambda cfg, cache: eia_inventories.fetch(
+        cfg["endpoint"], weeks=max(int(cfg.get("lookback_periods", 260)) + 52, 260), cache=cache),
+    "futures_curves": lambda cfg, cache: futures_curves.fetch(cfg["symbols"], cache=cache),
+    "gdelt": lambda cfg, cache: gdelt_events.fetch(cfg.get("regions", []), cfg.get("event_types", []), cache=cache),
+    "cftc_cot": lambda cfg, cache: cftc_cot.fetch(cfg["report"], cache=cache),
 }
 
+# Collectors of one market run concurrently; these sources take one request
+# at a time (GDELT rate-limits bursts from the same IP).
+SOURCE_CONCURRENCY = {"gdelt": 1}
+_SOURCE_SLOTS = {source: threading.BoundedSemaphore(n) for source, n in SOURCE_CONCURRENCY.items()}
+MAX_COLLECTOR_WORKERS = 8
 
-def _run_collector(signal_cfg: dict) -> Any:
+
+def _run_collector(signal_cfg: dict, cache: CollectorCache | None = None) -> Any:
     source = signal_cfg.get("source")
     runner = COLLECTOR_DISPATCH.get(source)
     if not runner:
         log.warning("Unknown source %s for %s", source, signal_cfg.get("label"))
         return None
+    slot = _SOURCE_SLOTS.get(source)
     try:
-        return runner(signal_cfg)
+        if slot is None:
+            return runner(signal_cfg, cache)
+        with slot:
+            return runner(signal_cfg, cache)
     except Exception as e:
         log.warning("Collector %s failed for %s: %s", source, signal_cfg.get("label"), e)
         return None
 
 
+def _collect_signals(signal_cfgs: dict[str, dict], cache: CollectorCache | None) -> dict[str, Any]:
+    """Raw data per signal, collectors in parallel; keeps drivers.yml order."""
+    if not signal_cfgs:
+        return {}
+    workers = min(MAX_COLLECTOR_WORKERS, len(signal_cfgs))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collector") as pool:
+        futures = {name: pool.submit(_run_collector, cfg, cache) for name, cfg in signal_cfgs.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
 def _market_narrative(signals: dict[str, dict]) -> str:
     parts = []
     for name, signal in signals.items():
@@ -72,14 +98,16 @@ def _serialize(obj: Any) -> Any:
     raise TypeError(f"Not JSON serializable: {type(obj)}")
 
 
-def analyze_market(market_id: str, market_cfg: dict) -> dict:
+def analyze_market(market_id: str, market_cfg: dict, cache: CollectorCache | None = None) -> dict:
     log.info("Analyzing market: %s", market_id)
     signal_cfgs = market_cfg.get("signals", {})
+    cache = cache if cache is not None else CollectorCache()
 
-    scored_signals: dict[str, dict] = {}
-    for signal_name, signal_cfg in signal_cfgs.items():
-        raw = _run_collector(signal_cfg)
-        scored_signals[signal_name] = stress_score.score_signal(signal_cfg, raw)
+    raw_signals = _collect_signals(signal_cfgs, cache)
+    scored_signals: dict[str, dict] = {
+        signal_name: stress_score.score_signal(signal_cfg, raw_signals[signal_name])
+        for signal_name, signal_cfg in signal_cfgs.items()
+    }
 
     composed = stress_score.compose(scored_signals, market_cfg.get("score_bands"))
     analogues = regime_detector.find_analogues(
@@ -138,8 +166,11 @@ def _persist(output: dict) -> None:
     log.info("Wrote %s, %s, %s", OUTPUT_PATH, LATEST_PATH, HISTORY_DIR / hist_name)
 
 
-def run(market_filter: str | None = None, dry_run: bool = False) -> dict:
+def run(market_filter: str | None = None, dry_run: bool = False, cache_ttl: float = 0.0) -> dict:
     cfg = load_config()
+    # One cache per run, shared by every market: each source file is fetched
+    # and parsed once (CFTC's deacot.txt serves every positioning signal).
+    cache = CollectorCache(disk_dir=CACHE_DIR, ttl_seconds=cache_ttl)
     markets_cfg = cfg.get("markets", {})
     if market_filter:
         if market_filter not in markets_cfg:
@@ -149,7 +180,7 @@ def run(market_filter: str | None = None, dry_run: bool = False) -> dict:
     results = {}
     highest = None
     for market_id, market_cfg in markets_cfg.items():
-        results[market_id] = analyze_market(market_id, market_cfg)
+        results[market_id] = analyze_market(market_id, market_cfg, cache)
         score = results[market_id].get("stress_score")
         if score is not None and (highest is None or score > highest.get("stress_score", -1)):
             highest = results[market_id]
@@ -166,6 +197,7 @@ def run(market_filter: str | None = None, dry_run: bool = False) -> dict:
         },
     }
 
+    log.info("Collector cache: %s", cache.stats)
     if dry_run:
         print(json.dumps(output, indent=2, default=_serialize))
     else:
@@ -179,13 +211,15 @@ def main() -> None:
     parser.add_argument("--market", help="Run a single market (e.g. crude_oil)")
     parser.add_argument("--dry-run", action="store_true", help="Print instead of writing")
     parser.add_argument("--verbose", "-v", action="store_true")
+    parser.add_argument("--cache-ttl", type=float, default=0.0,
+                        help=f"Reuse raw source payloads younger than N seconds from {CACHE_DIR}")
     args = parser.parse_args()
 
     logging.basicConfig(
         level=logging.DEBUG if args.verbose else logging.INFO,
         format="%(asctime)s %(levelname)s %(name)s: %(message)s",
     )
-    run(market_filter=args.market, dry_run=args.dry_run)
+    run(market_filter=args.market, dry_run=args.dry_run, cache_ttl=args.cache_ttl)
 
 
 if __name__ == "__main__":
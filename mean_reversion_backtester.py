@@ -11,6 +11,7 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 import json
+import event_study
 from mean_reversion_detector import MeanReversionDetector
 
 
@@ -372,195 +373,85 @@ class MeanReversionBacktester:
         if holding_periods is None:
             holding_periods = [7, 14, 30]
 
-        history_dir = Path("docs/history")
-        snapshot_dirs = sorted([d for d in history_dir.iterdir() if d.is_dir()])
-
+        snapshot_dirs = event_study.snapshot_dirs()
         if not snapshot_dirs:
             print("❌ No hay snapshots en docs/history/")
             return {}
 
-        # Recopilar todas las señales históricas
-        all_signals = []
-        for snap_dir in snapshot_dirs:
-            csv = snap_dir / "mean_reversion_opportunities.csv"
-            if not csv.exists():
-                continue
-            try:
-                df = pd.read_csv(csv)
-                df['snapshot_date'] = snap_dir.name  # YYYY-MM-DD
-                all_signals.append(df)
-            except Exception as e:
-                print(f"   ⚠️  Error leyendo {csv}: {e}")
-
-        if not all_signals:
+        # Recopilar todas las señales históricas (una pasada por los snapshots)
+        combined = event_study.load_snapshots("mean_reversion_opportunities.csv")
+        if combined.empty:
             print("❌ No se pudieron cargar snapshots históricos")
             return {}
 
-        combined = pd.concat(all_signals, ignore_index=True)
-        combined['snapshot_date'] = pd.to_datetime(combined['snapshot_date'])
-        combined = combined.sort_values('snapshot_date')
-
         # Filtro de score y estrategia (cargamos TODOS los scores para el tier analysis)
         if strategy_filter:
             combined = combined[combined['strategy'] == strategy_filter]
 
         # Cooldown: para cada ticker, solo la primera aparición en cada ventana de cooldown_days
-        combined = combined.sort_values(['ticker', 'snapshot_date'])
-        filtered_rows = []
-        last_seen: Dict[str, pd.Timestamp] = {}
-        for _, row in combined.iterrows():
-            ticker = row['ticker']
-            date = row['snapshot_date']
-            if ticker not in last_seen or (date - last_seen[ticker]).days >= cooldown_days:
-                filtered_rows.append(row)
-                last_seen[ticker] = date
-        combined = pd.DataFrame(filtered_rows)
+        combined = event_study.apply_cooldown(combined, cooldown_days)
 
         print(f"📁 {len(snapshot_dirs)} snapshots históricos ({snapshot_dirs[0].name} → {snapshot_dirs[-1].name})")
         print(f"📋 {len(combined)} señales únicas después de cooldown ({cooldown_days}d)")
         print(f"🎯 Estrategia: {strategy_filter or 'TODAS'}")
         print()
+        if combined.empty:
+            return {p: [] for p in holding_periods}
 
-        # Descargar régimen de mercado SPY (MA50) para filtro de mercado alcista
-        print("📈 Descargando régimen de mercado (SPY MA50)...")
-        spy_regime: Dict[str, bool] = {}  # fecha → True si SPY > MA50 (mercado alcista)
-        try:
-            start_hist = combined['snapshot_date'].min() - timedelta(days=60)
-            spy_hist = yf.Ticker('SPY').history(
-                start=start_hist.strftime('%Y-%m-%d'),
-                end=datetime.now().strftime('%Y-%m-%d')
-            )
-            if len(spy_hist) >= 50:
-                spy_hist['ma50'] = spy_hist['Close'].rolling(50).mean()
-                for ts, row_spy in spy_hist.iterrows():
-                    date_str = ts.strftime('%Y-%m-%d') if hasattr(ts, 'strftime') else str(ts)[:10]
-                    spy_regime[date_str] = bool(row_spy['Close'] > row_spy['ma50'])
-                print(f"   ✅ Régimen descargado ({len(spy_regime)} días)")
-            else:
-                print("   ⚠️  Sin datos SPY — sin filtro de régimen")
-        except Exception as e:
-            print(f"   ⚠️  Error SPY: {e} — sin filtro de régimen")
-        print()
-
-        # Descargar datos de precio para cada ticker (una sola vez)
+        # Precios de todas las señales + SPY en un solo panel (60 días extra
+        # antes de la primera señal para la MA50 del régimen de mercado)
         print("📥 Descargando datos de precio...")
         tickers_needed = combined['ticker'].unique().tolist()
-        price_cache: Dict[str, pd.DataFrame] = {}
-        for i, ticker in enumerate(tickers_needed):
-            if (i + 1) % 10 == 0:
-                print(f"   {i+1}/{len(tickers_needed)}")
-            try:
-                start = combined[combined['ticker'] == ticker]['snapshot_date'].min() - timedelta(days=1)
-                end = datetime.now()
-                hist = yf.Ticker(ticker).history(start=start.strftime('%Y-%m-%d'),
-                                                  end=end.strftime('%Y-%m-%d'))
-                if len(hist) >= 5:
-                    price_cache[ticker] = hist
-            except Exception:
-                pass
-        print(f"   ✅ {len(price_cache)} tickers con datos\n")
-
-        # Simular trades
-        trades_by_period: Dict[int, List[Dict]] = {p: [] for p in holding_periods}
+        panel = event_study.fetch_prices(
+            [*tickers_needed, event_study.BENCHMARK],
+            start=combined['snapshot_date'].min() - timedelta(days=60),
+        )
+        print(f"   ✅ {len(set(panel.codes) & set(tickers_needed))} tickers con datos\n")
+
+        # Régimen de mercado SPY (MA50) para filtro de mercado alcista
+        regime = event_study.regime_above_ma(panel, event_study.BENCHMARK, 50)
+        if regime.empty:
+            print("   ⚠️  Sin datos SPY — sin filtro de régimen\n")
+
+        # Simular trades: stop fijo 8% bajo la entrada REAL; target del CSV si
+        # está >5% sobre ella, si no +25% (evita stop > entry cuando la señal
+        # usa entry_zone > current_price)
+        trades = event_study.run_event_study(
+            combined, 'reversion_score', holding_periods, cooldown_days=0, panel=panel,
+            target_col='target', stop_pct=0.08, target_pct=0.25, min_target_pct=0.05,
+        )
 
-        for _, signal in combined.iterrows():
-            ticker = signal['ticker']
-            if ticker not in price_cache:
+        trades_by_period: Dict[int, List[Dict]] = {p: [] for p in holding_periods}
+        for period, df in trades.items():
+            if df.empty:
                 continue
-
-            hist = price_cache[ticker]
-            entry_date = signal['snapshot_date']
-            reversion_score = signal['reversion_score']
-            entry_price = signal['current_price']
-            csv_target = signal.get('target', None)
-
-            # Encontrar el índice de entrada en el histórico (strip tz para comparación)
-            idx_naive = hist.index.tz_convert(None).normalize()
-            hist_after = hist[idx_naive >= entry_date.normalize()]
-            if len(hist_after) < 2:
-                continue  # No hay datos suficientes hacia adelante
-
-            # Entrada al precio de cierre del día de detección
-            actual_entry_price = hist_after['Close'].iloc[0]
-
-            # Stop/target RELATIVOS al precio real de entrada para evitar
-            # el problema de stop > entry cuando la señal usa entry_zone > current_price
-            stop = actual_entry_price * 0.92   # stop fijo 8% bajo entrada
-            if csv_target and float(csv_target) > actual_entry_price * 1.05:
-                target = float(csv_target)     # usar target del CSV si está >5% sobre entrada
-            else:
-                target = actual_entry_price * 1.25  # target por defecto +25%
-
-            for period in holding_periods:
-                if len(hist_after) < 2:
-                    continue
-
-                # Ventana de simulación
-                window = hist_after.iloc[:period + 1]
-                if len(window) < 2:
-                    continue
-
-                # Comprobar si alcanzó target o stop dentro del periodo
-                hit_target = False
-                hit_stop = False
-                exit_price = window['Close'].iloc[-1]
-                exit_reason = "HOLDING_PERIOD"
-                holding_days = len(window) - 1
-
-                for j in range(1, len(window)):
-                    high = window['High'].iloc[j]
-                    low = window['Low'].iloc[j]
-                    if low <= stop:
-                        hit_stop = True
-                        exit_price = stop
-                        exit_reason = "STOP_LOSS"
-                        holding_days = j
-                        break
-                    if high >= target:
-                        hit_target = True
-                        exit_price = target
-                        exit_reason = "TARGET"
-                        holding_days = j
-                        break
-
-                pnl_pct = ((exit_price - actual_entry_price) / actual_entry_price) * 100
-
-                # Score tier
-                score = float(reversion_score)
-                if score >= 90:
-                    tier = '90-100'
-                elif score >= 80:
-                    tier = '80-89'
-                elif score >= 70:
-                    tier = '70-79'
-                else:
-                    tier = '60-69'
-
-                date_str = entry_date.strftime('%Y-%m-%d')
-                spy_bullish = spy_regime.get(date_str, None)  # None = sin datos
-
-                trades_by_period[period].append({
-                    'ticker': ticker,
-                    'company_name': signal.get('company_name', ticker),
-                    'strategy': signal.get('strategy', ''),
-                    'reversion_score': score,
-                    'score_tier': tier,
-                    'snapshot_date': date_str,
-                    'entry_price': round(actual_entry_price, 4),
-                    'exit_price': round(exit_price, 4),
-                    'target': round(target, 4),
-                    'stop_loss': round(stop, 4),
-                    'rsi': signal.get('rsi', None),
-                    'drawdown_pct': signal.get('drawdown_pct', None),
-                    'holding_days': holding_days,
-                    'profit_loss_pct': round(pnl_pct, 2),
-                    'hit_target': hit_target,
-                    'hit_stop': hit_stop,
-                    'exit_reason': exit_reason,
-                    'win': pnl_pct > 0,
-                    'sufficient_data': len(hist_after) >= period,
-                    'spy_bullish': spy_bullish,
-                })
+            date_str = df['snapshot_date'].dt.strftime('%Y-%m-%d')
+            spy = regime.reindex(pd.DatetimeIndex(df['snapshot_date'])).to_numpy(dtype=object)
+            out = pd.DataFrame({
+                'ticker': df['ticker'],
+                'company_name': df['company_name'] if 'company_name' in df else df['ticker'],
+                'strategy': df['strategy'] if 'strategy' in df else '',
+                'reversion_score': df['reversion_score'].astype(float),
+                'score_tier': df['score_tier'],
+                'snapshot_date': date_str,
+                'entry_price': df['entry_price'].round(4),
+                'exit_price': df['exit_price'].round(4),
+                'target': df['target'].round(4),
+                'stop_loss': df['stop_loss'].round(4),
+                'rsi': df['rsi'] if 'rsi' in df else None,
+                'drawdown_pct': df['drawdown_pct'] if 'drawdown_pct' in df else None,
+                'holding_days': df['holding_days'],
+                'profit_loss_pct': df['profit_loss_pct'].round(2),
+                'hit_target': df['hit_target'],
+                'hit_stop': df['hit_stop'],
+                'exit_reason': df['exit_reason'],
+                'win': df['profit_loss_pct'] > 0,
+                'sufficient_data': df['sufficient_data'],
+                'spy_bullish': [None if pd.isna(v) else bool(v) for v in spy],
+                'benchmark_return_pct': df['benchmark_return_pct'].round(2),
+                'alpha_pct': df['alpha_pct'].round(2),
+            })
+            trades_by_period[period] = out.to_dict('records')
 
         return trades_by_period
 
@@ -609,7 +500,10 @@ class MeanReversionBacktester:
                 t_wins = (tier_df['win'] == True).sum()
                 t_wr = t_wins / len(tier_df) * 100
                 t_avg = tier_df['profit_loss_pct'].mean()
-                print(f"    [{tier}] n={len(tier_df):2d}  WR={t_wr:.0f}%  avg={t_avg:+.1f}%")
+                line = f"    [{tier}] n={len(tier_df):2d}  WR={t_wr:.0f}%  avg={t_avg:+.1f}%"
+                if 'alpha_pct' in tier_df and tier_df['alpha_pct'].notna().any():
+                    line += f"  alpha={tier_df['alpha_pct'].mean():+.1f}%"
+                print(line)
 
             # Breakdown por régimen de mercado SPY MA50
             if 'spy_bullish' in df_use.columns and df_use['spy_bullish'].notna().any():
@@ -679,13 +573,13 @@ class MeanReversionBacktester:
             total = len(df_use)
             wins = int((df_use['win'] == True).sum())
             tiers = {}
-            for tier in df_use['score_tier'].unique():
-                td = df_use[df_use['score_tier'] == tier]
+            for tier, st in event_study.tier_stats(df_use).iterrows():
                 tiers[tier] = {
-                    'n': len(td),
-                    'win_rate': round(float((td['win'] == True).sum()) / len(td) * 100, 1),
-                    'avg_return': round(float(td['profit_loss_pct'].mean()), 2),
-                    'median_return': round(float(td['profit_loss_pct'].median()), 2),
+                    'n': int(st['n']),
+                    'win_rate': round(float(st['win_rate']), 1),
+                    'avg_return': round(float(st['avg_return']), 2),
+                    'median_return': round(float(st['median_return']), 2),
+                    'avg_alpha': None if pd.isna(st['avg_alpha']) else round(float(st['avg_alpha']), 2),
                 }
             summary['periods'][str(period)] = {
                 'total_trades': total,
@@ -613,14 +613,13 @@ class MeanReversionDetector:
         - Tendencia mayor alcista (SMA50 > SMA200)
         """
         try:
-            stock = yf.Ticker(ticker)
-
+            from yfinance_client import get_history, YFClientError
             end_date = datetime.now()
             start_date = end_date - timedelta(days=self.lookback_days)
-            hist = stock.history(start=start_date, end=end_date)
-
-            if len(hist) < 100:
-                return None
+            try:
+                hist = get_history(ticker, start=start_date, end=end_date, min_rows=100)
+            except YFClientError:
+                return None  # sin datos o rate-limited — no es problema del ticker
 
             current_price = hist['Close'].iloc[-1]
 
@@ -794,8 +793,8 @@ class MeanReversionDetector:
                 opportunities.append(setup)
                 print(f"   {icono} {ticker}: {nombre} ({setup['reversion_score']:.0f}/100)")
 
-            import time
-            time.sleep(0.5)
+            # Sin sleep: get_history ya gasta del token bucket compartido de
+            # yfinance_client, que frena solo cuando Yahoo devuelve 429.
 
         # Sort by score
         opportunities.sort(key=lambda x: x['reversion_score'], reverse=True)
@@ -8,12 +8,12 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
-import yfinance as yf
 from typing import Dict, List, Optional
 import json
-import time
 import argparse
 
+from yfinance_client import get_history, get_history_batch, DataNotFoundError
+
 
 class MLScorer:
     """
@@ -43,35 +43,34 @@ class MLScorer:
         if as_of_date:
             print(f"📅 ML Scorer: Historical mode (as_of_date={as_of_date})")
 
-    def calculate_features(self, ticker: str) -> Dict:
+    def _history_kwargs(self) -> Dict:
+        """Ventana de historial para get_history / get_history_batch"""
+        # 🔴 FIX LOOK-AHEAD BIAS: Use date range instead of period
+        if self.as_of_date:
+            # Historical mode: fetch data up to as_of_date
+            end_date = datetime.strptime(self.as_of_date, '%Y-%m-%d')
+            start_date = end_date - timedelta(days=180)  # 6 months lookback
+            return {
+                'start': start_date.strftime('%Y-%m-%d'),
+                'end': end_date.strftime('%Y-%m-%d'),
+                'min_rows': 50,
+            }
+        # Current mode: use standard period
+        return {'period': "6mo", 'min_rows': 50}
+
+    def calculate_features(self, ticker: str, df: Optional[pd.DataFrame] = None) -> Dict:
         """Calcula features técnicos para un ticker
 
         Args:
             ticker: Stock ticker symbol
+            df: Historial ya descargado (score_batch); si es None se descarga
 
         Returns:
             Dictionary with calculated features, or None if data insufficient
         """
         try:
-            stock = yf.Ticker(ticker)
-
-            # 🔴 FIX LOOK-AHEAD BIAS: Use date range instead of period
-            if self.as_of_date:
-                # Historical mode: fetch data up to as_of_date
-                end_date = datetime.strptime(self.as_of_date, '%Y-%m-%d')
-                start_date = end_date - timedelta(days=180)  # 6 months lookback
-
-                df = stock.history(
-                    start=start_date.strftime('%Y-%m-%d'),
-                    end=end_date.strftime('%Y-%m-%d'),
-                    interval='1d'
-                )
-            else:
-                # Current mode: use standard period
-                df = stock.history(period="6mo")
-
-            if len(df) < 50:
-                return None
+            if df is None:
+                df = get_history(ticker, **self._history_kwargs())
 
             features = {}
 
@@ -155,6 +154,8 @@ class MLScorer:
 
             return features
 
+        except DataNotFoundError:
+            return None
         except Exception as e:
             print(f"   ⚠️  Error calculando features de {ticker}: {e}")
             return None
@@ -168,9 +169,10 @@ class MLScorer:
 
         return round(score, 1)
 
-    def score_ticker(self, ticker: str, company_name: str = None) -> Dict:
+    def score_ticker(self, ticker: str, company_name: str = None,
+                     df: Optional[pd.DataFrame] = None) -> Dict:
         """Calcula ML score para un ticker"""
-        features = self.calculate_features(ticker)
+        features = self.calculate_features(ticker, df)
 
         if features is None:
             return None
@@ -206,20 +208,27 @@ class MLScorer:
         """Calcula scores para múltiples tickers"""
         print(f"🤖 Scoring ML para {len(tickers)} tickers...")
 
+        # Historial de todos en tandas concurrentes; los que fallan (sin datos
+        # o rate-limited) simplemente no puntúan, igual que antes.
+        histories, errors = get_history_batch(tickers, **self._history_kwargs())
+        if errors:
+            print(f"   ⚠️  {len(errors)} tickers sin historial suficiente")
+
         results = []
 
         for i, ticker in enumerate(tickers):
             if i % 25 == 0:
                 print(f"   Progreso: {i}/{len(tickers)}")
 
+            if ticker not in histories:
+                continue
+
             company = company_names.get(ticker) if company_names else None
-            score = self.score_ticker(ticker, company)
+            score = self.score_ticker(ticker, company, histories[ticker])
 
             if score:
                 results.append(score)
 
-            time.sleep(0.5)
-
         results.sort(key=lambda x: x['ml_score'], reverse=True)
 
         print(f"✅ Scoring completado: {len(results)} tickers")
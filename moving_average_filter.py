@@ -17,13 +17,14 @@ Filters out:
 - Stocks with downtrending 200 MA (structural weakness)
 - Stocks not in stage 2 uptrend
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 from datetime import datetime
 from pathlib import Path
 
+from yfinance_client import get_history, DataNotFoundError
+
 
 class MovingAverageFilter:
     """Filtra stocks usando Minervini Trend Template"""
@@ -32,13 +33,16 @@ class MovingAverageFilter:
         self.cache_dir = Path('cache/ma_filter')
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def check_stock(self, ticker: str, verbose: bool = False) -> Dict:
+    def check_stock(self, ticker: str, verbose: bool = False,
+                    hist: Optional[pd.DataFrame] = None) -> Dict:
         """
         Verifica si un stock cumple el Minervini Trend Template
 
         Args:
             ticker: Symbol del stock
             verbose: Si imprimir detalles
+            hist: Historial diario ya descargado (≥1y). Si es None se pide
+                  a yfinance_client; un DataFrame vacío = sin datos
 
         Returns:
             Dict con:
@@ -52,8 +56,11 @@ class MovingAverageFilter:
 
         try:
             # Get data
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period='1y')
+            if hist is None:
+                try:
+                    hist = get_history(ticker, period='1y')
+                except DataNotFoundError:
+                    hist = pd.DataFrame()
 
             if hist.empty or len(hist) < 200:
                 return {
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Option store — snapshots en disco de cadenas de opciones, uno por
+(ticker, día, vencimiento).
+
+Soluciona:
+  - options_flow_detector, unusual_flow_scanner, leaps_analyzer,
+    earnings_options_snapshot y fundamental_scorer pedían cada uno
+    yf.Ticker(t).options y option_chain(exp) para tickers que se solapan:
+    la misma cadena se descargaba varias veces por run (earnings_options_
+    snapshot incluso dos veces seguidas: straddle y skew).
+  - Sin histórico de cadenas no había forma de ver el cambio de open
+    interest / volumen de un día a otro sin volver a pedirlas.
+
+Diseño:
+  - {root}/{TICKER}/{YYYY-MM-DD}/{vencimiento}.npz con calls y puts en
+    formato columnar: un array por columna con su dtype nativo (fechas en
+    int64 ns UTC, textos como str) → sin pickle ni dependencias nuevas.
+    _expirations.npz guarda la lista de vencimientos del día.
+  - fetched_at (epoch) en cada fichero → frescura con TTL, igual que
+    price_store. El día del snapshot es el de la descarga.
+  - Escritura atómica (tmp + os.replace): varios procesos/threads pueden
+    escribir el mismo ticker sin dejar ficheros a medias.
+  - Al abrir un día nuevo de un ticker se conservan solo sus keep_days
+    días más recientes: el store no crece sin límite.
+  - activity_diff(): cambio de OI y volumen por contrato entre dos días
+    (options_flow_detector lo publica como oi_change_calls/puts). Necesita
+    el día anterior en disco: en CI data/cache/options se restaura con
+    actions/cache (daily-analysis.yml), igual que el price store.
+
+Este módulo NO habla con Yahoo: la orquestación (servir del store o
+descargar) vive en yfinance_client.option_chains.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = Path('data/cache/options')
+
+# Mismo margen que price_store: un run completo del pipeline dura <6h.
+DEFAULT_TTL_HOURS = 6.0
+
+# Días de snapshots que se conservan por ticker (diffs día a día y semanales).
+DEFAULT_KEEP_DAYS = 30
+
+_EXPIRATIONS = '_expirations'
+_SIDES = ('calls', 'puts')
+
+
+@dataclass
+class ChainSnapshot:
+    """Calls y puts de un vencimiento + momento de la descarga."""
+    calls: pd.DataFrame
+    puts: pd.DataFrame
+    fetched_at: float            # epoch seconds
+
+    def is_fresh(self, ttl_seconds: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return (now - self.fetched_at) < ttl_seconds
+
+
+# ── Codificación columnar ─────────────────────────────────────────────────────
+
+def _encode(frame: pd.DataFrame, prefix: str) -> dict[str, np.ndarray]:
+    """Un array por columna. kinds: num | bool | dt | dtutc | str."""
+    arrays, names, kinds = {}, [], []
+    for i, col in enumerate(frame.columns):
+        s = frame[col]
+        if isinstance(s.dtype, pd.DatetimeTZDtype):
+            values, kind = s.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy('datetime64[ns]').view('int64'), 'dtutc'
+        elif pd.api.types.is_datetime64_dtype(s.dtype):
+            values, kind = s.to_numpy('datetime64[ns]').view('int64'), 'dt'
+        elif pd.api.types.is_bool_dtype(s.dtype):
+            values, kind = s.to_numpy(dtype=bool), 'bool'
+        elif pd.api.types.is_numeric_dtype(s.dtype):
+            values, kind = s.to_numpy(), 'num'
+        else:
+            values, kind = s.map(lambda v: '' if v is None or v != v else str(v)).to_numpy(dtype=str), 'str'
+        arrays[f'{prefix}{i}'] = values
+        names.append(str(col))
+        kinds.append(kind)
+    arrays[f'{prefix}names'] = np.array(names, dtype=str)
+    arrays[f'{prefix}kinds'] = np.array(kinds, dtype=str)
+    arrays[f'{prefix}rows'] = np.array(len(frame))
+    return arrays
+
+
+def _decode(z, prefix: str) -> pd.DataFrame:
+    data = {}
+    for i, (name, kind) in enumerate(zip(z[f'{prefix}names'], z[f'{prefix}kinds'])):
+        values = z[f'{prefix}{i}']
+        if kind in ('dt', 'dtutc'):
+            values = pd.to_datetime(values.view('datetime64[ns]'))
+            if kind == 'dtutc':
+                values = values.tz_localize('UTC')
+        elif kind == 'str':
+            values = np.array([v if v else None for v in values.tolist()], dtype=object)
+        data[str(name)] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(int(z[f'{prefix}rows'])))
+
+
+def _save_npz(path: Path, arrays: dict) -> bool:
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        return False
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class OptionStore:
+    """
+    Snapshots de cadenas de opciones: {root}/{TICKER}/{día}/{vencimiento}.npz
+
+    Uso (lo hace yfinance_client.option_chains, no los scripts):
+        store = OptionStore()
+        snap = store.read_chain('AAPL', '2026-11-20')
+        if snap and snap.is_fresh(store.ttl_seconds):
+            calls, puts = snap.calls, snap.puts
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_ROOT,
+                 ttl_hours: float = DEFAULT_TTL_HOURS,
+                 keep_days: int = DEFAULT_KEEP_DAYS):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_hours * 3600
+        self.keep_days = keep_days
+
+    def _ticker_dir(self, ticker: str) -> Path:
+        safe = ticker.upper().replace(os.sep, '_').replace('/', '_')
+        return self.root / safe
+
+    def path(self, ticker: str, expiry: str, day: Optional[str] = None) -> Path:
+        day = day or date.today().isoformat()
+        return self._ticker_dir(ticker) / day / f'{expiry}.npz'
+
+    def days(self, ticker: str) -> list[str]:
+        """Días con snapshot del ticker, de más viejo a más nuevo."""
+        d = self._ticker_dir(ticker)
+        return sorted(p.name for p in d.iterdir() if p.is_dir()) if d.is_dir() else []
+
+    def _read(self, path: Path):
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                return {k: z[k] for k in z.files}
+        except (OSError, KeyError, ValueError, TypeError, EOFError):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    # vencimientos
+    def read_expirations(self, ticker: str, day: Optional[str] = None
+                         ) -> Optional[tuple[tuple[str, ...], float]]:
+        z = self._read(self.path(ticker, _EXPIRATIONS, day))
+        if z is None:
+            return None
+        return tuple(str(e) for e in z['expirations']), float(z['fetched_at'])
+
+    def write_expirations(self, ticker: str, expirations, fetched_at: Optional[float] = None,
+                          day: Optional[str] = None) -> bool:
+        path = self.path(ticker, _EXPIRATIONS, day)
+        new_day = not path.parent.exists()
+        ok = _save_npz(path, {
+            'expirations': np.array([str(e) for e in expirations], dtype=str),
+            'fetched_at': np.array(time.time() if fetched_at is None else fetched_at),
+        })
+        if ok and new_day:
+            self.prune(ticker)
+        return ok
+
+    # cadenas
+    def read_chain(self, ticker: str, expiry: str, day: Optional[str] = None) -> Optional[ChainSnapshot]:
+        """Snapshot guardado o None (no existe / corrupto → se re-descarga)."""
+        z = self._read(self.path(ticker, expiry, day))
+        if z is None:
+            return None
+        try:
+            return ChainSnapshot(calls=_decode(z, 'calls/'), puts=_decode(z, 'puts/'),
+                                 fetched_at=float(z['fetched_at']))
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    def write_chain(self, ticker: str, expiry: str, snap: ChainSnapshot,
+                    day: Optional[str] = None) -> bool:
+        arrays = {'fetched_at': np.array(snap.fetched_at)}
+        for side in _SIDES:
+            frame = getattr(snap, side)
+            arrays.update(_encode(frame if frame is not None else pd.DataFrame(), f'{side}/'))
+        return _save_npz(self.path(ticker, expiry, day), arrays)
+
+    # histórico
+    def activity_diff(self, ticker: str, expiry: str, day: Optional[str] = None,
+                      prev_day: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Cambio por contrato entre el snapshot de `day` (hoy por defecto) y el
+        de `prev_day` (por defecto el último día anterior con ese vencimiento).
+
+        Columnas: contractSymbol, side, strike, openInterest, prev_openInterest,
+        oi_change, volume, prev_volume, volume_change. Los contratos nuevos
+        tienen prev_* NaN. None si falta alguno de los dos snapshots.
+        """
+        day = day or date.today().isoformat()
+        if prev_day is None:
+            earlier = [d for d in self.days(ticker) if d < day
+                       and self.path(ticker, expiry, d).exists()]
+            if not earlier:
+                return None
+            prev_day = earlier[-1]
+        cur, prev = self.read_chain(ticker, expiry, day), self.read_chain(ticker, expiry, prev_day)
+        if cur is None or prev is None:
+            return None
+        cols = ['contractSymbol', 'strike', 'openInterest', 'volume']
+
+        def _flat(snap: ChainSnapshot) -> pd.DataFrame:
+            parts = []
+            for side in _SIDES:
+                frame = getattr(snap, side)
+                if frame.empty or 'contractSymbol' not in frame:
+                    continue
+                part = frame.reindex(columns=cols).copy()
+                part['side'] = side[:-1].upper()
+                parts.append(part)
+            return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=cols + ['side'])
+
+        now, before = _flat(cur), _flat(prev)
+        out = now.merge(before[['contractSymbol', 'openInterest', 'volume']].rename(
+            columns={'openInterest': 'prev_openInterest', 'volume': 'prev_volume'}),
+            on='contractSymbol', how='left')
+        out['oi_change'] = out['openInterest'] - out['prev_openInterest']
+        out['volume_change'] = out['volume'] - out['prev_volume']
+        return out[['contractSymbol', 'side', 'strike', 'openInterest', 'prev_openInterest',
+                    'oi_change', 'volume', 'prev_volume', 'volume_change']]
+
+    # mantenimiento
+    def prune(self, ticker: str, keep_days: Optional[int] = None) -> int:
+        """Borra los días del ticker más allá de los keep_days más recientes."""
+        keep = self.keep_days if keep_days is None else keep_days
+        old = self.days(ticker)[:-keep] if keep > 0 else self.days(ticker)
+        for d in old:
+            shutil.rmtree(self._ticker_dir(ticker) / d, ignore_errors=True)
+        return len(old)
+
+    def clear(self) -> int:
+        """Borra todo el store. Devuelve nº de ficheros eliminados."""
+        n = 0
+        for p in self.root.glob('*/*/*.npz'):
+            try:
+                p.unlink()
+                n += 1
+            except OSError:
+                pass
+        return n
@@ -18,12 +18,21 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 import json
 
+from options_math import flow_columns
+from scan_executor import DEFAULT_SCAN_DEADLINE, DEFAULT_TICKER_TIMEOUT, run_scan
+from yfinance_client import acquire_rate_budget, option_activity_diff, option_chains
+
+# scan_tickers: threads concurrentes. El ritmo contra Yahoo lo marca el token
+# bucket compartido de yfinance_client, no un sleep por ticker.
+SCAN_WORKERS = 6
+
 
 class OptionsFlowDetector:
     """Detector de flujo institucional de opciones"""
 
     def __init__(self):
         self.results = []
+        self.scan_report = None
         self.min_volume = 100  # Volumen mínimo para considerar
         self.min_premium = 10000  # Premium mínimo ($10k) para bloques
 
@@ -35,7 +44,7 @@ class OptionsFlowDetector:
             Tuple de (calls DataFrame, puts DataFrame, expiration_date str)
         """
         try:
-            stock = yf.Ticker(ticker)
+            stock = option_chains(ticker, yf.Ticker(ticker))
 
             # Get available expiration dates
             expirations = stock.options
@@ -58,6 +67,52 @@ class OptionsFlowDetector:
             print(f"   ⚠️  Error obteniendo opciones de {ticker}: {e}")
             return None, None, None
 
+    def _unusual_contracts(self, chain: pd.DataFrame, current_price: float, kind: str) -> List[Dict]:
+        """
+        Contratos con actividad inusual de una cadena (calls o puts), de una vez:
+        volumen >= min_volume, volumen/OI > 3 (sin OI cuenta el volumen) y
+        premium (volumen × último precio × 100) >= min_premium.
+        """
+        if chain is None or len(chain) == 0:
+            return []
+        flow = flow_columns(chain, spot=current_price, kind=kind)
+        volume = pd.to_numeric(chain['volume'], errors='coerce') if 'volume' in chain else pd.Series(np.nan, chain.index)
+        ratio = flow['vol_oi_ratio'].where(flow['vol_oi_ratio'].notna(), volume)
+        unusual = ((volume >= self.min_volume) & (ratio > 3) &
+                   (flow['premium_usd'] >= self.min_premium)).to_numpy()
+
+        def _values(col, default=0):
+            return chain[col].to_numpy() if col in chain else np.full(len(chain), default)
+
+        strike, oi, last, iv = (_values(c) for c in ('strike', 'openInterest', 'lastPrice', 'impliedVolatility'))
+        return [{
+            'type': kind,
+            'strike': strike[i],
+            'volume': volume.iloc[i],
+            'oi': oi[i],
+            'vol_oi_ratio': ratio.iloc[i],
+            'last_price': last[i],
+            'premium': flow['premium_usd'].iloc[i],
+            'itm': flow['itm'].iloc[i],
+            'implied_volatility': iv[i],
+        } for i in np.flatnonzero(unusual)]
+
+    def _oi_change(self, ticker: str, expiration_date: str) -> Dict:
+        """
+        Cambio de open interest por lado contra el snapshot anterior de la
+        misma expiración (option store, sin re-descargar). None sin histórico.
+        """
+        out = {'oi_change_calls': None, 'oi_change_puts': None}
+        diff = option_activity_diff(ticker, expiration_date)
+        if diff is None or diff.empty:
+            return out
+        by_side = diff.groupby('side')['oi_change'].sum(min_count=1)
+        for side, key in (('CALL', 'oi_change_calls'), ('PUT', 'oi_change_puts')):
+            value = by_side.get(side)
+            if value is not None and pd.notna(value):
+                out[key] = int(value)
+        return out
+
     def detect_unusual_activity(self, ticker: str,
                                company_name: str = None) -> Dict:
         """
@@ -79,87 +134,19 @@ class OptionsFlowDetector:
                 return None
 
             stock = yf.Ticker(ticker)
+            acquire_rate_budget()
             current_price = stock.info.get('currentPrice', 0)
 
             if current_price == 0:
                 # Fallback to fast_info
                 try:
+                    acquire_rate_budget()
                     current_price = stock.fast_info.get('lastPrice', 0)
                 except:
                     return None
 
-            unusual_calls = []
-            unusual_puts = []
-
-            # Analyze calls
-            if len(calls) > 0:
-                for _, row in calls.iterrows():
-                    volume = row.get('volume', 0)
-                    oi = row.get('openInterest', 0)
-                    last_price = row.get('lastPrice', 0)
-                    strike = row.get('strike', 0)
-
-                    if volume is None or volume == 0:
-                        continue
-
-                    # Calculate metrics
-                    vol_oi_ratio = volume / oi if oi > 0 else volume
-                    premium = volume * last_price * 100  # Each contract = 100 shares
-                    itm = strike < current_price  # In The Money
-
-                    # Unusual activity criteria
-                    is_unusual = (
-                        volume >= self.min_volume and
-                        vol_oi_ratio > 3 and  # Volume is 3x+ open interest
-                        premium >= self.min_premium
-                    )
-
-                    if is_unusual:
-                        unusual_calls.append({
-                            'type': 'CALL',
-                            'strike': strike,
-                            'volume': volume,
-                            'oi': oi,
-                            'vol_oi_ratio': vol_oi_ratio,
-                            'last_price': last_price,
-                            'premium': premium,
-                            'itm': itm,
-                            'implied_volatility': row.get('impliedVolatility', 0)
-                        })
-
-            # Analyze puts
-            if len(puts) > 0:
-                for _, row in puts.iterrows():
-                    volume = row.get('volume', 0)
-                    oi = row.get('openInterest', 0)
-                    last_price = row.get('lastPrice', 0)
-                    strike = row.get('strike', 0)
-
-                    if volume is None or volume == 0:
-                        continue
-
-                    vol_oi_ratio = volume / oi if oi > 0 else volume
-                    premium = volume * last_price * 100
-                    itm = strike > current_price
-
-                    is_unusual = (
-                        volume >= self.min_volume and
-                        vol_oi_ratio > 3 and
-                        premium >= self.min_premium
-                    )
-
-                    if is_unusual:
-                        unusual_puts.append({
-                            'type': 'PUT',
-                            'strike': strike,
-                            'volume': volume,
-                            'oi': oi,
-                            'vol_oi_ratio': vol_oi_ratio,
-                            'last_price': last_price,
-                            'premium': premium,
-                            'itm': itm,
-                            'implied_volatility': row.get('impliedVolatility', 0)
-                        })
+            unusual_calls = self._unusual_contracts(calls, current_price, 'CALL')
+            unusual_puts = self._unusual_contracts(puts, current_price, 'PUT')
 
             # If no unusual activity found
             if len(unusual_calls) == 0 and len(unusual_puts) == 0:
@@ -241,6 +228,7 @@ class OptionsFlowDetector:
                 'quality': self._get_quality_label(score),
                 'top_calls': sorted(unusual_calls, key=lambda x: x['premium'], reverse=True)[:3],
                 'top_puts': sorted(unusual_puts, key=lambda x: x['premium'], reverse=True)[:3],
+                **self._oi_change(ticker, expiration_date),
                 'detected_date': datetime.now().strftime('%Y-%m-%d')
             }
 
@@ -260,42 +248,43 @@ class OptionsFlowDetector:
             return "MODERATE"
 
     def scan_tickers(self, tickers: List[str],
-                    company_names: Dict[str, str] = None) -> List[Dict]:
+                    company_names: Dict[str, str] = None,
+                    max_workers: int = SCAN_WORKERS,
+                    ticker_timeout: float = DEFAULT_TICKER_TIMEOUT,
+                    deadline: float = DEFAULT_SCAN_DEADLINE) -> List[Dict]:
         """
         Escanea lista de tickers buscando flujo inusual de opciones
 
         Args:
             tickers: Lista de símbolos a analizar
             company_names: Dict opcional {ticker: company_name}
+            max_workers: Threads concurrentes (scan_executor.run_scan)
+            ticker_timeout: Segundos por ticker antes de abandonarlo
+            deadline: Segundos para el scan completo (cancela la cola)
 
         Returns:
             Lista de alertas de flujo detectadas
         """
         print(f"📊 Options Flow Detector")
-        print(f"   Escaneando {len(tickers)} tickers...")
+        print(f"   Escaneando {len(tickers)} tickers (threads={max_workers})...")
         print()
 
-        flows = []
-
-        for i, ticker in enumerate(tickers, 1):
-            if i % 25 == 0:
-                print(f"   Progreso: {i}/{len(tickers)}")
-
-            company = company_names.get(ticker) if company_names else None
-
-            flow = self.detect_unusual_activity(ticker, company)
+        names = company_names or {}
 
-            if flow:
-                flows.append(flow)
-                print(f"   🔥 {ticker}: {flow['sentiment']} - ${flow['total_premium']/1000:.0f}K premium ({flow['flow_score']:.0f}/100)")
+        def _print_flow(ticker: str, flow: Dict) -> None:
+            print(f"   🔥 {ticker}: {flow['sentiment']} - ${flow['total_premium']/1000:.0f}K premium ({flow['flow_score']:.0f}/100)")
 
-            import time
-            time.sleep(0.5)
+        found, self.scan_report = run_scan(
+            lambda t: self.detect_unusual_activity(t, names.get(t)), tickers,
+            label='options_flow', max_workers=max_workers,
+            ticker_timeout=ticker_timeout, deadline=deadline, on_result=_print_flow)
+        flows = list(found.values())
 
         # Sort by flow score
         flows.sort(key=lambda x: x['flow_score'], reverse=True)
 
         print()
+        print(self.scan_report.format())
         print(f"✅ Scan completado: {len(flows)} flujos inusuales detectados")
 
         self.results = flows
@@ -363,6 +352,7 @@ class OptionsFlowDetector:
                 'neutral': len([r for r in self.results if r['sentiment'] == 'NEUTRAL'])
             },
             'total_premium': sum(r['total_premium'] for r in self.results),
+            'scan_stats': self.scan_report.summary() if self.scan_report else None,
             'flows': json_safe_results
         }
 
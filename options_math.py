@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+OPTIONS MATH — Black-Scholes vectorizado para cadenas de opciones completas
+
+Soluciona:
+  - leaps_analyzer evaluaba bs_call_delta / leaps_metrics contrato a contrato
+    (math.log + norm.cdf dentro de un iterrows por cada call deep-ITM de cada
+    vencimiento) y los scanners de flujo calculaban prima y ratios fila a fila.
+
+Diseño:
+  - Todas las funciones aceptan escalares o arrays (se hace broadcast) y
+    devuelven arrays; entradas inválidas (spot, strike, t o iv ≤ 0) → NaN.
+  - greeks(): delta, gamma, vega (por punto de vol, 0.01) y theta (por día
+    natural) de calls o puts con dividendo continuo.
+  - implied_vol(): Newton vectorizado con bisección de respaldo dentro de
+    [IV_MIN, IV_MAX] (la horquilla se estrecha en cada iteración, así que
+    converge aunque Newton se salga o la vega sea ~0).
+  - contract_metrics(): intrínseco, extrínseco, carry anualizado, coste total
+    con el dividendo al que se renuncia, leverage y break-even.
+  - chain_analytics(): una cadena (DataFrame de yfinance) → mismas columnas
+    más mid, spread y greeks, de una vez.
+  - flow_columns(): prima en $ y volumen/OI para los scanners de flujo.
+
+leaps_analyzer.bs_call_delta y leaps_metrics se apoyan en este módulo.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+IV_MIN = 1e-4
+IV_MAX = 5.0
+CONTRACT_SIZE = 100          # acciones por contrato
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def _arrays(*values) -> list[np.ndarray]:
+    return np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in values))
+
+
+def _pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _is_call(kind) -> np.ndarray:
+    return np.isin(np.char.lower(np.asarray(kind).astype(str)), ('call', 'c'))
+
+
+def _d1_d2(spot, strike, t_years, rate, iv, div_yield):
+    spot, strike, t_years, rate, iv, div_yield = _arrays(spot, strike, t_years, rate, iv, div_yield)
+    valid = (iv > 0) & (t_years > 0) & (spot > 0) & (strike > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_t = iv * np.sqrt(t_years)
+        d1 = (np.log(spot / strike) + (rate - div_yield + 0.5 * iv * iv) * t_years) / vol_t
+    d1 = np.where(valid, d1, np.nan)
+    return d1, d1 - vol_t, spot, strike, t_years, rate, iv, div_yield
+
+
+# ── Precio y greeks ───────────────────────────────────────────────────────────
+
+def bs_price(spot, strike, t_years, rate, iv, div_yield=0.0, kind='call') -> np.ndarray:
+    """Precio Black-Scholes con dividendo continuo."""
+    d1, d2, spot, strike, t_years, rate, iv, q = _d1_d2(spot, strike, t_years, rate, iv, div_yield)
+    disc_s = spot * np.exp(-q * t_years)
+    disc_k = strike * np.exp(-rate * t_years)
+    call = disc_s * ndtr(d1) - disc_k * ndtr(d2)
+    put = disc_k * ndtr(-d2) - disc_s * ndtr(-d1)
+    return np.where(_is_call(kind), call, put)
+
+
+def greeks(spot, strike, t_years, rate, iv, div_yield=0.0, kind='call') -> dict[str, np.ndarray]:
+    """{'delta', 'gamma', 'vega', 'theta'}: vega por punto de vol, theta por día."""
+    d1, d2, spot, strike, t_years, rate, iv, q = _d1_d2(spot, strike, t_years, rate, iv, div_yield)
+    call = _is_call(kind)
+    disc_q = np.exp(-q * t_years)
+    disc_r = np.exp(-rate * t_years)
+    pdf = _pdf(d1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sqrt_t = np.sqrt(t_years)
+        gamma = disc_q * pdf / (spot * iv * sqrt_t)
+        decay = -spot * disc_q * pdf * iv / (2 * sqrt_t)
+    theta_call = decay - rate * strike * disc_r * ndtr(d2) + q * spot * disc_q * ndtr(d1)
+    theta_put = decay + rate * strike * disc_r * ndtr(-d2) - q * spot * disc_q * ndtr(-d1)
+    return {
+        'delta': np.where(call, disc_q * ndtr(d1), -disc_q * ndtr(-d1)),
+        'gamma': gamma,
+        'vega': spot * disc_q * pdf * sqrt_t / 100,
+        'theta': np.where(call, theta_call, theta_put) / 365,
+    }
+
+
+def implied_vol(price, spot, strike, t_years, rate, div_yield=0.0, kind='call',
+                tol: float = 1e-8, max_iter: int = 100) -> np.ndarray:
+    """Volatilidad implícita de cada precio. NaN si el precio está fuera de los
+    límites de no arbitraje o si no hay solución en [IV_MIN, IV_MAX]."""
+    price, spot, strike, t_years, rate, q = _arrays(price, spot, strike, t_years, rate, div_yield)
+    kind = np.broadcast_to(np.asarray(kind, dtype=object), price.shape)
+    lo = np.full(price.shape, IV_MIN)
+    hi = np.full(price.shape, IV_MAX)
+    p_lo = bs_price(spot, strike, t_years, rate, lo, q, kind)
+    p_hi = bs_price(spot, strike, t_years, rate, hi, q, kind)
+    solvable = (price >= p_lo - tol) & (price <= p_hi + tol) & np.isfinite(price)
+    iv = np.where(solvable, 0.3, np.nan)
+    active = solvable.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        model = bs_price(spot, strike, t_years, rate, iv, q, kind)
+        diff = model - price
+        done = np.abs(diff) < tol
+        active &= ~done
+        # El precio crece con la vol: se estrecha la horquilla con cada evaluación
+        hi = np.where(active & (diff > 0), iv, hi)
+        lo = np.where(active & (diff < 0), iv, lo)
+        vega = greeks(spot, strike, t_years, rate, iv, q, kind)['vega'] * 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = iv - diff / vega
+        ok = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        iv = np.where(active, np.where(ok, newton, 0.5 * (lo + hi)), iv)
+    return np.where(solvable, iv, np.nan)
+
+
+# ── Métricas de contrato ──────────────────────────────────────────────────────
+
+def contract_metrics(spot, strike, t_years, premium, delta, div_yield=0.0) -> dict[str, np.ndarray]:
+    """Métricas de una call como sustituto de la acción (premium por acción).
+
+    extrinsic_pct y breakeven_move_pct son % del spot; annual_carry_pct es el
+    extrínseco por año; total_annual_cost_pct le suma el dividendo al que se
+    renuncia; leverage = exposición (spot × delta) / prima.
+    """
+    spot, strike, t_years, premium, delta, q = _arrays(spot, strike, t_years, premium, delta, div_yield)
+    intrinsic = np.maximum(spot - strike, 0.0)
+    extrinsic = np.maximum(premium - intrinsic, 0.0)       # prima NaN → NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extrinsic_pct = np.where(spot > 0, extrinsic / spot * 100, np.nan)
+        annual_carry_pct = np.where(t_years > 0, extrinsic_pct / t_years, np.nan)
+        leverage = np.where(premium > 0, spot * delta / premium, np.nan)
+        breakeven = strike + premium
+        breakeven_move_pct = np.where(spot > 0, (breakeven - spot) / spot * 100, np.nan)
+    return {
+        'intrinsic': intrinsic,
+        'extrinsic': extrinsic,
+        'extrinsic_pct': extrinsic_pct,
+        'annual_carry_pct': annual_carry_pct,
+        'forgone_dividend_pct': q * 100,
+        'total_annual_cost_pct': annual_carry_pct + q * 100,
+        'leverage': leverage,
+        'breakeven': breakeven,
+        'breakeven_move_pct': breakeven_move_pct,
+    }
+
+
+def _col(df: pd.DataFrame, name: str, default: float = np.nan) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), default)
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+
+
+def chain_analytics(chain: pd.DataFrame, spot: float, t_years, rate: float,
+                    div_yield: float = 0.0, kind: str = 'call',
+                    solve_iv: bool = False) -> pd.DataFrame:
+    """
+    Copia de `chain` (columnas de yfinance: strike, bid, ask, impliedVolatility...)
+    con mid, spread_pct, iv, greeks y contract_metrics por contrato.
+
+    mid = (bid+ask)/2 si ask > 0 (NaN si no). `t_years` puede ser escalar o
+    una columna (cadenas con varios vencimientos). Con solve_iv=True la iv se
+    resuelve desde el mid donde la de la cadena falta o es ≤ 0 (columna
+    iv_solved con la solución para todas las filas).
+    """
+    out = chain.copy()
+    strike = _col(chain, 'strike')
+    bid = _col(chain, 'bid', 0.0)
+    ask = _col(chain, 'ask', 0.0)
+    t = np.asarray(t_years, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mid = np.where(ask > 0, (bid + ask) / 2, np.nan)
+        out['mid'] = mid
+        out['spread_pct'] = np.where(mid > 0, (ask - bid) / mid * 100, np.nan)
+    iv = _col(chain, 'impliedVolatility')
+    if solve_iv:
+        solved = implied_vol(mid, spot, strike, t, rate, div_yield, kind)
+        out['iv_solved'] = solved
+        iv = np.where(iv > 0, iv, solved)
+    out['iv'] = iv
+    g = greeks(spot, strike, t, rate, iv, div_yield, kind)
+    for name, values in g.items():
+        out[name] = values
+    for name, values in contract_metrics(spot, strike, t, mid, g['delta'], div_yield).items():
+        out[name] = np.broadcast_to(values, (len(out),))
+    return out
+
+
+def flow_columns(chain: pd.DataFrame, spot: Optional[float] = None, kind: str = 'call') -> pd.DataFrame:
+    """
+    premium_usd (volumen × último precio × 100), vol_oi_ratio (NaN sin OI) e
+    itm (respecto a `spot`; sin spot se usa inTheMoney de la cadena).
+    """
+    volume = _col(chain, 'volume')
+    oi = _col(chain, 'openInterest')
+    out = pd.DataFrame(index=chain.index)
+    out['premium_usd'] = volume * _col(chain, 'lastPrice') * CONTRACT_SIZE
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['vol_oi_ratio'] = np.where(oi > 0, volume / oi, np.nan)
+    if spot is not None:
+        strike = _col(chain, 'strike')
+        out['itm'] = strike < spot if kind.lower() in ('call', 'c') else strike > spot
+    elif 'inTheMoney' in chain.columns:
+        out['itm'] = chain['inTheMoney'].fillna(False).astype(bool)
+    return out
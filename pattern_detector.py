@@ -15,7 +15,8 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from yfinance_client import get_history
 
 DOCS = Path("docs")
 PATTERN_JSON = DOCS / "pattern_signals.json"
@@ -56,8 +57,7 @@ BEAR_PATTERNS = {
 
 def _fetch(ticker: str) -> pd.DataFrame | None:
     try:
-        df = yf.download(ticker, period="1y", interval="1d",
-                         progress=False, auto_adjust=True)
+        df = get_history(ticker, period="1y", auto_adjust=True)
         if df is None or df.empty or len(df) < 30:
             return None
         if isinstance(df.columns, pd.MultiIndex):
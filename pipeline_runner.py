@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+PIPELINE RUNNER — el pipeline diario como DAG, con etapas independientes en paralelo
+
+Soluciona:
+  - daily-analysis.yml y run_full_pipeline.sh corren ~60 scripts en fila y
+    los bugs de orden (entry_verdict_agent o portfolio_tracker antes que
+    technical_filter) solo se cazaban a posteriori con
+    tests/test_pipeline_order.py.
+
+Diseño:
+  - Cada Stage declara los ficheros de docs/ que LEE y ESCRIBE (rutas
+    relativas a docs/; 'dir/' es un directorio entero y 'prefijo*' todos los
+    ficheros que empiezan así).
+  - STAGES va en el orden del workflow. build_dag() ordena dos etapas solo si
+    comparten un fichero: lectura tras escritura, escritura tras lectura (no
+    pisar lo que otra aún tiene que leer, p.ej. el value_opportunities.csv de
+    ayer) o escritura tras escritura. Cualquier conflicto se resuelve en el
+    orden declarado, así que el resultado es el mismo que en serie; solo se
+    paraleliza lo que no comparte datos. `after` añade dependencias de
+    control sin fichero de por medio (el coherence_check como gate).
+  - run() lanza cada etapa en cuanto terminan sus dependencias, con un pool de
+    `workers` hilos (cada uno un subprocess). main() abre un token bucket
+    compartido (yfinance_client.share_rate_limit): los subprocesses heredan
+    YF_RATE_LIMIT_FILE y todos gastan del mismo presupuesto de Yahoo, así
+    que más workers no multiplican el ritmo de llamadas. Si falla una etapa crítica, todo
+    lo que depende de ella se salta; las no críticas son como el
+    `|| echo "... failed"` del workflow: se registra y se sigue.
+  - Las etapas con Stage.cache se saltan si sus entradas y su código no han
+    cambiado desde un run OK: se restaura su salida (stage_cache.py).
+  - Por etapa se registra tiempo de pared y bytes leídos/escritos (tamaño de
+    los ficheros declarados al empezar / los modificados al terminar) en
+    docs/pipeline_runner_report.json.
+
+Uso:
+    python3 pipeline_runner.py --dry-run            # niveles del DAG
+    python3 pipeline_runner.py --workers 6
+    python3 pipeline_runner.py --only technical_filter entry_verdict_agent
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent
+DOCS = ROOT / 'docs'
+LOG_DIR = ROOT / 'logs' / 'pipeline'
+REPORT_PATH = DOCS / 'pipeline_runner_report.json'
+DEFAULT_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    cmd: tuple
+    reads: tuple = ()
+    writes: tuple = ()
+    critical: bool = False
+    after: tuple = ()       # dependencias de control (sin fichero compartido)
+    cache: Optional[str] = None     # None | 'content' | 'daily' (ver stage_cache.py)
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str             # ok | cached | failed | skipped
+    returncode: Optional[int] = None
+    wall_s: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    started_at: Optional[str] = None
+    reason: Optional[str] = None
+    cache_key: Optional[str] = None
+
+
+def _py(script: str, *args: str) -> tuple:
+    return (sys.executable, script, *args)
+
+
+VALUE_US = ('value_opportunities.csv', 'value_opportunities_filtered.csv')
+VALUE_EU = ('european_value_opportunities.csv', 'european_value_opportunities_filtered.csv')
+CONVICTION = ('value_conviction.csv', 'european_value_conviction.csv')
+MOMENTUM = ('momentum_opportunities.csv', 'momentum_opportunities_filtered.csv')
+MICRO_SHORT = ('micro_cap_opportunities.csv', 'micro_cap_opportunities_filtered.csv',
+               'short_opportunities.json', 'short_opportunities_filtered.json')
+
+
+# Orden = orden del workflow (jobs vcp-scan, core-scoring y scanners).
+STAGES: tuple[Stage, ...] = (
+    # ── vcp-scan ──
+    Stage('vcp_scanner', _py('vcp_scanner_usa.py', '--sp500', '--parallel'),
+          writes=('reports/vcp/',)),
+
+    # ── core-scoring ──
+    Stage('market_regime_detector', _py('market_regime_detector.py'),
+          reads=('ticker_data_cache.json',), writes=('market_regime.json',)),
+    Stage('sector_rotation_detector', _py('sector_rotation_detector.py'),
+          writes=('sector_rotation/',)),
+    Stage('fundamental_scorer', _py('fundamental_scorer.py', '--curated'), critical=True,
+          reads=('reports/vcp/latest.csv', 'ml_scores.csv',
+                 'super_opportunities_5d_complete_with_earnings.csv', 'value_opportunities.csv'),
+          writes=('fundamental_scores.csv',)),
+    Stage('analyst_revisions_tracker', _py('analyst_revisions_tracker.py'),
+          reads=('fundamental_scores.csv',),
+          writes=('analyst_revisions.csv', 'analyst_revisions_history.json')),
+    Stage('ml_win_predictor', _py('ml_win_predictor.py'),
+          reads=('value_opportunities.csv', 'european_value_opportunities.csv', 'portfolio_tracker/'),
+          writes=('ml_win_probability.json', 'ml_model_report.json')),
+    Stage('super_score_integrator', _py('super_score_integrator.py'), critical=True,
+          reads=('analyst_revisions.csv', 'cerebro_ticker_signals.csv', 'fundamental_scores.csv',
+                 'hedge_fund_summary.json', 'mean_reversion_opportunities.csv', 'ml_scores.csv',
+                 'ml_win_probability.json', 'options_flow.csv', 'owner_earnings_ai_validated.json',
+                 'portfolio_tracker/summary.json', 'reports/vcp/latest.csv',
+                 'sector_rotation/latest_scan.json', 'ticker_data_cache.json'),
+          writes=(*VALUE_US, *MOMENTUM, 'super_scores_ultimate.csv', 'industry_group_rankings.csv')),
+    Stage('enrich_why_cheap', _py('enrich_why_cheap.py'),
+          reads=('value_opportunities.csv', 'european_value_opportunities.csv', 'why_cheap_cache.json'),
+          writes=('value_opportunities.csv', 'european_value_opportunities.csv', 'why_cheap_cache.json')),
+    Stage('ai_quality_filter', _py('ai_quality_filter.py'),
+          reads=('value_opportunities.csv', 'momentum_opportunities.csv', *MICRO_SHORT),
+          writes=(*VALUE_US, *MOMENTUM, *MICRO_SHORT)),
+    Stage('european_insider_scanner', _py('european_insider_scanner.py'),
+          writes=('eu_recurring_insiders.csv',)),
+    Stage('european_value_scanner', _py('european_value_scanner.py', '--curated'),
+          reads=('eu_recurring_insiders.csv',),
+          writes=('european_value_opportunities.csv', 'european_fundamental_scores.csv',
+                  'european_market_regime.json')),
+    Stage('global_market_scanner', _py('global_market_scanner.py', '--curated'),
+          writes=('global_value_opportunities.csv',)),
+    Stage('macro_radar', _py('macro_radar.py'), writes=('macro_radar.json',)),
+    Stage('macro_stress_radar', (sys.executable, '-m', 'macro_stress.macro_stress_radar'),
+          writes=('macro_stress.json', 'macro_stress/')),
+    Stage('ai_quality_filter_eu', _py('ai_quality_filter.py', '--european'),
+          reads=VALUE_EU, writes=VALUE_EU),
+    Stage('add_entry_exit', _py('add_entry_exit_to_opportunities.py', '--all'), critical=True,
+          reads=(*VALUE_US, *VALUE_EU, 'super_scores_ultimate.csv'),
+          writes=(*VALUE_US, *VALUE_EU, 'super_opportunities_with_prices.csv')),
+    Stage('owner_earnings', _py('owner_earnings.py'), cache='content',
+          reads=('tikr_earnings_data.json',), writes=('owner_earnings_batch.json',)),
+    Stage('owner_earnings_validator', _py('owner_earnings_validator.py'), cache='content',
+          reads=('owner_earnings_batch.json',),
+          writes=('owner_earnings_ai_validated.csv', 'owner_earnings_ai_validated.json')),
+    Stage('apply_oe_ai_adjustment', _py('apply_oe_ai_adjustment.py'),
+          reads=('owner_earnings_ai_validated.json', *VALUE_US, 'european_value_opportunities.csv',
+                 'global_value_opportunities.csv', *CONVICTION),
+          writes=(*VALUE_US, 'european_value_opportunities.csv', 'global_value_opportunities.csv',
+                  *CONVICTION)),
+    Stage('conviction_filter', _py('conviction_filter.py'), critical=True,
+          reads=('value_opportunities.csv', 'european_value_opportunities.csv'),
+          writes=(*CONVICTION, 'value_opportunities_filtered.csv',
+                  'european_value_opportunities_filtered.csv')),
+    Stage('technical_filter', _py('technical_filter.py'),
+          reads=(*VALUE_US, *VALUE_EU), writes=(*VALUE_US, *VALUE_EU, 'technical_signals.json')),
+    Stage('thesis_generator', _py('thesis_generator.py', '50', '--ai'),
+          reads=('cerebro_ticker_signals.csv', 'european_fundamental_scores.csv',
+                 'european_value_opportunities_filtered.csv', 'fundamental_scores.csv',
+                 'insider_index.json', 'momentum_opportunities.csv', 'recurring_insiders.csv',
+                 'reports/vcp/latest.csv', 'super_opportunities_5d_complete.csv',
+                 'tikr_earnings_data.json', 'value_opportunities.csv'),
+          writes=('theses.json',)),
+    Stage('generate_insights', _py('generate_insights.py'), cache='daily',
+          reads=(*VALUE_US, *VALUE_EU, *CONVICTION, 'eu_recurring_insiders.csv',
+                 'industry_group_rankings.csv', 'macro_radar.json', 'options_flow.json',
+                 'portfolio_tracker/summary.json', 'recurring_insiders.csv'),
+          writes=('daily_briefing.json', '*_insight.json', 'portfolio_tracker/portfolio_insight.json')),
+    Stage('portfolio_tracker', _py('portfolio_tracker.py', '--all', '--backfill-alpha'), critical=True,
+          reads=('value_opportunities.csv', 'momentum_opportunities_filtered.csv',
+                 'mean_reversion_opportunities.csv', 'bounce_setups_broad.csv',
+                 'leaps_opportunities.json', 'history/'),
+          writes=('portfolio_tracker/',)),
+    Stage('thesis_drift_monitor', _py('thesis_drift_monitor.py'),
+          reads=('fundamental_scores.csv', 'portfolio_tracker/recommendations.csv'),
+          writes=('portfolio_tracker/thesis_drift_alerts.json', 'portfolio_tracker/thesis_drift_sent.json')),
+    Stage('technical_signal_analyzer', _py('technical_signal_analyzer.py'),
+          reads=('value_opportunities.csv', 'european_value_opportunities.csv',
+                 'global_value_opportunities.csv', 'portfolio_tracker/recommendations.csv'),
+          writes=('technical_signals.csv', 'technical_signals_summary.csv')),
+    Stage('entry_verdict_agent', _py('entry_verdict_agent.py', '--llm-budget', '30'),
+          reads=('value_opportunities.csv', 'european_value_opportunities.csv',
+                 'momentum_opportunities.csv', 'bounce_opportunities.csv', 'market_regime.json'),
+          writes=('entry_verdicts.csv',)),
+    Stage('pattern_detector', _py('pattern_detector.py'),
+          reads=VALUE_US, writes=('pattern_signals.json',)),
+    Stage('chart_analyzer', _py('chart_analyzer.py', '--batch'),
+          reads=('technical_signals.json', 'value_opportunities.csv'), writes=('chart_signals.json',)),
+    Stage('returns_panel', _py('returns_panel.py'),
+          reads=(*VALUE_US, *VALUE_EU, *CONVICTION), writes=('returns_panel.npz',)),
+
+    # ── scanners ──
+    Stage('bond_scanner', _py('bond_scanner.py'),
+          writes=('bonds_opportunities.csv', 'preferred_stocks.csv')),
+    Stage('commodity_scanner', _py('commodity_scanner.py'), writes=('commodity_opportunities.csv',)),
+    Stage('check_alerts', _py('check_alerts.py')),
+    Stage('openinsider_scraper', _py('insiders/openinsider_scraper.py'), writes=('reports/daily/',)),
+    Stage('analyze_recurring_insiders', _py('analyze_recurring_insiders.py'), cache='daily',
+          reads=('reports/daily/',), writes=('recurring_insiders.csv', 'recurring_insiders.html')),
+    Stage('build_insider_index', _py('build_insider_index.py'), cache='daily',
+          reads=('reports/daily/',), writes=('insider_index.json',)),
+    Stage('hedge_fund_tracker', _py('hedge_fund_tracker.py'),
+          writes=('hedge_fund_holdings.csv', 'hedge_fund_summary.json')),
+    Stage('backtest_engine', _py('backtest_engine.py'),
+          reads=('super_opportunities_5d_complete.csv', 'super_scores_ultimate.csv', 'value_opportunities.csv'),
+          writes=('backtest/',)),
+    Stage('position_sizer', _py('position_sizer.py'),
+          reads=('backtest/', 'sector_rotation/latest_scan.json', 'super_opportunities_5d_complete.csv'),
+          writes=('position_sizing.csv',)),
+    Stage('earnings_calendar', _py('earnings_calendar.py'),
+          reads=('super_opportunities_5d_complete.csv',),
+          writes=('earnings_alerts.json', 'opportunities_with_earnings.csv')),
+    Stage('earnings_thesis_generator', _py('earnings_thesis_generator.py'),
+          reads=('personal_portfolio_snapshot.json',), writes=('earnings_theses.json',)),
+    Stage('mean_reversion_detector', _py('mean_reversion_detector.py'),
+          reads=('value_opportunities.csv', 'european_value_opportunities.csv', 'fundamental_scores.csv'),
+          writes=('mean_reversion_opportunities.csv',)),
+    Stage('mean_reversion_backtester', _py('mean_reversion_backtester.py'),
+          reads=('history/', 'mean_reversion_opportunities.csv'), writes=('backtest/',)),
+    Stage('mean_reversion_recent', _py('mean_reversion_recent.py'),
+          reads=('history/', 'mean_reversion_opportunities.csv'), writes=('mean_reversion_recent.json',)),
+    Stage('bounce_scanner_broad', _py('bounce_scanner_broad.py'),
+          writes=('bounce_setups_broad.csv', 'bounce_setups_broad.json')),
+    Stage('bounce_alerts', _py('bounce_alerts.py'),
+          reads=('bounce_setups_broad.json', 'mean_reversion_opportunities.csv', 'bounce_alerts_seen.json'),
+          writes=('bounce_alerts_seen.json', 'bounce_catalyst_flags.json')),
+    Stage('macro_country_scanner', _py('macro_country_scanner.py'), writes=('macro_country_analysis.json',)),
+    Stage('economic_calendar_generator', _py('economic_calendar_generator.py'),
+          writes=('economic_calendar.json',)),
+    Stage('catalyst_scanner', _py('catalyst_scanner.py'),
+          reads=('economic_calendar.json',), writes=('catalysts.json',)),
+    Stage('portfolio_news_monitor', _py('portfolio_news_monitor.py'),
+          reads=('portfolio_watch.json', '.portfolio_news_seen.json'),
+          writes=('portfolio_news.json', '.portfolio_news_seen.json')),
+    Stage('strategy_agent', _py('strategy_agent.py'),
+          reads=('cerebro_ticker_signals.csv', 'fundamental_scores.csv', 'macro_radar.json',
+                 'mean_reversion_opportunities.csv', 'options_flow.csv', 'portfolio_watch.json',
+                 'recurring_insiders.csv', 'technical_signals_summary.csv'),
+          writes=('portfolio_strategies.csv', 'portfolio_strategies.json')),
+    Stage('earnings_options_snapshot', _py('earnings_options_snapshot.py'),
+          reads=('portfolio_watch.json',), writes=('earnings_options.json',)),
+    Stage('strategy_alerts', _py('strategy_alerts.py'),
+          reads=('portfolio_strategies.json', '.strategy_alerts_seen.json'),
+          writes=('.strategy_alerts_seen.json',)),
+    Stage('options_flow_detector', _py('options_flow_detector.py'),
+          reads=('fundamental_scores.csv',), writes=('options_flow.csv', 'options_flow.json')),
+    Stage('unusual_flow_scanner', _py('unusual_flow_scanner.py'),
+          writes=('unusual_flow.csv', 'unusual_flow.json')),
+    Stage('new_value_alerts', _py('new_value_alerts.py'),
+          reads=(*VALUE_US, 'history/')),
+    Stage('cerebro', _py('cerebro.py'),
+          reads=(*VALUE_US, *VALUE_EU, 'european_value_conviction.csv', 'economic_calendar.json',
+                 'eu_recurring_insiders.csv', 'fundamental_scores.csv', 'hedge_fund_holdings.csv',
+                 'history/', 'leaps_opportunities.json', 'macro_radar.json', 'macro_stress.json',
+                 'market_regime.json', 'mean_reversion_opportunities.csv', 'options_flow.csv',
+                 'portfolio_tracker/', 'sector_rotation/latest_scan.json'),
+          writes=('cerebro_*',)),
+    Stage('dividend_trap_scanner', _py('dividend_trap_scanner.py'),
+          reads=('fundamental_scores.csv',), writes=('dividend_traps.json',)),
+    Stage('contrarian_discovery', _py('contrarian_discovery.py'),
+          reads=('fundamental_scores.csv',), writes=('contrarian_picks.json',)),
+    Stage('score_drift_detector', _py('score_drift_detector.py'), cache='daily',
+          reads=('value_opportunities.csv', 'history/'), writes=('score_alerts.json',)),
+    Stage('signal_postmortem', _py('signal_postmortem.py'),
+          reads=('portfolio_tracker/recommendations.csv',), writes=('signal_postmortem.json',)),
+    Stage('portfolio_price_alerts', _py('portfolio_price_alerts.py'), writes=('portfolio_alerts.json',)),
+    Stage('coherence_check', _py('coherence_check.py'), critical=True,
+          reads=('commodity_opportunities.csv', 'entry_verdicts.csv', 'european_value_opportunities.csv',
+                 'leaps_opportunities.json', 'signal_postmortem.json', 'value_opportunities.csv'),
+          writes=('coherence_check.json',)),
+    Stage('daily_briefing', _py('daily_briefing.py'), after=('coherence_check',),
+          reads=('history/', 'market_regime.json', 'portfolio_tracker/', 'value_opportunities.csv'),
+          writes=('daily_briefing.json',)),
+    Stage('ticker_api_payloads', _py('ticker_api_payloads.py'),
+          reads=(*VALUE_US, *VALUE_EU, *CONVICTION, *MOMENTUM, 'bounce_setups_broad.csv',
+                 'global_value_opportunities.csv', 'hedge_fund_holdings.csv',
+                 'mean_reversion_opportunities.csv', 'micro_cap_opportunities.csv', 'options_flow.csv',
+                 'short_opportunities.csv'),
+          writes=('api_payloads/',)),
+)
+
+
+# ── DAG ───────────────────────────────────────────────────────────────────────
+
+def _is_prefix(path: str) -> bool:
+    return path.endswith('/') or path.endswith('*')
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """¿Pueden `a` y `b` referirse al mismo fichero? (directorios y prefijos incluidos)"""
+    if a == b:
+        return True
+    if _is_prefix(a) and b.startswith(a.rstrip('*')):
+        return True
+    if _is_prefix(b) and a.startswith(b.rstrip('*')):
+        return True
+    if '*' in a or '*' in b:
+        return fnmatch.fnmatch(b, a) or fnmatch.fnmatch(a, b)
+    return False
+
+
+def _conflict(xs: Iterable[str], ys: Iterable[str]) -> bool:
+    ys = tuple(ys)
+    return any(_overlaps(x, y) for x in xs for y in ys)
+
+
+def build_dag(stages: Sequence[Stage]) -> dict[str, set[str]]:
+    """{etapa: etapas anteriores de las que depende}. Depende de cada etapa
+    ANTERIOR con la que comparte un fichero y al menos una de las dos escribe."""
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        dupes = sorted({n for n in names if names.count(n) > 1})
+        raise ValueError(f"Etapas duplicadas: {dupes}")
+    dag: dict[str, set[str]] = {}
+    for i, stage in enumerate(stages):
+        deps = set()
+        for prev in stages[:i]:
+            if (_conflict(stage.reads, prev.writes)
+                    or _conflict(stage.writes, prev.reads)
+                    or _conflict(stage.writes, prev.writes)):
+                deps.add(prev.name)
+        for name in stage.after:
+            if name not in names[:i]:
+                raise ValueError(f"{stage.name}: 'after' apunta a {name!r}, que no es una etapa anterior")
+            deps.add(name)
+        dag[stage.name] = deps
+    return dag
+
+
+def levels(dag: dict[str, set[str]]) -> list[list[str]]:
+    """Etapas agrupadas por profundidad: cada nivel solo depende de los anteriores."""
+    depth: dict[str, int] = {}
+    for name, deps in dag.items():      # dag está en orden topológico (declaración)
+        depth[name] = 1 + max((depth[d] for d in deps), default=-1)
+    out: list[list[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name, d in depth.items():
+        out[d].append(name)
+    return out
+
+
+def select(stages: Sequence[Stage], only: Optional[Iterable[str]]) -> list[Stage]:
+    """Subconjunto `only` (en orden de declaración). Las dependencias fuera del
+    subconjunto se dan por satisfechas con lo que ya haya en docs/."""
+    if not only:
+        return list(stages)
+    wanted = set(only)
+    unknown = wanted - {s.name for s in stages}
+    if unknown:
+        raise ValueError(f"Etapas desconocidas: {sorted(unknown)}")
+    return [s for s in stages if s.name in wanted]
+
+
+# ── Métricas de I/O ───────────────────────────────────────────────────────────
+
+def docs_files(docs: Path, path: str) -> list[Path]:
+    if path.endswith('/'):
+        base = docs / path
+        return [f for f in base.rglob('*') if f.is_file()] if base.is_dir() else []
+    if '*' in path:
+        return [f for f in docs.glob(path) if f.is_file()]
+    f = docs / path
+    return [f] if f.is_file() else []
+
+
+def _size(f: Path) -> int:
+    try:
+        return f.stat().st_size
+    except OSError:
+        return 0
+
+
+def bytes_read(docs: Path, stage: Stage) -> int:
+    files = {f for p in stage.reads for f in docs_files(docs, p)}
+    return sum(_size(f) for f in files)
+
+
+def bytes_written(docs: Path, stage: Stage, since: float) -> int:
+    """Tamaño de los ficheros declarados en writes modificados desde `since`."""
+    total = 0
+    for f in {f for p in stage.writes for f in docs_files(docs, p)}:
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        if st.st_mtime >= since:
+            total += st.st_size
+    return total
+
+
+# ── Ejecución ─────────────────────────────────────────────────────────────────
+
+def run_subprocess(stage: Stage, log_dir: Path = LOG_DIR) -> int:
+    """Ejecuta la etapa en ROOT con su salida en logs/pipeline/<etapa>.log."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_dir / f'{stage.name}.log', 'w') as log:
+        return subprocess.run(stage.cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT).returncode
+
+
+def run(stages: Sequence[Stage], workers: int = DEFAULT_WORKERS, docs: Path = DOCS,
+        execute: Callable[[Stage], int] = run_subprocess,
+        on_done: Optional[Callable[[StageResult], None]] = None,
+        cache=None) -> list[StageResult]:
+    """
+    Ejecuta `stages` respetando build_dag(): cada etapa arranca en cuanto
+    acaban sus dependencias, como mucho `workers` a la vez. Devuelve un
+    StageResult por etapa en orden de declaración.
+
+    Con `cache` (un stage_cache.StageCache), las etapas con Stage.cache
+    cuyas entradas y código no han cambiado restauran su salida en vez de
+    ejecutarse.
+    """
+    stages = list(stages)
+    by_name = {s.name: s for s in stages}
+    dag = {name: deps & by_name.keys() for name, deps in build_dag(stages).items()}
+    results: dict[str, StageResult] = {}
+    lock = threading.Lock()
+
+    def _run_one(stage: Stage) -> StageResult:
+        res = StageResult(stage.name, 'ok', started_at=datetime.now().isoformat(timespec='seconds'))
+        res.bytes_read = bytes_read(docs, stage)
+        since = time.time() - 1.0       # margen por la resolución de mtime
+        t0 = time.perf_counter()
+        use_cache = cache is not None and stage.cache is not None
+        if use_cache:
+            res.cache_key = cache.key(stage)
+            manifest = cache.lookup(stage, res.cache_key)
+            if manifest is not None:
+                res.status, res.returncode = 'cached', 0
+                res.bytes_written = cache.restore(manifest)
+                res.wall_s = round(time.perf_counter() - t0, 3)
+                return res
+        try:
+            res.returncode = int(execute(stage))
+        except Exception as e:
+            res.returncode, res.reason = -1, f'{type(e).__name__}: {e}'
+        res.wall_s = round(time.perf_counter() - t0, 3)
+        res.bytes_written = bytes_written(docs, stage, since)
+        if res.returncode != 0:
+            res.status = 'failed'
+        elif use_cache:
+            cache.store(stage, res.cache_key, since)
+        return res
+
+    def _finish(res: StageResult) -> None:
+        with lock:
+            results[res.name] = res
+        if on_done:
+            on_done(res)
+
+    def _blocked_by(name: str) -> Optional[str]:
+        """Dependencia crítica fallida (o saltada) que impide correr `name`."""
+        for dep in dag[name]:
+            r = results.get(dep)
+            if r is None:
+                continue
+            if r.status == 'skipped' or (r.status == 'failed' and by_name[dep].critical):
+                return dep
+        return None
+
+    pending = [s.name for s in stages]
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name in list(pending):
+                    if not dag[name] <= results.keys():
+                        continue
+                    pending.remove(name)
+                    progressed = True
+                    blocker = _blocked_by(name)
+                    if blocker:
+                        _finish(StageResult(name, 'skipped', reason=f'depende de {blocker}'))
+                    else:
+                        running[pool.submit(_run_one, by_name[name])] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                running.pop(fut)
+                _finish(fut.result())
+    return [results[s.name] for s in stages]
+
+
+def save_report(results: Sequence[StageResult], wall_s: float, workers: int,
+                path: Path = REPORT_PATH) -> dict:
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'workers': workers,
+        'wall_s': round(wall_s, 3),
+        'serial_s': round(sum(r.wall_s for r in results), 3),
+        'failed': [r.name for r in results if r.status == 'failed'],
+        'skipped': [r.name for r in results if r.status == 'skipped'],
+        'cached': [r.name for r in results if r.status == 'cached'],
+        'stages': [asdict(r) for r in results],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(report, indent=2))
+    tmp.replace(path)
+    return report
+
+
+def _print_result(res: StageResult) -> None:
+    icon = {'ok': '✅', 'cached': '♻️ ', 'failed': '❌', 'skipped': '⏭️ '}[res.status]
+    extra = f" ({res.reason})" if res.reason else ''
+    print(f"{icon} {res.name:<28} {res.wall_s:8.1f}s  "
+          f"R {res.bytes_read / 1e6:7.1f}MB  W {res.bytes_written / 1e6:7.1f}MB{extra}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline diario como DAG con etapas en paralelo')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--only', nargs='+', help='Solo estas etapas (el resto se da por hecho)')
+    parser.add_argument('--dry-run', action='store_true', help='Muestra los niveles del DAG y sale')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ejecuta también las etapas cacheables aunque sus entradas no cambien')
+    parser.add_argument('--report', default=str(REPORT_PATH))
+    args = parser.parse_args()
+
+    stages = select(STAGES, args.only)
+    if args.dry_run:
+        dag = build_dag(stages)
+        for depth, names in enumerate(levels(dag)):
+            print(f"[{depth}] " + ', '.join(names))
+        print(f"\n{len(stages)} etapas en {len(levels(dag))} niveles")
+        return
+
+    print(f"🚀 {len(stages)} etapas, {args.workers} workers (logs en {LOG_DIR.relative_to(ROOT)}/)")
+    cache = None
+    if not args.no_cache:
+        from stage_cache import StageCache
+        cache = StageCache()
+    from yfinance_client import share_rate_limit
+    t0 = time.perf_counter()
+    # Las etapas heredan YF_RATE_LIMIT_FILE: un solo bucket para todos los subprocesses
+    with share_rate_limit():
+        results = run(stages, workers=args.workers, on_done=_print_result, cache=cache)
+    if cache is not None:
+        cache.save_digests()
+    report = save_report(results, time.perf_counter() - t0, args.workers, Path(args.report))
+    print(f"\n⏱️  {report['wall_s']:.0f}s de pared (en serie: {report['serial_s']:.0f}s) — "
+          f"{len(report['failed'])} fallidas, {len(report['skipped'])} saltadas, "
+          f"{len(report['cached'])} desde caché")
+    critical = {s.name for s in stages if s.critical}
+    critical_failed = [r.name for r in results if r.status == 'failed' and r.name in critical]
+    if critical_failed:
+        print(f"❌ Etapas críticas fallidas: {', '.join(critical_failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
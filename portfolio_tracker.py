@@ -11,8 +11,8 @@ import yfinance as yf
 from pathlib import Path
 from datetime import datetime, timedelta
 import json
-import time
 import argparse
+from yfinance_client import get_history_batch
 from value_bands import (UPSIDE_MIN, UPSIDE_GOLDEN_MAX, UPSIDE_HARD_REJECT,
                          solo_politica_vigente)
 
@@ -84,6 +84,110 @@ PERFORMANCE_FILE = TRACKER_DIR / 'performance.csv'
 SUMMARY_FILE = TRACKER_DIR / 'summary.json'
 CALIBRATION_FILE = TRACKER_DIR / 'calibration.json'
 
+# Horizontes (días naturales) de los checkpoints return_/price_/win_/alpha_Nd
+CHECKPOINT_DAYS = (7, 14, 30, 90, 180, 365)
+
+
+def _fetch_histories(starts: pd.Series, end: str) -> dict[str, pd.DataFrame]:
+    """Velas diarias de cada ticker desde su primera fecha necesaria.
+
+    `starts` es {ticker: fecha}. Los tickers se agrupan por el mes de esa
+    fecha y cada grupo va en UNA llamada a get_history_batch (price store
+    primero, tandas concurrentes): decenas de llamadas en vez de una por
+    ticker con sleep de 1s entre medias.
+    """
+    frames: dict[str, pd.DataFrame] = {}
+    if starts.empty:
+        return frames
+    month = pd.to_datetime(starts).dt.to_period('M').dt.start_time
+    failed = 0
+    for bucket, group in starts.groupby(month):
+        got, errors = get_history_batch(sorted(group.index), start=bucket.strftime('%Y-%m-%d'), end=end)
+        frames.update(got)
+        failed += len(errors)
+    if failed:
+        print(f"    {failed} tickers sin historial")
+    return frames
+
+
+def _long_panel(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Velas de varios tickers en formato largo, ordenadas por fecha (merge_asof).
+
+    'pos' es la posición de la fila dentro del orden (ticker, fecha): los
+    rangos [pos_a, pos_b] de un mismo ticker son contiguos.
+    """
+    parts = []
+    for ticker, hist in frames.items():
+        if hist is None or hist.empty:
+            continue
+        dates = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        parts.append(pd.DataFrame({
+            'ticker': ticker,
+            'date': pd.DatetimeIndex(dates).astype('datetime64[ns]'),
+            'Close': hist['Close'].to_numpy(dtype=float),
+            'Low': hist['Low'].to_numpy(dtype=float) if 'Low' in hist else hist['Close'].to_numpy(dtype=float),
+            'High': hist['High'].to_numpy(dtype=float) if 'High' in hist else hist['Close'].to_numpy(dtype=float),
+        }))
+    if not parts:
+        return pd.DataFrame({'ticker': pd.Series(dtype=object), 'date': pd.Series(dtype='datetime64[ns]'),
+                             'Close': [], 'Low': [], 'High': [], 'pos': []})
+    panel = pd.concat(parts, ignore_index=True).sort_values(['ticker', 'date'], kind='stable')
+    panel['pos'] = np.arange(len(panel), dtype=float)
+    return panel.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def _asof(panel: pd.DataFrame, tickers, dates, column: str, direction: str = 'forward',
+          allow_exact_matches: bool = True) -> np.ndarray:
+    """`column` de la primera vela en/tras (forward) o en/antes (backward) de
+    cada (ticker, fecha). NaN si no hay vela."""
+    n = len(tickers)
+    out = np.full(n, np.nan)
+    if n == 0 or panel.empty:
+        return out
+    left = pd.DataFrame({
+        'ticker': np.asarray(tickers, dtype=object),
+        'date': pd.DatetimeIndex(dates).astype('datetime64[ns]'),
+        '_row': np.arange(n),
+    }).sort_values('date', kind='stable')
+    merged = pd.merge_asof(left, panel[['ticker', 'date', column]], on='date', by='ticker',
+                           direction=direction, allow_exact_matches=allow_exact_matches)
+    out[merged['_row'].to_numpy()] = merged[column].to_numpy(dtype=float)
+    return out
+
+
+def _range_min(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """min(values[lo:hi+1]) por fila ignorando NaN; NaN si el rango está vacío o falta."""
+    out = np.full(len(lo), np.nan)
+    ok = ~np.isnan(lo) & ~np.isnan(hi) & (lo <= hi)
+    if not ok.any():
+        return out
+    # reduceat sobre pares [lo, hi+1) intercalados; el centinela permite hi+1 == len
+    padded = np.append(values, np.nan)
+    bounds = np.column_stack([lo[ok], hi[ok] + 1]).astype(np.intp).ravel()
+    out[ok] = np.fmin.reduceat(padded, bounds)[::2]
+    return out
+
+
+def _fix_gbp_scale(check_price: np.ndarray, signal_price: np.ndarray) -> np.ndarray:
+    """LSE GBp/GBP: si señal y checkpoint difieren ~100x, corrige el checkpoint."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = check_price / signal_price
+    valid = (signal_price > 0) & (check_price > 0)
+    fixed = np.where(valid & (ratio < 0.02), check_price * 100, check_price)   # señal en GBp
+    return np.where(valid & (ratio > 50), check_price / 100, fixed)            # señal en GBP
+
+
+def _numeric(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[col], errors='coerce')
+
+
+def _isna(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    return df[col].isna().to_numpy()
+
 
 class PortfolioTracker:
     """Track recommendations and measure real-world results"""
@@ -466,140 +570,122 @@ class PortfolioTracker:
             earliest = pd.Timestamp(active_all['signal_date'].min()) - timedelta(days=1)
             bench_end = (today + timedelta(days=1)).strftime('%Y-%m-%d')
             bench_start = earliest.strftime('%Y-%m-%d')
-            for bench in ['SPY', 'VGK']:
-                try:
-                    h = yf.Ticker(bench).history(start=bench_start, end=bench_end)
-                    if not h.empty:
-                        if h.index.tz is not None:
-                            h.index = h.index.tz_localize(None)
-                        bench_hists[bench] = h
-                except Exception as e:
-                    print(f"    Warning: could not download {bench}: {e}")
+            bench_hists, bench_errors = get_history_batch(['SPY', 'VGK'], start=bench_start, end=bench_end)
+            for bench, e in bench_errors.items():
+                print(f"    Warning: could not download {bench}: {e}")
         # ──────────────────────────────────────────────────────────────────────
 
-        # Group by ticker to batch yfinance calls
-        active = active_all.copy()
-        tickers_to_check = active['ticker'].unique()
-
-        print(f"  Checking {len(tickers_to_check)} tickers for performance updates...")
-
-        for ticker in tickers_to_check:
-            ticker_recs = active_all[active_all['ticker'] == ticker]
-
-            # Fetch price history
-            try:
-                stock = yf.Ticker(ticker)
-                earliest_date = ticker_recs['signal_date'].min()
-                start_date = pd.Timestamp(earliest_date) - timedelta(days=1)
-                hist = stock.history(
-                    start=start_date.strftime('%Y-%m-%d'),
-                    end=(today + timedelta(days=1)).strftime('%Y-%m-%d')
-                )
-                if hist.empty:
-                    continue
-
-                # yfinance returns tz-aware index; strip tz to allow naive comparisons
-                if hist.index.tz is not None:
-                    hist.index = hist.index.tz_localize(None)
-
-                for idx, rec in ticker_recs.iterrows():
-                    signal_date = pd.Timestamp(rec['signal_date'])
-                    signal_price = float(rec['signal_price'])
-                    days_since = (today - signal_date).days
-
-                    # Get prices at 7d..365d checkpoints (90/180/365d = horizonte
-                    # real de una tesis value; 7-30d mide ruido/momentum)
-                    for period, col_return, col_price, col_win in [
-                        (7, 'return_7d', 'price_7d', 'win_7d'),
-                        (14, 'return_14d', 'price_14d', 'win_14d'),
-                        (30, 'return_30d', 'price_30d', 'win_30d'),
-                        (90, 'return_90d', 'price_90d', 'win_90d'),
-                        (180, 'return_180d', 'price_180d', 'win_180d'),
-                        (365, 'return_365d', 'price_365d', 'win_365d'),
-                    ]:
-                        if days_since >= period and pd.isna(rec.get(col_return)):
-                            check_date = signal_date + timedelta(days=period)
-                            # Find closest trading day
-                            mask = hist.index >= check_date
-                            if mask.any():
-                                check_price = float(hist.loc[mask, 'Close'].iloc[0])
-                                # LSE GBp/GBP sanity: if prices differ by ~100x, correct
-                                if signal_price > 0 and check_price > 0:
-                                    ratio = check_price / signal_price
-                                    if ratio < 0.02:   # signal in GBp, fetch in GBP
-                                        check_price = check_price * 100
-                                    elif ratio > 50:   # signal in GBP, fetch in GBp
-                                        check_price = check_price / 100
-                                pct_return = ((check_price - signal_price) / signal_price) * 100
-                                self.recommendations.at[idx, col_return] = round(pct_return, 2)
-                                self.recommendations.at[idx, col_price] = round(check_price, 2)
-                                self.recommendations.at[idx, col_win] = pct_return > 0
-                                updated += 1
-
-                                # ── Alpha vs benchmark ────────────────────────
-                                strategy = rec.get('strategy', 'VALUE')
-                                bench_key = 'VGK' if strategy == 'EU_VALUE' else 'SPY'
-                                bench_col_ret  = f'benchmark_return_{period}d'
-                                bench_col_alpha = f'alpha_{period}d'
-                                if bench_key in bench_hists and pd.isna(rec.get(bench_col_ret)):
-                                    bh = bench_hists[bench_key]
-                                    b_signal_mask = bh.index >= signal_date
-                                    b_check_mask  = bh.index >= check_date
-                                    if b_signal_mask.any() and b_check_mask.any():
-                                        b_signal_price = float(bh.loc[b_signal_mask, 'Close'].iloc[0])
-                                        b_check_price  = float(bh.loc[b_check_mask,  'Close'].iloc[0])
-                                        if b_signal_price > 0:
-                                            bench_ret = ((b_check_price - b_signal_price) / b_signal_price) * 100
-                                            alpha     = pct_return - bench_ret
-                                            self.recommendations.at[idx, bench_col_ret]   = round(bench_ret, 2)
-                                            self.recommendations.at[idx, bench_col_alpha] = round(alpha, 2)
-                                # ─────────────────────────────────────────────
-
-                    # Max drawdown over 30 days
-                    if days_since >= 7 and pd.isna(rec.get('max_drawdown_30d')):
-                        window_end = min(signal_date + timedelta(days=30), today)
-                        window = hist[(hist.index >= signal_date) & (hist.index <= window_end)]
-                        if not window.empty:
-                            min_price = float(window['Low'].min())
-                            drawdown = ((min_price - signal_price) / signal_price) * 100
-                            self.recommendations.at[idx, 'max_drawdown_30d'] = round(drawdown, 2)
-
-                    # Simulate stop/target exit (daily check for active signals)
-                    stop = rec.get('stop_loss')
-                    target = rec.get('target_price')
-                    if (pd.isna(rec.get('exit_reason')) and
-                            stop and target and not pd.isna(stop) and not pd.isna(target)):
-                        stop_f = float(stop)
-                        target_f = float(target)
-                        sim_end = min(signal_date + timedelta(days=45), today)
-                        sim_window = hist[(hist.index > signal_date) & (hist.index <= sim_end)]
-                        for sim_day, (sim_dt, sim_row) in enumerate(sim_window.iterrows(), 1):
-                            if sim_row['Low'] <= stop_f:
-                                self.recommendations.at[idx, 'exit_price'] = round(stop_f, 2)
-                                self.recommendations.at[idx, 'exit_day'] = sim_day
-                                self.recommendations.at[idx, 'exit_reason'] = 'STOP'
-                                break
-                            elif sim_row['High'] >= target_f:
-                                self.recommendations.at[idx, 'exit_price'] = round(target_f, 2)
-                                self.recommendations.at[idx, 'exit_day'] = sim_day
-                                self.recommendations.at[idx, 'exit_reason'] = 'TARGET'
-                                break
-                        else:
-                            if sim_day >= 30:
-                                last_p = float(sim_window['Close'].iloc[-1]) if not sim_window.empty else signal_price
-                                self.recommendations.at[idx, 'exit_price'] = round(last_p, 2)
-                                self.recommendations.at[idx, 'exit_day'] = sim_day
-                                self.recommendations.at[idx, 'exit_reason'] = 'TIME_30D'
-
-                    # Mark completed if 30d has passed
-                    if days_since >= 30 and not pd.isna(self.recommendations.at[idx, 'return_30d']):
-                        self.recommendations.at[idx, 'status'] = 'COMPLETED'
-
-                time.sleep(1.0)  # Rate limiting
+        # ── Velas de todos los tickers en tandas (price store primero) ────────
+        active_all = active_all[active_all['signal_date'].notna()]
+        starts = active_all.groupby('ticker')['signal_date'].min() - timedelta(days=1)
+        print(f"  Checking {len(starts)} tickers for performance updates...")
+        frames = _fetch_histories(starts, end=(today + timedelta(days=1)).strftime('%Y-%m-%d'))
+        rows = active_all[active_all['ticker'].isin(frames)]
+        if rows.empty:
+            print("  Updated 0 performance checkpoints")
+            self._save_recommendations()
+            return
 
-            except Exception as e:
-                print(f"    Error checking {ticker}: {e}")
+        panel = _long_panel(frames)
+        bench_panel = _long_panel(bench_hists)
+        by_pos = panel.sort_values('pos')   # rangos [lo, hi] de 'pos' → contiguos
+        lows = by_pos['Low'].to_numpy(dtype=float)
+        highs = by_pos['High'].to_numpy(dtype=float)
+        closes = by_pos['Close'].to_numpy(dtype=float)
+        recs = self.recommendations
+        for col in ('return_30d', 'max_drawdown_30d', 'exit_price', 'exit_day', 'exit_reason'):
+            if col not in recs.columns:
+                recs[col] = np.nan
+        if recs['exit_reason'].dtype != object:
+            recs['exit_reason'] = recs['exit_reason'].astype(object)
+
+        idx = rows.index.to_numpy()
+        tickers = rows['ticker'].to_numpy(dtype=object)
+        signal_date = pd.to_datetime(rows['signal_date']).astype('datetime64[ns]').to_numpy()
+        signal_price = pd.to_numeric(rows['signal_price'], errors='coerce').to_numpy(dtype=float)
+        days_since = (today - pd.DatetimeIndex(signal_date)).days.to_numpy()
+        strategy = rows['strategy'].to_numpy() if 'strategy' in rows.columns else np.full(len(rows), None)
+        bench_key = np.where(strategy == 'EU_VALUE', 'VGK', 'SPY').astype(object)
+        b_signal = _asof(bench_panel, bench_key, signal_date, 'Close')
+
+        # ── Checkpoints 7d..365d: un merge_asof por horizonte ─────────────────
+        # (90/180/365d = horizonte real de una tesis value; 7-30d mide
+        # ruido/momentum). Precio = primer cierre en o tras signal+N días.
+        for period in CHECKPOINT_DAYS:
+            col_return, col_price, col_win = f'return_{period}d', f'price_{period}d', f'win_{period}d'
+            bench_col_ret, bench_col_alpha = f'benchmark_return_{period}d', f'alpha_{period}d'
+            for col in (col_return, col_price, bench_col_ret, bench_col_alpha):
+                if col not in recs.columns:
+                    recs[col] = np.nan
+            if col_win not in recs.columns:
+                recs[col_win] = pd.Series(np.nan, index=recs.index, dtype=object)
+            elif recs[col_win].dtype != object:
+                recs[col_win] = recs[col_win].astype(object)
+
+            need = (days_since >= period) & _isna(rows, col_return)
+            check_date = signal_date + np.timedelta64(period, 'D')
+            check_price = np.full(len(rows), np.nan)
+            check_price[need] = _asof(panel, tickers[need], check_date[need], 'Close')
+            hit = ~np.isnan(check_price)
+            if not hit.any():
                 continue
+            check_price = _fix_gbp_scale(check_price, signal_price)
+            pct_return = (check_price - signal_price) / signal_price * 100
+            recs.loc[idx[hit], col_return] = np.round(pct_return[hit], 2)
+            recs.loc[idx[hit], col_price] = np.round(check_price[hit], 2)
+            recs.loc[idx[hit], col_win] = pct_return[hit] > 0
+            updated += int(hit.sum())
+
+            # ── Alpha vs benchmark (SPY; VGK para EU_VALUE) ──────────────────
+            b_need = hit & _isna(rows, bench_col_ret)
+            b_check = np.full(len(rows), np.nan)
+            b_check[b_need] = _asof(bench_panel, bench_key[b_need], check_date[b_need], 'Close')
+            b_ok = b_need & ~np.isnan(b_check) & (b_signal > 0)
+            bench_ret = (b_check - b_signal) / b_signal * 100
+            recs.loc[idx[b_ok], bench_col_ret] = np.round(bench_ret[b_ok], 2)
+            recs.loc[idx[b_ok], bench_col_alpha] = np.round(pct_return[b_ok] - bench_ret[b_ok], 2)
+
+        # ── Max drawdown: mínimo Low en [signal, signal+30d] ──────────────────
+        need_dd = (days_since >= 7) & _isna(rows, 'max_drawdown_30d')
+        if need_dd.any():
+            window_end = np.minimum(signal_date + np.timedelta64(30, 'D'), today.to_datetime64())
+            lo = _asof(panel, tickers[need_dd], signal_date[need_dd], 'pos')
+            hi = _asof(panel, tickers[need_dd], window_end[need_dd], 'pos', direction='backward')
+            min_low = _range_min(lows, lo, hi)
+            dd_idx = idx[need_dd]
+            ok = ~np.isnan(min_low)
+            drawdown = (min_low - signal_price[need_dd]) / signal_price[need_dd] * 100
+            recs.loc[dd_idx[ok], 'max_drawdown_30d'] = np.round(drawdown[ok], 2)
+
+        # ── Simulación de salida stop/target (45 días tras la señal) ──────────
+        stop = _numeric(rows, 'stop_loss')
+        target = _numeric(rows, 'target_price')
+        need_exit = (_isna(rows, 'exit_reason') & stop.notna().to_numpy() & target.notna().to_numpy()
+                     & (stop.fillna(0).to_numpy() != 0) & (target.fillna(0).to_numpy() != 0))
+        if need_exit.any():
+            sim_end = np.minimum(signal_date + np.timedelta64(45, 'D'), today.to_datetime64())
+            lo = _asof(panel, tickers[need_exit], signal_date[need_exit], 'pos', allow_exact_matches=False)
+            hi = _asof(panel, tickers[need_exit], sim_end[need_exit], 'pos', direction='backward')
+            for row_idx, a, b, stop_f, target_f in zip(idx[need_exit], lo, hi,
+                                                       stop.to_numpy()[need_exit],
+                                                       target.to_numpy()[need_exit]):
+                if np.isnan(a) or np.isnan(b) or a > b:
+                    continue
+                a, b = int(a), int(b) + 1
+                # Mismo día con stop y target → cuenta el stop (peor caso)
+                hit_stop = lows[a:b] <= stop_f
+                hit_any = hit_stop | (highs[a:b] >= target_f)
+                if hit_any.any():
+                    first = int(np.argmax(hit_any))
+                    reason = 'STOP' if hit_stop[first] else 'TARGET'
+                    price = float(stop_f if reason == 'STOP' else target_f)
+                    recs.loc[row_idx, ['exit_price', 'exit_day', 'exit_reason']] = [round(price, 2), first + 1, reason]
+                elif b - a >= 30:
+                    recs.loc[row_idx, ['exit_price', 'exit_day', 'exit_reason']] = [round(float(closes[b - 1]), 2), b - a, 'TIME_30D']
+
+        # Mark completed if 30d has passed
+        done = (days_since >= 30) & recs.loc[idx, 'return_30d'].notna().to_numpy()
+        recs.loc[idx[done], 'status'] = 'COMPLETED'
 
         print(f"  Updated {updated} performance checkpoints")
         self._save_recommendations()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Price store — almacén en disco de velas diarias OHLCV, un fichero por ticker.
+
+Soluciona:
+  - Cada etapa del pipeline (VCP, ML, technical_filter, MA/AD filters,
+    pattern_detector, portfolio_tracker, entry_timing_backtest...) volvía a
+    descargar las MISMAS velas diarias de los MISMOS tickers el MISMO día.
+    Con ~3k tickers eso son decenas de miles de round-trips a Yahoo y los
+    sleeps de rate-limit que dominan el tiempo del job.
+
+Diseño:
+  - Formato columnar .npz (numpy, sin dependencias nuevas): índice en int64 ns,
+    una matriz float64 con todas las columnas y los dtypes originales.
+  - Metadatos por fichero:
+      covered_from  primera fecha PEDIDA (no la primera vela: un IPO reciente
+                    tiene menos velas que el rango pedido y eso NO es un hueco)
+      fetched_at    epoch de la última descarga → frescura
+  - Escritura atómica (tmp + os.replace): varios procesos de un Pool pueden
+    escribir el mismo ticker sin dejar ficheros a medias.
+  - Separado por auto_adjust: precios ajustados y sin ajustar no se mezclan.
+
+Este módulo NO habla con Yahoo: solo guarda, lee, decide cobertura y fusiona.
+La orquestación (qué descargar cuando falta algo) vive en
+yfinance_client.get_history, que es quien lo consulta primero.
+"""
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = Path('data/cache/prices')
+
+# Un run completo del pipeline dura <6h: dentro de ese margen las velas
+# descargadas por una etapa sirven a todas las siguientes.
+DEFAULT_TTL_HOURS = 6.0
+
+# Tolerancia relativa al comparar la vela solapada: si Yahoo re-ajustó la
+# serie (dividendo / split), las velas viejas guardadas ya no valen.
+_ADJUST_TOLERANCE = 1e-6
+
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+# ── Period helpers ────────────────────────────────────────────────────────────
+
+def period_window(period: str, today: Optional[pd.Timestamp] = None
+                  ) -> Optional[tuple[pd.Timestamp, Optional[int]]]:
+    """
+    Traduce un period de yfinance a (start, tail_rows).
+
+    - 'Nmo' / 'Ny' / 'Nwk' / 'ytd' → start calendario, tail_rows None
+    - 'Nd'  → Yahoo devuelve N SESIONES, no N días naturales: start holgado
+              (fines de semana y festivos) + tail_rows = N
+    - 'max' u otros → None (no se sirve desde el store)
+    """
+    today = (today if today is not None else pd.Timestamp.now()).normalize()
+    period = (period or '').strip().lower()
+    if period == 'ytd':
+        return pd.Timestamp(year=today.year, month=1, day=1), None
+    m = _PERIOD_RE.match(period)
+    if not m:
+        return None
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == 'd':
+        return today - pd.Timedelta(days=n * 2 + 7), n
+    if unit == 'wk':
+        return today - pd.Timedelta(weeks=n), None
+    if unit == 'mo':
+        return today - pd.DateOffset(months=n), None
+    return today - pd.DateOffset(years=n), None
+
+
+def to_naive(value: Any, tz: Optional[str] = None) -> pd.Timestamp:
+    """Timestamp sin zona, en hora local del mercado si venía con zona."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        if tz:
+            ts = ts.tz_convert(tz)
+        ts = ts.tz_localize(None)
+    return ts
+
+
+# ── Stored entry ──────────────────────────────────────────────────────────────
+
+@dataclass
+class StoredHistory:
+    """Velas de un ticker + metadatos de cobertura."""
+    frame: pd.DataFrame
+    covered_from: pd.Timestamp   # naive, hora local del mercado
+    fetched_at: float            # epoch seconds
+
+    @property
+    def tz(self) -> Optional[str]:
+        tz = getattr(self.frame.index, 'tz', None)
+        return str(tz) if tz is not None else None
+
+    def _naive_index(self) -> pd.DatetimeIndex:
+        idx = self.frame.index
+        return idx.tz_localize(None) if idx.tz is not None else idx
+
+    def fetched_day(self) -> pd.Timestamp:
+        """Día (local del mercado) de la última descarga."""
+        ts = pd.Timestamp(self.fetched_at, unit='s', tz='UTC')
+        return to_naive(ts, self.tz).normalize()
+
+    def is_fresh(self, ttl_seconds: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return (now - self.fetched_at) < ttl_seconds
+
+    def covers(self, start: pd.Timestamp, end: Optional[pd.Timestamp],
+               ttl_seconds: float, now: Optional[float] = None) -> bool:
+        """
+        ¿Se puede servir [start, end) sin ir a Yahoo?
+
+        - start debe caer dentro de lo pedido originalmente (covered_from)
+        - con end en el pasado basta con que la descarga sea POSTERIOR a end:
+          toda vela < end ya era definitiva cuando se guardó (las velas de
+          días anteriores al de la descarga no cambian)
+        - sin end (hasta hoy) manda el TTL
+        """
+        if start < self.covered_from:
+            return False
+        if end is not None and end <= self.fetched_day():
+            return True
+        return self.is_fresh(ttl_seconds, now)
+
+    def slice(self, start: pd.Timestamp, end: Optional[pd.Timestamp] = None,
+              tail_rows: Optional[int] = None) -> pd.DataFrame:
+        idx = self._naive_index()
+        mask = idx >= start
+        if end is not None:
+            mask &= idx < end   # yfinance: end es exclusivo
+        out = self.frame.loc[mask]
+        if tail_rows is not None:
+            out = out.tail(tail_rows)
+        return out.copy()
+
+    def append_start(self) -> pd.Timestamp:
+        """
+        Desde dónde pedir velas nuevas. Se solapan las DOS últimas: la última
+        pudo guardarse intradía (parcial) y se reemplaza; la penúltima es
+        definitiva y sirve para detectar un re-ajuste de la serie.
+        """
+        idx = self._naive_index()
+        return idx[-2].normalize() if len(idx) >= 2 else idx[-1].normalize()
+
+    def merge_trailing(self, fresh: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Fusiona velas nuevas al final. Devuelve None si la vela solapada no
+        coincide (Yahoo re-ajustó precios por dividendo/split) → el caller
+        debe re-descargar el rango completo.
+        """
+        if fresh is None or fresh.empty:
+            return self.frame
+        fresh = _align_tz(fresh, self.tz)
+        fresh_start = fresh.index[0]
+        if fresh_start in self.frame.index and 'Close' in fresh.columns:
+            old = float(self.frame.at[fresh_start, 'Close'])
+            new = float(fresh.at[fresh_start, 'Close'])
+            if abs(old - new) > _ADJUST_TOLERANCE * max(abs(old), 1.0):
+                return None
+        kept = self.frame.loc[self.frame.index < fresh_start]
+        merged = pd.concat([kept, fresh])
+        return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+def _align_tz(df: pd.DataFrame, tz: Optional[str]) -> pd.DataFrame:
+    idx = df.index
+    if tz and getattr(idx, 'tz', None) is not None and str(idx.tz) != tz:
+        df = df.copy()
+        df.index = idx.tz_convert(tz)
+    return df
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class PriceStore:
+    """
+    Almacén de velas diarias en disco: {root}/{adj|raw}/{TICKER}.npz
+
+    Uso (lo hace yfinance_client.get_history, no los scripts):
+        store = PriceStore()
+        entry = store.read('AAPL')
+        if entry and entry.covers(start, None, store.ttl_seconds):
+            df = entry.slice(start)
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_ROOT,
+                 ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def path(self, ticker: str, auto_adjust: bool = True) -> Path:
+        safe = ticker.upper().replace(os.sep, '_').replace('/', '_')
+        return self.root / ('adj' if auto_adjust else 'raw') / f'{safe}.npz'
+
+    def read(self, ticker: str, auto_adjust: bool = True) -> Optional[StoredHistory]:
+        """Entrada guardada o None (no existe / corrupta → se re-descarga)."""
+        path = self.path(ticker, auto_adjust)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                tz = str(z['tz'])
+                index = pd.DatetimeIndex(z['index'].astype('datetime64[ns]'))
+                if tz:
+                    index = index.tz_localize('UTC').tz_convert(tz)
+                columns = [str(c) for c in z['columns']]
+                dtypes = [str(d) for d in z['dtypes']]
+                frame = pd.DataFrame(z['values'], index=index, columns=columns)
+                for col, dtype in zip(columns, dtypes):
+                    if dtype != 'float64':
+                        frame[col] = frame[col].astype(dtype)
+                return StoredHistory(
+                    frame=frame,
+                    covered_from=pd.Timestamp(int(z['covered_from'])),
+                    fetched_at=float(z['fetched_at']),
+                )
+        except (OSError, KeyError, ValueError, TypeError):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    def write(self, ticker: str, entry: StoredHistory, auto_adjust: bool = True) -> bool:
+        """Guarda atómicamente. False si el frame no es guardable (sin fechas)."""
+        frame = entry.frame
+        if not isinstance(frame.index, pd.DatetimeIndex) or frame.empty:
+            return False
+        numeric = frame.select_dtypes(include=[np.number, 'bool'])
+        if numeric.empty:
+            return False
+        tz = entry.tz or ''
+        index = frame.index.tz_convert('UTC').tz_localize(None) if tz else frame.index
+        path = self.path(ticker, auto_adjust)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    index=index.asi8,
+                    columns=np.array([str(c) for c in numeric.columns], dtype=str),
+                    dtypes=np.array([str(d) for d in numeric.dtypes], dtype=str),
+                    values=numeric.to_numpy(dtype='float64'),
+                    tz=np.array(tz),
+                    covered_from=np.array(entry.covered_from.value),
+                    fetched_at=np.array(entry.fetched_at),
+                )
+            os.replace(tmp, path)
+            return True
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except (OSError, UnboundLocalError):
+                pass
+            return False
+
+    def clear(self) -> int:
+        """Borra todo el store. Devuelve nº de ficheros eliminados."""
+        n = 0
+        for p in self.root.glob('*/*.npz'):
+            try:
+                p.unlink()
+                n += 1
+            except OSError:
+                pass
+        return n
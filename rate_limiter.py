@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Token bucket con backoff adaptativo (AIMD) — el presupuesto de llamadas a
+Yahoo que comparte todo el pipeline.
+
+Soluciona:
+  - yfinance_client tenía un único lock de "gap mínimo" por proceso, y encima
+    cada script metía su propio sleep fijo (0.5s en super_score_integrator,
+    0.5s en MeanReversionDetector.scan_tickers, 1.5s en DataProvider). Lento
+    cuando Yahoo va bien y aun así insuficiente cuando empieza a devolver 429.
+  - El Pool de CalibratedVCPScanner.scan_parallel multiplicaba el límite por
+    N workers: cada proceso tenía su propio lock y su propio reloj.
+
+Diseño:
+  - Token bucket: `rate` tokens/s, hasta `burst` acumulados. Cada llamada a
+    Yahoo consume uno; si no hay, se espera lo justo hasta el siguiente.
+  - AIMD (como el control de congestión de TCP):
+      * RateLimitError → rate se divide por 2 (mínimo `min_rate`) y el bucket
+        se vacía — frenar YA, no después de gastar el burst acumulado
+      * cada llamada OK → rate sube `max_rate * increase` hasta `max_rate`
+  - Compartido entre procesos con `path`: el estado (tokens, último refill,
+    rate actual) vive en un fichero de 24 bytes protegido con flock. Los
+    workers de un Pool que apuntan al mismo fichero comparten UN presupuesto
+    y el backoff de uno frena a todos. Sin `path` (o sin fcntl, p.ej.
+    Windows) el estado es local al proceso con un threading.Lock.
+
+Uso (lo hace yfinance_client; los scripts NO deberían dormir por su cuenta):
+    bucket = TokenBucket(rate=6.0, burst=3)
+    bucket.acquire()
+    try:
+        ...llamada...
+        bucket.on_success()
+    except RateLimitError:
+        bucket.on_rate_limit()
+"""
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin coordinación entre procesos
+    fcntl = None
+
+# Env var con el fichero de estado compartido. La fijan los orquestadores que
+# lanzan varios procesos que llaman a Yahoo para que los hijos — incluidos los
+# creados con 'spawn', que reimportan los módulos — usen el mismo bucket.
+SHARED_STATE_ENV = 'YF_RATE_LIMIT_FILE'
+
+_STATE = struct.Struct('ddd')   # tokens, last_refill (epoch), rate actual
+
+
+class TokenBucket:
+    """Token bucket con AIMD, opcionalmente compartido entre procesos."""
+
+    def __init__(self, rate: float, burst: float = 1.0, *,
+                 min_rate: Optional[float] = None,
+                 decrease: float = 0.5,
+                 increase: float = 0.02,
+                 path: Optional[Path | str] = None):
+        """
+        Args:
+            rate: tokens/s máximos (0 o negativo = sin límite)
+            burst: tokens acumulables — llamadas seguidas sin espera
+            min_rate: suelo del backoff (default rate/16)
+            decrease: factor multiplicativo ante RateLimitError
+            increase: fracción de `rate` que se recupera por llamada OK
+            path: fichero de estado compartido entre procesos
+        """
+        self.max_rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = float(min_rate) if min_rate is not None else self.max_rate / 16
+        self.decrease = decrease
+        self.increase = increase
+        self.path = Path(path) if path and fcntl is not None else None
+        self._lock = threading.Lock()
+        # Estado local (se usa solo sin path)
+        self._tokens = self.burst
+        self._last = time.time()
+        self._rate = self.max_rate
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_rate <= 0
+
+    # ── Estado ────────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _state(self) -> Iterator[list[float]]:
+        """[tokens, last, rate] bajo lock; lo que se modifique se persiste."""
+        with self._lock:
+            if self.path is None:
+                state = [self._tokens, self._last, self._rate]
+                yield state
+                self._tokens, self._last, self._rate = state
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.pread(fd, _STATE.size, 0)
+                if len(raw) == _STATE.size:
+                    state = list(_STATE.unpack(raw))
+                else:
+                    state = [self.burst, time.time(), self.max_rate]
+                yield state
+                os.pwrite(fd, _STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def current_rate(self) -> float:
+        with self._state() as st:
+            return st[2]
+
+    # ── API ───────────────────────────────────────────────────────────────────
+
+    def acquire(self) -> float:
+        """Bloquea hasta tener un token. Devuelve los segundos esperados."""
+        if self.unlimited:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._state() as st:
+                now = time.time()
+                tokens, last, rate = st
+                rate = min(self.max_rate, max(self.min_rate, rate))
+                tokens = min(self.burst, tokens + max(0.0, now - last) * rate)
+                if tokens >= 1.0:
+                    st[0], st[1] = tokens - 1.0, now
+                    return waited
+                st[0], st[1] = tokens, now
+                wait = (1.0 - tokens) / rate
+            # Dormir FUERA del lock: los demás procesos siguen pudiendo leer
+            time.sleep(wait)
+            waited += wait
+
+    def on_success(self) -> None:
+        """Aumento aditivo del rate tras una llamada OK."""
+        if self.unlimited:
+            return
+        with self._state() as st:
+            st[2] = min(self.max_rate, st[2] + self.max_rate * self.increase)
+
+    def on_rate_limit(self) -> None:
+        """Decremento multiplicativo + vaciado del bucket tras un 429."""
+        if self.unlimited:
+            return
+        with self._state() as st:
+            st[2] = max(self.min_rate, st[2] * self.decrease)
+            st[0] = 0.0
+            st[1] = time.time()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Returns panel — retornos diarios del universo value, mantenidos por el pipeline.
+
+Soluciona:
+  - /api/correlation-matrix hacía yf.download de 15 tickers × 90 días en CADA
+    petición, dentro del worker web. Ahora el pipeline deja en docs/ un panel
+    de retornos diarios (fechas × tickers) y el endpoint calcula la matriz en
+    local: ventana configurable, universo completo y shrinkage sin red.
+
+Diseño:
+  - Formato .npz (igual que price_store): fechas en int64 ns, tickers y una
+    matriz float32 de retornos con NaN donde un ticker no cotizó.
+  - Cada retorno se calcula sobre la serie de SU ticker antes de alinear: un
+    festivo europeo es NaN en la fecha alineada, no un retorno 0.
+  - Escritura atómica (tmp + os.replace): la recarga en caliente de ticker_api
+    nunca ve un fichero a medias.
+  - La correlación es pairwise-complete (como DataFrame.corr) pero vectorizada
+    con productos de matrices, y admite shrinkage hacia correlación constante.
+
+Uso (pipeline, tras los scanners value):
+    python3 returns_panel.py              # universo de VALUE_UNIVERSE_CSVS
+    python3 returns_panel.py --period 2y
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DOCS = Path('docs')
+PANEL_FILENAME = 'returns_panel.npz'
+
+# CSVs value cuyo universo mantiene el panel (US + EU)
+VALUE_UNIVERSE_CSVS = (
+    'value_conviction.csv',
+    'value_opportunities.csv',
+    'value_opportunities_filtered.csv',
+    'european_value_conviction.csv',
+    'european_value_opportunities.csv',
+    'european_value_opportunities_filtered.csv',
+)
+
+_log = logging.getLogger(__name__)
+
+
+# ── Universe ──────────────────────────────────────────────────────────────────
+
+def universe_tickers(docs: Path = DOCS, csv_names: Sequence[str] = VALUE_UNIVERSE_CSVS) -> list[str]:
+    """Tickers únicos de los CSVs value, en el orden en que aparecen."""
+    seen: dict[str, None] = {}
+    for name in csv_names:
+        path = Path(docs) / name
+        if not path.exists():
+            continue
+        try:
+            col = pd.read_csv(path, usecols=['ticker'])['ticker']
+        except Exception:
+            continue
+        for t in col.dropna().astype(str).str.upper().str.strip():
+            if t:
+                seen.setdefault(t, None)
+    return list(seen)
+
+
+# ── Build / persist ───────────────────────────────────────────────────────────
+
+def build_panel(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Panel fechas × tickers de retornos diarios a partir de velas OHLCV."""
+    series = {}
+    for ticker, hist in frames.items():
+        if hist is None or hist.empty or 'Close' not in hist.columns:
+            continue
+        close = hist['Close'].astype(float)
+        idx = close.index
+        if getattr(idx, 'tz', None) is not None:
+            close.index = idx.tz_localize(None)
+        close.index = close.index.normalize()
+        close = close[~close.index.duplicated(keep='last')]
+        series[ticker] = close.pct_change().iloc[1:]
+    if not series:
+        return pd.DataFrame()
+    return pd.DataFrame(series).sort_index()
+
+
+def save_panel(panel: pd.DataFrame, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.panel-', suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(
+                f,
+                dates=panel.index.values.astype('datetime64[ns]').astype(np.int64),
+                tickers=np.asarray(panel.columns, dtype=str),
+                returns=panel.to_numpy(dtype=np.float32),
+                built_at=np.float64(time.time()),
+            )
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def load_panel(path: Path, logger: Optional[logging.Logger] = None) -> pd.DataFrame:
+    """Panel guardado por save_panel; DataFrame vacío si no existe o no se lee."""
+    path = Path(path)
+    log = logger or _log
+    if not path.exists():
+        log.warning("Panel de retornos no encontrado: %s", path)
+        return pd.DataFrame()
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            return pd.DataFrame(
+                npz['returns'],
+                index=pd.to_datetime(npz['dates']),
+                columns=[str(t) for t in npz['tickers']],
+            )
+    except Exception:
+        log.exception("Error cargando panel de retornos: %s", path)
+        return pd.DataFrame()
+
+
+# ── Correlation ───────────────────────────────────────────────────────────────
+
+def pairwise_corr(returns: np.ndarray, min_obs: int = 2) -> np.ndarray:
+    """
+    Correlación de Pearson por pares con las observaciones comunes a cada par
+    (mismo resultado que DataFrame.corr(min_periods=min_obs)), en O(1)
+    productos de matrices en vez de un bucle por par.
+
+    Pares con menos de `min_obs` observaciones comunes o varianza nula → NaN.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    mask = ~np.isnan(x)
+    m = mask.astype(np.float64)
+    x0 = np.where(mask, x, 0.0)
+
+    n = m.T @ m                       # obs comunes por par
+    sx = x0.T @ m                     # Σx_i sobre las filas comunes a (i, j)
+    sxx = (x0 * x0).T @ m             # Σx_i² idem
+    sxy = x0.T @ x0                   # Σx_i·x_j
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr[(n < min_obs) | ~np.isfinite(corr)] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    diag = np.diag_indices_from(corr)
+    corr[diag] = np.where(np.isnan(np.diag(corr)), np.nan, 1.0)
+    return corr
+
+
+def shrink_corr(corr: np.ndarray, intensity: float) -> np.ndarray:
+    """
+    Shrinkage hacia correlación constante (la media de las correlaciones
+    fuera de la diagonal): (1-δ)·C + δ·F. Con muchos tickers y pocas
+    observaciones la matriz muestral exagera las correlaciones extremas.
+    """
+    intensity = float(np.clip(intensity, 0.0, 1.0))
+    if intensity == 0.0:
+        return corr
+    k = corr.shape[0]
+    off = ~np.eye(k, dtype=bool)
+    mean_off = np.nanmean(corr[off]) if k > 1 else 0.0
+    target = np.full_like(corr, mean_off)
+    np.fill_diagonal(target, 1.0)
+    return (1.0 - intensity) * corr + intensity * target
+
+
+def correlation_matrix(panel: pd.DataFrame, tickers: Iterable[str], window: int,
+                       min_obs: Optional[int] = None, shrinkage: float = 0.0
+                       ) -> tuple[pd.DataFrame, int]:
+    """
+    (matriz de correlación, filas usadas) de las últimas `window` sesiones del
+    panel para los `tickers` que estén en él. Se descartan los tickers con
+    menos de `min_obs` retornos en la ventana (por defecto la mitad).
+    """
+    cols = [t for t in dict.fromkeys(tickers) if t in panel.columns]
+    window_df = panel[cols].iloc[-window:].dropna(how='all')
+    min_obs = max(2, window // 2) if min_obs is None else min_obs
+    valid = window_df.columns[window_df.notna().sum().to_numpy() >= min_obs]
+    window_df = window_df[valid]
+    if window_df.shape[1] == 0:
+        return pd.DataFrame(), len(window_df)
+    corr = shrink_corr(pairwise_corr(window_df.to_numpy(), min_obs), shrinkage)
+    return pd.DataFrame(corr, index=valid, columns=valid), len(window_df)
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the daily returns panel for ticker_api')
+    parser.add_argument('--docs', default=str(DOCS), help='Docs directory (default: docs)')
+    parser.add_argument('--period', default='1y', help='History period per ticker (default: 1y)')
+    args = parser.parse_args()
+
+    from yfinance_client import get_history_batch
+
+    docs = Path(args.docs)
+    tickers = universe_tickers(docs)
+    if not tickers:
+        print(f"⚠️  Sin tickers value en {docs} — panel no actualizado")
+        return
+    frames, errors = get_history_batch(tickers, period=args.period)
+    panel = build_panel(frames)
+    if panel.empty:
+        print("⚠️  Sin historiales — panel no actualizado")
+        return
+    save_panel(panel, docs / PANEL_FILENAME)
+    print(f"✅ Panel de retornos: {panel.shape[1]} tickers × {panel.shape[0]} sesiones "
+          f"({len(errors)} sin datos) → {docs / PANEL_FILENAME}")
+
+
+if __name__ == '__main__':
+    main()
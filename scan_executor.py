@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Scan executor — escaneo concurrente de tickers para los scanners de opciones.
+
+Soluciona:
+  - OptionsFlowDetector.scan_tickers iba ticker a ticker con un
+    time.sleep(0.5) fijo: una de las etapas secuenciales más largas del job
+    diario, aunque casi todo el tiempo fuera espera de red.
+  - unusual_flow_scanner.scan ya usaba un ThreadPoolExecutor, pero cada
+    thread dormía SLEEP_BETWEEN por su cuenta: sin presupuesto común, N
+    threads eran N ritmos independientes contra Yahoo.
+  - Un ticker colgado (Yahoo a veces tarda minutos en una cadena) retenía
+    el scan entero sin que el log dijera cuál era.
+
+Diseño:
+  - run_scan(fn, tickers) reparte fn(ticker) en un pool de hilos. El ritmo
+    lo pone el token bucket de yfinance_client (option_chains y
+    acquire_rate_budget gastan de él): es el presupuesto global del proceso
+    — y de varios procesos si está compartido —, así que nada de sleeps.
+  - Timeout por ticker, contado desde que EMPIEZA a ejecutarse (no desde que
+    se encola). Pasado el plazo se abandona: su resultado se descarta y
+    queda como timeout. Un thread no se puede matar; el colgado sigue hasta
+    que yfinance corte, pero el scan no lo espera (shutdown sin wait).
+  - Ese thread sigue ocupando su hueco del pool: si TODOS los huecos quedan
+    en manos de tickers abandonados, la cola no avanzaría hasta que yfinance
+    los suelte, así que los tickers aún no empezados se cancelan ya.
+  - deadline del scan completo (DEFAULT_SCAN_DEADLINE): al vencer se
+    cancelan los tickers aún no empezados y se abandonan los que corren.
+    Acota el scan aunque los cuelgues no lleguen a llenar el pool.
+  - ScanReport: contadores por estado, llamadas a Yahoo gastadas (delta de
+    get_stats) e histograma de latencias por ticker con p50/p95.
+
+Uso:
+    results, report = run_scan(analyze, tickers, label='options_flow',
+                               max_workers=6, ticker_timeout=60,
+                               on_result=lambda t, r: print(t))
+    print(report.format())
+"""
+from __future__ import annotations
+
+import logging
+import time
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from yfinance_client import get_stats
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 6
+DEFAULT_TICKER_TIMEOUT = 60.0
+DEFAULT_SCAN_DEADLINE = 15 * 60.0
+
+# Límites superiores (s) de los cubos del histograma de latencias.
+LATENCY_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+# Cada cuánto se revisan timeouts mientras no termina ningún ticker.
+_POLL_SECONDS = 0.25
+
+
+def _bucket_labels() -> list[str]:
+    labels, lo = [], 0.0
+    for hi in LATENCY_BUCKETS:
+        labels.append(f'{lo:g}-{hi:g}s')
+        lo = hi
+    labels.append(f'>{lo:g}s')
+    return labels
+
+
+@dataclass
+class ScanReport:
+    """Resultado agregado de un run_scan."""
+    label: str
+    total: int = 0
+    ok: int = 0                  # fn devolvió un resultado
+    empty: int = 0               # fn devolvió None (sin señal / sin opciones)
+    failed: int = 0              # fn lanzó
+    timed_out: list[str] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
+    latencies: dict[str, float] = field(default_factory=dict)   # solo terminados
+    wall_s: float = 0.0
+    yahoo_calls: int = 0
+    rate_limited: int = 0
+
+    def histogram(self) -> dict[str, int]:
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for seconds in self.latencies.values():
+            counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        return dict(zip(_bucket_labels(), counts))
+
+    def percentile(self, q: float) -> Optional[float]:
+        values = sorted(self.latencies.values())
+        if not values:
+            return None
+        return values[int(round(q / 100 * (len(values) - 1)))]
+
+    def summary(self) -> dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            'total':        self.total,
+            'ok':           self.ok,
+            'empty':        self.empty,
+            'failed':       self.failed,
+            'timed_out':    list(self.timed_out),
+            'cancelled':    list(self.cancelled),
+            'wall_s':       round(self.wall_s, 1),
+            'yahoo_calls':  self.yahoo_calls,
+            'rate_limited': self.rate_limited,
+            'latency_p50':  round(p50, 2) if p50 is not None else None,
+            'latency_p95':  round(p95, 2) if p95 is not None else None,
+            'latency_hist': self.histogram(),
+        }
+
+    def format(self) -> str:
+        s = self.summary()
+        lines = [
+            f"   ⏱️  {self.label}: {s['total']} tickers en {s['wall_s']:.1f}s — "
+            f"{s['ok']} con señal, {s['empty']} sin, {s['failed']} errores, "
+            f"{len(self.timed_out)} timeout, {len(self.cancelled)} cancelados",
+            f"   Yahoo: {s['yahoo_calls']} llamadas, {s['rate_limited']} rate-limited | "
+            f"latencia p50={s['latency_p50']}s p95={s['latency_p95']}s",
+            '   ' + '  '.join(f'{k}:{v}' for k, v in s['latency_hist'].items()),
+        ]
+        if self.timed_out:
+            lines.append(f"   Timeout: {', '.join(self.timed_out[:10])}")
+        return '\n'.join(lines)
+
+
+def run_scan(
+    fn: Callable[[str], Any],
+    tickers: Iterable[str],
+    *,
+    label: str = 'scan',
+    max_workers: int = DEFAULT_WORKERS,
+    ticker_timeout: Optional[float] = DEFAULT_TICKER_TIMEOUT,
+    deadline: Optional[float] = DEFAULT_SCAN_DEADLINE,
+    on_result: Optional[Callable[[str, Any], None]] = None,
+    progress_every: int = 25,
+) -> tuple[dict[str, Any], ScanReport]:
+    """
+    Ejecuta fn(ticker) para cada ticker en un pool de `max_workers` hilos.
+
+    Devuelve (results, report): results = {ticker: valor} de los que
+    devolvieron algo distinto de None, en orden de llegada. on_result se
+    llama en el thread del caller (prints sin intercalar).
+
+    :param ticker_timeout: segundos por ticker desde que empieza; None = sin límite
+    :param deadline: segundos para el scan completo; None = sin límite
+        (entonces solo el pool bloqueado corta la cola)
+    """
+    unique = list(dict.fromkeys(t for t in tickers if t))
+    report = ScanReport(label=label, total=len(unique))
+    results: dict[str, Any] = {}
+    started: dict[str, float] = {}
+    stats_before = get_stats()
+    t0 = time.monotonic()
+
+    def _task(ticker: str) -> tuple[Any, float]:
+        started[ticker] = time.monotonic()
+        value = fn(ticker)
+        return value, time.monotonic() - started[ticker]
+
+    workers = max(1, max_workers)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {pool.submit(_task, t): t for t in unique}
+    pending = set(futures)
+    abandoned: set = set()          # timeout, pero su thread sigue ocupado
+    finished_count = 0
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ticker = futures[fut]
+                try:
+                    value, elapsed = fut.result()
+                except Exception as exc:
+                    report.failed += 1
+                    _logger.debug("%s: %s falló: %s", label, ticker, exc)
+                    continue
+                report.latencies[ticker] = elapsed
+                if value is None:
+                    report.empty += 1
+                    continue
+                report.ok += 1
+                results[ticker] = value
+                if on_result is not None:
+                    on_result(ticker, value)
+
+            now = time.monotonic()
+            if ticker_timeout is not None:
+                slow = [f for f in pending if not f.done() and futures[f] in started
+                        and now - started[futures[f]] > ticker_timeout]
+                for fut in slow:
+                    pending.discard(fut)
+                    abandoned.add(fut)
+                    report.timed_out.append(futures[fut])
+            abandoned = {f for f in abandoned if not f.done()}
+            if len(abandoned) >= workers and pending:
+                queued = [f for f in pending if futures[f] not in started and f.cancel()]
+                for fut in queued:
+                    pending.discard(fut)
+                    report.cancelled.append(futures[fut])
+                if queued:
+                    _logger.warning("%s: pool bloqueado por %d tickers colgados; "
+                                    "%d en cola cancelados", label, len(abandoned), len(queued))
+            if deadline is not None and now - t0 > deadline and pending:
+                for fut in pending:
+                    (report.cancelled if fut.cancel() else report.timed_out).append(futures[fut])
+                pending = set()
+
+            before, finished_count = finished_count, report.total - len(pending)
+            if progress_every and finished_count // progress_every > before // progress_every:
+                print(f'   Progreso: {finished_count}/{report.total} '
+                      f'({now - t0:.0f}s, {len(report.timed_out)} timeout)')
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    stats_after = get_stats()
+    report.wall_s = time.monotonic() - t0
+    report.yahoo_calls = max(0, stats_after['calls_total'] - stats_before['calls_total'])
+    report.rate_limited = max(0, stats_after['rate_limited'] - stats_before['rate_limited'])
+    if report.timed_out:
+        _logger.warning("%s: %d tickers abandonados por timeout: %s",
+                        label, len(report.timed_out), ', '.join(report.timed_out[:10]))
+    return results, report
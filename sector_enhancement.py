@@ -135,13 +135,18 @@ class SectorEnhancement:
 
         return True
 
-    def map_ticker_to_sector(self, ticker):
-        """Mapea ticker a sector DJ, usando caché si está disponible"""
+    def map_ticker_to_sector(self, ticker, info=None):
+        """Mapea ticker a sector DJ, usando caché si está disponible
+
+        Args:
+            info: .info ya descargado; si es None se pide a yfinance
+        """
         if ticker in self.ticker_to_sector:
             return self.ticker_to_sector[ticker].get('dj_ticker')
 
         try:
-            info = yf.Ticker(ticker).info
+            if info is None:
+                info = yf.Ticker(ticker).info
             sector = info.get('sector', '')
             self.ticker_to_sector[ticker] = {
                 'sector': sector,
@@ -154,7 +159,7 @@ class SectorEnhancement:
             self.ticker_to_sector[ticker] = {'sector': '', 'industry': '', 'dj_ticker': None}
             return None
 
-    def calculate_sector_score(self, ticker, use_cache=True):
+    def calculate_sector_score(self, ticker, use_cache=True, info=None):
         """
         Calcula sector score dinámico (0-100) basado en DJ Sectorial
 
@@ -165,7 +170,7 @@ class SectorEnhancement:
         """
         # Mapear ticker a sector DJ
         if ticker not in self.ticker_to_sector or not use_cache:
-            dj_ticker = self.map_ticker_to_sector(ticker)
+            dj_ticker = self.map_ticker_to_sector(ticker, info=info)
         else:
             dj_ticker = self.ticker_to_sector[ticker]['dj_ticker']
 
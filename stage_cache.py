@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+STAGE CACHE — caché por contenido de las etapas de pipeline_runner.py
+
+Soluciona:
+  - Etapas que son función pura de sus ficheros de docs/ (owner_earnings,
+    generate_insights, score_drift_detector...) se recalculaban en cada run,
+    también al relanzar el pipeline tras un fallo parcial o cuando el cambio
+    de aguas arriba no tocaba sus entradas, y volvían a pegarle a Yahoo y a
+    los LLM.
+
+Diseño:
+  - Clave = sha256 de: nombre y argumentos de la etapa + digest de cada
+    fichero que declara en `reads` (los que falten cuentan como ausentes) +
+    digest del código (el script y, transitivamente, los módulos del repo
+    que importa). Con Stage.cache == 'daily' entra también la fecha del
+    run: para etapas cuya salida depende de "hoy".
+  - Tras un run OK se guardan los ficheros de `writes` modificados por la
+    etapa como blobs direccionados por contenido (data/cache/stages/blobs/)
+    y un manifiesto {ruta: digest} por clave. Un hit restaura esos ficheros
+    en docs/ sin ejecutar nada.
+  - Los digests de docs/ se memorizan por (tamaño, mtime_ns) en
+    digests.json para no rehashear history/ en cada etapa.
+  - Escrituras atómicas (tmp + os.replace): dos etapas en paralelo pueden
+    compartir blobs sin pisarse.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Optional
+
+from pipeline_runner import DOCS, docs_files
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = ROOT / 'data' / 'cache' / 'stages'
+
+_CHUNK = 1 << 20
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.stage-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+# ── Versión del código ────────────────────────────────────────────────────────
+
+def _module_file(name: str, code_root: Path) -> Optional[Path]:
+    """Fichero del módulo `name` si vive en el repo (None si es de terceros)."""
+    base = code_root.joinpath(*name.split('.'))
+    for candidate in (base.with_suffix('.py'), base / '__init__.py'):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _imports(path: Path, code_root: Path) -> set[Path]:
+    try:
+        tree = ast.parse(path.read_text(encoding='utf-8'))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return set()
+    package = path.parent.relative_to(code_root).parts
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package[:len(package) - node.level + 1]
+                base = '.'.join((*parts, node.module) if node.module else parts)
+            else:
+                base = node.module or ''
+            names.append(base)
+            names.extend(f'{base}.{alias.name}' for alias in node.names if base)
+    found = set()
+    for name in names:
+        # 'a.b.c' → también 'a.b' y 'a' (sus __init__ se ejecutan)
+        parts = name.split('.')
+        for i in range(len(parts), 0, -1):
+            f = _module_file('.'.join(parts[:i]), code_root)
+            if f is not None:
+                found.add(f)
+    return found
+
+
+def code_files(cmd: Iterable[str], code_root: Path = ROOT) -> list[Path]:
+    """Script de `cmd` (o módulo de `-m`) y los módulos del repo que importa."""
+    args = list(cmd)[1:]
+    entry = None
+    if args[:1] == ['-m'] and len(args) > 1:
+        entry = _module_file(args[1], code_root)
+    elif args:
+        candidate = code_root / args[0]
+        entry = candidate if candidate.is_file() else None
+    if entry is None:
+        return []
+    seen, todo = set(), [entry]
+    while todo:
+        f = todo.pop()
+        if f in seen:
+            continue
+        seen.add(f)
+        todo.extend(_imports(f, code_root) - seen)
+    return sorted(seen)
+
+
+# ── Caché ─────────────────────────────────────────────────────────────────────
+
+class StageCache:
+    def __init__(self, root: Path = CACHE_DIR, docs: Path = DOCS,
+                 code_root: Path = ROOT, today: Optional[str] = None):
+        self.root = Path(root)
+        self.docs = Path(docs)
+        self.code_root = Path(code_root)
+        self.today = today or date.today().isoformat()
+        self._lock = threading.Lock()
+        self._digests: dict[str, list] = self._load_digests()
+        self._code: dict[tuple, dict] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0}
+
+    # digests de ficheros, memorizados por (tamaño, mtime_ns)
+    def _load_digests(self) -> dict:
+        try:
+            return json.loads((self.root / 'digests.json').read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def save_digests(self) -> None:
+        with self._lock:
+            data = json.dumps(self._digests, sort_keys=True).encode()
+        _atomic_write(self.root / 'digests.json', data)
+
+    def digest(self, path: Path) -> Optional[str]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path.resolve())
+        with self._lock:
+            memo = self._digests.get(key)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        sha = _sha256_file(path)
+        with self._lock:
+            self._digests[key] = [st.st_size, st.st_mtime_ns, sha]
+        return sha
+
+    def _code_digest(self, stage) -> dict:
+        with self._lock:
+            cached = self._code.get(stage.cmd)
+        if cached is None:
+            cached = {str(f.relative_to(self.code_root)): self.digest(f)
+                      for f in code_files(stage.cmd, self.code_root)}
+            with self._lock:
+                self._code[stage.cmd] = cached
+        return cached
+
+    def key(self, stage) -> str:
+        inputs = {}
+        for pattern in stage.reads:
+            files = docs_files(self.docs, pattern)
+            if not files:
+                inputs[pattern] = None
+            for f in files:
+                inputs[str(f.relative_to(self.docs))] = self.digest(f)
+        material = {
+            'stage': stage.name,
+            'args': list(stage.cmd[1:]),
+            'inputs': dict(sorted(inputs.items())),
+            'code': self._code_digest(stage),
+        }
+        if stage.cache == 'daily':
+            material['date'] = self.today
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    # manifiestos y blobs
+    def _manifest_path(self, stage, key: str) -> Path:
+        return self.root / 'manifests' / stage.name / f'{key}.json'
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.root / 'blobs' / sha[:2] / sha
+
+    def lookup(self, stage, key: str) -> Optional[dict]:
+        """Manifiesto {ruta relativa a docs: digest} si está completo, si no None."""
+        try:
+            manifest = json.loads(self._manifest_path(stage, key).read_text())
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is not None and all(self._blob_path(sha).is_file() for sha in manifest.values()):
+            with self._lock:
+                self.stats['hits'] += 1
+            return manifest
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def restore(self, manifest: dict) -> int:
+        """Copia los blobs a docs/. Devuelve los bytes escritos."""
+        total = 0
+        for rel, sha in manifest.items():
+            dest = self.docs / rel
+            if dest.is_file() and self.digest(dest) == sha:
+                continue
+            data = self._blob_path(sha).read_bytes()
+            _atomic_write(dest, data)
+            total += len(data)
+        return total
+
+    def store(self, stage, key: str, since: float) -> dict:
+        """Guarda los `writes` de la etapa modificados desde `since`."""
+        manifest = {}
+        for f in sorted({f for p in stage.writes for f in docs_files(self.docs, p)}):
+            try:
+                if f.stat().st_mtime < since:
+                    continue
+            except OSError:
+                continue
+            sha = self.digest(f)
+            blob = self._blob_path(sha)
+            if not blob.is_file():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=blob.parent, prefix='.stage-')
+                os.close(fd)
+                shutil.copyfile(f, tmp)
+                os.replace(tmp, blob)
+            manifest[str(f.relative_to(self.docs))] = sha
+        _atomic_write(self._manifest_path(stage, key), json.dumps(manifest, indent=1, sort_keys=True).encode())
+        with self._lock:
+            self.stats['stored'] += 1
+        return manifest
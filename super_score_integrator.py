@@ -22,7 +22,7 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 import json
-import time
+import hashlib
 import argparse
 from opportunity_validator import OpportunityValidator
 from value_bands import UPSIDE_MIN, UPSIDE_GOLDEN_MAX, UPSIDE_HARD_REJECT, VALUE_SCORE_MIN
@@ -36,8 +36,9 @@ from moving_average_filter import MovingAverageFilter
 from accumulation_distribution_filter import AccumulationDistributionFilter
 from float_filter import FloatFilter
 
-# Rate limit delay between yfinance API calls (seconds)
-YFINANCE_RATE_DELAY = 0.5
+# Rate limit: lo aplica el token bucket compartido de yfinance_client (todas
+# las llamadas de los filtros y del ticker cache pasan por él). Nada de sleeps
+# fijos por ticker aquí.
 
 # Un upside de modelo propio fuera de ±200% es un dato roto (divisa sin
 # convertir en ADR), no una valoración: se descarta al triangular.
@@ -47,15 +48,59 @@ YFINANCE_RATE_DELAY = 0.5
 # no debe arrastrar todo el integrator para reusar una función pura.
 from upside_triangulation import add_upside_triangulation, MODEL_UPSIDE_SANE_MAX  # noqa: E402,F401
 
+# Entradas del integrador. La huella (sha1 del contenido, no el mtime: un
+# checkout lo cambia sin tocar datos) decide qué se recalcula en cada run.
+INPUT_FILES = {
+    'vcp':          Path('docs/reports/vcp/latest.csv'),
+    'ml':           Path('docs/ml_win_probability.json'),
+    'fundamental':  Path('docs/fundamental_scores.csv'),
+    'options_flow': Path('docs/options_flow.csv'),
+    '5d':           Path('docs/super_opportunities_5d_complete_with_earnings.csv'),
+}
+
+# Estado incremental: merge cacheado + resultado de MA/A-D/Float por ticker.
+# En CI se restaura con actions/cache (job core-scoring de daily-analysis.yml).
+# El merge vale entre días mientras las entradas no cambien; el estado de
+# filtros solo dentro de la misma reference_date (leen precios), así que en
+# el run diario arranca en frío y lo aprovechan los re-runs del mismo día.
+INCREMENTAL_CACHE_DIR = Path('cache/super_score')
+
+# Código que produce cada caché: si cambia, lo guardado no se reutiliza
+# (un cambio de lógica no puede reproducir merges o filtros viejos).
+_MERGE_CODE = (Path(__file__),)
+_FILTER_CODE = (Path(__file__), Path('moving_average_filter.py'),
+                Path('accumulation_distribution_filter.py'), Path('float_filter.py'))
+
+
+def _code_digest(paths) -> str:
+    """sha1 del fuente de los módulos dados (los que falten no cuentan)"""
+    h = hashlib.sha1()
+    root = Path(__file__).resolve().parent
+    for path in paths:
+        path = path if path.is_absolute() else root / path
+        if path.exists():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+# Columnas de cada filtro que se persisten (las únicas que se mergean después)
+_FILTER_KEYS = {
+    'ma':    ('ticker', 'passes', 'score', 'reason'),
+    'ad':    ('ticker', 'signal', 'score', 'reason'),
+    'float': ('ticker', 'float_category', 'shares_outstanding_millions'),
+}
+
 
 class SuperScoreIntegrator:
     """Integra VCP, ML y Fundamental scores en Super Score Ultimate"""
 
-    def __init__(self, as_of_date: str = None):
+    def __init__(self, as_of_date: str = None, incremental: bool = True):
         """Initialize Super Score Integrator
 
         Args:
             as_of_date: Historical date (YYYY-MM-DD) for scoring. Used for timestamps.
+            incremental: Reutiliza el merge y los filtros por ticker cuyas
+                         entradas no cambiaron desde el último run (False = todo
+                         desde cero)
         """
         # Weights para cada sistema
         self.weights = {
@@ -66,6 +111,8 @@ class SuperScoreIntegrator:
 
         # 🔴 FIX LOOK-AHEAD BIAS: Store as_of_date for timestamps
         self.as_of_date = as_of_date
+        self.incremental = incremental
+        self.cache_dir = INCREMENTAL_CACHE_DIR
         if as_of_date:
             print(f"📅 Super Score Integrator: Historical mode (as_of_date={as_of_date})")
 
@@ -86,38 +133,48 @@ class SuperScoreIntegrator:
         # 🔴 FIX LOOK-AHEAD BIAS: Use reference_date > as_of_date > today
         self.reference_date = reference_date if reference_date else (self.as_of_date if self.as_of_date else datetime.now().strftime('%Y-%m-%d'))
 
-        # 1. Cargar VCP scores
-        vcp_df = self._load_vcp_scores()
-        print(f"✅ VCP: {len(vcp_df)} tickers cargados")
+        # 0. Huella de las entradas: si ninguna cambió, el merge es el mismo
+        fingerprints = self._fingerprint_inputs()
+        integrated_df = self._load_cached_merge(fingerprints)
+
+        if integrated_df is None:
+            # 1. Cargar VCP scores
+            vcp_df = self._load_vcp_scores()
+            print(f"✅ VCP: {len(vcp_df)} tickers cargados")
 
-        # 2. Cargar ML scores
-        ml_df = self._load_ml_scores()
-        print(f"✅ ML: {len(ml_df)} tickers cargados")
+            # 2. Cargar ML scores
+            ml_df = self._load_ml_scores()
+            print(f"✅ ML: {len(ml_df)} tickers cargados")
 
-        # 3. Cargar Fundamental scores
-        fundamental_df = self._load_fundamental_scores()
-        print(f"✅ Fundamental: {len(fundamental_df)} tickers cargados")
+            # 3. Cargar Fundamental scores
+            fundamental_df = self._load_fundamental_scores()
+            print(f"✅ Fundamental: {len(fundamental_df)} tickers cargados")
 
-        # 4. Cargar Options Flow
-        options_df = self._load_options_flow()
-        print(f"✅ Options Flow: {len(options_df)} tickers cargados")
+            # 4. Cargar Options Flow
+            options_df = self._load_options_flow()
+            print(f"✅ Options Flow: {len(options_df)} tickers cargados")
 
-        # 5. Cargar 5D data (insiders/institutional)
-        data_5d = self._load_5d_opportunities()
-        print(f"✅ 5D Data (insiders/institutional): {len(data_5d)} tickers cargados")
+            # 5. Cargar 5D data (insiders/institutional)
+            data_5d = self._load_5d_opportunities()
+            print(f"✅ 5D Data (insiders/institutional): {len(data_5d)} tickers cargados")
 
-        # 6. Merge todos los dataframes
-        print(f"\n🔄 Integrando scores...")
-        integrated_df = self._merge_scores(vcp_df, ml_df, fundamental_df, options_df, data_5d)
+            # 6. Merge todos los dataframes
+            print(f"\n🔄 Integrando scores...")
+            integrated_df = self._merge_scores(vcp_df, ml_df, fundamental_df, options_df, data_5d)
+            self._save_cached_merge(integrated_df, fingerprints)
 
         print(f"✅ Integración completada: {len(integrated_df)} tickers con scores completos")
 
+        # Huella por ticker de sus columnas de entrada: solo los tickers cuya
+        # fila cambió vuelven a pasar por los filtros (que descargan precios)
+        input_hashes = self._ticker_input_hashes(integrated_df)
+
         # 5. Calcular Super Score Ultimate
         integrated_df = self._calculate_super_score(integrated_df)
 
         # 6. Aplicar filtros profesionales (MA, Market Regime, A/D, Float)
         print("\n🔍 Aplicando filtros profesionales...")
-        integrated_df = self._apply_advanced_filters(integrated_df)
+        integrated_df = self._apply_advanced_filters(integrated_df, input_hashes=input_hashes)
 
         # 7. Determinar tier final
         integrated_df['tier'] = integrated_df['super_score_ultimate'].apply(self._get_tier)
@@ -173,7 +230,7 @@ class SuperScoreIntegrator:
 
     def _load_vcp_scores(self) -> pd.DataFrame:
         """Carga scores del VCP scanner"""
-        vcp_path = Path('docs/reports/vcp/latest.csv')
+        vcp_path = INPUT_FILES['vcp']
 
         if not vcp_path.exists():
             print("⚠️  No se encontró VCP scan, usando fallback vacío")
@@ -212,7 +269,7 @@ class SuperScoreIntegrator:
         señales VALUE — reemplazo directo, mismo contrato de columnas
         (ticker, ml_score 0-100) para no tocar nada río abajo.
         """
-        ml_path = Path('docs/ml_win_probability.json')
+        ml_path = INPUT_FILES['ml']
 
         if not ml_path.exists():
             print("⚠️  No se encontró ML win probability, usando fallback vacío")
@@ -232,7 +289,7 @@ class SuperScoreIntegrator:
 
     def _load_fundamental_scores(self) -> pd.DataFrame:
         """Carga scores del fundamental analyzer"""
-        fundamental_path = Path('docs/fundamental_scores.csv')
+        fundamental_path = INPUT_FILES['fundamental']
 
         if not fundamental_path.exists():
             print("⚠️  No se encontró Fundamental scores, usando fallback vacío")
@@ -282,7 +339,7 @@ class SuperScoreIntegrator:
 
     def _load_options_flow(self) -> pd.DataFrame:
         """Carga datos de options flow"""
-        path = Path('docs/options_flow.csv')
+        path = INPUT_FILES['options_flow']
         if not path.exists():
             return pd.DataFrame()
         df = pd.read_csv(path)
@@ -331,7 +388,7 @@ class SuperScoreIntegrator:
 
     def _load_5d_opportunities(self) -> pd.DataFrame:
         """Carga 5D opportunities para datos de insiders/institucionales"""
-        path = Path('docs/super_opportunities_5d_complete_with_earnings.csv')
+        path = INPUT_FILES['5d']
         if not path.exists():
             return pd.DataFrame()
         df = pd.read_csv(path)
@@ -339,6 +396,83 @@ class SuperScoreIntegrator:
         available = [c for c in cols if c in df.columns]
         return df[available] if available else pd.DataFrame()
 
+    # ── Estado incremental ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _fingerprint_inputs() -> dict:
+        """sha1 del contenido de cada entrada (None si el fichero no existe)
+        y del código del integrador"""
+        fingerprints = {}
+        for name, path in INPUT_FILES.items():
+            fingerprints[name] = (hashlib.sha1(path.read_bytes()).hexdigest()
+                                  if path.exists() else None)
+        fingerprints['code'] = _code_digest(_MERGE_CODE)
+        return fingerprints
+
+    @staticmethod
+    def _ticker_input_hashes(df: pd.DataFrame) -> dict:
+        """{ticker: hash} de la fila mergeada de cada ticker (todas sus entradas)"""
+        if df.empty or 'ticker' not in df.columns:
+            return {}
+        cols = sorted(df.columns)
+        hashes = pd.util.hash_pandas_object(df[cols].astype(str), index=False)
+        return {t: format(int(h), '016x') for t, h in zip(df['ticker'], hashes)}
+
+    def _load_cached_merge(self, fingerprints: dict):
+        """Merge del run anterior si ninguna entrada cambió; None si hay que rehacerlo"""
+        if not self.incremental:
+            return None
+        path = self.cache_dir / 'merged.pkl'
+        try:
+            cached = pd.read_pickle(path)
+        except Exception:
+            return None
+
+        previous = cached.get('fingerprints', {})
+        changed = [name for name in fingerprints if previous.get(name) != fingerprints[name]]
+        if changed:
+            print(f"🔄 Entradas cambiadas desde el último run: {', '.join(changed)}")
+            return None
+        print("♻️  Entradas sin cambios: reutilizando el merge del último run")
+        return cached['df'].copy()
+
+    def _save_cached_merge(self, df: pd.DataFrame, fingerprints: dict) -> None:
+        if not self.incremental or df.empty:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_dir / 'merged.pkl.tmp'
+            pd.to_pickle({'fingerprints': fingerprints, 'df': df}, tmp)
+            tmp.replace(self.cache_dir / 'merged.pkl')
+        except Exception as e:
+            print(f"⚠️  No se pudo guardar el merge incremental: {e}")
+
+    def _load_filter_state(self) -> dict:
+        """Resultados de filtros por ticker del último run de la MISMA fecha
+        (los filtros leen precios: de un día para otro no valen) y con el
+        mismo código de filtros"""
+        path = self.cache_dir / 'filter_state.json'
+        try:
+            state = json.loads(path.read_text())
+        except Exception:
+            return {}
+        if (state.get('reference_date') != self.reference_date
+                or state.get('code') != _code_digest(_FILTER_CODE)):
+            return {}
+        return state.get('tickers', {})
+
+    def _save_filter_state(self, tickers: dict) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            state = {'reference_date': self.reference_date,
+                     'code': _code_digest(_FILTER_CODE),
+                     'tickers': self._convert_to_native(tickers)}
+            tmp = self.cache_dir / 'filter_state.json.tmp'
+            tmp.write_text(json.dumps(state))
+            tmp.replace(self.cache_dir / 'filter_state.json')
+        except Exception as e:
+            print(f"⚠️  No se pudo guardar el estado de filtros: {e}")
+
     def _merge_scores(
         self,
         vcp_df: pd.DataFrame,
@@ -487,7 +621,81 @@ class SuperScoreIntegrator:
 
         return df
 
-    def _apply_advanced_filters(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _fetch_filter_panel(tickers: list) -> tuple[dict, dict]:
+        """
+        Descarga una vez el historial (1y) y el info de todos los tickers.
+
+        Devuelve ({ticker: DataFrame}, {ticker: info}). Los tickers que fallan
+        (rate-limit, sin datos) simplemente no aparecen: los filtros reciben
+        un DataFrame/dict vacío → 'Insufficient data', que ya cuenta como
+        no-evaluado y no penaliza.
+        """
+        from yfinance_client import get_history_batch, get_info_batch
+
+        tickers = [t for t in dict.fromkeys(tickers) if isinstance(t, str) and t]
+        histories, hist_errors = get_history_batch(tickers, period='1y')
+        infos, info_errors = get_info_batch(tickers)
+        print(f"📦 Filter panel: {len(histories)}/{len(tickers)} historiales, "
+              f"{len(infos)}/{len(tickers)} info "
+              f"({len(hist_errors) + len(info_errors)} errores)")
+        return histories, infos
+
+    def _ticker_filter_results(self, tickers: list, input_hashes: dict = None) -> dict:
+        """
+        MA / A-D / Float por ticker → {'ma': {ticker: res}, 'ad': ..., 'float': ...}
+
+        Con input_hashes (y modo incremental) reutiliza el resultado guardado de
+        los tickers cuya fila de entrada no cambió hoy; solo el resto descarga
+        panel y se evalúa. Un ticker sin historial o sin info en el panel
+        (rate-limit, sin datos) no se guarda: se reintenta en el próximo run.
+        """
+        tickers = [t for t in dict.fromkeys(tickers) if isinstance(t, str) and t]
+        use_state = self.incremental and input_hashes is not None
+        cached = self._load_filter_state() if use_state else {}
+
+        results = {'ma': {}, 'ad': {}, 'float': {}}
+        pending = []
+        for t in tickers:
+            entry = cached.get(t)
+            if entry and entry.get('input_hash') == input_hashes.get(t):
+                for kind in results:
+                    results[kind][t] = entry[kind]
+            else:
+                pending.append(t)
+
+        if use_state:
+            print(f"♻️  Filtros reutilizados: {len(tickers) - len(pending)}/{len(tickers)} "
+                  f"tickers · a evaluar: {len(pending)}")
+
+        if pending:
+            # Panel único: 1y de OHLCV + info por ticker, descargado una sola
+            # vez en paralelo. MA (1y), A/D (últimas 50 velas) y Float (info)
+            # lo leen de memoria.
+            histories, infos = self._fetch_filter_panel(pending)
+            ma_filter = MovingAverageFilter()
+            ad_filter = AccumulationDistributionFilter()
+            float_filter = FloatFilter()
+
+            for t in pending:
+                hist = histories.get(t, pd.DataFrame())
+                fresh = {
+                    'ma': ma_filter.check_stock(t, verbose=False, hist=hist),
+                    'ad': ad_filter.analyze_stock(t, period_days=50, verbose=False, hist=hist),
+                    'float': float_filter.check_stock(t, verbose=False, info=infos.get(t, {})),
+                }
+                for kind, res in fresh.items():
+                    results[kind][t] = {k: res.get(k) for k in _FILTER_KEYS[kind]}
+                if use_state and t in input_hashes and t in histories and t in infos:
+                    cached[t] = {'input_hash': input_hashes.get(t),
+                                 **{kind: results[kind][t] for kind in results}}
+
+        if use_state and pending:
+            self._save_filter_state({t: e for t, e in cached.items() if t in input_hashes})
+
+        return results
+
+    def _apply_advanced_filters(self, df: pd.DataFrame, input_hashes: dict = None) -> pd.DataFrame:
         """
         Aplica filtros profesionales avanzados:
         1. Market Regime Detector (SPY/QQQ/VIX)
@@ -496,6 +704,11 @@ class SuperScoreIntegrator:
         4. Float Filter (shares outstanding)
 
         Ajusta super_score_ultimate basado en resultados de filtros
+
+        Args:
+            df: Scores integrados
+            input_hashes: {ticker: huella de sus entradas} (ver
+                          _ticker_input_hashes). None = evalúa todos
         """
         print("\n" + "="*70)
         print("🔍 ADVANCED FILTERS - Professional Trading Criteria")
@@ -522,18 +735,15 @@ class SuperScoreIntegrator:
         else:
             print("✅ Market in CONFIRMED_UPTREND - safe to trade")
 
+        # MA / A-D / Float por ticker (incremental: solo los que cambiaron)
+        filter_results = self._ticker_filter_results(df['ticker'].tolist(), input_hashes)
+
         # 2. Apply Moving Average Filter (stock-by-stock)
         print("\n2️⃣ MOVING AVERAGE FILTER (Minervini Trend Template)")
         print("-" * 70)
-        ma_filter = MovingAverageFilter()
-
-        ma_results = []
-        for ticker in df['ticker']:
-            result = ma_filter.check_stock(ticker, verbose=False)
-            ma_results.append(result)
-            time.sleep(YFINANCE_RATE_DELAY)
 
-        ma_df = pd.DataFrame(ma_results)
+        ma_df = pd.DataFrame(list(filter_results['ma'].values()),
+                             columns=list(_FILTER_KEYS['ma']))
         df = df.merge(
             ma_df[['ticker', 'passes', 'score', 'reason']].rename(columns={
                 'passes': 'ma_filter_pass',
@@ -552,15 +762,8 @@ class SuperScoreIntegrator:
         # 3. Apply Accumulation/Distribution Filter
         print("\n3️⃣ ACCUMULATION/DISTRIBUTION FILTER")
         print("-" * 70)
-        ad_filter = AccumulationDistributionFilter()
-
-        ad_results = []
-        for ticker in df['ticker']:
-            result = ad_filter.analyze_stock(ticker, period_days=50, verbose=False)
-            ad_results.append(result)
-            time.sleep(YFINANCE_RATE_DELAY)
-
-        ad_df = pd.DataFrame(ad_results)
+        ad_df = pd.DataFrame(list(filter_results['ad'].values()),
+                             columns=list(_FILTER_KEYS['ad']))
         df = df.merge(
             ad_df[['ticker', 'signal', 'score', 'reason']].rename(columns={
                 'signal': 'ad_signal',
@@ -579,15 +782,8 @@ class SuperScoreIntegrator:
         # 4. Apply Float Filter (optional - informational)
         print("\n4️⃣ FLOAT FILTER (Informational)")
         print("-" * 70)
-        float_filter = FloatFilter()
-
-        float_results = []
-        for ticker in df['ticker']:
-            result = float_filter.check_stock(ticker, verbose=False)
-            float_results.append(result)
-            time.sleep(YFINANCE_RATE_DELAY)
-
-        float_df = pd.DataFrame(float_results)
+        float_df = pd.DataFrame(list(filter_results['float'].values()),
+                                columns=list(_FILTER_KEYS['float']))
         df = df.merge(
             float_df[['ticker', 'float_category', 'shares_outstanding_millions']],
             on='ticker',
@@ -1864,7 +2060,7 @@ class SuperScoreIntegrator:
             include_all_sp500: Si True, también cachea todos los tickers del S&P 500
                                aunque no tengan patrón VCP (para cobertura total desde Railway)
         """
-        import yfinance as yf
+        from yfinance_client import get_info, get_history, DataNotFoundError
 
         print("\n" + "="*80)
         print("📦 EXPORTANDO TICKER DATA CACHE")
@@ -1897,13 +2093,15 @@ class SuperScoreIntegrator:
                 print(f"  [{idx+1}/{len(all_tickers)}] Fetching {ticker}...", end=" ")
 
                 # Fetch ticker data
-                stock = yf.Ticker(ticker)
-                info = stock.info
+                try:
+                    info = get_info(ticker)
+                except DataNotFoundError:
+                    info = {}
 
                 # Get historical data (200 days for moving average calculations)
-                hist = stock.history(period="200d")
-
-                if hist.empty:
+                try:
+                    hist = get_history(ticker, period="200d")
+                except DataNotFoundError:
                     print("❌ No historical data")
                     failed += 1
                     continue
@@ -1967,8 +2165,6 @@ class SuperScoreIntegrator:
                 print(f"❌ {str(e)[:50]}")
                 failed += 1
 
-            time.sleep(YFINANCE_RATE_DELAY)
-
         # Save to JSON
         cache_path = Path('docs/ticker_data_cache.json')
         with open(cache_path, 'w') as f:
@@ -2114,6 +2310,8 @@ Note:
 
     parser.add_argument('--as-of-date', type=str, default=None,
                        help='Historical date for scoring (YYYY-MM-DD). Used for timestamps.')
+    parser.add_argument('--full', action='store_true',
+                       help='Ignora el estado incremental (cache/super_score) y recalcula todo.')
 
     args = parser.parse_args()
 
@@ -2124,7 +2322,7 @@ Note:
     print()
 
     # 🔴 FIX LOOK-AHEAD BIAS: Pass as_of_date to integrator
-    integrator = SuperScoreIntegrator(as_of_date=args.as_of_date)
+    integrator = SuperScoreIntegrator(as_of_date=args.as_of_date, incremental=not args.full)
 
     # Integrar todos los scores → retorna 2 dataframes
     value_df, momentum_df = integrator.integrate_scores()
@@ -25,6 +25,8 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 
+from yfinance_client import get_history, get_history_batch, RateLimitError
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
@@ -58,9 +60,9 @@ def _now_utc() -> str:
 # ─── Data fetching ─────────────────────────────────────────────────────────────
 
 def _fetch_history(ticker: str, period: str = "1y") -> pd.DataFrame | None:
-    """Download daily OHLCV history. Returns None on any error."""
+    """Daily OHLCV history via yfinance_client (price store). None on any error."""
     try:
-        df = yf.download(ticker, period=period, interval="1d", progress=False, auto_adjust=True)
+        df = get_history(ticker, period=period, auto_adjust=True)
         if df is None or df.empty or len(df) < 30:
             return None
         if isinstance(df.columns, pd.MultiIndex):
@@ -93,16 +95,14 @@ def fetch_spy_6m_return() -> float:
 
 # ─── Signal sub-computations ───────────────────────────────────────────────────
 
-def _compute_ma_signals(close: pd.Series, price: float) -> tuple[bool, int, float | None]:
-    """Returns (is_stage2, ma_score, ma200_4wk_ago)."""
-    ma50 = float(close.rolling(50).mean().iloc[-1])
-    ma150 = float(close.rolling(150).mean().iloc[-1]) if len(close) >= 150 else None
-    ma200 = float(close.rolling(200).mean().iloc[-1]) if len(close) >= 200 else None
-    ma200_4wk = float(close.rolling(200).mean().iloc[-21]) if len(close) >= 220 else None
+def _valid(x: float | None) -> bool:
+    return x is not None and not np.isnan(x)
+
 
-    valid50 = not np.isnan(ma50)
-    valid150 = ma150 is not None and not np.isnan(ma150)
-    valid200 = ma200 is not None and not np.isnan(ma200)
+def _ma_verdict(price: float, ma50: float, ma150: float | None, ma200: float | None,
+                ma200_4wk: float | None) -> tuple[bool, int]:
+    """(is_stage2, ma_score) a partir de los niveles de las medias."""
+    valid50, valid150, valid200 = _valid(ma50), _valid(ma150), _valid(ma200)
 
     cond1 = price > ma50 if valid50 else False
     cond2 = ma50 > ma150 if (valid50 and valid150) else False
@@ -111,6 +111,17 @@ def _compute_ma_signals(close: pd.Series, price: float) -> tuple[bool, int, floa
 
     is_stage2 = cond1 and cond2 and cond3 and cond4
     ma_score = int(cond1) + int(cond2) + int(cond3)
+    return is_stage2, ma_score
+
+
+def _compute_ma_signals(close: pd.Series, price: float) -> tuple[bool, int, float | None]:
+    """Returns (is_stage2, ma_score, ma200_4wk_ago)."""
+    ma50 = float(close.rolling(50).mean().iloc[-1])
+    ma150 = float(close.rolling(150).mean().iloc[-1]) if len(close) >= 150 else None
+    ma200 = float(close.rolling(200).mean().iloc[-1]) if len(close) >= 200 else None
+    ma200_4wk = float(close.rolling(200).mean().iloc[-21]) if len(close) >= 220 else None
+
+    is_stage2, ma_score = _ma_verdict(price, ma50, ma150, ma200, ma200_4wk)
     return is_stage2, ma_score, ma200_4wk
 
 
@@ -137,41 +148,72 @@ def _compute_volume_dryup(volume: pd.Series) -> bool:
         return False
 
 
+def _pct_from_extremes(price: float, hi52: float, lo52: float) -> tuple[float | None, float | None]:
+    pct_hi = round((price - hi52) / hi52 * 100, 2) if hi52 > 0 else None
+    pct_lo = round((price - lo52) / lo52 * 100, 2) if lo52 > 0 else None
+    return pct_hi, pct_lo
+
+
 def _compute_52w(high: pd.Series, low: pd.Series, price: float) -> tuple[float | None, float | None]:
     try:
         hi52 = float(high.iloc[-252:].max()) if len(high) >= 252 else float(high.max())
         lo52 = float(low.iloc[-252:].min()) if len(low) >= 252 else float(low.min())
-        pct_hi = round((price - hi52) / hi52 * 100, 2) if hi52 > 0 else None
-        pct_lo = round((price - lo52) / lo52 * 100, 2) if lo52 > 0 else None
-        return pct_hi, pct_lo
+        return _pct_from_extremes(price, hi52, lo52)
     except Exception:
         return None, None
 
 
+def _rs_verdict(price: float, price_6m_ago: float, spy_6m_return: float) -> float:
+    ticker_6m = (price - price_6m_ago) / price_6m_ago * 100 if price_6m_ago > 0 else 0.0
+    return round(ticker_6m - spy_6m_return, 2)
+
+
 def _compute_rs(close: pd.Series, price: float, spy_6m_return: float) -> float | None:
     try:
         price_6m_ago = float(close.iloc[-126]) if len(close) >= 126 else float(close.iloc[0])
-        ticker_6m = (price - price_6m_ago) / price_6m_ago * 100 if price_6m_ago > 0 else 0.0
-        return round(ticker_6m - spy_6m_return, 2)
+        return _rs_verdict(price, price_6m_ago, spy_6m_return)
     except Exception:
         return None
 
 
+def _trend_verdict(price: float, ma50: float, ma200: float | None) -> str:
+    if ma200 is None or np.isnan(ma200) or np.isnan(ma50):
+        return "sideways"
+    if price > ma50 and ma50 > ma200:
+        return "uptrend"
+    if price < ma50 and ma50 < ma200:
+        return "downtrend"
+    return "sideways"
+
+
 def _compute_trend(close: pd.Series, price: float) -> str:
     try:
         ma50 = float(close.rolling(50).mean().iloc[-1])
         ma200_val = float(close.rolling(200).mean().iloc[-1]) if len(close) >= 200 else None
-        if ma200_val is None or np.isnan(ma200_val) or np.isnan(ma50):
-            return "sideways"
-        if price > ma50 and ma50 > ma200_val:
-            return "uptrend"
-        if price < ma50 and ma50 < ma200_val:
-            return "downtrend"
-        return "sideways"
+        return _trend_verdict(price, ma50, ma200_val)
     except Exception:
         return "sideways"
 
 
+def _stage_verdict(n_bars: int, price: float, ma200: float, ma200_4wk: float | None,
+                   pct_from_52w_high: float | None, pct_from_52w_low: float | None) -> str:
+    if n_bars < 200 or np.isnan(ma200):
+        return "stage1"
+
+    above_ma200 = price > ma200
+    ma200_trending_up = (ma200 > ma200_4wk) if ma200_4wk is not None else False
+
+    if not above_ma200:
+        return "stage1" if (pct_from_52w_low is not None and pct_from_52w_low < 15) else "stage4"
+
+    if not ma200_trending_up:
+        return "stage1"
+
+    # Above MA200 and trending up
+    extended = (pct_from_52w_high is not None and pct_from_52w_high > -5) or (price > ma200 * 1.5)
+    return "stage3" if extended else "stage2"
+
+
 def _compute_tech_stage(
     close: pd.Series,
     price: float,
@@ -183,21 +225,7 @@ def _compute_tech_stage(
         if len(close) < 200:
             return "stage1"
         ma200 = float(close.rolling(200).mean().iloc[-1])
-        if np.isnan(ma200):
-            return "stage1"
-
-        above_ma200 = price > ma200
-        ma200_trending_up = (ma200 > ma200_4wk) if ma200_4wk is not None else False
-
-        if not above_ma200:
-            return "stage1" if (pct_from_52w_low is not None and pct_from_52w_low < 15) else "stage4"
-
-        if not ma200_trending_up:
-            return "stage1"
-
-        # Above MA200 and trending up
-        extended = (pct_from_52w_high is not None and pct_from_52w_high > -5) or (price > ma200 * 1.5)
-        return "stage3" if extended else "stage2"
+        return _stage_verdict(len(close), price, ma200, ma200_4wk, pct_from_52w_high, pct_from_52w_low)
     except Exception:
         return "unknown"
 
@@ -235,10 +263,56 @@ def _entry_readiness(tech_stage: str, trend: str, rs_6m: float | None,
     return "VIGILAR", "Construyendo base (lateral) — espera la reconquista de las medias"
 
 
+# ─── Point-in-time series (backtests) ─────────────────────────────────────────
+
+def indicator_series(close: pd.Series, high: pd.Series, low: pd.Series) -> pd.DataFrame:
+    """Niveles de las funciones _compute_* para CADA vela, en una pasada.
+
+    La fila i vale exactamente lo mismo que calcularlos sobre la historia
+    cortada en i (close.iloc[:i + 1]): medias, máximos/mínimos y el precio de
+    hace 6 meses solo miran hacia atrás, y rolling() recorre el mismo
+    prefijo en el mismo orden. Para reconstruir muchas fechas de un ticker
+    sin recalcularlo todo por fecha.
+    """
+    n = np.arange(1, len(close) + 1)
+    ma200 = close.rolling(200).mean()
+    first = float(close.iloc[0]) if len(close) else np.nan
+    return pd.DataFrame({
+        "n_bars": n,
+        "price": close.to_numpy(dtype=float),
+        "ma50": close.rolling(50).mean().to_numpy(),
+        "ma150": close.rolling(150).mean().to_numpy(),
+        "ma200": ma200.to_numpy(),
+        "ma200_4wk": ma200.shift(20).to_numpy(),
+        "hi52": high.rolling(252, min_periods=1).max().to_numpy(),
+        "lo52": low.rolling(252, min_periods=1).min().to_numpy(),
+        "price_6m_ago": np.where(n >= 126, close.shift(125).to_numpy(), first),
+    }, index=close.index)
+
+
+def readiness_at(levels: pd.DataFrame, i: int, spy_6m_return: float) -> tuple[str, str]:
+    """entry_readiness en la vela i de indicator_series() — mismas reglas que
+    _signals_from_history sobre la historia cortada en esa vela."""
+    r = levels.iloc[i]
+    price, n_bars = float(r["price"]), int(r["n_bars"])
+    ma200_4wk = float(r["ma200_4wk"]) if n_bars >= 220 else None
+    is_stage2, _ma_score = _ma_verdict(price, r["ma50"], r["ma150"], r["ma200"], ma200_4wk)
+    pct_hi, pct_lo = _pct_from_extremes(price, r["hi52"], r["lo52"])
+    rs = _rs_verdict(price, r["price_6m_ago"], spy_6m_return)
+    trend = _trend_verdict(price, r["ma50"], r["ma200"])
+    stage = _stage_verdict(n_bars, price, r["ma200"], ma200_4wk, pct_hi, pct_lo)
+    return _entry_readiness(stage, trend, rs, is_stage2)
+
+
 # ─── Main signal computation ───────────────────────────────────────────────────
 
 def compute_technical_signals(ticker: str, spy_6m_return: float) -> dict:
     """Compute all technical signals for a single ticker."""
+    return _signals_from_history(ticker, _fetch_history(ticker, period="1y"), spy_6m_return)
+
+
+def _signals_from_history(ticker: str, df: pd.DataFrame | None, spy_6m_return: float) -> dict:
+    """Technical signals from an already-fetched history (None → no_data)."""
     base: dict = {
         "ticker": ticker,
         "is_stage2": False,
@@ -256,10 +330,11 @@ def compute_technical_signals(ticker: str, spy_6m_return: float) -> dict:
         "error": None,
     }
 
-    df = _fetch_history(ticker, period="1y")
     if df is None:
         base["error"] = "no_data"
         return base
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = [col[0] for col in df.columns]
 
     close = df["Close"].squeeze()
     high = df["High"].squeeze()
@@ -351,12 +426,17 @@ def run_technical_filter() -> None:
         log.info("VGK 6m return: %.2f%%", vgk_return)
         time.sleep(RATE_DELAY)
 
+    # Historial de todo el universo en tandas concurrentes (price store +
+    # rate limit del cliente) en vez de ticker a ticker con sleep entre medias.
+    histories, errors = get_history_batch(tickers, period="1y", min_rows=30)
+    n_rl = sum(isinstance(e, RateLimitError) for e in errors.values())
+    log.info("History: %d/%d tickers (%d sin datos, %d rate-limited)",
+             len(histories), len(tickers), len(errors) - n_rl, n_rl)
+
     signals: dict = {}
-    for i, ticker in enumerate(tickers):
-        log.info("  [%d/%d] %s", i + 1, len(tickers), ticker)
+    for ticker in tickers:
         benchmark_return = vgk_return if ticker in eu_tickers else spy_return
-        signals[ticker] = compute_technical_signals(ticker, benchmark_return)
-        time.sleep(RATE_DELAY)
+        signals[ticker] = _signals_from_history(ticker, histories.get(ticker), benchmark_return)
 
     tech_json_out = {
         "generated_at": _now_utc(),
@@ -33,3 +33,30 @@ def _presupuesto_claude_aislado(tmp_path, monkeypatch):
         return
     monkeypatch.setattr(cb, 'ESTADO', tmp_path / 'claude_budget_test.json', raising=False)
     monkeypatch.setattr(cb, 'TOPE_USD', 1_000_000.0, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _price_store_desactivado(monkeypatch):
+    """get_history va directo al mock de yfinance, sin price store en disco.
+
+    Sin esto, un test que mockea `yf.Ticker(...).history` dejaría velas falsas
+    en data/cache/prices del árbol de trabajo — y el siguiente run real (o el
+    siguiente test) las serviría como si fueran de Yahoo. Los tests del propio
+    store (test_price_store.py) instalan uno en tmp_path.
+    """
+    try:
+        import yfinance_client as yc
+    except ImportError:
+        return
+    monkeypatch.setattr(yc, '_price_store', None, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _option_store_desactivado(monkeypatch):
+    """option_chains va directo al yf.Ticker (mock) del test, sin snapshots
+    en data/cache/options. Los tests del propio store instalan uno en tmp_path."""
+    try:
+        import yfinance_client as yc
+    except ImportError:
+        return
+    monkeypatch.setattr(yc, '_option_store', None, raising=False)
@@ -131,6 +131,16 @@ class TestPortfolioAndPipeline:
         body = resp.get_json()
         assert body is not None
 
+    def test_portfolio_timeseries_shape_and_etag(self, client):
+        resp = client.get('/api/portfolio-tracker/timeseries')
+        _assert_ok_or_no_data(resp, '/api/portfolio-tracker/timeseries')
+        body = resp.get_json()
+        for key in ('by_week', 'by_month', 'by_quarter', 'by_weekday', 'by_strategy'):
+            assert isinstance(body[key], list)
+        again = client.get('/api/portfolio-tracker/timeseries',
+                           headers={'If-None-Match': resp.headers['ETag']})
+        assert again.status_code == 304
+
 
 # ── Download map (CSV exports) ────────────────────────────────────────────────
 
@@ -149,3 +159,189 @@ class TestDownloadEndpoint:
         resp = client.get(f'/api/download/{dataset}')
         assert resp.status_code in (200, 404), \
             f"/api/download/{dataset} devolvió {resp.status_code}"
+
+
+# ── Análisis live: una descarga, componentes en paralelo ─────────────────────
+
+class TestAnalyzeLiveFanOut:
+
+    @staticmethod
+    def _hist(n: int = 260):
+        import numpy as np
+        import pandas as pd
+        close = 50 + np.arange(n, dtype=float) * 0.5
+        return pd.DataFrame({
+            'Open': close, 'High': close + 1, 'Low': close - 1,
+            'Close': close, 'Volume': np.full(n, 1_000_000.0),
+        }, index=pd.bdate_range('2025-01-02', periods=n))
+
+    def test_components_share_one_fetch(self, tmp_path, monkeypatch):
+        from unittest.mock import patch
+        import sector_enhancement
+        import ticker_api as api
+
+        monkeypatch.setattr(sector_enhancement, 'SECTOR_CACHE_FILE', tmp_path / 'sector_cache.json')
+
+        hist = self._hist()
+        info = {'longName': 'Test Co', 'currentPrice': 180.0, 'sector': 'Technology'}
+        with patch.object(api, '_fetch_live_inputs', return_value=(hist, info)) as fetch, \
+             patch('moving_average_filter.get_history', side_effect=AssertionError('refetch')), \
+             patch('accumulation_distribution_filter.get_history', side_effect=AssertionError('refetch')), \
+             patch('ml_scoring.get_history', side_effect=AssertionError('refetch')):
+            out = api._analyze_live('TEST')
+
+        fetch.assert_called_once_with('TEST')
+        assert out['company_name'] == 'Test Co'
+        assert out['ma_error'] is None and out['ma_reason'] != 'Insufficient data'
+        assert out['ad_error'] is None
+        assert out['ml_error'] is None and out['ml_score'] is not None
+        assert set(out['timings_ms']) == {'fetch', 'vcp', 'ml', 'fundamentals', 'ma', 'ad', 'sector'}
+
+    def test_latency_is_the_slowest_component_not_the_sum(self):
+        import time
+        from unittest.mock import patch
+        import ticker_api as api
+
+        def slow(result):
+            def _run(*_a, **_k):
+                time.sleep(0.2)
+                return result
+            return _run
+
+        with patch.object(api, '_run_vcp', slow((None, {}, None))), \
+             patch.object(api, '_run_ml', slow((None, {}, None))), \
+             patch.object(api, '_run_fundamentals', slow((None, {}, None, {}, None))), \
+             patch.object(api, '_run_ma', slow(({'passes': True, 'score': 100}, None))), \
+             patch.object(api, '_run_ad', slow(({'signal': 'NEUTRAL', 'score': 60}, None))), \
+             patch.object(api, '_run_sector', slow((50.0, 'stable', 'Tech', None))):
+            t0 = time.monotonic()
+            results, timings = api._run_live_components('TEST', self._hist(), {})
+            elapsed = time.monotonic() - t0
+
+        assert elapsed < 0.6          # 6 × 0.2s en serie serían 1.2s
+        assert all(ms >= 150 for ms in timings.values())
+        assert results['sector'][2] == 'Tech'
+
+    def test_stragglers_become_partial_timeout_results(self):
+        import threading
+        from unittest.mock import patch
+        import ticker_api as api
+
+        release = threading.Event()
+
+        def hang(*_a, **_k):
+            release.wait(5)
+            return None, {}, None
+
+        try:
+            with patch.object(api, '_run_vcp', hang), \
+                 patch.object(api, '_run_ml', lambda *a, **k: (70.0, {}, None)), \
+                 patch.object(api, '_run_fundamentals', lambda *a, **k: (None, {}, None, {}, 'n/a')), \
+                 patch.object(api, '_run_ma', lambda *a, **k: ({'passes': True}, None)), \
+                 patch.object(api, '_run_ad', lambda *a, **k: ({'signal': 'NEUTRAL'}, None)), \
+                 patch.object(api, '_run_sector', lambda *a, **k: (50.0, 'stable', 'Tech', None)):
+                results, timings = api._run_live_components('TEST', self._hist(), {}, timeout=0.2)
+        finally:
+            release.set()
+
+        assert results['vcp'] == (None, {}, 'timeout')
+        assert timings['vcp'] is None
+        assert results['ml'][0] == 70.0 and timings['ml'] is not None
+
+
+# ── Recarga en caliente de datasets ──────────────────────────────────────────
+
+class TestDatasetHotReload:
+
+    def test_swap_rebinds_module_globals(self):
+        from dataclasses import replace
+        import ticker_api as api
+
+        original = api._REGISTRY.current
+        try:
+            api._on_datasets_swapped(replace(original, ticker_cache={'ZZZT': {}}))
+            assert api.TICKER_CACHE == {'ZZZT': {}}
+            assert api.DF_5D is original.df_5d
+        finally:
+            api._bind_datasets(original)
+        assert api.TICKER_CACHE is original.ticker_cache
+
+
+class TestCachedAnalyzeRecord:
+
+    def test_cached_analyze_reads_joined_record(self, tmp_path, monkeypatch):
+        import ticker_api as api
+        from ticker_api_data import load_static_datasets
+
+        (tmp_path / "super_opportunities_5d_complete_with_earnings.csv").write_text(
+            "ticker,company_name,vcp_score,ml_score,fundamental_score\nzzzt,Zeta Corp,71,64,58\n")
+        (tmp_path / "fundamental_scores.csv").write_text("ticker,piotroski_score\nzzzt,7\n")
+        (tmp_path / "recurring_insiders.csv").write_text("ticker,purchase_count,unique_insiders\nzzzt,4,2\n")
+        (tmp_path / "options_flow.csv").write_text("ticker,sentiment,flow_score\nzzzt,BULLISH,81\n")
+        monkeypatch.setattr(api, '_live_earnings_days', lambda t: (None, None))
+
+        original = api._REGISTRY.current
+        try:
+            api._bind_datasets(load_static_datasets(tmp_path))
+            assert api._record('ZZZT')['in_cache']
+            out = api._analyze_from_cache('ZZZT')
+            missing = api._analyze_from_cache('NOPE')
+        finally:
+            api._bind_datasets(original)
+
+        assert out['company_name'] == 'Zeta Corp'
+        assert out['vcp_score'] == 71 and out['piotroski_score'] == 7
+        assert out['insider_recurring']['purchase_count'] == 4
+        assert out['options_flow']['sentiment'] == 'BULLISH'
+        assert missing['insider_recurring'] is None and missing['options_flow'] is None
+
+
+class TestCorrelationMatrixPanel:
+
+    def test_served_from_panel_without_network(self, client, monkeypatch):
+        import numpy as np
+        import pandas as pd
+        import ticker_api as api
+
+        rng = np.random.default_rng(3)
+        idx = pd.bdate_range('2025-06-02', periods=120)
+        panel = pd.DataFrame(rng.normal(size=(120, 4)), index=idx, columns=['AAA', 'BBB', 'CCC', 'DDD'])
+        monkeypatch.setattr(api, 'RETURNS_PANEL', panel)
+        monkeypatch.setattr(api, '_correlation_universe', lambda top: ['AAA', 'BBB', 'CCC', 'DDD'][:top])
+
+        def _no_network(*a, **k):
+            raise AssertionError('no debe descargar con panel disponible')
+        monkeypatch.setattr(api, '_live_returns', _no_network)
+
+        resp = client.get('/api/correlation-matrix?window=30&shrinkage=0.5')
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body['source'] == 'panel' and body['days'] == 30 and body['window'] == 30
+        assert body['tickers'] == ['AAA', 'BBB', 'CCC', 'DDD']
+        assert body['matrix'][0]['AAA'] == 1.0
+        assert body['as_of'] == idx[-1].strftime('%Y-%m-%d')
+
+        body = client.get('/api/correlation-matrix?window=abc&top=3').get_json()
+        assert body['window'] == api.CORR_DEFAULT_WINDOW and len(body['tickers']) == 3
+
+    def test_live_fallback_is_capped(self, client, monkeypatch):
+        import numpy as np
+        import pandas as pd
+        import ticker_api as api
+
+        universe = [f'T{i:03d}' for i in range(200)]
+        monkeypatch.setattr(api, 'RETURNS_PANEL', pd.DataFrame())
+        monkeypatch.setattr(api, '_correlation_universe', lambda top: universe[:top])
+        requested = []
+
+        def _fake_live(tickers, window):
+            requested.append(list(tickers))
+            idx = pd.bdate_range('2025-06-02', periods=80)
+            rng = np.random.default_rng(5)
+            return pd.DataFrame(rng.normal(size=(80, len(tickers))), index=idx, columns=tickers)
+        monkeypatch.setattr(api, '_live_returns', _fake_live)
+
+        body = client.get('/api/correlation-matrix?top=200').get_json()
+        assert body['source'] == 'live'
+        assert requested == [universe[:api.CORR_LIVE_MAX_TOP]]
+        assert len(body['tickers']) == api.CORR_LIVE_MAX_TOP
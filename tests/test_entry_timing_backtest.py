@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Tests de entry_timing_backtest: el modo series reproduce el modo corte."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import entry_timing_backtest as etb
+
+
+def _hist(n, rng, drift):
+    idx = pd.bdate_range('2024-01-01', periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(drift, 0.02, n)))
+    return pd.DataFrame({'Close': close, 'High': close * 1.01, 'Low': close * 0.99}, index=idx)
+
+
+def test_series_mode_matches_slice_mode():
+    rng = np.random.default_rng(5)
+    hist = {f'T{k}': _hist(600, rng, drift) for k, drift in enumerate((-0.003, 0.0, 0.001, 0.004))}
+    hist['T1'].iloc[350, 0] = np.nan           # huecos en los datos: mismo trato en ambos modos
+    spy = _hist(600, rng, 0.0005)
+    d = pd.DataFrame({
+        'ticker': rng.choice([*hist, 'nope'], 250),
+        'signal_date': pd.Timestamp('2024-08-01') + pd.to_timedelta(rng.integers(0, 450, 250), unit='D'),
+    })
+
+    corte = etb._reconstruir(d, hist, spy, 'corte')
+    series = etb._reconstruir(d, hist, spy, 'series')
+
+    assert series == corte
+    assert {r for r, _ in series} >= {None, 'ESPERAR', 'VIGILAR'}
+
+
+def test_spy_series_matches_point_in_time():
+    rng = np.random.default_rng(1)
+    spy = _hist(300, rng, 0.001)
+    serie = etb._spy_6m_serie(spy)
+    for i in (0, 1, 50, 125, 126, 299):
+        assert serie.iloc[i] == etb._spy_6m_en_fecha(spy, spy.index[i])
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Tests del motor de event study (event_study.py) y de sus usuarios."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import event_study
+from event_study import PricePanel, apply_cooldown, run_event_study, simulate_exits, tier_stats
+
+
+def _bars(closes, start='2026-03-02', lows=None, highs=None, tz='America/New_York'):
+    closes = np.asarray(closes, dtype=float)
+    idx = pd.bdate_range(start, periods=len(closes), tz=tz)
+    return pd.DataFrame({
+        'Open': closes,
+        'High': closes if highs is None else np.asarray(highs, dtype=float),
+        'Low': closes if lows is None else np.asarray(lows, dtype=float),
+        'Close': closes,
+    }, index=idx)
+
+
+def _loop_cooldown(df, days):
+    """Referencia: el bucle iterrows que sustituye apply_cooldown."""
+    df = df.sort_values(['ticker', 'snapshot_date'], kind='stable')
+    kept, last_seen = [], {}
+    for i, row in df.iterrows():
+        t, d = row['ticker'], row['snapshot_date']
+        if t not in last_seen or (d - last_seen[t]).days >= days:
+            kept.append(i)
+            last_seen[t] = d
+    return df.loc[kept]
+
+
+class TestCooldown:
+
+    def test_matches_sequential_loop(self):
+        rng = np.random.default_rng(11)
+        df = pd.DataFrame({
+            'ticker': rng.choice(['AAA', 'BBB', 'CCC', 'DDD'], 300),
+            'snapshot_date': pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, 120, 300), unit='D'),
+            'n': np.arange(300),
+        })
+        for days in (1, 5, 14, 30):
+            expected = _loop_cooldown(df, days)
+            got = apply_cooldown(df, days)
+            assert got['n'].tolist() == expected['n'].tolist()
+
+    def test_counts_from_last_kept_signal(self):
+        dates = pd.to_datetime(['2026-07-01', '2026-07-08', '2026-07-15', '2026-07-16'])
+        df = pd.DataFrame({'ticker': 'AAA', 'snapshot_date': dates})
+        # 07-08 cae dentro del cooldown de 07-01; 07-15 ya no (14 días desde 07-01)
+        assert apply_cooldown(df, 14)['snapshot_date'].tolist() == [dates[0], dates[2]]
+
+    def test_zero_cooldown_keeps_everything(self):
+        df = pd.DataFrame({'ticker': ['A', 'A'], 'snapshot_date': pd.to_datetime(['2026-07-01'] * 2)})
+        assert len(apply_cooldown(df, 0)) == 2
+
+
+class TestSimulateExits:
+
+    def test_stop_target_and_holding_period(self):
+        panel = PricePanel.from_frames({
+            # toca stop (low 90 < 92) en la vela 2
+            'STP': _bars([100, 101, 99, 120], lows=[100, 101, 90, 120]),
+            # toca target (+25%) en la vela 3
+            'TGT': _bars([100, 105, 110, 130], highs=[100, 105, 110, 126]),
+            # ni stop ni target: sale al cierre del periodo
+            'HLD': _bars([100, 102, 104, 106]),
+        })
+        date = pd.Timestamp('2026-03-02')
+        out = simulate_exits(panel, ['STP', 'TGT', 'HLD'], [date] * 3, periods=[2, 5])
+
+        p2 = out[2].set_index('event')
+        assert p2.loc[0, 'exit_reason'] == 'STOP_LOSS' and p2.loc[0, 'holding_days'] == 2
+        assert p2.loc[0, 'exit_price'] == pytest.approx(92.0)
+        assert p2.loc[1, 'exit_reason'] == 'HOLDING_PERIOD' and p2.loc[1, 'exit_price'] == 110
+        assert p2.loc[2, 'profit_loss_pct'] == pytest.approx(4.0)
+
+        p5 = out[5].set_index('event')
+        assert p5.loc[1, 'exit_reason'] == 'TARGET' and p5.loc[1, 'holding_days'] == 3
+        assert bool(p5.loc[1, 'hit_target']) and not bool(p5.loc[1, 'hit_stop'])
+        # solo 3 velas tras la entrada: periodo 5 recortado y sin datos suficientes
+        assert p5.loc[2, 'holding_days'] == 3 and not bool(p5.loc[2, 'sufficient_data'])
+
+    def test_stop_wins_when_both_touch_same_bar(self):
+        panel = PricePanel.from_frames({'AAA': _bars([100, 100, 100], lows=[100, 80, 100], highs=[100, 130, 100])})
+        out = simulate_exits(panel, ['AAA'], [pd.Timestamp('2026-03-02')], periods=[2])
+        assert out[2]['exit_reason'].iloc[0] == 'STOP_LOSS'
+
+    def test_entry_is_first_bar_on_or_after_signal_and_csv_target(self):
+        # 2026-03-07 es sábado → entrada el lunes 09 (sexta sesión, cierre 105)
+        panel = PricePanel.from_frames({'AAA': _bars([100, 101, 102, 103, 104, 105, 106, 107, 108])})
+        out = simulate_exits(panel, ['AAA', 'ZZZ'], pd.to_datetime(['2026-03-07', '2026-03-07']),
+                             periods=[3], targets=[104.0])[3]
+        assert out['event'].tolist() == [0]            # ZZZ sin velas → fuera
+        row = out.iloc[0]
+        assert row['entry_price'] == 105
+        assert row['entry_date'] == pd.Timestamp('2026-03-09')
+        # target del CSV no llega al +5% → target por defecto +25%
+        assert row['target'] == pytest.approx(105 * 1.25)
+
+
+class TestStudy:
+
+    def test_run_event_study_tiers_and_alpha(self):
+        panel = PricePanel.from_frames({
+            'AAA': _bars(np.linspace(100, 110, 30)),
+            'BBB': _bars(np.linspace(100, 95, 30)),
+            'SPY': _bars(np.linspace(100, 102, 30)),
+        })
+        events = pd.DataFrame({
+            'ticker': ['AAA', 'BBB', 'AAA'],
+            'snapshot_date': pd.to_datetime(['2026-03-02', '2026-03-02', '2026-03-04']),
+            'value_score': [92, 75, 92],
+        })
+        trades = run_event_study(events, 'value_score', periods=[10], cooldown_days=14, panel=panel)[10]
+
+        assert trades['ticker'].tolist() == ['AAA', 'BBB']      # 2ª señal de AAA en cooldown
+        assert trades['score_tier'].tolist() == ['90-100', '70-79']
+        spy = (100 + 2 * 10 / 29) / 100 * 100 - 100
+        assert trades['benchmark_return_pct'].iloc[0] == pytest.approx(spy)
+        assert trades['alpha_pct'].iloc[0] == pytest.approx(trades['profit_loss_pct'].iloc[0] - spy)
+
+        stats = tier_stats(trades)
+        assert stats.index.tolist() == ['90-100', '70-79']
+        assert stats.loc['90-100', 'win_rate'] == 100 and stats.loc['70-79', 'win_rate'] == 0
+
+    def test_load_snapshots_reads_every_day_once(self, tmp_path):
+        for day, tickers in (('2026-07-01', ['AAA']), ('2026-07-02', ['AAA', 'BBB'])):
+            (tmp_path / day).mkdir()
+            pd.DataFrame({'ticker': tickers, 'value_score': 80}).to_csv(tmp_path / day / 'value_opportunities.csv',
+                                                                        index=False)
+        (tmp_path / '2026-07-03').mkdir()       # snapshot sin ese CSV
+        df = event_study.load_snapshots('value_opportunities.csv', tmp_path)
+        assert len(df) == 3
+        assert df['snapshot_date'].dt.strftime('%Y-%m-%d').tolist() == ['2026-07-01', '2026-07-02', '2026-07-02']
+
+
+class TestBacktestSystemReturns:
+
+    def test_calculate_returns_uses_one_panel(self, tmp_path, monkeypatch):
+        import backtest_system
+
+        monkeypatch.chdir(tmp_path)
+        system = backtest_system.BacktestSystem()
+        pd.DataFrame({
+            'ticker': ['AAA', 'BBB'], 'entry_price': [100.0, np.nan], 'entry_date': '2026-03-02',
+        }).to_csv(system.snapshots_dir / 'snapshot_X.csv', index=False)
+
+        calls = []
+
+        def _fetch(tickers, start, end=None):
+            calls.append(list(tickers))
+            return PricePanel.from_frames({'AAA': _bars(100 + np.arange(40.0))})
+
+        monkeypatch.setattr(backtest_system, 'fetch_prices', _fetch)
+        monkeypatch.setattr(system, 'get_historical_price',
+                            lambda *a: (_ for _ in ()).throw(AssertionError('descarga por fila')))
+        df = system.calculate_returns('X', timeframes=[7, 14])
+
+        assert calls == [['AAA']]
+        # +7 días naturales → 2026-03-09, sexta sesión (cierre 105)
+        assert df['exit_price_7d'].iloc[0] == 105 and df['return_7d'].iloc[0] == pytest.approx(5.0)
+        assert df['return_14d'].iloc[0] == pytest.approx(10.0)
+        assert np.isnan(df['return_7d'].iloc[1])
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests para utils.cache.FundamentalCache (backend SQLite).
+
+Verifica:
+  - get/set conservan el contrato anterior (TTL, tickers inválidos, stats)
+  - get_many / set_many resuelven el universo en una consulta
+  - cleanup_expired usa el índice cached_at y borra solo lo caducado
+  - Los .json del formato antiguo se importan y se eliminan
+  - Dos instancias sobre el mismo directorio ven los mismos datos
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from utils.cache import FundamentalCache, DB_FILENAME
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = FundamentalCache(cache_dir=str(tmp_path), ttl_hours=24)
+    yield c
+    c.close()
+
+
+def _age(cache, ticker, hours):
+    """Retrasa cached_at de una entrada `hours` horas."""
+    with cache._lock:
+        cache._conn.execute(
+            "UPDATE entries SET cached_at = cached_at - ? WHERE ticker = ?",
+            (hours * 3600, ticker.upper()))
+
+
+class TestSingleTicker:
+
+    def test_set_then_get_roundtrip(self, cache):
+        data = {'pe_ratio': 25.5, 'as_of': datetime(2026, 1, 2)}
+        assert cache.set('aapl', data)
+        got = cache.get('aapl')
+        assert got['pe_ratio'] == pytest.approx(25.5)
+        assert got['as_of'] == str(datetime(2026, 1, 2))   # default=str como antes
+        assert cache.stats['hits'] == 1 and cache.stats['saved'] == 1
+
+    def test_invalid_tickers_are_rejected(self, cache):
+        assert cache.get(None) is None
+        assert cache.get('nan') is None
+        assert cache.set(float('nan'), {'x': 1}) is False
+        assert cache.stats['misses'] == 0
+
+    def test_expired_entry_is_a_miss_and_gets_dropped(self, cache):
+        cache.set('MSFT', {'x': 1})
+        _age(cache, 'MSFT', 25)
+        assert cache.get('MSFT') is None
+        assert cache.stats['invalidated'] == 1
+        assert cache.get_cache_info()['cached_tickers'] == 0
+
+    def test_invalidate(self, cache):
+        cache.set('NVDA', {'x': 1})
+        assert cache.invalidate('NVDA') is True
+        assert cache.invalidate('NVDA') is False
+        assert cache.get('NVDA') is None
+
+
+class TestBulk:
+
+    def test_get_many_returns_only_hits_keyed_as_requested(self, cache):
+        saved = cache.set_many({'AAA': {'v': 1}, 'BBB': {'v': 2}, 'nan': {'v': 3}})
+        assert saved == 2
+        got = cache.get_many(['aaa', 'BBB', 'CCC', None])
+        assert got == {'aaa': {'v': 1}, 'BBB': {'v': 2}}
+        assert cache.stats['hits'] == 2 and cache.stats['misses'] == 1
+
+    def test_get_many_beyond_sqlite_parameter_limit(self, cache):
+        cache.set_many({f'T{i}': {'i': i} for i in range(1200)})
+        got = cache.get_many([f'T{i}' for i in range(1200)])
+        assert len(got) == 1200
+        assert got['T1199'] == {'i': 1199}
+
+    def test_set_many_overwrites(self, cache):
+        cache.set_many({'AAA': {'v': 1}})
+        cache.set_many({'AAA': {'v': 2}})
+        assert cache.get('AAA') == {'v': 2}
+        assert cache.get_cache_info()['cached_tickers'] == 1
+
+
+class TestMaintenance:
+
+    def test_cleanup_expired_only_drops_old_rows(self, cache):
+        cache.set_many({'OLD1': {}, 'OLD2': {}, 'NEW': {}})
+        _age(cache, 'OLD1', 48)
+        _age(cache, 'OLD2', 30)
+        assert cache.cleanup_expired() == 2
+        assert cache.get_many(['OLD1', 'OLD2', 'NEW']) == {'NEW': {}}
+
+    def test_clear_all_returns_count(self, cache):
+        cache.set_many({'A': {}, 'B': {}})
+        assert cache.clear_all() == 2
+        assert cache.get_cache_info()['cached_tickers'] == 0
+
+    def test_cache_info_shape(self, cache):
+        cache.set('A', {'x': 1})
+        cache.get('A')
+        cache.get('B')
+        info = cache.get_cache_info()
+        assert info['ttl_hours'] == pytest.approx(24)
+        assert info['cached_tickers'] == 1
+        assert info['cache_size_kb'] > 0
+        assert info['stats']['total_requests'] == 2
+        assert info['stats']['hit_rate'] == pytest.approx(50.0)
+
+
+class TestStorage:
+
+    def test_legacy_json_files_are_imported_and_removed(self, tmp_path):
+        fresh = {'ticker': 'AAPL', 'cached_at': datetime.now().isoformat(),
+                 'ttl_hours': 24, 'data': {'pe': 20}}
+        stale = {'ticker': 'OLD', 'cached_at': (datetime.now() - timedelta(days=3)).isoformat(),
+                 'ttl_hours': 24, 'data': {'pe': 5}}
+        (tmp_path / 'AAPL.json').write_text(json.dumps(fresh))
+        (tmp_path / 'OLD.json').write_text(json.dumps(stale))
+        (tmp_path / 'BAD.json').write_text('{not json')
+
+        c = FundamentalCache(cache_dir=str(tmp_path))
+        try:
+            assert list(tmp_path.glob('*.json')) == []
+            assert c.get('AAPL') == {'pe': 20}
+            assert c.get('OLD') is None
+            assert c.get('BAD') is None
+        finally:
+            c.close()
+
+    def test_two_instances_share_the_database(self, tmp_path):
+        a = FundamentalCache(cache_dir=str(tmp_path))
+        b = FundamentalCache(cache_dir=str(tmp_path))
+        try:
+            a.set('AAPL', {'pe': 20})
+            assert b.get('AAPL') == {'pe': 20}
+            assert (tmp_path / DB_FILENAME).exists()
+        finally:
+            a.close()
+            b.close()
@@ -813,11 +813,11 @@ class TestSinDatosNoRecibeVeredicto:
 
     def test_backoff_detecta_el_nuevo_marcador(self):
         """El backoff de rate-limit contaba fallos por score==50.0; con el score
-        vacío tenía que dejar de mirar el 50 o no volvería a dispararse."""
-        from pathlib import Path
-        import fundamental_scorer as fs_mod
-        src = Path(fs_mod.__file__).read_text()
-        assert "is_empty = result.get('fundamental_score') is None" in src
+        vacío tenía que dejar de mirar el 50 o no volvería a dispararse. Hoy el
+        backoff es el reintento por ticker de score_batch."""
+        from fundamental_scorer import FundamentalScorer
+        assert FundamentalScorer._is_failed_result({'fundamental_score': None, 'tier': '❓ SIN DATOS'})
+        assert not FundamentalScorer._is_failed_result({'fundamental_score': 50.0, 'tier': '⭐ AVERAGE'})
 
 
 class TestConsumidoresAceptanVacio:
@@ -946,3 +946,154 @@ class TestScraperInsidersNoTrunca:
             'sin nombre no se pueden contar personas distintas en un cluster'
         assert "'TradeDate': trade_date" in src, \
             'sin fecha de operación la deduplicación no distingue re-scrapeos'
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# score_batch concurrente: workers, reintentos por ticker y checkpoint
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestScoreBatchConcurrent:
+
+    @pytest.fixture
+    def scorer(self, tmp_path):
+        from fundamental_scorer import FundamentalScorer
+        s = FundamentalScorer()
+        s.cache_dir = tmp_path
+        with patch('fundamental_scorer.acquire_rate_budget', return_value=0.0):
+            yield s
+
+    @staticmethod
+    def _ok(ticker, score=70.0):
+        return {'ticker': ticker, 'fundamental_score': score, 'tier': 'OK', 'company_name': ticker}
+
+    def test_workers_run_concurrently(self, scorer):
+        import time as _t
+
+        def _slow(ticker):
+            _t.sleep(0.1)
+            return self._ok(ticker)
+
+        tickers = [f'T{i}' for i in range(8)]
+        with patch.object(scorer, 'score_ticker', side_effect=_slow):
+            t0 = _t.monotonic()
+            df = scorer.score_batch(tickers, max_workers=4, checkpoint=False)
+            elapsed = _t.monotonic() - t0
+
+        assert sorted(df['ticker']) == sorted(tickers)
+        assert elapsed < 0.6   # secuencial serían ≥0.8s
+
+    def test_failed_ticker_is_retried_without_blocking_others(self, scorer):
+        calls = []
+
+        def _flaky(ticker):
+            calls.append(ticker)
+            if ticker == 'BAD' and calls.count('BAD') == 1:
+                return scorer._get_empty_result(ticker)
+            return self._ok(ticker)
+
+        with patch.object(scorer, 'score_ticker', side_effect=_flaky):
+            df = scorer.score_batch(['BAD', 'AAA', 'BBB'], max_workers=1,
+                                    retry_delay=0.05, checkpoint=False)
+
+        assert calls == ['BAD', 'AAA', 'BBB', 'BAD']   # el reintento va al final
+        assert df.set_index('ticker').loc['BAD', 'fundamental_score'] == 70.0
+
+    def test_no_data_outcomes_are_not_retried(self, scorer):
+        calls = []
+
+        def _no_data(ticker):
+            calls.append(ticker)
+            if ticker == 'GONE':
+                return scorer._get_empty_result(ticker, reason='no_data')
+            return {'ticker': ticker, 'fundamental_score': None, 'tier': '❓ SIN DATOS',
+                    'company_name': ticker}
+
+        with patch.object(scorer, 'score_ticker', side_effect=_no_data):
+            df = scorer.score_batch(['GONE', 'EMPTY'], retry_delay=0.05, checkpoint=False)
+
+        assert sorted(calls) == ['EMPTY', 'GONE']        # una vez cada uno
+        assert 'error_reason' not in df.columns
+
+    def test_rate_limited_ticker_is_retried(self, scorer):
+        calls = []
+
+        def _limited(ticker):
+            calls.append(ticker)
+            if len(calls) == 1:
+                return scorer._get_empty_result(ticker, reason='rate_limit')
+            return self._ok(ticker)
+
+        with patch.object(scorer, 'score_ticker', side_effect=_limited):
+            df = scorer.score_batch(['AAA'], retry_delay=0.05, checkpoint=False)
+
+        assert calls == ['AAA', 'AAA']
+        assert df['fundamental_score'].iloc[0] == 70.0
+
+    def test_persistent_rate_limit_raises_instead_of_empty_info(self):
+        from fundamental_scorer import _yf_info_with_retry
+        from yfinance_client import RateLimitError
+
+        stock = MagicMock()
+        type(stock).info = PropertyMock(side_effect=Exception('429 Too Many Requests'))
+        with patch('fundamental_scorer.time.sleep'), \
+             patch('fundamental_scorer.report_rate_limited'):
+            with pytest.raises(RateLimitError):
+                _yf_info_with_retry(stock, max_retries=2)
+
+    def test_resume_from_checkpoint_skips_scored_tickers(self, scorer):
+        def _bbb_down(ticker):
+            return scorer._get_empty_result(ticker) if ticker == 'BBB' else self._ok(ticker)
+
+        with patch.object(scorer, 'score_ticker', side_effect=_bbb_down):
+            scorer.score_batch(['AAA', 'BBB'], max_retries=0)
+        assert scorer._checkpoint_path().exists()   # hubo fallos: se conserva
+
+        resumed = MagicMock(side_effect=lambda t: self._ok(t, 80.0))
+        with patch.object(scorer, 'score_ticker', resumed):
+            df = scorer.score_batch(['AAA', 'BBB'])
+
+        assert [c.args[0] for c in resumed.call_args_list] == ['BBB']
+        assert set(df['ticker']) == {'AAA', 'BBB'}
+        assert not scorer._checkpoint_path().exists()   # completo: se borra
+
+    def test_saturated_pool_blocks_instead_of_polling(self, scorer):
+        import fundamental_scorer as fs
+        import time as _t
+
+        timeouts, real_wait = [], fs.wait
+
+        def _spy(futures, timeout=None, return_when=None):
+            timeouts.append(timeout)
+            return real_wait(futures, timeout=timeout, return_when=return_when)
+
+        tickers = [f'T{i}' for i in range(6)]
+        with patch.object(scorer, 'score_ticker', side_effect=lambda t: (_t.sleep(0.05), self._ok(t))[1]), \
+             patch.object(fs, 'wait', _spy):
+            scorer.score_batch(tickers, max_workers=2, checkpoint=False)
+
+        # Cola pendiente y pool lleno: se espera a que termine uno, sin timeout=0
+        assert timeouts and all(t is None for t in timeouts)
+        assert len(timeouts) <= len(tickers)
+
+    def test_checkpoint_from_another_run_is_ignored(self, scorer):
+        stale = {'run': 'run-1|live', 'result': self._ok('AAA')}
+        scorer._checkpoint_path().write_text(json.dumps(stale) + '\n{"run": "cortad')
+
+        assert scorer._load_checkpoint(scorer._checkpoint_run_key('run-2')) == {}
+        assert set(scorer._load_checkpoint(scorer._checkpoint_run_key('run-1'))) == {'AAA'}
+
+    def test_resume_across_midnight_with_same_run_id(self, scorer):
+        from datetime import datetime
+        def _bbb_down(ticker):
+            return scorer._get_empty_result(ticker) if ticker == 'BBB' else self._ok(ticker)
+
+        with patch.object(scorer, 'score_ticker', side_effect=_bbb_down):
+            scorer.score_batch(['AAA', 'BBB'], max_retries=0, run_id='42')
+
+        resumed = MagicMock(side_effect=lambda t: self._ok(t, 80.0))
+        with patch('fundamental_scorer.datetime') as fake_dt, \
+             patch.object(scorer, 'score_ticker', resumed):
+            fake_dt.now.return_value = datetime(2099, 1, 2, 0, 5)
+            scorer.score_batch(['AAA', 'BBB'], run_id='42')
+
+        assert [c.args[0] for c in resumed.call_args_list] == ['BBB']
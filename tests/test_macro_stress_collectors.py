@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Tests del caché de collectors de macro_stress (una descarga por fuente y run)."""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from macro_stress.collectors import cftc_cot
+from macro_stress.collectors.cache import CollectorCache
+from macro_stress import macro_stress_radar as radar
+
+COT_TEXT = (
+    "Market_and_Exchange_Names,As_of_Date_In_Form_YYMMDD,Report_Date_as_YYYY-MM-DD,"
+    "Open_Interest_All,NonComm_Positions_Long_All,NonComm_Positions_Short_All\n"
+    "\"CRUDE OIL, LIGHT SWEET - NEW YORK MERCANTILE EXCHANGE\",260106,2026-01-06,1000,400,100\n"
+    "\"CRUDE OIL, LIGHT SWEET - NEW YORK MERCANTILE EXCHANGE\",260113,2026-01-13,1000,500,100\n"
+    "\"GOLD - COMMODITY EXCHANGE INC.\",260113,2026-01-13,2000,900,300\n"
+)
+
+
+class TestCollectorCache:
+
+    def test_loader_runs_once_even_when_concurrent(self):
+        cache = CollectorCache()
+        calls = []
+
+        def _slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"ok": True}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("k", _slow))) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert cache.stats["misses"] == 1 and cache.stats["hits"] == 5
+
+    def test_failures_are_cached_for_the_run(self):
+        cache = CollectorCache()
+        calls = []
+        assert cache.get("dead", lambda: calls.append(1)) is None
+        assert cache.get("dead", lambda: calls.append(1)) is None
+        assert len(calls) == 1
+
+    def test_disk_layer_honours_ttl(self, tmp_path):
+        fetches = []
+
+        def _fetch():
+            fetches.append(1)
+            return "payload"
+
+        assert CollectorCache(tmp_path, ttl_seconds=60).download("src", _fetch) == "payload"
+        fresh = CollectorCache(tmp_path, ttl_seconds=60)
+        assert fresh.download("src", _fetch) == "payload"
+        assert len(fetches) == 1 and fresh.stats["disk_hits"] == 1
+
+        for f in tmp_path.iterdir():
+            os.utime(f, (time.time() - 120, time.time() - 120))
+        CollectorCache(tmp_path, ttl_seconds=60).download("src", _fetch)
+        assert len(fetches) == 2
+
+    def test_no_disk_without_ttl(self, tmp_path):
+        CollectorCache(tmp_path, ttl_seconds=0).download("src", lambda: "x")
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestCftcSharedParse:
+
+    def test_deacot_downloaded_once_for_every_contract(self, monkeypatch):
+        downloads = []
+
+        def _download():
+            downloads.append(1)
+            return COT_TEXT
+
+        monkeypatch.setattr(cftc_cot, "_download_cot", _download)
+        cache = CollectorCache()
+        oil = cftc_cot.fetch("crude_oil_wti", cache=cache)
+        gold = cftc_cot.fetch("gold", cache=cache)
+
+        assert len(downloads) == 1
+        assert oil["non_commercial_net"] == 400 and oil["net_pct_of_open_interest"] == 40.0
+        assert gold["non_commercial_net"] == 600
+
+    def test_without_cache_behaves_as_before(self, monkeypatch):
+        downloads = []
+        monkeypatch.setattr(cftc_cot, "_download_cot", lambda: downloads.append(1) or COT_TEXT)
+        cftc_cot.fetch("crude_oil_wti")
+        cftc_cot.fetch("gold")
+        assert len(downloads) == 2
+
+
+class TestConcurrentCollectors:
+
+    def test_signals_collected_in_parallel_and_in_order(self, monkeypatch):
+        def _slow(value):
+            def _run(cfg, cache):
+                time.sleep(0.2)
+                return value
+            return _run
+
+        monkeypatch.setattr(radar, "COLLECTOR_DISPATCH", {"a": _slow("A"), "b": _slow("B"), "c": _slow("C")})
+        signals = {"third": {"source": "c"}, "first": {"source": "a"}, "second": {"source": "b"},
+                   "bad": {"source": "nope"}}
+        t0 = time.monotonic()
+        raw = radar._collect_signals(signals, CollectorCache())
+        assert time.monotonic() - t0 < 0.5        # 3 × 0.2s en serie serían 0.6s
+        assert list(raw) == ["third", "first", "second", "bad"]
+        assert raw == {"third": "C", "first": "A", "second": "B", "bad": None}
+
+    def test_collector_exception_becomes_none(self, monkeypatch):
+        def _boom(cfg, cache):
+            raise RuntimeError("down")
+
+        monkeypatch.setattr(radar, "COLLECTOR_DISPATCH", {"x": _boom})
+        assert radar._collect_signals({"s": {"source": "x", "label": "S"}}, None) == {"s": None}
+
+    def test_rate_limited_source_runs_one_at_a_time(self, monkeypatch):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def _gdelt(cfg, cache):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return {}
+
+        monkeypatch.setattr(radar, "COLLECTOR_DISPATCH", {"gdelt": _gdelt})
+        radar._collect_signals({f"g{i}": {"source": "gdelt"} for i in range(4)}, None)
+        assert peak[0] == 1
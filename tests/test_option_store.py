@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests para option_store y su integración en yfinance_client.option_chains.
+
+Verifica:
+  - Round-trip .npz conserva columnas, dtypes, NaN y fechas con zona
+  - Segunda petición de la misma cadena se sirve del store, SIN llamar a Yahoo
+  - Snapshot viejo (TTL) → se vuelve a descargar
+  - activity_diff: cambio de OI/volumen contra el día anterior
+  - prune conserva solo los keep_days más recientes
+"""
+import os
+import sys
+import time
+from collections import namedtuple
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import yfinance_client as yc
+from option_store import ChainSnapshot, OptionStore
+from yfinance_client import get_stats, option_chains, reset_stats, set_min_gap_seconds
+
+_Chain = namedtuple('_Chain', ['calls', 'puts'])
+
+
+def _side(kind: str, strikes, oi, volume) -> pd.DataFrame:
+    n = len(strikes)
+    return pd.DataFrame({
+        'contractSymbol': [f'AAPL261120{kind}{int(k * 1000):08d}' for k in strikes],
+        'lastTradeDate': pd.date_range('2026-10-15 14:30', periods=n, freq='min', tz='UTC'),
+        'strike': np.asarray(strikes, dtype=float),
+        'lastPrice': np.linspace(1.0, 2.0, n),
+        'volume': np.asarray(volume, dtype=float),
+        'openInterest': np.asarray(oi, dtype='int64'),
+        'impliedVolatility': np.full(n, 0.3),
+        'inTheMoney': np.arange(n) % 2 == 0,
+        'currency': ['USD'] * n,
+    })
+
+
+def _chain(oi=(100, 200, 300), volume=(10.0, np.nan, 30.0)) -> _Chain:
+    strikes = (90.0, 100.0, 110.0)
+    return _Chain(_side('C', strikes, oi, volume), _side('P', strikes, oi, volume))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = OptionStore(root=tmp_path / 'options', ttl_hours=6, keep_days=3)
+    monkeypatch.setattr(yc, '_option_store', s)
+    reset_stats()
+    set_min_gap_seconds(0.0)
+    yield s
+    set_min_gap_seconds(0.15)
+
+
+# ── OptionStore ───────────────────────────────────────────────────────────────
+
+class TestOptionStoreRoundTrip:
+
+    def test_write_read_preserves_frames(self, store):
+        chain = _chain()
+        assert store.write_chain('AAPL', '2026-11-20', ChainSnapshot(chain.calls, chain.puts, 123.0))
+
+        back = store.read_chain('AAPL', '2026-11-20')
+        pd.testing.assert_frame_equal(back.calls, chain.calls)
+        pd.testing.assert_frame_equal(back.puts, chain.puts)
+        assert back.fetched_at == pytest.approx(123.0)
+
+    def test_expirations_round_trip(self, store):
+        store.write_expirations('AAPL', ('2026-11-20', '2026-12-18'), fetched_at=5.0)
+        assert store.read_expirations('AAPL') == (('2026-11-20', '2026-12-18'), 5.0)
+
+    def test_corrupt_file_is_discarded(self, store):
+        path = store.path('BAD', '2026-11-20')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'not an npz')
+        assert store.read_chain('BAD', '2026-11-20') is None
+        assert not path.exists()
+
+    def test_prune_keeps_most_recent_days(self, store):
+        chain = _chain()
+        for day in ('2026-10-10', '2026-10-11', '2026-10-12', '2026-10-13'):
+            store.write_chain('AAPL', '2026-11-20', ChainSnapshot(chain.calls, chain.puts, 0.0), day=day)
+        assert store.prune('AAPL') == 1
+        assert store.days('AAPL') == ['2026-10-11', '2026-10-12', '2026-10-13']
+
+
+class TestActivityDiff:
+
+    def test_diff_against_previous_day(self, store):
+        old, new = _chain(oi=(100, 200, 300)), _chain(oi=(150, 200, 250), volume=(40.0, 5.0, 30.0))
+        store.write_chain('AAPL', '2026-11-20', ChainSnapshot(old.calls, old.puts, 0.0), day='2026-10-14')
+        store.write_chain('AAPL', '2026-11-20', ChainSnapshot(new.calls, new.puts, 0.0), day='2026-10-15')
+
+        diff = store.activity_diff('AAPL', '2026-11-20', day='2026-10-15')
+        calls = diff[diff['side'] == 'CALL'].set_index('strike')
+        assert calls.loc[90.0, 'oi_change'] == 50
+        assert calls.loc[110.0, 'oi_change'] == -50
+        assert calls.loc[90.0, 'volume_change'] == pytest.approx(30.0)
+        assert np.isnan(calls.loc[100.0, 'volume_change'])   # ayer sin volumen
+        assert set(diff['side']) == {'CALL', 'PUT'}
+
+    def test_no_previous_day_returns_none(self, store):
+        chain = _chain()
+        store.write_chain('AAPL', '2026-11-20', ChainSnapshot(chain.calls, chain.puts, 0.0), day='2026-10-15')
+        assert store.activity_diff('AAPL', '2026-11-20', day='2026-10-15') is None
+
+
+# ── option_chains + store ─────────────────────────────────────────────────────
+
+class TestOptionChainsWithStore:
+
+    def _mock_ticker(self) -> MagicMock:
+        tk = MagicMock()
+        tk.options = ('2026-11-20', '2026-12-18')
+        tk.option_chain.return_value = _chain()
+        return tk
+
+    def test_second_consumer_served_locally(self, store):
+        tk = self._mock_ticker()
+        first = option_chains('AAPL', tk)
+        exp = first.options[0]
+        calls = first.option_chain(exp).calls
+
+        other = option_chains('AAPL', self._mock_ticker())
+        assert other.options == ('2026-11-20', '2026-12-18')
+        pd.testing.assert_frame_equal(other.option_chain(exp).calls, calls)
+
+        assert tk.option_chain.call_count == 1
+        assert get_stats()['store_hits'] == 2
+
+    def test_stale_snapshot_is_refetched(self, store):
+        chain = _chain()
+        store.write_chain('AAPL', '2026-11-20',
+                          ChainSnapshot(chain.calls, chain.puts, time.time() - 7 * 3600))
+        tk = self._mock_ticker()
+        option_chains('AAPL', tk).option_chain('2026-11-20')
+        assert tk.option_chain.call_count == 1
+        assert store.read_chain('AAPL', '2026-11-20').is_fresh(store.ttl_seconds)
+
+    def test_without_store_goes_to_yahoo(self, monkeypatch):
+        monkeypatch.setattr(yc, '_option_store', None)
+        tk = self._mock_ticker()
+        with patch('yfinance_client.yf.Ticker', return_value=tk):
+            chains = option_chains('AAPL')
+            chains.option_chain('2026-11-20')
+            chains.option_chain('2026-11-20')
+        assert tk.option_chain.call_count == 2
+
+    def test_yahoo_errors_propagate_and_nothing_is_stored(self, store):
+        tk = self._mock_ticker()
+        tk.option_chain.side_effect = ValueError('no chain')
+        with pytest.raises(ValueError):
+            option_chains('AAPL', tk).option_chain('2026-11-20')
+        assert store.read_chain('AAPL', '2026-11-20') is None
+
+    def test_chain_without_puts_is_empty_side(self, store):
+        tk = self._mock_ticker()
+        tk.option_chain.return_value = type('OnlyCalls', (), {'calls': _chain().calls})()
+        chain = option_chains('AAPL', tk).option_chain('2026-11-20')
+        assert len(chain.calls) == 3
+        assert chain.puts.empty
+
+
+class TestOptionsFlowOiChange:
+
+    def test_oi_change_from_previous_snapshot(self, store):
+        from datetime import date, timedelta
+        from options_flow_detector import OptionsFlowDetector
+
+        today = date.today()
+        old, new = _chain(oi=(100, 200, 300)), _chain(oi=(150, 260, 300))
+        store.write_chain('AAPL', '2026-11-20', ChainSnapshot(old.calls, old.puts, 0.0),
+                          day=(today - timedelta(days=1)).isoformat())
+        store.write_chain('AAPL', '2026-11-20', ChainSnapshot(new.calls, new.puts, 0.0))
+
+        out = OptionsFlowDetector()._oi_change('AAPL', '2026-11-20')
+        assert out == {'oi_change_calls': 110, 'oi_change_puts': 110}
+
+        assert OptionsFlowDetector()._oi_change('MSFT', '2026-11-20') == {
+            'oi_change_calls': None, 'oi_change_puts': None}
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Tests de options_math.py (Black-Scholes vectorizado) y paridad con leaps_analyzer."""
+import math
+import os
+import sys
+import types
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+import leaps_analyzer as la
+import options_math as om
+
+
+def _ref_call_delta(spot, strike, t, rate, iv, q=0.0):
+    """Fórmula escalar original de leaps_analyzer.bs_call_delta."""
+    d1 = (math.log(spot / strike) + (rate - q + 0.5 * iv * iv) * t) / (iv * math.sqrt(t))
+    return math.exp(-q * t) * norm.cdf(d1)
+
+
+class TestBlackScholes:
+
+    def test_reference_values(self):
+        # Hull: S=K=100, T=1, r=5%, σ=20% → call 10.4506, put 5.5735
+        assert float(om.bs_price(100, 100, 1, 0.05, 0.2)) == pytest.approx(10.4506, abs=1e-4)
+        assert float(om.bs_price(100, 100, 1, 0.05, 0.2, kind='put')) == pytest.approx(5.5735, abs=1e-4)
+        g = om.greeks(100, 100, 1, 0.05, 0.2)
+        assert float(g['delta']) == pytest.approx(0.6368, abs=1e-4)
+        assert float(g['gamma']) == pytest.approx(0.018762, abs=1e-6)
+        assert float(g['vega']) == pytest.approx(0.37524, abs=1e-5)          # por punto de vol
+        assert float(g['theta']) == pytest.approx(-6.4140 / 365, abs=1e-6)   # por día
+
+    def test_put_call_parity_with_dividend(self):
+        strikes = np.linspace(50, 150, 11)
+        call = om.bs_price(100, strikes, 1.5, 0.04, 0.3, 0.02, 'call')
+        put = om.bs_price(100, strikes, 1.5, 0.04, 0.3, 0.02, 'put')
+        forward = 100 * math.exp(-0.02 * 1.5) - strikes * math.exp(-0.04 * 1.5)
+        np.testing.assert_allclose(call - put, forward, atol=1e-10)
+
+    def test_greeks_match_finite_differences(self):
+        kw = dict(strike=np.array([70.0, 100.0, 130.0]), rate=0.04, div_yield=0.01)
+        for kind in ('call', 'put'):
+            g = om.greeks(100, t_years=1.2, iv=0.35, kind=kind, **kw)
+            price = lambda s=100, t=1.2, v=0.35: om.bs_price(s, t_years=t, iv=v, kind=kind, **kw)
+            h = 1e-3
+            np.testing.assert_allclose(g['delta'], (price(s=100 + h) - price(s=100 - h)) / (2 * h), atol=1e-6)
+            np.testing.assert_allclose(g['gamma'], (price(s=100 + h) - 2 * price() + price(s=100 - h)) / h**2,
+                                       atol=1e-4)
+            np.testing.assert_allclose(g['vega'], (price(v=0.35 + h) - price(v=0.35 - h)) / (2 * h) / 100,
+                                       atol=1e-6)
+            np.testing.assert_allclose(g['theta'], -(price(t=1.2 + h) - price(t=1.2 - h)) / (2 * h) / 365,
+                                       atol=1e-6)
+
+    def test_invalid_inputs_are_nan(self):
+        d = om.greeks([100, 0, 100, 100], [50, 50, 50, 0], [1.5, 1.5, 0, 1.5], 0.04, [0.4, 0.4, 0.4, 0.4])['delta']
+        assert not np.isnan(d[0]) and np.isnan(d[1:]).all()
+
+
+class TestImpliedVol:
+
+    def test_recovers_vol_for_whole_chain(self):
+        rng = np.random.default_rng(7)
+        n = 200
+        strikes = rng.uniform(40, 180, n)
+        t = rng.uniform(0.05, 2.5, n)
+        vols = rng.uniform(0.08, 1.8, n)
+        kinds = np.where(rng.random(n) < 0.5, 'call', 'put')
+        prices = om.bs_price(100, strikes, t, 0.04, vols, 0.01, kinds)
+        solved = om.implied_vol(prices, 100, strikes, t, 0.04, 0.01, kinds)
+        # Contratos sin valor temporal apreciable no determinan la vol
+        vega = om.greeks(100, strikes, t, 0.04, vols, 0.01, kinds)['vega']
+        ok = vega > 1e-4
+        np.testing.assert_allclose(solved[ok], vols[ok], rtol=1e-5)
+
+    def test_prices_outside_arbitrage_bounds_are_nan(self):
+        # Por debajo del intrínseco descontado / por encima del spot
+        out = om.implied_vol([30.0, 150.0, 10.45058357], 100, [60, 100, 100], 1.0, 0.05)
+        assert np.isnan(out[:2]).all()
+        assert out[2] == pytest.approx(0.2, abs=1e-6)
+
+
+class TestLeapsParity:
+    """bs_call_delta / leaps_metrics se apoyan en options_math sin cambiar resultados."""
+
+    CASES = [
+        (100, 50, 1.5, 0.04, 0.4, 0.0), (100, 100, 1.5, 0.04, 0.4, 0.0), (100, 70, 1.5, 0.04, 0.35, 0.04),
+        (412.25, 306.7, 1.53, 0.043, 0.494, 0.01), (55.3, 30, 2.2, 0.045, 0.6, 0.023),
+    ]
+
+    @pytest.mark.parametrize('spot,strike,t,rate,iv,q', CASES)
+    def test_bs_call_delta_matches_scalar_formula(self, spot, strike, t, rate, iv, q):
+        assert la.bs_call_delta(spot, strike, t, rate, iv, q) == pytest.approx(
+            _ref_call_delta(spot, strike, t, rate, iv, q), abs=1e-14)
+
+    def test_chain_analytics_matches_leaps_metrics_per_contract(self):
+        spot, t, rate, q = 180.0, 1.4, 0.043, 0.015
+        strikes = np.arange(90.0, 180.0, 5.0)
+        ivs = np.linspace(0.25, 0.45, len(strikes))
+        fair = om.bs_price(spot, strikes, t, rate, ivs, q)
+        chain = pd.DataFrame({'strike': strikes, 'bid': fair * 0.98, 'ask': fair * 1.02,
+                              'impliedVolatility': ivs})
+        out = om.chain_analytics(chain, spot, t, rate, q)
+        for _, row in out.iterrows():
+            m = la.leaps_metrics(spot, row['strike'], t, row['mid'], row['impliedVolatility'], rate, q)
+            for key, value in m.items():
+                assert value == pytest.approx(round(float(row[key]), 3 if key == 'delta' else 2)), key
+        assert out['spread_pct'].iloc[0] == pytest.approx(4.0)
+
+    def test_chain_analytics_solves_missing_iv(self):
+        chain = pd.DataFrame({'strike': [80.0, 90.0], 'impliedVolatility': [np.nan, 0.3]})
+        chain['bid'] = om.bs_price(100, chain['strike'], 1.0, 0.04, 0.45) - 0.01
+        chain['ask'] = chain['bid'] + 0.02
+        out = om.chain_analytics(chain, 100, 1.0, 0.04, solve_iv=True)
+        assert out['iv'].iloc[0] == pytest.approx(0.45, abs=1e-6)
+        assert out['iv'].iloc[1] == 0.3                       # la de la cadena manda
+        assert out['delta'].notna().all()
+
+
+class TestAnalyzeTickerLeaps:
+
+    @staticmethod
+    def _fake_ticker(monkeypatch, calls):
+        spot = 200.0
+        expiry = (date.today() + timedelta(days=560)).isoformat()
+        fake = types.SimpleNamespace(options=[expiry], option_chain=lambda e: types.SimpleNamespace(calls=calls))
+        monkeypatch.setattr(la, 'yf', types.SimpleNamespace(Ticker=lambda t: fake))
+        monkeypatch.setattr(la.time, 'sleep', lambda s: None)
+        monkeypatch.setattr(la, '_get_spot', lambda t: spot)
+        monkeypatch.setattr(la, '_get_analyst_target', lambda t, sig: spot * 1.2)
+        monkeypatch.setattr(la, '_get_forward_pe', lambda t: 20.0)
+        monkeypatch.setattr(la, '_get_dividend_yield', lambda t: 0.01)
+        monkeypatch.setattr(la, '_get_price_context', lambda t: (-10.0, 5.0, 30.0))
+        monkeypatch.setattr(la, '_get_days_to_earnings', lambda t: 40)
+        monkeypatch.setattr(la, '_get_trailing_pe', lambda t: 22.0)
+        return spot, 560 / 365.0
+
+    def test_recommended_contract_matches_per_contract_math(self, monkeypatch):
+        strikes = np.arange(110.0, 200.0, 5.0)
+        fair = om.bs_price(200.0, strikes, 560 / 365.0, 0.043, 0.3, 0.01)
+        calls = pd.DataFrame({'strike': strikes, 'bid': fair - 0.4, 'ask': fair + 0.4,
+                              'impliedVolatility': 0.3, 'openInterest': 800.0,
+                              'volume': [np.nan] + [5.0] * (len(strikes) - 1)})
+        spot, t = self._fake_ticker(monkeypatch, calls)
+
+        out = la.analyze_ticker_leaps('TEST', {'fundamental_score': 70}, 0.043)
+        best = out['recommended_contract']
+        row = calls[calls['strike'] == best['strike']].iloc[0]
+        expected = la.leaps_metrics(spot, row['strike'], t, (row['bid'] + row['ask']) / 2, 0.3, 0.043, 0.01)
+        assert {k: best[k] for k in expected} == expected
+        assert la.DELTA_MIN <= best['delta'] <= la.DELTA_MAX
+        assert best['annual_carry_pct'] <= la.MAX_CARRY_PCT
+        assert all(c['expiry'] == best['expiry'] for c in out['alternative_contracts'])
+
+    def test_filters_drop_illiquid_and_quote_less_contracts(self, monkeypatch):
+        fair = float(om.bs_price(200.0, 150.0, 560 / 365.0, 0.043, 0.3, 0.01))
+        calls = pd.DataFrame({'strike': [150.0] * 3, 'bid': [fair - 0.4] * 3,
+                              'ask': [fair + 0.4, 0.0, fair + 0.4], 'impliedVolatility': 0.3,
+                              'openInterest': [np.nan, 800.0, 10.0], 'volume': 5.0})
+        self._fake_ticker(monkeypatch, calls)
+        # OI NaN / sin ask / OI < MIN_OPEN_INT → ningún contrato válido
+        assert la.analyze_ticker_leaps('TEST', {'fundamental_score': 70}, 0.043) is None
+
+
+class TestFlowColumns:
+
+    def test_premium_ratio_and_itm(self):
+        chain = pd.DataFrame({'strike': [90.0, 110.0], 'volume': [500.0, 200.0],
+                              'openInterest': [100.0, 0.0], 'lastPrice': [2.5, 0.4]})
+        calls = om.flow_columns(chain, spot=100.0, kind='call')
+        assert calls['premium_usd'].tolist() == [125_000.0, 8_000.0]
+        assert calls['vol_oi_ratio'].iloc[0] == 5.0 and np.isnan(calls['vol_oi_ratio'].iloc[1])
+        assert calls['itm'].tolist() == [True, False]
+        assert om.flow_columns(chain, spot=100.0, kind='put')['itm'].tolist() == [False, True]
+
+    def test_options_flow_detector_vectorized_filter(self):
+        from options_flow_detector import OptionsFlowDetector
+
+        chain = pd.DataFrame({'strike': [90.0, 95.0, 100.0, 105.0], 'volume': [500.0, np.nan, 50.0, 400.0],
+                              'openInterest': [100.0, 10.0, 1.0, 0.0], 'lastPrice': [2.5, 3.0, 9.0, 1.0],
+                              'impliedVolatility': 0.4})
+        out = OptionsFlowDetector()._unusual_contracts(chain, 100.0, 'CALL')
+        # 95: sin volumen; 100: volumen < 100; 105: sin OI → ratio = volumen, premium 40k
+        assert [c['strike'] for c in out] == [90.0, 105.0]
+        assert out[0]['vol_oi_ratio'] == 5.0 and out[0]['premium'] == 125_000.0 and out[0]['itm']
+        assert out[1]['vol_oi_ratio'] == 400.0
+
+    def test_unusual_flow_records_prefer_barchart_oi(self):
+        from unusual_flow_scanner import _unusual_records
+
+        chain = pd.DataFrame({'contractSymbol': ['A', 'B'], 'strike': [100.0, 105.0], 'volume': [300.0, 80.0],
+                              'openInterest': [0.0, np.nan], 'lastPrice': [2.0, 4.0], 'premium_usd': [60_000.0, 32_000.0],
+                              'impliedVolatility': [0.41234, np.nan], 'inTheMoney': [True, False],
+                              'lastTradeDate': pd.to_datetime(['2026-10-15 15:30', None])})
+        out = _unusual_records(chain, 'CALL', '2026-10-30', 14, {'A': 150})
+        assert out[0]['open_interest'] == 150 and out[0]['vol_oi_ratio'] == 2.0
+        assert out[0]['iv'] == 0.412 and out[0]['last_trade_date'] == '2026-10-15 15:30'
+        assert out[1]['open_interest'] == 0 and out[1]['vol_oi_ratio'] is None
+        assert out[1]['iv'] is None and out[1]['last_trade_date'] is None and out[0]['speculative']
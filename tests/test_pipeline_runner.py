@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Tests del runner del pipeline como DAG (pipeline_runner.py)."""
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import pipeline_runner as pr
+from pipeline_runner import Stage, build_dag, levels, run
+
+
+def _stage(name, reads=(), writes=(), **kw):
+    return Stage(name, ('true',), reads=reads, writes=writes, **kw)
+
+
+class TestBuildDag:
+
+    def test_dependencies_come_from_shared_files(self):
+        stages = [
+            _stage('scorer', writes=('scores.csv',)),
+            _stage('macro', writes=('macro.json',)),
+            _stage('integrator', reads=('scores.csv',), writes=('value.csv',)),
+            _stage('filter', reads=('value.csv',), writes=('value.csv',)),
+            _stage('tracker', reads=('value.csv',), writes=('tracker/',)),
+        ]
+        dag = build_dag(stages)
+        assert dag['macro'] == set()
+        assert dag['integrator'] == {'scorer'}
+        assert dag['filter'] == {'integrator'}
+        assert dag['tracker'] == {'integrator', 'filter'}
+        assert levels(dag) == [['scorer', 'macro'], ['integrator'], ['filter'], ['tracker']]
+
+    def test_write_after_read_keeps_yesterdays_input(self):
+        """Quien lee el CSV de ayer va antes que quien lo regenera."""
+        dag = build_dag([_stage('reader', reads=('value.csv',)), _stage('writer', writes=('value.csv',))])
+        assert dag['writer'] == {'reader'}
+
+    def test_directories_and_prefixes_overlap(self):
+        dag = build_dag([
+            _stage('tracker', writes=('portfolio_tracker/',)),
+            _stage('drift', reads=('portfolio_tracker/recommendations.csv',)),
+            _stage('cerebro', writes=('cerebro_*',)),
+            _stage('agent', reads=('cerebro_ticker_signals.csv',)),
+            _stage('other', reads=('portfolio_trackerX.csv',)),
+        ])
+        assert dag['drift'] == {'tracker'}
+        assert dag['agent'] == {'cerebro'}
+        assert dag['other'] == set()
+
+    def test_after_and_validation(self):
+        dag = build_dag([_stage('gate'), _stage('briefing', after=('gate',))])
+        assert dag['briefing'] == {'gate'}
+        with pytest.raises(ValueError):
+            build_dag([_stage('a', after=('b',)), _stage('b')])
+        with pytest.raises(ValueError):
+            build_dag([_stage('a'), _stage('a')])
+
+
+class TestRealStages:
+    """Las invariantes de tests/test_pipeline_order.py salen solas del DAG."""
+
+    @staticmethod
+    def _ancestors(dag, name):
+        seen, todo = set(), list(dag[name])
+        while todo:
+            n = todo.pop()
+            if n not in seen:
+                seen.add(n)
+                todo.extend(dag[n])
+        return seen
+
+    def test_technical_columns_consumers_run_after_technical_filter(self):
+        dag = build_dag(pr.STAGES)
+        assert 'super_score_integrator' in self._ancestors(dag, 'technical_filter')
+        assert 'technical_filter' in self._ancestors(dag, 'portfolio_tracker')
+        assert 'technical_filter' in self._ancestors(dag, 'entry_verdict_agent')
+
+    def test_coherence_check_gates_daily_briefing(self):
+        dag = build_dag(pr.STAGES)
+        assert 'coherence_check' in dag['daily_briefing']
+        assert 'entry_verdict_agent' in self._ancestors(dag, 'coherence_check')
+
+    def test_independent_stages_share_a_level(self):
+        first = levels(build_dag(pr.STAGES))[0]
+        assert {'market_regime_detector', 'sector_rotation_detector', 'macro_radar'} <= set(first)
+
+    def test_scripts_exist(self):
+        for stage in pr.STAGES:
+            script = stage.cmd[1]
+            if script != '-m':
+                assert (pr.ROOT / script).exists(), stage.name
+
+
+class TestRun:
+
+    def test_independent_stages_run_concurrently(self, tmp_path):
+        stages = [_stage(n, writes=(f'{n}.csv',)) for n in 'abc'] + [
+            _stage('d', reads=('a.csv', 'b.csv', 'c.csv'))]
+        order = []
+
+        def _exec(stage):
+            time.sleep(0.2)
+            order.append(stage.name)
+            return 0
+
+        t0 = time.monotonic()
+        results = run(stages, workers=3, docs=tmp_path, execute=_exec)
+        assert time.monotonic() - t0 < 0.7          # 4 × 0.2s en serie serían 0.8s
+        assert order[-1] == 'd'
+        assert [r.status for r in results] == ['ok'] * 4
+
+    def test_worker_limit(self, tmp_path):
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def _exec(stage):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return 0
+
+        run([_stage(f's{i}') for i in range(6)], workers=2, docs=tmp_path, execute=_exec)
+        assert peak[0] == 2
+
+    def test_critical_failure_skips_dependents_only(self, tmp_path):
+        stages = [
+            _stage('scorer', writes=('scores.csv',), critical=True),
+            _stage('optional', writes=('extra.json',)),
+            _stage('integrator', reads=('scores.csv',), writes=('value.csv',)),
+            _stage('tracker', reads=('value.csv',)),
+            _stage('uses_extra', reads=('extra.json',)),
+            _stage('macro', writes=('macro.json',)),
+        ]
+        fail = {'scorer', 'optional'}
+        results = {r.name: r for r in run(stages, docs=tmp_path, execute=lambda s: int(s.name in fail))}
+        assert results['scorer'].status == 'failed'
+        assert results['integrator'].status == 'skipped' and results['tracker'].status == 'skipped'
+        assert results['optional'].status == 'failed'
+        assert results['uses_extra'].status == 'ok'       # no crítica: se sigue
+        assert results['macro'].status == 'ok'
+
+    def test_exception_is_a_failure(self, tmp_path):
+        def _boom(stage):
+            raise RuntimeError('down')
+
+        res = run([_stage('x')], docs=tmp_path, execute=_boom)[0]
+        assert res.status == 'failed' and 'down' in res.reason
+
+    def test_bytes_read_and_written(self, tmp_path):
+        (tmp_path / 'in.csv').write_text('x' * 100)
+        (tmp_path / 'tracker').mkdir()
+        (tmp_path / 'tracker' / 'old.csv').write_text('y' * 50)
+
+        def _exec(stage):
+            (tmp_path / 'out.json').write_text('z' * 30)
+            return 0
+
+        stage = _stage('s', reads=('in.csv', 'tracker/', 'missing.csv'), writes=('out.json',))
+        res = run([stage], docs=tmp_path, execute=_exec)[0]
+        assert res.bytes_read == 150 and res.bytes_written == 30
+        assert res.wall_s >= 0 and res.started_at
+
+    def test_report(self, tmp_path):
+        results = run([_stage('a'), _stage('b')], docs=tmp_path, execute=lambda s: 0)
+        report = pr.save_report(results, 1.5, 2, tmp_path / 'report.json')
+        on_disk = json.loads((tmp_path / 'report.json').read_text())
+        assert on_disk == report
+        assert [s['name'] for s in on_disk['stages']] == ['a', 'b'] and on_disk['failed'] == []
+
+
+class TestMain:
+
+    def test_stages_share_the_yahoo_rate_limit(self, tmp_path, monkeypatch):
+        from rate_limiter import SHARED_STATE_ENV
+
+        probe = 'import os, sys; open(sys.argv[1], "w").write(os.environ.get(sys.argv[2], ""))'
+        stages = [Stage(n, (sys.executable, '-c', probe, str(tmp_path / n), SHARED_STATE_ENV),
+                        writes=(f'{n}.json',)) for n in ('probe_a', 'probe_b')]
+        monkeypatch.setattr(pr, 'STAGES', stages)
+        monkeypatch.delenv(SHARED_STATE_ENV, raising=False)
+        monkeypatch.setattr(sys, 'argv', ['pipeline_runner.py', '--no-cache', '--workers', '2',
+                                          '--report', str(tmp_path / 'report.json')])
+        pr.main()
+
+        seen = {(tmp_path / n).read_text() for n in ('probe_a', 'probe_b')}
+        assert len(seen) == 1 and seen != {''}     # mismo bucket para las dos
+        assert SHARED_STATE_ENV not in os.environ  # se restaura al acabar
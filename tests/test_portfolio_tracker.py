@@ -1400,3 +1400,105 @@ class TestDesfaseNoEsIncoherencia:
             {'generated_at': '2026-08-12T07:00:00',
              'overall': {'90d': {'win_rate': 61.5}}})
         assert len(r) == 1 and not r[0].startswith('⏳')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 16. update_performance — velas en tandas + merge_asof vectorizado
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestUpdatePerformanceBatch:
+    """Checkpoints, alpha, drawdown y salida simulada desde get_history_batch."""
+
+    TODAY = pd.Timestamp.now().normalize()
+
+    def _bday(self, days_ago):
+        """Día hábil (≤) de hace `days_ago` días: la vela 0 es la de la señal."""
+        return pd.bdate_range(end=self.TODAY - pd.Timedelta(days=days_ago), periods=1)[0]
+
+    def _hist(self, closes, start, low=None, high=None):
+        idx = pd.bdate_range(start, periods=len(closes), tz='America/New_York')
+        closes = np.asarray(closes, dtype=float)
+        return pd.DataFrame({
+            'Close': closes,
+            'Low': closes * 0.99 if low is None else low,
+            'High': closes * 1.01 if high is None else high,
+        }, index=idx)
+
+    def _run(self, recs, hists):
+        import portfolio_tracker as pt
+        from yfinance_client import DataNotFoundError
+        calls = []
+
+        def fake_batch(tickers, start=None, end=None, **kwargs):
+            calls.append((tuple(tickers), start))
+            frames = {t: hists[t] for t in tickers if t in hists}
+            errors = {t: DataNotFoundError(t) for t in tickers if t not in hists}
+            return frames, errors
+
+        tracker = pt.PortfolioTracker()
+        tracker.recommendations = _make_df(*recs)
+        with patch.object(pt, 'get_history_batch', side_effect=fake_batch):
+            tracker.update_performance()
+        return tracker.recommendations, calls
+
+    def test_checkpoints_alpha_and_status(self):
+        sig = self._bday(45)
+        start = sig - pd.Timedelta(days=3)
+        n = 60
+        hists = {
+            'AAA': self._hist(np.linspace(100, 160, n), start),
+            'SPY': self._hist(np.full(n, 400.0), start),
+        }
+        out, calls = self._run([dict(ticker='AAA', signal_date=sig, signal_price=100.0)], hists)
+        row = out.iloc[0]
+
+        closes = hists['AAA']['Close']
+        closes.index = closes.index.tz_localize(None)
+        for period in (7, 14, 30):
+            expected = float(closes[closes.index >= sig + pd.Timedelta(days=period)].iloc[0])
+            assert row[f'price_{period}d'] == pytest.approx(round(expected, 2))
+            assert row[f'return_{period}d'] == pytest.approx(round(expected - 100.0, 2))
+            assert bool(row[f'win_{period}d'])
+            assert row[f'benchmark_return_{period}d'] == pytest.approx(0.0)
+            assert row[f'alpha_{period}d'] == pytest.approx(row[f'return_{period}d'])
+        assert pd.isna(row['return_90d'])
+        assert row['status'] == 'COMPLETED'
+        # Una tanda por mes de inicio + una para los benchmarks
+        assert ('SPY', 'VGK') in [c[0] for c in calls]
+
+    def test_gbp_scale_fixed_and_drawdown(self):
+        sig = self._bday(20)
+        closes = np.full(30, 10.0)              # GBP en Yahoo, señal en GBp
+        low = closes.copy()
+        low[5] = 8.0                            # mínimo dentro de la ventana
+        hists = {'LSE.L': self._hist(closes, sig, low=low)}
+        out, _ = self._run([dict(ticker='LSE.L', signal_date=sig, signal_price=1000.0)], hists)
+        row = out.iloc[0]
+        assert row['price_7d'] == pytest.approx(1000.0)
+        assert row['return_7d'] == pytest.approx(0.0)
+        assert row['max_drawdown_30d'] == pytest.approx((8.0 - 1000.0) / 1000.0 * 100, abs=0.01)
+        assert row['status'] == 'ACTIVE'
+
+    def test_exit_simulation_stop_before_target(self):
+        sig = self._bday(20)
+        closes = np.full(15, 100.0)
+        low, high = closes * 0.99, closes * 1.01
+        low[3], high[3] = 90.0, 120.0           # mismo día: stop y target → STOP
+        hists = {'AAA': self._hist(closes, sig, low=low, high=high)}
+        out, _ = self._run([dict(ticker='AAA', signal_date=sig, signal_price=100.0,
+                                 stop_loss=95.0, target_price=115.0)], hists)
+        row = out.iloc[0]
+        assert row['exit_reason'] == 'STOP'
+        assert row['exit_day'] == 3             # la vela 0 es el día de la señal
+        assert row['exit_price'] == pytest.approx(95.0)
+
+    def test_tickers_without_history_untouched(self):
+        sig = self._bday(40)
+        out, calls = self._run([
+            dict(ticker='GONE', signal_date=sig),
+            dict(ticker='OLD', signal_date=sig - pd.Timedelta(days=62)),
+        ], {})
+        assert out['return_7d'].isna().all()
+        assert (out['status'] == 'ACTIVE').all()
+        starts = sorted(c[1] for c in calls if c[0] != ('SPY', 'VGK'))
+        assert len(starts) == 2 and all(s.endswith('-01') for s in starts)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tests para price_store y su integración en yfinance_client.get_history.
+
+Verifica:
+  - Round-trip .npz conserva índice con zona, columnas y dtypes
+  - Rango cubierto y fresco → se sirve en local, SIN llamar a Yahoo
+  - Store viejo → solo se piden las velas finales (append)
+  - Re-ajuste de la serie (dividendo/split) → re-descarga completa
+  - period 'Nd' devuelve N sesiones, no N días naturales
+"""
+import os
+import sys
+import time
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import yfinance_client as yc
+from price_store import PriceStore, StoredHistory, period_window
+from yfinance_client import get_history, get_stats, reset_stats, set_min_gap_seconds
+
+
+def _bars(start: str, periods: int, tz: str = 'America/New_York', base: float = 100.0) -> pd.DataFrame:
+    idx = pd.bdate_range(start, periods=periods).tz_localize(tz)
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'Open': close - 0.5, 'High': close + 1, 'Low': close - 1,
+        'Close': close, 'Volume': np.arange(periods, dtype='int64') * 1000,
+    }, index=idx)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = PriceStore(root=tmp_path / 'prices', ttl_hours=6)
+    monkeypatch.setattr(yc, '_price_store', s)
+    reset_stats()
+    set_min_gap_seconds(0.0)
+    yield s
+    set_min_gap_seconds(0.15)
+
+
+# ── PriceStore ────────────────────────────────────────────────────────────────
+
+class TestPriceStoreRoundTrip:
+
+    def test_write_read_preserves_frame(self, store):
+        df = _bars('2026-01-02', 30)
+        entry = StoredHistory(frame=df, covered_from=pd.Timestamp('2026-01-01'), fetched_at=123.0)
+        assert store.write('AAPL', entry)
+
+        back = store.read('AAPL')
+        pd.testing.assert_frame_equal(back.frame, df, check_freq=False)
+        assert back.covered_from == pd.Timestamp('2026-01-01')
+        assert back.fetched_at == pytest.approx(123.0)
+
+    def test_frame_without_dates_is_not_stored(self, store):
+        entry = StoredHistory(frame=pd.DataFrame({'Close': [1.0, 2.0]}),
+                              covered_from=pd.Timestamp('2026-01-01'), fetched_at=0.0)
+        assert store.write('X', entry) is False
+        assert store.read('X') is None
+
+    def test_corrupt_file_is_discarded(self, store):
+        path = store.path('BAD')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'not an npz')
+        assert store.read('BAD') is None
+        assert not path.exists()
+
+    def test_adjusted_and_raw_are_separate(self, store):
+        entry = StoredHistory(frame=_bars('2026-01-02', 5),
+                              covered_from=pd.Timestamp('2026-01-01'), fetched_at=0.0)
+        store.write('AAPL', entry, auto_adjust=True)
+        assert store.read('AAPL', auto_adjust=False) is None
+
+
+class TestCoverage:
+
+    def _entry(self, fetched_at: float) -> StoredHistory:
+        return StoredHistory(frame=_bars('2026-01-02', 60),
+                             covered_from=pd.Timestamp('2026-01-01'), fetched_at=fetched_at)
+
+    def test_start_before_covered_from_is_miss(self):
+        e = self._entry(time.time())
+        assert not e.covers(pd.Timestamp('2025-12-01'), None, 3600)
+
+    def test_fresh_entry_covers_open_range(self):
+        e = self._entry(time.time())
+        assert e.covers(pd.Timestamp('2026-02-01'), None, 3600)
+
+    def test_stale_entry_does_not_cover_open_range(self):
+        e = self._entry(time.time() - 7200)
+        assert not e.covers(pd.Timestamp('2026-02-01'), None, 3600)
+
+    def test_past_end_covered_by_later_download_even_if_stale(self):
+        fetched = pd.Timestamp('2026-03-30 22:00', tz='UTC').timestamp()
+        e = self._entry(fetched)
+        assert e.covers(pd.Timestamp('2026-01-05'), pd.Timestamp('2026-03-01'), 3600)
+
+    def test_period_days_are_sessions(self):
+        start, tail = period_window('5d', today=pd.Timestamp('2026-03-30'))
+        assert tail == 5
+        assert start <= pd.Timestamp('2026-03-20')
+
+    def test_period_max_not_served(self):
+        assert period_window('max') is None
+
+
+# ── get_history + store ───────────────────────────────────────────────────────
+
+class TestGetHistoryWithStore:
+
+    def test_second_call_served_locally(self, store):
+        today = pd.Timestamp.now().normalize()
+        df = _bars(today - pd.Timedelta(days=120), 80)
+        mock_tk = MagicMock()
+        mock_tk.history.return_value = df
+
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            first = get_history('AAPL', period='3mo')
+            second = get_history('AAPL', period='3mo')
+
+        assert mock_tk.history.call_count == 1
+        pd.testing.assert_frame_equal(first, second)
+        assert get_stats()['store_hits'] == 1
+
+    def test_narrower_start_end_slice_served_locally(self, store):
+        today = pd.Timestamp.now().normalize()
+        df = _bars(today - pd.Timedelta(days=400), 280)
+        mock_tk = MagicMock()
+        mock_tk.history.return_value = df
+
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            get_history('AAPL', period='1y')
+            lo, hi = df.index[100].tz_localize(None), df.index[150].tz_localize(None)
+            sub = get_history('AAPL', start=lo, end=hi)
+
+        assert mock_tk.history.call_count == 1
+        assert len(sub) == 50   # end exclusivo, como yfinance
+        assert sub.index[0].tz_localize(None) == lo
+
+    def test_stale_store_fetches_only_trailing_bars(self, store):
+        today = pd.Timestamp.now().normalize()
+        full = _bars(today - pd.Timedelta(days=120), 80)
+        old = StoredHistory(frame=full.iloc[:-3], covered_from=today - pd.DateOffset(months=4),
+                            fetched_at=time.time() - 86400)
+        store.write('AAPL', old)
+
+        mock_tk = MagicMock()
+        mock_tk.history.return_value = full.iloc[-5:]   # penúltima guardada en adelante
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            df = get_history('AAPL', period='3mo')
+
+        kwargs = mock_tk.history.call_args.kwargs
+        assert kwargs['start'] == full.index[-5].tz_localize(None).date()
+        assert kwargs['end'] is None
+        assert df.index[-1] == full.index[-1]
+        assert not df.index.duplicated().any()
+
+    def test_readjusted_series_triggers_full_refetch(self, store):
+        today = pd.Timestamp.now().normalize()
+        full = _bars(today - pd.Timedelta(days=120), 80)
+        old = StoredHistory(frame=full.iloc[:-3], covered_from=today - pd.DateOffset(months=4),
+                            fetched_at=time.time() - 86400)
+        store.write('AAPL', old)
+
+        adjusted = full.copy()
+        adjusted[['Open', 'High', 'Low', 'Close']] *= 0.98   # dividendo re-ajusta todo
+        mock_tk = MagicMock()
+        mock_tk.history.side_effect = [adjusted.iloc[-5:], adjusted]
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            df = get_history('AAPL', period='3mo')
+
+        assert mock_tk.history.call_count == 2
+        assert float(df['Close'].iloc[0]) == pytest.approx(
+            float(adjusted.loc[df.index[0], 'Close']))
+
+    def test_empty_history_still_raises(self, store):
+        mock_tk = MagicMock()
+        mock_tk.history.return_value = pd.DataFrame()
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            with pytest.raises(yc.DataNotFoundError):
+                get_history('DELISTED')
+        assert store.read('DELISTED') is None
+
+    def test_intraday_interval_bypasses_store(self, store):
+        mock_tk = MagicMock()
+        mock_tk.history.return_value = _bars('2026-01-02', 10)
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            get_history('AAPL', period='5d', interval='5m')
+            get_history('AAPL', period='5d', interval='5m')
+        assert mock_tk.history.call_count == 2
+        assert store.read('AAPL') is None
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests para rate_limiter.TokenBucket y su uso en yfinance_client.
+
+Verifica:
+  - El burst se gasta sin esperas; después se espera al ritmo de `rate`
+  - AIMD: un 429 divide el rate y vacía el bucket; las llamadas OK lo recuperan
+  - Dos buckets sobre el MISMO fichero comparten presupuesto (= dos procesos)
+  - Un RateLimitError en yfinance_client frena el bucket global
+"""
+import os
+import sys
+import time
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import yfinance_client as yc
+from rate_limiter import TokenBucket
+
+
+class TestTokenBucket:
+
+    def test_burst_is_immediate(self):
+        bucket = TokenBucket(rate=1.0, burst=3)
+        t0 = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        assert time.monotonic() - t0 < 0.05
+
+    def test_waits_at_rate_after_burst(self):
+        bucket = TokenBucket(rate=20.0, burst=1)
+        bucket.acquire()
+        t0 = time.monotonic()
+        bucket.acquire()
+        bucket.acquire()
+        # 2 tokens a 20/s → ≥100ms (tolerancia por el scheduler)
+        assert time.monotonic() - t0 >= 0.08
+
+    def test_unlimited_never_waits(self):
+        bucket = TokenBucket(rate=0)
+        t0 = time.monotonic()
+        for _ in range(100):
+            bucket.acquire()
+        assert time.monotonic() - t0 < 0.05
+
+    def test_rate_limit_halves_rate_and_success_recovers(self):
+        bucket = TokenBucket(rate=10.0, burst=5, increase=0.1)
+        bucket.on_rate_limit()
+        assert bucket.current_rate() == pytest.approx(5.0)
+        bucket.on_rate_limit()
+        assert bucket.current_rate() == pytest.approx(2.5)
+        for _ in range(100):
+            bucket.on_success()
+        assert bucket.current_rate() == pytest.approx(10.0)   # tope = max_rate
+
+    def test_backoff_has_floor(self):
+        bucket = TokenBucket(rate=16.0, min_rate=2.0)
+        for _ in range(10):
+            bucket.on_rate_limit()
+        assert bucket.current_rate() == pytest.approx(2.0)
+
+    def test_rate_limit_empties_bucket(self):
+        bucket = TokenBucket(rate=20.0, burst=5)
+        bucket.on_rate_limit()   # rate → 10/s, tokens → 0
+        t0 = time.monotonic()
+        bucket.acquire()
+        assert time.monotonic() - t0 >= 0.07
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='flock no disponible en Windows')
+class TestSharedBucket:
+
+    def test_two_buckets_on_same_file_share_budget(self, tmp_path):
+        path = tmp_path / 'yf.bucket'
+        a = TokenBucket(rate=10.0, burst=2, path=path)
+        b = TokenBucket(rate=10.0, burst=2, path=path)
+
+        a.acquire()
+        b.acquire()          # el burst de 2 se gasta entre ambos
+        t0 = time.monotonic()
+        a.acquire()          # ya no queda: toca esperar ~100ms
+        assert time.monotonic() - t0 >= 0.07
+
+    def test_backoff_propagates_between_processes(self, tmp_path):
+        path = tmp_path / 'yf.bucket'
+        a = TokenBucket(rate=8.0, path=path)
+        b = TokenBucket(rate=8.0, path=path)
+        a.on_rate_limit()
+        assert b.current_rate() == pytest.approx(4.0)
+
+
+class TestClientIntegration:
+
+    @pytest.fixture(autouse=True)
+    def _fresh_limiter(self):
+        yc.reset_stats()
+        yc.configure_rate_limit(100.0, burst=10)
+        yield
+        yc.set_min_gap_seconds(0.15)
+
+    def test_429_slows_down_global_bucket(self):
+        mock_tk = MagicMock()
+        type(mock_tk).info = property(lambda _s: (_ for _ in ()).throw(RuntimeError("429")))
+
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            with pytest.raises(yc.RateLimitError):
+                yc.get_info('X')
+
+        assert yc._limiter.current_rate() == pytest.approx(50.0)
+
+    def test_share_rate_limit_keeps_budget_and_exports_env(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('YF_RATE_LIMIT_FILE', raising=False)
+        before = yc._limiter
+        with yc.share_rate_limit(str(tmp_path / 'shared.bucket')) as path:
+            assert os.environ['YF_RATE_LIMIT_FILE'] == path
+            assert yc._limiter.path is not None
+            assert yc._limiter.max_rate == pytest.approx(100.0)
+            assert yc._limiter.burst == pytest.approx(10.0)
+        assert 'YF_RATE_LIMIT_FILE' not in os.environ
+        assert yc._limiter is before
+
+    def test_share_rate_limit_removes_its_temp_file(self, monkeypatch):
+        monkeypatch.setenv('YF_RATE_LIMIT_FILE', '/tmp/otro.bucket')
+        with yc.share_rate_limit() as path:
+            assert os.path.exists(path)
+        assert not os.path.exists(path)
+        assert os.environ['YF_RATE_LIMIT_FILE'] == '/tmp/otro.bucket'
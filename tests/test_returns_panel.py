@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests para returns_panel — panel de retornos y correlación vectorizada."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from returns_panel import (
+    build_panel, correlation_matrix, load_panel, pairwise_corr,
+    save_panel, shrink_corr, universe_tickers,
+)
+
+
+def _hist(closes, start='2026-01-05', tz=None):
+    idx = pd.bdate_range(start, periods=len(closes), tz=tz)
+    return pd.DataFrame({'Close': closes, 'Volume': 1}, index=idx)
+
+
+class TestPairwiseCorr:
+
+    def test_matches_pandas_with_missing_values(self):
+        rng = np.random.default_rng(7)
+        x = rng.normal(size=(90, 12))
+        x[:, 3] += x[:, 0]
+        x[rng.random(x.shape) < 0.25] = np.nan
+        expected = pd.DataFrame(x).corr(min_periods=15).to_numpy()
+        got = pairwise_corr(x, min_obs=15)
+        assert np.array_equal(np.isnan(expected), np.isnan(got))
+        assert np.nanmax(np.abs(expected - got)) < 1e-12
+
+    def test_constant_series_is_nan(self):
+        x = np.column_stack([np.ones(30), np.arange(30.0)])
+        corr = pairwise_corr(x)
+        assert np.isnan(corr[0, 1]) and np.isnan(corr[0, 0])
+        assert corr[1, 1] == 1.0
+
+    def test_shrinkage_pulls_towards_mean_correlation(self):
+        corr = np.array([[1.0, 0.9, 0.1], [0.9, 1.0, 0.2], [0.1, 0.2, 1.0]])
+        shrunk = shrink_corr(corr, 0.5)
+        assert shrunk[0, 1] == pytest.approx(0.5 * 0.9 + 0.5 * 0.4)
+        assert np.allclose(np.diag(shrunk), 1.0)
+        assert shrink_corr(corr, 0.0) is corr
+
+
+class TestPanel:
+
+    def test_returns_computed_per_ticker_before_alignment(self):
+        us = _hist([100.0, 101.0, 102.0, 103.0])
+        # EU con un hueco: su retorno tras el hueco no se parte en dos
+        eu = _hist([50.0, 55.0, 60.5], tz='Europe/Madrid').drop(pd.Timestamp('2026-01-06', tz='Europe/Madrid'))
+        panel = build_panel({'AAA': us, 'SAP.DE': eu, 'EMPTY': pd.DataFrame()})
+        assert list(panel.columns) == ['AAA', 'SAP.DE']
+        assert panel.index.tz is None
+        assert panel.loc['2026-01-07', 'SAP.DE'] == pytest.approx(0.21)
+        assert np.isnan(panel.loc['2026-01-06', 'SAP.DE'])
+
+    def test_save_load_roundtrip(self, tmp_path):
+        panel = build_panel({'AAA': _hist([1.0, 2.0, 3.0]), 'BBB': _hist([4.0, 2.0, 2.0])})
+        path = tmp_path / 'returns_panel.npz'
+        save_panel(panel, path)
+        loaded = load_panel(path)
+        assert list(loaded.columns) == ['AAA', 'BBB']
+        assert loaded.index.equals(panel.index)
+        assert np.allclose(loaded.to_numpy(), panel.to_numpy())
+        assert load_panel(tmp_path / 'missing.npz').empty
+
+    def test_universe_dedupes_across_csvs(self, tmp_path):
+        (tmp_path / 'value_conviction.csv').write_text('ticker,value_score\nbbb,80\naaa,70\n')
+        (tmp_path / 'value_opportunities.csv').write_text('ticker,value_score\naaa,70\nccc,60\n')
+        assert universe_tickers(tmp_path) == ['BBB', 'AAA', 'CCC']
+
+
+class TestCorrelationMatrix:
+
+    def test_window_and_min_obs(self):
+        rng = np.random.default_rng(1)
+        idx = pd.bdate_range('2025-01-01', periods=100)
+        panel = pd.DataFrame(rng.normal(size=(100, 3)), index=idx, columns=['A', 'B', 'C'])
+        panel.iloc[:-10, 2] = np.nan          # C solo tiene 10 retornos recientes
+
+        corr, days = correlation_matrix(panel, ['A', 'B', 'C', 'ZZZ'], window=40)
+        assert days == 40
+        assert list(corr.index) == ['A', 'B']
+        expected = panel[['A', 'B']].iloc[-40:].corr().to_numpy()
+        assert np.allclose(corr.to_numpy(), expected)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests para scan_executor.run_scan y su uso en OptionsFlowDetector.scan_tickers.
+
+Verifica:
+  - Resultados None / excepciones no cuentan como señal ni rompen el scan
+  - Los tickers se ejecutan en paralelo (no en serie)
+  - Timeout por ticker: el lento se abandona sin esperar a que termine
+  - Pool lleno de tickers colgados → la cola se cancela, no se espera
+  - deadline cancela los tickers aún no empezados
+  - Histograma y percentiles de latencia
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from scan_executor import LATENCY_BUCKETS, ScanReport, run_scan
+
+
+class TestRunScan:
+
+    def test_results_and_counters(self):
+        def fn(t):
+            if t == 'BAD':
+                raise ValueError('boom')
+            return None if t == 'NONE' else t.lower()
+
+        seen = []
+        results, report = run_scan(fn, ['AAA', 'NONE', 'BAD', 'BBB', 'AAA'],
+                                   on_result=lambda t, r: seen.append(t), progress_every=0)
+
+        assert results == {'AAA': 'aaa', 'BBB': 'bbb'}
+        assert sorted(seen) == ['AAA', 'BBB']
+        assert (report.total, report.ok, report.empty, report.failed) == (4, 2, 1, 1)
+        assert set(report.latencies) == {'AAA', 'NONE', 'BBB'}
+
+    def test_tickers_run_concurrently(self):
+        barrier = threading.Barrier(4, timeout=5)
+
+        def fn(t):
+            barrier.wait()      # solo pasa si los 4 corren a la vez
+            return t
+
+        results, report = run_scan(fn, ['A', 'B', 'C', 'D'], max_workers=4, progress_every=0)
+        assert len(results) == 4
+        assert report.failed == 0
+
+    def test_slow_ticker_is_abandoned(self):
+        release = threading.Event()
+
+        def fn(t):
+            if t == 'SLOW':
+                release.wait(10)
+            return t
+
+        t0 = time.monotonic()
+        results, report = run_scan(fn, ['SLOW', 'A', 'B'], max_workers=2,
+                                   ticker_timeout=0.3, progress_every=0)
+        release.set()
+
+        assert time.monotonic() - t0 < 5
+        assert report.timed_out == ['SLOW']
+        assert set(results) == {'A', 'B'}
+
+    def test_hung_workers_do_not_stall_the_queue(self):
+        release = threading.Event()
+
+        def fn(t):
+            if t.startswith('HUNG'):
+                release.wait(10)
+            return t
+
+        t0 = time.monotonic()
+        results, report = run_scan(fn, ['HUNG1', 'HUNG2', 'Q1', 'Q2', 'Q3'], max_workers=2,
+                                   ticker_timeout=0.3, deadline=None, progress_every=0)
+        release.set()
+
+        assert time.monotonic() - t0 < 5                 # no espera a los colgados
+        assert sorted(report.timed_out) == ['HUNG1', 'HUNG2']
+        assert sorted(report.cancelled) == ['Q1', 'Q2', 'Q3']
+        assert results == {}
+
+    def test_deadline_cancels_queued_tickers(self):
+        release = threading.Event()
+
+        def fn(t):
+            release.wait(10)
+            return t
+
+        results, report = run_scan(fn, ['A', 'B', 'C'], max_workers=1,
+                                   ticker_timeout=None, deadline=0.3, progress_every=0)
+        release.set()
+
+        assert results == {}
+        assert report.timed_out == ['A']
+        assert sorted(report.cancelled) == ['B', 'C']
+
+
+class TestScanReport:
+
+    def test_histogram_and_percentiles(self):
+        report = ScanReport(label='x', latencies={'A': 0.1, 'B': 0.7, 'C': 3.0, 'D': 45.0})
+        hist = report.histogram()
+
+        assert len(hist) == len(LATENCY_BUCKETS) + 1
+        assert sum(hist.values()) == 4
+        assert hist['0-0.5s'] == 1 and hist['0.5-1s'] == 1 and hist['2-5s'] == 1 and hist['>30s'] == 1
+        assert report.percentile(50) == pytest.approx(3.0)
+        assert report.summary()['latency_p95'] == pytest.approx(45.0)
+
+    def test_empty_report(self):
+        report = ScanReport(label='x')
+        assert report.percentile(50) is None
+        assert 'x: 0 tickers' in report.format()
+
+
+class TestOptionsFlowDetectorScan:
+
+    def test_scan_tickers_sorts_flows_and_keeps_report(self, monkeypatch):
+        from options_flow_detector import OptionsFlowDetector
+
+        scores = {'AAA': 40, 'BBB': 90, 'CCC': None}
+
+        def fake_detect(self, ticker, company_name=None):
+            if scores[ticker] is None:
+                return None
+            return {'ticker': ticker, 'company_name': company_name, 'sentiment': 'BULLISH',
+                    'total_premium': 100_000, 'flow_score': scores[ticker]}
+
+        monkeypatch.setattr(OptionsFlowDetector, 'detect_unusual_activity', fake_detect)
+        detector = OptionsFlowDetector()
+        flows = detector.scan_tickers(['AAA', 'BBB', 'CCC'], {'AAA': 'Alpha'})
+
+        assert [f['ticker'] for f in flows] == ['BBB', 'AAA']
+        assert flows[1]['company_name'] == 'Alpha'
+        assert detector.scan_report.ok == 2 and detector.scan_report.empty == 1
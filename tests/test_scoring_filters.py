@@ -287,3 +287,165 @@ class TestSourceCodeAlignment:
         assert "+= 3.0" in src, "RS Line percentile bonus (+3) cambió"
         assert "+= 2.0" in src, "RS Line trend bonus (+2) cambió"
         assert "clip(upper=10.0)" in src, "RS Line cap (10) cambió"
+
+
+# ── Panel único para MA / A/D / Float ─────────────────────────────────────────
+
+class TestAdvancedFiltersPanel:
+    """Los tres filtros aceptan datos ya descargados y NO vuelven a pedirlos."""
+
+    @staticmethod
+    def _uptrend(n: int = 260) -> pd.DataFrame:
+        import numpy as np
+        close = 50 + np.arange(n, dtype=float) * 0.5
+        return pd.DataFrame({
+            'Open': close, 'High': close + 1, 'Low': close - 1,
+            'Close': close, 'Volume': np.full(n, 1_000_000.0),
+        }, index=pd.bdate_range('2025-01-02', periods=n))
+
+    def test_filters_use_prefetched_data(self):
+        from unittest.mock import patch
+        from moving_average_filter import MovingAverageFilter
+        from accumulation_distribution_filter import AccumulationDistributionFilter
+        from float_filter import FloatFilter
+
+        hist = self._uptrend()
+        boom = AssertionError("no debería descargar")
+        with patch('moving_average_filter.get_history', side_effect=boom), \
+             patch('accumulation_distribution_filter.get_history', side_effect=boom), \
+             patch('float_filter.get_info', side_effect=boom):
+            ma = MovingAverageFilter().check_stock('AAA', hist=hist)
+            ad = AccumulationDistributionFilter().analyze_stock('AAA', period_days=50, hist=hist)
+            fl = FloatFilter().check_stock('AAA', info={'floatShares': 20_000_000})
+
+        assert ma['reason'] != 'Insufficient data'
+        assert ad['signal'] != 'UNKNOWN'
+        assert fl['shares_outstanding_millions'] == pytest.approx(20.0)
+
+    def test_missing_panel_entry_is_not_evaluated(self):
+        from moving_average_filter import MovingAverageFilter
+        res = MovingAverageFilter().check_stock('AAA', hist=pd.DataFrame())
+        assert res['passes'] is False
+        assert res['reason'] == 'Insufficient data'   # no penaliza
+
+    def test_panel_fetched_once_for_all_tickers(self):
+        from unittest.mock import patch
+        from super_score_integrator import SuperScoreIntegrator
+
+        with patch('yfinance_client.get_history_batch',
+                   return_value=({'AAA': self._uptrend()}, {})) as hb, \
+             patch('yfinance_client.get_info_batch', return_value=({}, {})) as ib:
+            histories, infos = SuperScoreIntegrator._fetch_filter_panel(['AAA', 'BBB', 'AAA', None])
+
+        hb.assert_called_once_with(['AAA', 'BBB'], period='1y')
+        ib.assert_called_once_with(['AAA', 'BBB'])
+        assert list(histories) == ['AAA'] and infos == {}
+
+
+# ── Super score incremental ───────────────────────────────────────────────────
+
+class TestIncrementalIntegration:
+    """Solo los tickers cuya fila de entrada cambió vuelven a los filtros."""
+
+    @pytest.fixture
+    def integrator(self, tmp_path):
+        from super_score_integrator import SuperScoreIntegrator
+        integ = SuperScoreIntegrator()
+        integ.cache_dir = tmp_path / 'super_score'
+        integ.reference_date = '2026-10-16'
+        return integ
+
+    @staticmethod
+    def _panel(tickers):
+        hist = TestAdvancedFiltersPanel._uptrend()
+        return ({t: hist for t in tickers}, {t: {'floatShares': 20_000_000} for t in tickers})
+
+    def test_unchanged_tickers_reuse_filter_results(self, integrator):
+        from unittest.mock import patch
+
+        hashes = {'AAA': 'h1', 'BBB': 'h2'}
+        with patch.object(integrator, '_fetch_filter_panel',
+                          side_effect=lambda ts: self._panel(ts)) as fp:
+            first = integrator._ticker_filter_results(['AAA', 'BBB'], hashes)
+            second = integrator._ticker_filter_results(['AAA', 'BBB'], {'AAA': 'h1', 'BBB': 'h2-new'})
+
+        assert fp.call_args_list[0].args == (['AAA', 'BBB'],)
+        assert fp.call_args_list[1].args == (['BBB'],)     # AAA sale del estado
+        assert second['ma']['AAA'] == first['ma']['AAA']
+        assert set(second['ad']) == {'AAA', 'BBB'}
+
+    def test_state_expires_with_reference_date(self, integrator):
+        from unittest.mock import patch
+
+        with patch.object(integrator, '_fetch_filter_panel',
+                          side_effect=lambda ts: self._panel(ts)) as fp:
+            integrator._ticker_filter_results(['AAA'], {'AAA': 'h1'})
+            integrator.reference_date = '2026-10-17'
+            integrator._ticker_filter_results(['AAA'], {'AAA': 'h1'})
+
+        assert fp.call_count == 2
+
+    def test_missing_panel_entries_are_retried(self, integrator):
+        from unittest.mock import patch
+
+        with patch.object(integrator, '_fetch_filter_panel', return_value=({}, {})) as fp:
+            res = integrator._ticker_filter_results(['AAA'], {'AAA': 'h1'})
+            integrator._ticker_filter_results(['AAA'], {'AAA': 'h1'})
+
+        assert res['ma']['AAA']['reason'] == 'Insufficient data'
+        assert fp.call_count == 2                          # no se congeló el fallo
+
+    def test_without_hashes_everything_is_evaluated(self, integrator):
+        from unittest.mock import patch
+
+        with patch.object(integrator, '_fetch_filter_panel',
+                          side_effect=lambda ts: self._panel(ts)) as fp:
+            integrator._ticker_filter_results(['AAA', 'AAA', None])
+            integrator._ticker_filter_results(['AAA'])
+
+        assert fp.call_count == 2
+        assert not (integrator.cache_dir / 'filter_state.json').exists()
+
+    def test_row_hash_changes_only_for_the_edited_ticker(self, integrator):
+        df = pd.DataFrame({'ticker': ['AAA', 'BBB'], 'vcp_score': [70.0, 60.0]})
+        before = integrator._ticker_input_hashes(df)
+        df.loc[1, 'vcp_score'] = 61.0
+        after = integrator._ticker_input_hashes(df)
+        assert before['AAA'] == after['AAA']
+        assert before['BBB'] != after['BBB']
+
+    def test_merge_cache_keyed_on_input_content(self, integrator, tmp_path, monkeypatch):
+        import super_score_integrator as ssi
+
+        vcp = tmp_path / 'vcp.csv'
+        vcp.write_text('ticker,vcp_score\nAAA,70\n')
+        monkeypatch.setattr(ssi, 'INPUT_FILES', {'vcp': vcp, 'ml': tmp_path / 'missing.json'})
+
+        merged = pd.DataFrame({'ticker': ['AAA'], 'vcp_score': [70.0]})
+        fps = integrator._fingerprint_inputs()
+        assert fps['ml'] is None
+        integrator._save_cached_merge(merged, fps)
+        pd.testing.assert_frame_equal(integrator._load_cached_merge(integrator._fingerprint_inputs()), merged)
+
+        vcp.write_text('ticker,vcp_score\nAAA,71\n')
+        assert integrator._load_cached_merge(integrator._fingerprint_inputs()) is None
+
+        integrator.incremental = False
+        vcp.write_text('ticker,vcp_score\nAAA,70\n')
+        assert integrator._load_cached_merge(integrator._fingerprint_inputs()) is None
+
+    def test_code_change_invalidates_merge_and_filter_state(self, integrator, tmp_path, monkeypatch):
+        from unittest.mock import patch
+        import super_score_integrator as ssi
+
+        monkeypatch.setattr(ssi, 'INPUT_FILES', {'ml': tmp_path / 'missing.json'})
+        merged = pd.DataFrame({'ticker': ['AAA'], 'vcp_score': [70.0]})
+        integrator._save_cached_merge(merged, integrator._fingerprint_inputs())
+        with patch.object(integrator, '_fetch_filter_panel',
+                          side_effect=lambda ts: self._panel(ts)) as fp:
+            integrator._ticker_filter_results(['AAA'], {'AAA': 'h1'})
+            monkeypatch.setattr(ssi, '_code_digest', lambda paths: 'otro-codigo')
+            integrator._ticker_filter_results(['AAA'], {'AAA': 'h1'})
+
+        assert fp.call_count == 2
+        assert integrator._load_cached_merge(integrator._fingerprint_inputs()) is None
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests de la caché por contenido de etapas (stage_cache.py)."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from pipeline_runner import Stage, run
+from stage_cache import StageCache, code_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    docs, code = tmp_path / 'docs', tmp_path / 'code'
+    docs.mkdir()
+    (code / 'pkg').mkdir(parents=True)
+    (code / 'drift.py').write_text('import helper\nfrom pkg import sub\nimport pandas\n')
+    (code / 'helper.py').write_text('X = 1\n')
+    (code / 'pkg' / '__init__.py').write_text('')
+    (code / 'pkg' / 'sub.py').write_text('from . import leaf\n')
+    (code / 'pkg' / 'leaf.py').write_text('')
+    (docs / 'value.csv').write_text('ticker,score\nAAA,80\n')
+    return tmp_path, docs, code
+
+
+def _cache(tmp_path, docs, code, today='2026-10-16'):
+    return StageCache(root=tmp_path / 'cache', docs=docs, code_root=code, today=today)
+
+
+def _drift(cache='content'):
+    return Stage('drift', ('python3', 'drift.py'), reads=('value.csv', 'history/'),
+                 writes=('alerts.json', 'out/'), cache=cache)
+
+
+class _Exec:
+    """Etapa falsa: escribe sus salidas a partir de value.csv."""
+
+    def __init__(self, docs, rc=0):
+        self.docs, self.rc, self.calls = docs, rc, 0
+
+    def __call__(self, stage):
+        self.calls += 1
+        value = (self.docs / 'value.csv').read_text()
+        (self.docs / 'alerts.json').write_text(json.dumps({'n': len(value)}))
+        (self.docs / 'out').mkdir(exist_ok=True)
+        (self.docs / 'out' / 'detail.txt').write_text(value.upper())
+        return self.rc
+
+
+class TestCodeFiles:
+
+    def test_follows_repo_imports_only(self, tree):
+        _, _, code = tree
+        names = {str(f.relative_to(code)) for f in code_files(('python3', 'drift.py'), code)}
+        assert names == {'drift.py', 'helper.py', 'pkg/__init__.py', 'pkg/sub.py', 'pkg/leaf.py'}
+
+    def test_module_entry(self, tree):
+        _, _, code = tree
+        names = {str(f.relative_to(code)) for f in code_files(('python3', '-m', 'pkg.sub'), code)}
+        assert names == {'pkg/__init__.py', 'pkg/sub.py', 'pkg/leaf.py'}
+
+
+class TestStageCache:
+
+    def test_second_run_replays_outputs(self, tree):
+        tmp_path, docs, code = tree
+        ex = _Exec(docs)
+        first = run([_drift()], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))[0]
+        assert first.status == 'ok' and ex.calls == 1
+        expected = {p: (docs / p).read_text() for p in ('alerts.json', 'out/detail.txt')}
+
+        (docs / 'alerts.json').unlink()
+        (docs / 'out' / 'detail.txt').write_text('corrupto')
+        cache = _cache(tmp_path, docs, code)
+        second = run([_drift()], docs=docs, execute=ex, cache=cache)[0]
+        assert second.status == 'cached' and ex.calls == 1
+        assert second.cache_key == first.cache_key
+        assert {p: (docs / p).read_text() for p in expected} == expected
+        assert second.bytes_written > 0 and cache.stats['hits'] == 1
+
+    def test_input_change_recomputes(self, tree):
+        tmp_path, docs, code = tree
+        ex = _Exec(docs)
+        run([_drift()], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))
+        (docs / 'history').mkdir()
+        (docs / 'history' / 'snap.csv').write_text('x')     # aparece una entrada que faltaba
+        run([_drift()], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))
+        (docs / 'value.csv').write_text('ticker,score\nBBB,70\n')
+        run([_drift()], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))
+        assert ex.calls == 3
+
+    def test_code_change_recomputes(self, tree):
+        tmp_path, docs, code = tree
+        ex = _Exec(docs)
+        run([_drift()], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))
+        (code / 'pkg' / 'leaf.py').write_text('Y = 2\n')
+        run([_drift()], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))
+        assert ex.calls == 2
+
+    def test_daily_stages_expire_with_the_date(self, tree):
+        tmp_path, docs, code = tree
+        ex = _Exec(docs)
+        for today in ('2026-10-16', '2026-10-16', '2026-10-17'):
+            run([_drift('daily')], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code, today))
+        assert ex.calls == 2
+
+    def test_failures_and_uncached_stages_always_run(self, tree):
+        tmp_path, docs, code = tree
+        failing = _Exec(docs, rc=1)
+        for _ in range(2):
+            run([_drift()], docs=docs, execute=failing, cache=_cache(tmp_path, docs, code))
+        assert failing.calls == 2
+
+        ex = _Exec(docs)
+        for _ in range(2):
+            run([_drift(cache=None)], docs=docs, execute=ex, cache=_cache(tmp_path, docs, code))
+        assert ex.calls == 2
+
+    def test_digests_are_memoized_across_runs(self, tree, monkeypatch):
+        import stage_cache
+
+        tmp_path, docs, code = tree
+        cache = _cache(tmp_path, docs, code)
+        cache.key(_drift())
+        cache.save_digests()
+
+        def _no_rehash(path):
+            raise AssertionError(f'rehash de {path}')
+        monkeypatch.setattr(stage_cache, '_sha256_file', _no_rehash)
+        assert _cache(tmp_path, docs, code).key(_drift()) == cache.key(_drift())
@@ -97,31 +97,32 @@ class TestNowUtc:
 # ─── 2. _fetch_history ────────────────────────────────────────────────────────
 
 class TestFetchHistory:
-    """_fetch_history is tightly coupled to yfinance; test via mocking."""
+    """_fetch_history goes through yfinance_client.get_history; test via mocking."""
 
     def test_returns_dataframe_on_success(self):
         mock_df = _make_ohlcv(100)
-        with patch("technical_filter.yf.download", return_value=mock_df):
+        with patch("technical_filter.get_history", return_value=mock_df):
             from technical_filter import _fetch_history
             result = _fetch_history("AAPL")
         assert isinstance(result, pd.DataFrame)
         assert len(result) == 100
 
     def test_returns_none_when_empty(self):
-        with patch("technical_filter.yf.download", return_value=pd.DataFrame()):
+        from yfinance_client import DataNotFoundError
+        with patch("technical_filter.get_history", side_effect=DataNotFoundError("empty")):
             from technical_filter import _fetch_history
             result = _fetch_history("AAPL")
         assert result is None
 
     def test_returns_none_when_less_than_30_rows(self):
         mock_df = _make_ohlcv(20)
-        with patch("technical_filter.yf.download", return_value=mock_df):
+        with patch("technical_filter.get_history", return_value=mock_df):
             from technical_filter import _fetch_history
             result = _fetch_history("AAPL")
         assert result is None
 
     def test_returns_none_on_exception(self):
-        with patch("technical_filter.yf.download", side_effect=Exception("network error")):
+        with patch("technical_filter.get_history", side_effect=Exception("network error")):
             from technical_filter import _fetch_history
             result = _fetch_history("AAPL")
         assert result is None
@@ -132,7 +133,7 @@ class TestFetchHistory:
         mock_df.columns = pd.MultiIndex.from_tuples(
             [(c, "AAPL") for c in mock_df.columns]
         )
-        with patch("technical_filter.yf.download", return_value=mock_df):
+        with patch("technical_filter.get_history", return_value=mock_df):
             from technical_filter import _fetch_history
             result = _fetch_history("AAPL")
         assert isinstance(result, pd.DataFrame)
@@ -769,10 +770,11 @@ class TestRunTechnicalFilterMultiUniverso:
         monkeypatch.setattr(tf, "TARGET_CSVS", [(us_csv, us_filtered), (eu_csv, eu_filtered)])
         monkeypatch.setattr(tf, "fetch_spy_6m_return", lambda: 5.0)
         monkeypatch.setattr(tf, "RATE_DELAY", 0)
+        monkeypatch.setattr(tf, "get_history_batch", lambda tickers, **kw: ({}, {}))
 
         vistos = []
 
-        def _fake_signals(ticker, spy_return):
+        def _fake_signals(ticker, df, spy_return):
             vistos.append(ticker)
             return {"ticker": ticker, "is_stage2": True, "ma_score": 3,
                     "atr_ratio": 1.0, "volume_dryup": False,
@@ -781,7 +783,7 @@ class TestRunTechnicalFilterMultiUniverso:
                     "tech_stage": "stage2", "entry_readiness": "ENTRADA",
                     "entry_readiness_reason": "test"}
 
-        monkeypatch.setattr(tf, "compute_technical_signals", _fake_signals)
+        monkeypatch.setattr(tf, "_signals_from_history", _fake_signals)
 
         tf.run_technical_filter()
 
@@ -815,10 +817,11 @@ class TestRunTechnicalFilterMultiUniverso:
         monkeypatch.setattr(tf, "fetch_spy_6m_return", lambda: 13.5)
         monkeypatch.setattr(tf, "fetch_benchmark_6m_return", lambda symbol: 9.9)
         monkeypatch.setattr(tf, "RATE_DELAY", 0)
+        monkeypatch.setattr(tf, "get_history_batch", lambda tickers, **kw: ({}, {}))
 
         benchmarks_usados = {}
 
-        def _fake_signals(ticker, spy_return):
+        def _fake_signals(ticker, df, spy_return):
             benchmarks_usados[ticker] = spy_return
             return {"ticker": ticker, "is_stage2": True, "ma_score": 3,
                     "atr_ratio": 1.0, "volume_dryup": False,
@@ -827,7 +830,7 @@ class TestRunTechnicalFilterMultiUniverso:
                     "tech_stage": "stage2", "entry_readiness": "ENTRADA",
                     "entry_readiness_reason": "test"}
 
-        monkeypatch.setattr(tf, "compute_technical_signals", _fake_signals)
+        monkeypatch.setattr(tf, "_signals_from_history", _fake_signals)
         tf.run_technical_filter()
 
         assert benchmarks_usados["AAPL"] == 13.5    # SPY
@@ -853,8 +856,11 @@ class TestRunTechnicalFilterMultiUniverso:
         monkeypatch.setattr(tf, "RATE_DELAY", 0)
 
         llamadas = {"n": 0}
+        pedidos = []
+        monkeypatch.setattr(tf, "get_history_batch",
+                            lambda tickers, **kw: (pedidos.extend(tickers), ({}, {}))[1])
 
-        def _fake_signals(ticker, spy_return):
+        def _fake_signals(ticker, df, spy_return):
             llamadas["n"] += 1
             return {"ticker": ticker, "is_stage2": False, "ma_score": 0,
                     "atr_ratio": None, "volume_dryup": None,
@@ -863,9 +869,10 @@ class TestRunTechnicalFilterMultiUniverso:
                     "tech_stage": "stage1", "entry_readiness": "VIGILAR",
                     "entry_readiness_reason": "x"}
 
-        monkeypatch.setattr(tf, "compute_technical_signals", _fake_signals)
+        monkeypatch.setattr(tf, "_signals_from_history", _fake_signals)
         tf.run_technical_filter()
         assert llamadas["n"] == 1
+        assert pedidos == ["AAPL"]
 
     def test_universo_ausente_no_rompe_a_los_demas(self, tmp_path, monkeypatch):
         import technical_filter as tf
@@ -879,8 +886,9 @@ class TestRunTechnicalFilterMultiUniverso:
         monkeypatch.setattr(tf, "TECH_JSON", tmp_path / "t.json")
         monkeypatch.setattr(tf, "fetch_spy_6m_return", lambda: 0.0)
         monkeypatch.setattr(tf, "RATE_DELAY", 0)
-        monkeypatch.setattr(tf, "compute_technical_signals",
-                            lambda t, s: {"ticker": t, "is_stage2": True, "ma_score": 1,
+        monkeypatch.setattr(tf, "get_history_batch", lambda tickers, **kw: ({}, {}))
+        monkeypatch.setattr(tf, "_signals_from_history",
+                            lambda t, df, s: {"ticker": t, "is_stage2": True, "ma_score": 1,
                                           "atr_ratio": None, "volume_dryup": None,
                                           "pct_from_52w_high": None, "pct_from_52w_low": None,
                                           "relative_strength_6m": None, "trend_direction": "uptrend",
@@ -889,3 +897,37 @@ class TestRunTechnicalFilterMultiUniverso:
 
         tf.run_technical_filter()  # no debe lanzar excepción
         assert pd.read_csv(existe)["entry_readiness"].iloc[0] == "ENTRADA"
+
+
+# ─── Series point-in-time (indicator_series / readiness_at) ───────────────────
+
+class TestIndicatorSeries:
+
+    @staticmethod
+    def _random_ohlc(n: int = 480, seed: int = 0) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n))))
+        return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99,
+                             "Close": close, "Volume": 1e6})
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_each_row_matches_the_truncated_history(self, seed):
+        import technical_filter as tf
+
+        df = self._random_ohlc(seed=seed)
+        levels = tf.indicator_series(df["Close"], df["High"], df["Low"])
+        for i in range(60, len(df), 7):
+            prefix = df.iloc[:i + 1]
+            expected = tf._signals_from_history("T", prefix.copy(), 3.0)
+            assert tf.readiness_at(levels, i, 3.0) == (
+                expected["entry_readiness"], expected["entry_readiness_reason"])
+
+    def test_no_look_ahead(self):
+        import technical_filter as tf
+
+        df = self._random_ohlc()
+        crash = df.copy()
+        crash.loc[300:, ["Close", "High", "Low"]] *= 0.3
+        a = tf.indicator_series(df["Close"], df["High"], df["Low"])
+        b = tf.indicator_series(crash["Close"], crash["High"], crash["Low"])
+        pd.testing.assert_frame_equal(a.iloc[:300], b.iloc[:300])
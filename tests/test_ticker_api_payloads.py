@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests para ticker_api_payloads — cuerpos JSON cacheados de los endpoints de lista.
+
+Verifica:
+  - Mismo cuerpo que el antiguo read_csv → to_json → jsonify (NaN → null, fallback)
+  - La caché no vuelve a leer el CSV mientras no cambie (mtime/tamaño)
+  - El pre-render se usa solo si el sha1 del CSV coincide
+  - ETag / 304 y variante gzip en el endpoint real
+"""
+import gzip
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+import ticker_api_payloads as tp
+
+
+@pytest.fixture
+def csvs(tmp_path):
+    full = tmp_path / 'full.csv'
+    full.write_text('ticker,score,note\nAAA,80.5,\nBBB,,x\n')
+    empty = tmp_path / 'empty.csv'
+    empty.write_text('ticker,score\n')
+    return full, empty, tmp_path
+
+
+class TestBuildPayload:
+
+    def test_body_matches_legacy_shape(self, csvs):
+        full, empty, tmp = csvs
+        payload = tp.build_payload([(tmp / 'missing.csv', 'a'), (empty, 'b'), (full, 'c')], None)
+        body = json.loads(payload.body)
+        assert body == {
+            'count': 2, 'source': 'c',
+            'data': [{'ticker': 'AAA', 'score': 80.5, 'note': None},
+                     {'ticker': 'BBB', 'score': None, 'note': 'x'}],
+        }
+
+    def test_no_candidate_with_rows(self, csvs):
+        _full, empty, _tmp = csvs
+        body = json.loads(tp.build_payload([(empty, 'b')], None).body)
+        assert body == {'data': [], 'count': 0, 'source': 'none'}
+
+    def test_gzip_variant_roundtrips(self, csvs):
+        full, _empty, _tmp = csvs
+        payload = tp.build_payload([(full, 'c')], None)
+        assert gzip.decompress(payload.gzipped()) == payload.body
+
+
+class TestPayloadCache:
+
+    def test_hit_does_not_touch_pandas(self, csvs):
+        full, _empty, _tmp = csvs
+        cache = tp.PayloadCache(prerender_dir=None)
+        first = cache.get([(full, 'c')])
+        with patch.object(tp.pd, 'read_csv', side_effect=AssertionError('re-read')):
+            second = cache.get([(full, 'c')])
+        assert second is first
+        assert cache.stats == {'hits': 1, 'misses': 1}
+
+    def test_rewritten_csv_invalidates(self, csvs):
+        full, _empty, _tmp = csvs
+        cache = tp.PayloadCache(prerender_dir=None)
+        before = cache.get([(full, 'c')])
+        full.write_text('ticker,score\nCCC,1\n')
+        os.utime(full, ns=(full.stat().st_mtime_ns + 10**9,) * 2)
+        after = cache.get([(full, 'c')])
+        assert after.etag != before.etag
+        assert json.loads(after.body)['data'] == [{'ticker': 'CCC', 'score': 1}]
+
+    def test_lru_is_bounded(self, csvs):
+        full, _empty, _tmp = csvs
+        cache = tp.PayloadCache(prerender_dir=None, max_entries=2)
+        for label in 'abc':
+            cache.get([(full, label)])
+        assert len(cache._entries) == 2
+
+
+class TestPrerender:
+
+    def test_valid_prerender_is_served_without_pandas(self, csvs):
+        full, _empty, tmp = csvs
+        out = tmp / 'api_payloads'
+        assert tp.prerender([full, tmp / 'missing.csv'], out) == 1
+        with patch.object(tp.pd, 'read_csv', side_effect=AssertionError('pandas')):
+            payload = tp.build_payload([(full, 'c')], out)
+        assert json.loads(payload.body)['count'] == 2
+        assert payload.body == tp.build_payload([(full, 'c')], None).body
+
+    def test_stale_prerender_is_ignored(self, csvs):
+        full, _empty, tmp = csvs
+        out = tmp / 'api_payloads'
+        tp.prerender([full], out)
+        full.write_text('ticker,score\nZZZ,3\n')
+        body = json.loads(tp.build_payload([(full, 'c')], out).body)
+        assert body['data'] == [{'ticker': 'ZZZ', 'score': 3}]
+
+
+class TestEndpoint:
+
+    @pytest.fixture
+    def respond(self, csvs, monkeypatch):
+        os.environ.pop('FLASK_ENV', None)
+        os.environ['AUTH_BYPASS'] = 'true'
+        import ticker_api as api
+        full, _empty, _tmp = csvs
+        monkeypatch.setattr(api, '_PAYLOADS', tp.PayloadCache(prerender_dir=None))
+
+        def _respond(**headers):
+            with api.app.test_request_context('/api/value-opportunities', headers=headers):
+                return api._csv_to_json_response([(full, 'csv')])
+        return _respond
+
+    def test_etag_revalidation_returns_304(self, respond):
+        first = respond()
+        assert first.status_code == 200
+        assert json.loads(first.get_data())['count'] == 2
+        again = respond(**{'If-None-Match': first.headers['ETag']})
+        assert again.status_code == 304
+        assert again.get_data() == b''
+
+    def test_gzip_when_accepted(self, respond):
+        resp = respond(**{'Accept-Encoding': 'gzip, br'})
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        assert resp.headers['Vary'] == 'Accept-Encoding'
+        assert json.loads(gzip.decompress(resp.get_data()))['source'] == 'csv'
+        assert resp.headers['ETag'] != respond().headers['ETag']
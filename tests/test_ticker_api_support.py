@@ -8,7 +8,7 @@ from pathlib import Path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ticker_api_config import build_cors_origins, load_runtime_config
-from ticker_api_data import load_csv_file, load_json_file
+from ticker_api_data import DatasetRegistry, load_csv_file, load_json_file, load_static_datasets
 
 
 def test_runtime_config_defaults_to_safe_dev_mode():
@@ -55,3 +55,102 @@ def test_load_json_file_reads_objects(tmp_path: Path):
 def test_loaders_handle_missing_files(tmp_path: Path):
     assert load_csv_file(tmp_path / "missing.csv").empty
     assert load_json_file(tmp_path / "missing.json") == {}
+
+
+def _touch_past(path: Path, seconds: float = 10.0):
+    """Fecha el fichero en el pasado (la recarga ignora los recién escritos)."""
+    import os
+    import time
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def _docs(tmp_path: Path) -> Path:
+    (tmp_path / "fundamental_scores.csv").write_text("ticker,fundamental_score\naaa,70\n")
+    (tmp_path / "ticker_data_cache.json").write_text('{"AAA": {"price": 1}}')
+    for p in tmp_path.iterdir():
+        _touch_past(p)
+    return tmp_path
+
+
+def test_registry_reloads_only_changed_datasets(tmp_path: Path):
+    docs = _docs(tmp_path)
+    swaps = []
+    reg = DatasetRegistry(docs, poll_seconds=0, on_swap=swaps.append)
+    before = reg.current
+    assert list(before.df_fund.index) == ["AAA"]
+
+    (docs / "fundamental_scores.csv").write_text("ticker,fundamental_score\naaa,70\nbbb,60\n")
+    _touch_past(docs / "fundamental_scores.csv", 5)
+    assert reg.refresh() == ["df_fund_us"]
+
+    after = reg.current
+    assert after is not before and swaps == [after]
+    assert list(after.df_fund.index) == ["AAA", "BBB"]     # derivado recalculado
+    assert after.ticker_cache is before.ticker_cache       # no recargado
+    assert reg.refresh() == []
+
+
+def test_registry_waits_for_files_still_being_written(tmp_path: Path):
+    docs = _docs(tmp_path)
+    reg = DatasetRegistry(docs, poll_seconds=0, settle_seconds=60)
+    (docs / "ticker_data_cache.json").write_text('{"AAA": {}, "BBB": {}}')
+    assert reg.refresh() == []
+    _touch_past(docs / "ticker_data_cache.json", 120)
+    assert reg.refresh() == ["ticker_cache"]
+    assert set(reg.current.ticker_cache) == {"AAA", "BBB"}
+
+
+def test_registry_keeps_previous_data_on_broken_reload(tmp_path: Path):
+    docs = _docs(tmp_path)
+    reg = DatasetRegistry(docs, poll_seconds=0)
+    (docs / "ticker_data_cache.json").write_text('{"AAA": ')      # a medio escribir
+    _touch_past(docs / "ticker_data_cache.json", 5)
+    assert reg.refresh() == []
+    assert reg.current.ticker_cache == {"AAA": {"price": 1}}
+    assert reg.generation == 0
+
+
+def test_registry_background_thread_picks_up_changes(tmp_path: Path):
+    import time
+    docs = _docs(tmp_path)
+    reg = DatasetRegistry(docs, poll_seconds=0.05, settle_seconds=0)
+    reg.ensure_started()
+    try:
+        (docs / "ml_scores.csv").write_text("ticker,ml_score\nccc,80\n")
+        deadline = time.monotonic() + 3
+        while reg.generation == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert list(reg.current.df_ml.index) == ["CCC"]
+    finally:
+        reg.stop()
+
+
+def test_ticker_index_joins_rows_once_per_ticker(tmp_path: Path):
+    docs = _docs(tmp_path)
+    (docs / "european_fundamental_scores.csv").write_text("ticker,fundamental_score\naaa,10\nsap.de,55\n")
+    (docs / "recurring_insiders.csv").write_text("ticker,purchase_count\naaa,3\n")
+    (docs / "eu_recurring_insiders.csv").write_text("ticker,purchase_count,market\nsap.de,2,EU\n")
+    (docs / "tikr_earnings_data.json").write_text('{"data": {"AAA": {"price": {}}}}')
+    ds = load_static_datasets(docs)
+    assert ds.tikr_earnings == {"AAA": {"price": {}}}
+
+    aaa, sap = ds.ticker_index["AAA"], ds.ticker_index["SAP.DE"]
+    assert aaa["rfund"]["fundamental_score"] == 70         # US antes que EU
+    assert aaa["insider"] == {"purchase_count": 3, "market": "US"}
+    assert sap["insider"]["market"] == "EU"
+    assert aaa["tc"] == {"price": 1} and sap["tc"] == {}
+    assert aaa["in_cache"] and not sap["in_cache"]         # solo fundamentales
+    assert sap["r5d"] is None and sap["rscores"] is None
+
+
+def test_ticker_index_rebuilt_on_reload(tmp_path: Path):
+    docs = _docs(tmp_path)
+    reg = DatasetRegistry(docs, poll_seconds=0)
+    assert "BBB" not in reg.current.ticker_index
+
+    (docs / "ml_scores.csv").write_text("ticker,ml_score\nbbb,80\n")
+    _touch_past(docs / "ml_scores.csv", 5)
+    assert reg.refresh() == ["df_ml"]
+    assert reg.current.ticker_index["BBB"]["rml"] == {"ml_score": 80}
+    assert reg.current.ticker_index["BBB"]["in_cache"]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests para ticker_api_timeseries — desglose temporal del portfolio tracker.
+
+Verifica:
+  - Etiquetas de semana/mes/trimestre iguales a las de Period.start_time
+  - win_* en bool o texto, NaN → null (nunca NaN en el JSON)
+  - Orden de días de la semana y estrategias
+  - Memoización por mtime/tamaño del CSV y códigos 404
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+import ticker_api_timeseries as ts
+
+CSV = """ticker,strategy,status,signal_date,return_14d,return_30d,win_14d,win_30d,max_drawdown_30d
+AAA,VALUE,COMPLETED,2026-03-04,2.0,4.0,True,True,-1.0
+BBB,EU_VALUE,COMPLETED,2026-03-06,-1.0,,False,,-3.0
+CCC,VALUE,COMPLETED,2026-04-01,5.0,6.0,True,False,-2.0
+DDD,MOMENTUM,ACTIVE,2026-04-02,,,,,
+EEE,VALUE,COMPLETED,not-a-date,1.0,1.0,True,True,0.0
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'recommendations.csv'
+    path.write_text(CSV)
+    return path
+
+
+def _body(csv_path):
+    status, payload = ts.build_timeseries(csv_path)
+    return status, json.loads(payload.body)
+
+
+class TestAggregate:
+
+    def test_labels_match_period_start(self, csv_path):
+        status, body = _body(csv_path)
+        assert status == 200
+        dates = pd.to_datetime(pd.Series(['2026-03-04', '2026-03-06', '2026-04-01']))
+        weeks = sorted({str(p.start_time.date()) for p in dates.dt.to_period('W')})
+        assert [r['label'] for r in body['by_week']] == weeks
+        assert [r['label'] for r in body['by_month']] == ['2026-03-01', '2026-04-01']
+        assert [r['label'] for r in body['by_quarter']] == ['Q1 2026', 'Q2 2026']
+        assert [r['label'] for r in body['by_weekday']] == ['Wednesday', 'Friday']
+        assert body['total_completed'] == 3
+        assert body['date_range'] == {'from': '2026-03-04', 'to': '2026-04-01'}
+
+    def test_period_stats(self, csv_path):
+        _, body = _body(csv_path)
+        march = body['by_month'][0]
+        assert march == {
+            'label': '2026-03-01', 'signals': 2,
+            'win_rate_14d': 50.0, 'win_rate_30d': 100.0,
+            'avg_return_14d': 0.5, 'avg_return_30d': 4.0,
+            'value_us': 1, 'value_eu': 1, 'momentum': 0,
+        }
+
+    def test_strategy_rows(self, csv_path):
+        _, body = _body(csv_path)
+        by_strategy = {r['strategy']: r for r in body['by_strategy']}
+        assert list(by_strategy) == ['EU_VALUE', 'VALUE']
+        assert by_strategy['EU_VALUE']['win_rate_30d'] is None
+        assert by_strategy['EU_VALUE']['avg_return_30d'] is None
+        assert by_strategy['VALUE']['avg_drawdown'] == -1.5
+
+    def test_bool_columns_parse_like_strings(self, tmp_path):
+        df = pd.read_csv(pd.io.common.StringIO(CSV))
+        df['win_14d'] = df['win_14d'].map({'True': True, 'False': False, True: True, False: False})
+        typed = ts.typed_completed(df)
+        assert typed['win_14d'].tolist() == [1.0, 0.0, 1.0]
+
+
+class TestBuildTimeseries:
+
+    def test_error_statuses(self, tmp_path):
+        assert ts.build_timeseries(tmp_path / 'missing.csv')[0] == 404
+        empty = tmp_path / 'empty.csv'
+        empty.write_text('ticker,status\n')
+        assert _body(empty) == (404, {'error': 'Empty data'})
+        active = tmp_path / 'active.csv'
+        active.write_text('ticker,status,signal_date\nAAA,ACTIVE,2026-03-04\n')
+        assert _body(active) == (404, {'error': 'No completed signals yet'})
+
+    def test_cache_reuses_until_csv_changes(self, csv_path):
+        cache = ts.TimeseriesCache()
+        first = cache.get(csv_path)
+        assert cache.get(csv_path) is first
+        assert cache.stats == {'hits': 1, 'misses': 1}
+
+        csv_path.write_text(CSV.replace('2.0,4.0', '12.0,4.0'))
+        status, payload = cache.get(csv_path)
+        assert status == 200 and payload is not first[1]
+        assert cache.stats['misses'] == 2
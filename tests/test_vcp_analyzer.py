@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Tests de paridad para el núcleo NumPy de CalibratedVCPAnalyzer.
+
+identify_pivot_points, calculate_flexible_contractions,
+calculate_volume_score_flexible y clean_dataframe_safe se reescribieron sobre
+arrays (máscaras de ventana deslizante, fmin.reduceat entre pivots, np.select).
+Aquí se conserva la versión anterior — bucle por barra con .iloc/.loc — como
+referencia y se compara salida a salida sobre series sintéticas con semilla
+fija (bases VCP, tendencias limpias, ruido, huecos con NaN/inf).
+
+El modo panel (PricePanel + screen_panel + scan_panel) se compara contra
+analyze_stage_and_trend / MovingAverageFilter ticker a ticker.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import vcp_scanner_usa as vsu
+from unittest.mock import patch
+
+from vcp_scanner_usa import (
+    CalibratedVCPAnalyzer, CalibratedVCPScanner, PricePanel,
+    safe_float, safe_comparison, safe_series_conversion,
+)
+
+
+# ── Referencia: implementación por bucle anterior ─────────────────────────────
+
+def _legacy_clean(df):
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df_clean = df.copy()
+    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        if col not in df_clean.columns:
+            continue
+        kind = 'int' if col == 'Volume' else 'float'
+        df_clean[col] = safe_series_conversion(df_clean[col], kind)
+    for col in ['Open', 'High', 'Low', 'Close']:
+        if col in df_clean.columns:
+            df_clean = df_clean[safe_comparison(df_clean[col], 0, '>')]
+    return df_clean
+
+
+class _LegacyAnalyzer(CalibratedVCPAnalyzer):
+
+    def identify_pivot_points(self, df, window=10):
+        if len(df) < window * 3:
+            return [], []
+        highs = df['High'].rolling(window=window, center=True).max()
+        lows = df['Low'].rolling(window=window, center=True).min()
+        pivot_highs, pivot_lows = [], []
+        for i in range(window, len(df) - window):
+            if df['High'].iloc[i] == highs.iloc[i]:
+                pivot_highs.append((df.index[i], df['High'].iloc[i]))
+            if df['Low'].iloc[i] == lows.iloc[i]:
+                pivot_lows.append((df.index[i], df['Low'].iloc[i]))
+        return pivot_highs, pivot_lows
+
+    def calculate_flexible_contractions(self, df):
+        if df.empty or len(df) < self.min_data_points:
+            return []
+        df = _legacy_clean(df)
+        if df.empty:
+            return []
+        pivot_highs, _ = self.identify_pivot_points(df, window=7)
+        if len(pivot_highs) < 3:
+            return []
+        recent_high = max([ph[1] for ph in pivot_highs[-5:]])
+        base_start_idx = None
+        for i, (_, price) in enumerate(pivot_highs):
+            if price >= recent_high * 0.90:
+                base_start_idx = i
+                break
+        if base_start_idx is None or len(pivot_highs) - base_start_idx < 2:
+            return []
+        base_highs = pivot_highs[base_start_idx:]
+        contractions = []
+        for i in range(len(base_highs) - 1):
+            high1_date, high1_price = base_highs[i]
+            high2_date, _ = base_highs[i + 1]
+            between_data = df.loc[high1_date:high2_date]
+            if len(between_data) < 5:
+                continue
+            low_price = safe_float(between_data['Low'].min())
+            if high1_price > 0:
+                contraction_pct = ((high1_price - low_price) / high1_price) * 100
+                if contraction_pct >= self.subsequent_min:
+                    volume_trend = self._legacy_volume_trend(between_data)
+                    contractions.append({
+                        'start_date': high1_date,
+                        'end_date': high2_date,
+                        'high_price': high1_price,
+                        'low_price': low_price,
+                        'contraction_pct': contraction_pct,
+                        'volume_trend': volume_trend,
+                        'duration_days': (high2_date - high1_date).days,
+                        'quality_score': self._score_contraction_quality(contraction_pct, volume_trend),
+                    })
+        return contractions
+
+    @staticmethod
+    def _legacy_volume_trend(data):
+        if len(data) < 5:
+            return 0
+        volumes = [x for x in (safe_float(v) for v in data['Volume']) if x > 0]
+        if len(volumes) < 3:
+            return 0
+        mid = len(volumes) // 2
+        first, second = np.mean(volumes[:mid]), np.mean(volumes[mid:])
+        return safe_float((second - first) / first * 100) if first > 0 else 0
+
+    def calculate_volume_score_flexible(self, df, contractions):
+        if not contractions or df.empty:
+            return 50
+        scores = []
+        for c in contractions:
+            trend = safe_float(c.get('volume_trend', 0))
+            quality = safe_float(c.get('quality_score', 50))
+            if trend < -15:
+                vol_score = 90
+            elif trend < -5:
+                vol_score = 75
+            elif trend < 5:
+                vol_score = 60
+            elif trend < 15:
+                vol_score = 45
+            else:
+                vol_score = 30
+            scores.append((vol_score + quality) / 2)
+        avg_score = np.mean(scores)
+        recent = safe_float(df['Volume'].tail(10).mean())
+        avg = safe_float(df['Volume'].tail(60).mean())
+        adjustment = 0
+        if avg > 0:
+            ratio = recent / avg
+            if ratio > 2.0:
+                adjustment = -15
+            elif ratio > 1.5:
+                adjustment = -8
+            elif ratio < 0.6:
+                adjustment = 10
+        return safe_float(max(20, min(100, avg_score + adjustment)))
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+
+def _vcp_base(seed: int, n: int = 260) -> pd.DataFrame:
+    """Avance + base con contracciones decrecientes y volumen que se seca."""
+    rng = np.random.default_rng(seed)
+    advance = np.linspace(40, 100, n // 3)
+    base = []
+    level = 100.0
+    depths = rng.uniform(0.25, 0.30), rng.uniform(0.12, 0.16), rng.uniform(0.05, 0.08), 0.03
+    per = (n - len(advance)) // len(depths)
+    for d in depths:
+        down = np.linspace(level, level * (1 - d), per // 2)
+        up = np.linspace(level * (1 - d), level * rng.uniform(0.98, 1.01), per - per // 2)
+        base.extend(down)
+        base.extend(up)
+    close = np.concatenate([advance, base])
+    close = np.concatenate([close, np.full(n - len(close), close[-1])])
+    close = close * (1 + rng.normal(0, 0.006, n))
+    spread = np.abs(rng.normal(0, 0.012, n)) * close
+    volume = np.linspace(3e6, 8e5, n) * rng.uniform(0.6, 1.4, n)
+    return pd.DataFrame({
+        'Open': close, 'High': close + spread, 'Low': close - spread,
+        'Close': close, 'Volume': volume.astype('int64'),
+    }, index=pd.bdate_range('2025-01-02', periods=n))
+
+
+def _random_walk(seed: int, n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+    # Precios redondeados a céntimo: fuerza empates dentro de la ventana
+    high = np.round(close * (1 + np.abs(rng.normal(0, 0.01, n))), 2)
+    low = np.round(close * (1 - np.abs(rng.normal(0, 0.01, n))), 2)
+    volume = rng.integers(1e5, 5e6, n).astype(float)
+    return pd.DataFrame({
+        'Open': close, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+    }, index=pd.bdate_range('2024-06-03', periods=n))
+
+
+def _downtrend(n: int = 260) -> pd.DataFrame:
+    """Stage 4 de manual: cae sin rebotes, lejos de máximos."""
+    close = np.linspace(100, 30, n)
+    return pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+        'Close': close, 'Volume': np.full(n, 1_000_000, dtype='int64'),
+    }, index=pd.bdate_range('2025-01-02', periods=n))
+
+
+def _dirty(seed: int) -> pd.DataFrame:
+    df = _random_walk(seed, 220)
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(df), 8, replace=False)
+    df.iloc[rows[:3], df.columns.get_loc('Volume')] = np.nan
+    df.iloc[rows[3:5], df.columns.get_loc('Low')] = np.nan
+    df.iloc[rows[5], df.columns.get_loc('High')] = np.inf
+    df.iloc[rows[6], df.columns.get_loc('Close')] = -1.0
+    return df
+
+
+FIXTURES = (
+    [(f'vcp-{s}', _vcp_base(s)) for s in range(8)]
+    + [(f'walk-{s}', _random_walk(s)) for s in range(8)]
+    + [(f'dirty-{s}', _dirty(s)) for s in range(4)]
+)
+
+
+def _assert_contractions_equal(new, old):
+    assert len(new) == len(old)
+    for a, b in zip(new, old):
+        assert a.keys() == b.keys()
+        for key in a:
+            if isinstance(a[key], (float, np.floating, int)):
+                assert a[key] == pytest.approx(b[key], rel=1e-12, abs=1e-12), key
+            else:
+                assert a[key] == b[key], key
+
+
+# ── Paridad ───────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('name,df', FIXTURES, ids=[f[0] for f in FIXTURES])
+class TestParity:
+
+    def test_clean_dataframe(self, name, df):
+        pd.testing.assert_frame_equal(vsu.clean_dataframe_safe(df), _legacy_clean(df))
+
+    @pytest.mark.parametrize('window', [7, 10])
+    def test_pivot_points(self, name, df, window):
+        clean = _legacy_clean(df)
+        new = CalibratedVCPAnalyzer().identify_pivot_points(clean, window=window)
+        old = _LegacyAnalyzer().identify_pivot_points(clean, window=window)
+        assert new == old
+
+    def test_contractions(self, name, df):
+        new = CalibratedVCPAnalyzer().calculate_flexible_contractions(df)
+        old = _LegacyAnalyzer().calculate_flexible_contractions(df)
+        _assert_contractions_equal(new, old)
+
+    def test_volume_score(self, name, df):
+        contractions = _LegacyAnalyzer().calculate_flexible_contractions(df)
+        new = CalibratedVCPAnalyzer().calculate_volume_score_flexible(df, contractions)
+        old = _LegacyAnalyzer().calculate_volume_score_flexible(df, contractions)
+        assert new == pytest.approx(old)
+
+
+def test_vcp_fixtures_produce_contractions():
+    """Sin contracciones la paridad no probaría nada."""
+    found = [len(CalibratedVCPAnalyzer().calculate_flexible_contractions(df))
+             for _, df in FIXTURES[:8]]
+    assert sum(n >= 2 for n in found) >= 4
+
+
+def test_volume_trend_matches_dataframe_version():
+    df = _vcp_base(3)
+    analyzer = CalibratedVCPAnalyzer()
+    assert analyzer._analyze_volume_trend_flexible(df.iloc[10:40]) == pytest.approx(
+        _LegacyAnalyzer._legacy_volume_trend(df.iloc[10:40]))
+
+
+def test_short_history_has_no_pivots():
+    df = _random_walk(0, 20)
+    assert CalibratedVCPAnalyzer().identify_pivot_points(df, window=10) == ([], [])
+
+
+# ── Modo panel ────────────────────────────────────────────────────────────────
+
+def _panel_frames():
+    frames = {name: vsu.clean_dataframe_safe(df) for name, df in FIXTURES}
+    frames['short'] = vsu.clean_dataframe_safe(_random_walk(99, 40))
+    frames['mid'] = vsu.clean_dataframe_safe(_random_walk(98, 120))
+    frames['falling'] = vsu.clean_dataframe_safe(_downtrend())
+    return frames
+
+
+class TestPanelScreen:
+
+    def test_panel_is_right_aligned(self):
+        frames = _panel_frames()
+        panel = PricePanel.from_frames(frames)
+        j = panel.tickers.index('short')
+        assert panel.n_rows[j] == 40
+        assert np.isnan(panel.close[:-40, j]).all()
+        np.testing.assert_array_equal(panel.close[-40:, j], frames['short']['Close'].to_numpy())
+
+    def test_stage_matches_per_ticker_analysis(self):
+        frames = _panel_frames()
+        analyzer = CalibratedVCPAnalyzer()
+        screen = analyzer.screen_panel(PricePanel.from_frames(frames))
+        for ticker, df in frames.items():
+            desc, score = analyzer.analyze_stage_and_trend(df)
+            assert screen.loc[ticker, 'stage_analysis'] == desc, ticker
+            assert screen.loc[ticker, 'stage_score'] == pytest.approx(score), ticker
+
+    def test_trend_template_matches_ma_filter(self):
+        from moving_average_filter import MovingAverageFilter
+        frames = _panel_frames()
+        screen = CalibratedVCPAnalyzer().screen_panel(PricePanel.from_frames(frames))
+        ma = MovingAverageFilter()
+        for ticker, df in frames.items():
+            res = ma.check_stock(ticker, hist=df)
+            assert screen.loc[ticker, 'trend_template_pass'] == res['passes'], ticker
+            assert screen.loc[ticker, 'trend_template_score'] == res['score'], ticker
+
+    def test_basic_filters_and_volume_ratio(self):
+        frames = _panel_frames()
+        screen = CalibratedVCPAnalyzer().screen_panel(PricePanel.from_frames(frames))
+        assert not screen.loc['short', 'passes_basic']      # < 150 velas
+        assert not screen.loc['mid', 'passes_basic']
+        df = frames['vcp-0']
+        expected = df['Volume'].tail(10).mean() / df['Volume'].tail(60).mean()
+        assert screen.loc['vcp-0', 'volume_ratio'] == pytest.approx(expected)
+
+
+class TestScanPanel:
+
+    def _scan(self, frames, infos=None):
+        scanner = CalibratedVCPScanner()
+        infos = infos or {}
+        with patch('vcp_scanner_usa.get_history_batch', return_value=(frames, {})) as hb, \
+             patch('vcp_scanner_usa.get_info_batch', return_value=(infos, {})) as ib:
+            results = scanner.scan_panel(list(frames))
+        return scanner, results, hb, ib
+
+    def test_info_only_for_survivors(self):
+        frames = {n: df for n, df in FIXTURES}
+        frames['falling'] = _downtrend()
+        scanner, _, hb, ib = self._scan(frames)
+
+        assert hb.call_args.kwargs['period'] == '1y'
+        asked = ib.call_args.args[0]
+        assert 'falling' not in asked
+        assert set(asked) <= set(frames)
+
+    def test_survivor_results_match_single_ticker_path(self):
+        frames = {n: df for n, df in FIXTURES[:8]}
+        infos = {n: {'marketCap': 5_000_000_000, 'sector': 'Tech'} for n in frames}
+        _, results, _, _ = self._scan(frames, infos)
+        assert results
+
+        analyzer = CalibratedVCPAnalyzer()
+        for res in results:
+            ref = analyzer.analyze_vcp_pattern_calibrated(res.ticker, vsu.clean_dataframe_safe(frames[res.ticker]))
+            assert res.vcp_score == pytest.approx(ref.vcp_score)
+            assert res.contractions == pytest.approx(ref.contractions)
+            assert res.sector == 'Tech'
+
+    def test_small_market_cap_is_dropped(self):
+        frames = {n: df for n, df in FIXTURES[:8]}
+        infos = {n: {'marketCap': 10_000_000} for n in frames}
+        _, results, _, _ = self._scan(frames, infos)
+        assert results == []
+
+    def test_as_of_date_uses_fixed_window(self):
+        scanner = CalibratedVCPScanner(as_of_date='2026-03-31')
+        with patch('vcp_scanner_usa.get_history_batch', return_value=({}, {})) as hb, \
+             patch('vcp_scanner_usa.get_info_batch', return_value=({}, {})):
+            assert scanner.scan_panel(['AAA']) == []
+        kwargs = hb.call_args.kwargs
+        assert kwargs['end'] == '2026-03-31' and kwargs['start'] == '2025-03-31'
+
+
+class TestScanParallelPipeline:
+    """Descarga en hilos → cola acotada → procesos que solo analizan."""
+
+    @staticmethod
+    def _provider(frames):
+        def _get(self, symbol, as_of_date=None):
+            if symbol not in frames:
+                return None
+            return vsu.clean_dataframe_safe(frames[symbol]), {'market_cap': 0, 'sector': 'Tech'}
+        return _get
+
+    def test_results_match_sequential_evaluation_in_input_order(self):
+        frames = {n: df for n, df in FIXTURES[:8]}
+        symbols = list(frames) + ['MISSING']
+        scanner = CalibratedVCPScanner()
+        with patch.object(vsu.DataProvider, 'get_stock_data', self._provider(frames)):
+            results = scanner.scan_parallel(symbols, num_workers=2, fetch_workers=3, queue_size=2)
+
+        expected = [r for r in (scanner.evaluate_frame(s, vsu.clean_dataframe_safe(frames[s]),
+                                                       {'market_cap': 0, 'sector': 'Tech'})
+                                for s in frames) if r]
+        assert [r.ticker for r in results] == [r.ticker for r in expected]
+        assert [r.vcp_score for r in results] == pytest.approx([r.vcp_score for r in expected])
+
+        m = scanner.last_scan_metrics
+        assert m['total'] == 9 and m['fetched'] == 8 and m['fetch_empty'] == 1
+        assert m['analyzed'] == 8 and m['errors'] == 0
+        assert m['max_queue_depth'] <= 2       # la cola acotada nunca se desborda
+
+    def test_fetch_exception_is_counted_not_fatal(self):
+        frames = {n: df for n, df in FIXTURES[:2]}
+        ok = self._provider(frames)
+
+        def _flaky(self_, symbol, as_of_date=None):
+            if symbol == 'BOOM':
+                raise RuntimeError('network down')
+            return ok(self_, symbol, as_of_date)
+
+        scanner = CalibratedVCPScanner()
+        with patch.object(vsu.DataProvider, 'get_stock_data', _flaky):
+            scanner.scan_parallel(['BOOM'] + list(frames), num_workers=1)
+        assert scanner.last_scan_metrics['fetch_empty'] == 1
+        assert scanner.last_scan_metrics['analyzed'] == 2
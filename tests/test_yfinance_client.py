@@ -233,3 +233,60 @@ class TestStats:
         assert stats['calls_total'] == 3
         assert stats['calls_ok'] == 2
         assert stats['ok_rate'] == pytest.approx(0.667, abs=0.01)
+
+
+# ── Batch ─────────────────────────────────────────────────────────────────────
+
+class TestHistoryBatch:
+
+    def test_splits_frames_and_classifies_errors_per_ticker(self):
+        from yfinance_client import get_history_batch
+
+        ok = MagicMock()
+        ok.history.return_value = pd.DataFrame({'Close': list(range(100))})
+        short = MagicMock()
+        short.history.return_value = pd.DataFrame({'Close': [1, 2]})
+        limited = MagicMock()
+        limited.history.side_effect = RuntimeError("Too Many Requests")
+        by_ticker = {'AAA': ok, 'BBB': short, 'CCC': limited}
+
+        with patch('yfinance_client.yf.Ticker', side_effect=lambda t: by_ticker[t]):
+            frames, errors = get_history_batch(['AAA', 'BBB', 'CCC', 'AAA'], min_rows=50)
+
+        assert list(frames) == ['AAA']
+        assert len(frames['AAA']) == 100
+        assert isinstance(errors['BBB'], DataNotFoundError)
+        assert isinstance(errors['CCC'], RateLimitError)
+
+        stats = get_stats()
+        assert stats['calls_total'] == 3   # AAA deduplicado
+        assert stats['rate_limited'] == 1
+        assert stats['top_failures'] == {'BBB': 1, 'CCC': 1}
+
+    def test_chunks_cover_every_ticker(self):
+        from yfinance_client import get_history_batch
+
+        mock_tk = MagicMock()
+        mock_tk.history.return_value = pd.DataFrame({'Close': [1.0]})
+        tickers = [f'T{i}' for i in range(7)]
+
+        with patch('yfinance_client.yf.Ticker', return_value=mock_tk):
+            frames, errors = get_history_batch(tickers, chunk_size=3, max_workers=2)
+
+        assert sorted(frames) == sorted(tickers)
+        assert errors == {}
+
+    def test_info_batch_same_contract(self):
+        from yfinance_client import get_info_batch
+
+        ok = MagicMock()
+        ok.info = {'floatShares': 10_000_000}
+        empty = MagicMock()
+        empty.info = {}
+        by_ticker = {'AAA': ok, 'BBB': empty}
+
+        with patch('yfinance_client.yf.Ticker', side_effect=lambda t: by_ticker[t]):
+            infos, errors = get_info_batch(['AAA', 'BBB'])
+
+        assert infos == {'AAA': {'floatShares': 10_000_000}}
+        assert isinstance(errors['BBB'], DataNotFoundError)
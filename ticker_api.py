@@ -33,7 +33,7 @@ Puerto: 5002 (local) | PORT env var (Railway)
 PRINCIPIO: null si no hay dato, nunca 50 inventado.
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -49,7 +49,9 @@ from datetime import datetime
 
 from currency_normalizer import normalize_info
 from ticker_api_config import load_runtime_config
-from ticker_api_data import build_dataset_summary, load_csv_file, load_json_file, load_static_datasets
+from ticker_api_data import DatasetRegistry, build_dataset_summary, load_csv_file, load_json_file
+from ticker_api_payloads import PayloadCache, PRERENDER_DIR
+from ticker_api_timeseries import TimeseriesCache
 from ticker_api_helpers import (
     sf as _sf,
     sfl as _sfl,
@@ -153,25 +155,59 @@ def _load_json(path):
     return load_json_file(path, logger=_logger)
 
 
-_DATASETS = load_static_datasets(logger=_logger)
-DOCS = _DATASETS.docs
-DF_5D = _DATASETS.df_5d
-DF_ML = _DATASETS.df_ml
-DF_FUND_US = _DATASETS.df_fund_us
-DF_FUND_EU = _DATASETS.df_fund_eu
-DF_FUND = _DATASETS.df_fund
-DF_SCORES = _DATASETS.df_scores
-DF_INSIDERS = _DATASETS.df_insiders
-DF_REVERSION = _DATASETS.df_reversion
-DF_OPTIONS = _DATASETS.df_options
-DF_PRICES = _DATASETS.df_prices
-DF_POSITIONS = _DATASETS.df_positions
-DF_INDUSTRIES = _DATASETS.df_industries
-TICKER_CACHE = _DATASETS.ticker_cache
+def _bind_datasets(ds):
+    """Publica un StaticDatasets en los globals DF_* / TICKER_CACHE.
+
+    Un único dict.update: los handlers leen los globals en cada petición, así
+    que tras una recarga la siguiente petición ya ve los datos nuevos.
+    """
+    globals().update(
+        DOCS=ds.docs,
+        DF_5D=ds.df_5d,
+        DF_ML=ds.df_ml,
+        DF_FUND_US=ds.df_fund_us,
+        DF_FUND_EU=ds.df_fund_eu,
+        DF_FUND=ds.df_fund,
+        DF_SCORES=ds.df_scores,
+        DF_INSIDERS=ds.df_insiders,
+        DF_REVERSION=ds.df_reversion,
+        DF_OPTIONS=ds.df_options,
+        DF_PRICES=ds.df_prices,
+        DF_POSITIONS=ds.df_positions,
+        DF_INDUSTRIES=ds.df_industries,
+        TICKER_CACHE=ds.ticker_cache,
+        TICKER_INDEX=ds.ticker_index,
+        TIKR_EARNINGS=ds.tikr_earnings,
+        RETURNS_PANEL=ds.returns_panel,
+    )
+
+
+def _on_datasets_swapped(ds):
+    _bind_datasets(ds)
+    _logger.info(build_dataset_summary(ds))
+
+
+# Recarga en caliente: cada DATASET_RELOAD_SECONDS (0 = desactivada) se miran
+# los mtimes de docs/ y se recargan solo los datasets que cambiaron, sin
+# reiniciar los workers de gunicorn
+_REGISTRY = DatasetRegistry(
+    logger=_logger,
+    poll_seconds=float(os.environ.get('DATASET_RELOAD_SECONDS', '60')),
+    on_swap=_on_datasets_swapped,
+)
+_DATASETS = _REGISTRY.current
+_bind_datasets(_DATASETS)
 
 print(build_dataset_summary(_DATASETS))
 
 
+@app.before_request
+def _start_dataset_reload():
+    # Aquí y no al importar: con --preload el import corre en el master y el
+    # hilo no sobreviviría al fork de los workers
+    _REGISTRY.ensure_started()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # UTILIDADES
 # ─────────────────────────────────────────────────────────────────────────────
@@ -200,6 +236,19 @@ def _row(df, ticker):
     return df.loc[ticker]
 
 
+# Registro vacío para tickers que no están en ningún dataset
+_EMPTY_RECORD = {
+    'r5d': None, 'rml': None, 'rfund': None, 'rscores': None, 'rprice': None,
+    'insider': None, 'reversion': None, 'options': None, 'tc': {}, 'in_cache': False,
+}
+
+
+def _record(ticker):
+    """Registro unido del ticker (ver ticker_api_data.build_ticker_index):
+    las filas de todos los datasets como dicts, resuelto con un solo lookup."""
+    return TICKER_INDEX.get(ticker, _EMPTY_RECORD)
+
+
 def _calc_base(vcp, ml, fund):
     """Calcula contribuciones y base score. None donde no hay datos reales."""
     vcp_c  = round(vcp  * 0.40, 1) if vcp  is not None else None
@@ -211,7 +260,7 @@ def _calc_base(vcp, ml, fund):
 
 
 def _notna_str(row, key, fallback=''):
-    """Lee un campo string de un pandas Series; devuelve fallback si NaN."""
+    """Lee un campo string de una fila (Series o dict); devuelve fallback si NaN."""
     val = row.get(key, fallback)
     try:
         if pd.isna(val):
@@ -303,12 +352,13 @@ def _live_earnings_days(ticker: str) -> tuple[int | None, str | None]:
 def _analyze_from_cache(ticker):
     """Construye la respuesta completa usando los CSVs del pipeline diario.
     Principio: null donde no hay dato, nunca valores inventados."""
-    r5d     = _row(DF_5D, ticker)
-    rml     = _row(DF_ML, ticker)
-    rfund   = _row(DF_FUND, ticker)
-    rscores = _row(DF_SCORES, ticker)
-    rprice  = _row(DF_PRICES, ticker)
-    tc      = TICKER_CACHE.get(ticker, {})
+    rec     = _record(ticker)
+    r5d     = rec['r5d']
+    rml     = rec['rml']
+    rfund   = rec['rfund']
+    rscores = rec['rscores']
+    rprice  = rec['rprice']
+    tc      = rec['tc']
 
     # ── VCP score ──────────────────────────────────────────────────────────
     vcp_score = _sf(r5d.get('vcp_score') if r5d is not None else None)
@@ -371,7 +421,7 @@ def _analyze_from_cache(ticker):
         _cp_r5d = _sf(r5d.get('current_price'))
         current_price   = _cp_r5d if _cp_r5d is not None else _sf(tc.get('current_price'))
         company_name    = (_notna_str(r5d, 'company_name')
-                          if 'company_name' in r5d.index
+                          if 'company_name' in r5d
                           else tc.get('company_name', ticker))
         if not company_name:
             company_name = tc.get('company_name', ticker)
@@ -525,7 +575,7 @@ def _analyze_from_cache(ticker):
         ml_volume   = _sf(rml.get('volume_score'))
 
     # ── Insiders ───────────────────────────────────────────────────────────
-    insider_data = _row(DF_INSIDERS, ticker)
+    insider_data = rec['insider']
     insider_info = None
     if insider_data is not None:
         insider_info = {
@@ -537,7 +587,7 @@ def _analyze_from_cache(ticker):
         }
 
     # ── Mean Reversion ─────────────────────────────────────────────────────
-    mr_data = _row(DF_REVERSION, ticker)
+    mr_data = rec['reversion']
     mean_reversion = None
     if mr_data is not None:
         mean_reversion = {
@@ -552,7 +602,7 @@ def _analyze_from_cache(ticker):
         }
 
     # ── Options flow ───────────────────────────────────────────────────────
-    opt_data = _row(DF_OPTIONS, ticker)
+    opt_data = rec['options']
     options_flow = None
     if opt_data is not None:
         options_flow = {
@@ -743,11 +793,56 @@ def _analyze_from_cache(ticker):
 
 # _sfl imported from ticker_api_helpers.sfl
 
+# Los seis componentes corren a la vez sobre el mismo OHLCV/info; pasado este
+# plazo se responde con lo que haya y el resto sale como error "timeout".
+LIVE_COMPONENT_TIMEOUT = 25.0
+
+
+def _fetch_live_inputs(ticker):
+    """OHLCV (1y) + info del ticker, una sola vez para todos los componentes.
+
+    Returns:
+        (hist, info): DataFrame vacío / {} si la descarga falla — cada
+        componente lo trata como "sin datos", igual que antes.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from yfinance_client import get_history, get_info
+
+    def _hist():
+        try:
+            return get_history(ticker, period='1y')
+        except Exception:
+            return pd.DataFrame()
+
+    def _info():
+        try:
+            return get_info(ticker)
+        except Exception:
+            return {}
+
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        hist_f, info_f = ex.submit(_hist), ex.submit(_info)
+        return hist_f.result(), info_f.result()
 
-def _run_vcp(ticker):
+
+def _run_vcp(ticker, hist=None, info=None):
     try:
-        from vcp_scanner_usa import CalibratedVCPScanner
-        result = CalibratedVCPScanner().process_single_ticker(ticker)
+        from vcp_scanner_usa import CalibratedVCPScanner, clean_dataframe_safe, safe_int
+        scanner = CalibratedVCPScanner()
+        if hist is None:
+            result = scanner.process_single_ticker(ticker)
+        else:
+            # Mismo camino que get_stock_data + evaluate_frame, sin descargar
+            df = clean_dataframe_safe(hist) if len(hist) >= 150 else pd.DataFrame()
+            if df.empty or len(df) < 150:
+                return None, {}, "No cumple criterios VCP mínimos"
+            info = info or {}
+            result = scanner.evaluate_frame(ticker, df, {
+                'market_cap': safe_int(info.get('marketCap', 0)),
+                'sector': str(info.get('sector', 'Unknown')),
+                'industry': str(info.get('industry', 'Unknown')),
+                'source': 'yfinance',
+            })
         if result is None:
             return None, {}, "No cumple criterios VCP mínimos"
         return (_sfl(result.vcp_score), {
@@ -761,10 +856,16 @@ def _run_vcp(ticker):
         return None, {}, str(e)
 
 
-def _run_ml(ticker):
+def _run_ml(ticker, hist=None):
     try:
         from ml_scoring import MLScorer
-        result = MLScorer().score_ticker(ticker)
+        df = None
+        if hist is not None:
+            # MLScorer trabaja sobre 6 meses: recortar el año compartido
+            df = hist.loc[hist.index >= hist.index[-1] - pd.DateOffset(months=6)] if len(hist) else hist
+            if len(df) < 50:
+                return None, {}, "Datos insuficientes (< 50 días)"
+        result = MLScorer().score_ticker(ticker, df=df)
         if result is None:
             return None, {}, "Datos insuficientes (< 50 días)"
         return (_sfl(result.get('ml_score')), {
@@ -817,32 +918,35 @@ def _run_fundamentals(ticker):
         return None, {}, None, {}, str(e)
 
 
-def _run_ma(ticker):
+def _run_ma(ticker, hist=None):
     try:
         from moving_average_filter import MovingAverageFilter
-        return MovingAverageFilter().check_stock(ticker), None
+        return MovingAverageFilter().check_stock(ticker, hist=hist), None
     except Exception as e:
         return {'passes': None, 'score': None, 'checks_passed': None, 'reason': str(e)}, str(e)
 
 
-def _run_ad(ticker):
+def _run_ad(ticker, hist=None):
     try:
         from accumulation_distribution_filter import AccumulationDistributionFilter
-        return AccumulationDistributionFilter().analyze_stock(ticker), None
+        return AccumulationDistributionFilter().analyze_stock(ticker, hist=hist), None
     except Exception as e:
         return {'signal': None, 'score': None, 'reason': str(e)}, str(e)
 
 
-def _run_sector(ticker):
+def _run_sector(ticker, info=None):
     try:
         from sector_enhancement import SectorEnhancement
         se = SectorEnhancement()
-        sc  = _sfl(se.calculate_sector_score(ticker))
+        # info vacío (descarga fallida) → que SectorEnhancement lo pida él
+        sc  = _sfl(se.calculate_sector_score(ticker, info=info or None))
         mom = se.get_sector_momentum(ticker)
         name = 'Unknown'
         try:
-            import yfinance as yf
-            name = yf.Ticker(ticker).info.get('sector', 'Unknown') or 'Unknown'
+            if info is None:
+                import yfinance as yf
+                info = yf.Ticker(ticker).info
+            name = info.get('sector', 'Unknown') or 'Unknown'
         except Exception:
             pass
         return sc, mom, name, None
@@ -850,6 +954,56 @@ def _run_sector(ticker):
         return None, None, 'Unknown', str(e)
 
 
+# Resultado de cada componente si no llega a tiempo (mismas formas que sus
+# ramas de error)
+_LIVE_TIMEOUT_RESULTS = {
+    'vcp':          lambda: (None, {}, 'timeout'),
+    'ml':           lambda: (None, {}, 'timeout'),
+    'fundamentals': lambda: (None, {}, None, {}, 'timeout'),
+    'ma':           lambda: ({'passes': None, 'score': None, 'checks_passed': None, 'reason': 'timeout'}, 'timeout'),
+    'ad':           lambda: ({'signal': None, 'score': None, 'reason': 'timeout'}, 'timeout'),
+    'sector':       lambda: (None, None, 'Unknown', 'timeout'),
+}
+
+
+def _run_live_components(ticker, hist, info, timeout=LIVE_COMPONENT_TIMEOUT):
+    """Lanza los seis componentes en paralelo sobre los datos compartidos.
+
+    Returns:
+        (results, timings_ms): results[nombre] = tupla del _run_* (o la de
+        timeout); timings_ms[nombre] = ms que tardó, None si no terminó.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    jobs = {
+        'vcp':          lambda: _run_vcp(ticker, hist=hist, info=info),
+        'ml':           lambda: _run_ml(ticker, hist=hist),
+        'fundamentals': lambda: _run_fundamentals(ticker),
+        'ma':           lambda: _run_ma(ticker, hist=hist),
+        'ad':           lambda: _run_ad(ticker, hist=hist),
+        'sector':       lambda: _run_sector(ticker, info=info),
+    }
+
+    def _timed(job):
+        t0 = time.perf_counter()
+        out = job()
+        return out, round((time.perf_counter() - t0) * 1000)
+
+    ex = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix=f'live-{ticker}')
+    futures = {name: ex.submit(_timed, job) for name, job in jobs.items()}
+    wait(futures.values(), timeout=timeout)
+    # No esperar a los rezagados: siguen en segundo plano, la respuesta sale ya
+    ex.shutdown(wait=False, cancel_futures=True)
+
+    results, timings = {}, {}
+    for name, fut in futures.items():
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            results[name], timings[name] = fut.result()
+        else:
+            results[name], timings[name] = _LIVE_TIMEOUT_RESULTS[name](), None
+    return results, timings
+
+
 def _calc_live_score(vcp, ml, fund, ma, ad):
     """Calcula base/penalty/final desde scores live. None si no hay datos."""
     vcp_c  = vcp  * 0.40 if vcp  is not None else None
@@ -878,24 +1032,25 @@ def _analyze_live(ticker):
     """Análisis completo con yfinance. Puede ser lento y fallar en Railway."""
     t0 = time.time()
 
-    company_name = ticker; current_price = None
-    try:
-        import yfinance as yf
-        info = yf.Ticker(ticker).info
-        company_name  = info.get('longName') or info.get('shortName') or ticker
-        current_price = _sfl(info.get('currentPrice') or info.get('regularMarketPrice'))
-    except Exception:
-        pass
+    # Una sola descarga de OHLCV + info; los componentes la comparten y
+    # corren en paralelo (el ritmo frente a Yahoo lo pone el token bucket de
+    # yfinance_client, no sleeps entre pasos)
+    t_fetch = time.perf_counter()
+    hist, info = _fetch_live_inputs(ticker)
+    fetch_ms = round((time.perf_counter() - t_fetch) * 1000)
 
-    vcp_score,  vcp_det,  vcp_err  = _run_vcp(ticker);           time.sleep(0.3)
-    ml_score,   ml_det,   ml_err   = _run_ml(ticker);            time.sleep(0.3)
-    fund_score, fund_det, entry_score, pt_det, fund_err = _run_fundamentals(ticker)
+    company_name  = info.get('longName') or info.get('shortName') or ticker
+    current_price = _sfl(info.get('currentPrice') or info.get('regularMarketPrice'))
+
+    results, timings = _run_live_components(ticker, hist, info)
+    vcp_score,  vcp_det,  vcp_err  = results['vcp']
+    ml_score,   ml_det,   ml_err   = results['ml']
+    fund_score, fund_det, entry_score, pt_det, fund_err = results['fundamentals']
     if current_price is None:
         current_price = fund_det.get('current_price')
-    time.sleep(0.3)
-    ma_result, ma_err = _run_ma(ticker);                          time.sleep(0.3)
-    ad_result, ad_err = _run_ad(ticker);                          time.sleep(0.3)
-    sector_score, sector_mom, sector_name, sector_err = _run_sector(ticker)
+    ma_result, ma_err = results['ma']
+    ad_result, ad_err = results['ad']
+    sector_score, sector_mom, sector_name, sector_err = results['sector']
 
     base, penalty, final = _calc_live_score(vcp_score, ml_score, fund_score, ma_result, ad_result)
     tier_emoji, tier_label = _get_tier(final)
@@ -906,7 +1061,8 @@ def _analyze_live(ticker):
     )
 
     # Insiders / mean reversion / options desde cache aunque sea live
-    insider_data = _row(DF_INSIDERS, ticker)
+    rec = _record(ticker)
+    insider_data = rec['insider']
     insider_info = None
     if insider_data is not None:
         insider_info = {
@@ -917,7 +1073,7 @@ def _analyze_live(ticker):
             "confidence_score": _sf(insider_data.get('confidence_score')),
         }
 
-    mr_data = _row(DF_REVERSION, ticker)
+    mr_data = rec['reversion']
     mean_reversion = None
     if mr_data is not None:
         mean_reversion = {
@@ -929,7 +1085,7 @@ def _analyze_live(ticker):
             "rsi":             _sf(mr_data.get('rsi')),
         }
 
-    opt_data = _row(DF_OPTIONS, ticker)
+    opt_data = rec['options']
     options_flow = None
     if opt_data is not None:
         options_flow = {
@@ -961,6 +1117,7 @@ def _analyze_live(ticker):
         "current_price": current_price,
         "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         "elapsed_seconds": round(time.time() - t0, 1),
+        "timings_ms": {"fetch": fetch_ms, **timings},
 
         "final_score": final,
         "base_score": base,
@@ -1091,14 +1248,7 @@ def analyze(ticker):
         return jsonify({"error": f"Ticker inválido: '{ticker}'"}), 400
 
     try:
-        in_cache = (
-            (not DF_5D.empty     and ticker in DF_5D.index)     or
-            (not DF_ML.empty     and ticker in DF_ML.index)     or
-            (not DF_SCORES.empty and ticker in DF_SCORES.index) or
-            (ticker in TICKER_CACHE)
-        )
-
-        if in_cache:
+        if _record(ticker)['in_cache']:
             result = _analyze_from_cache(ticker)
         else:
             result = _analyze_live(ticker)
@@ -1147,25 +1297,38 @@ def analyze(ticker):
 # DASHBOARD DATA ENDPOINTS (for React frontend)
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Cuerpos ya serializados por lista de CSVs candidatos (ver ticker_api_payloads):
+# mientras ningún CSV cambie de mtime/tamaño no se toca pandas
+_PAYLOADS = PayloadCache(prerender_dir=DOCS / PRERENDER_DIR.name)
+# Agregado de /api/portfolio-tracker/timeseries, por versión de recommendations.csv
+_TIMESERIES = TimeseriesCache()
+
+
 def _csv_to_json_response(csv_candidates):
-    """Smart fallback: try CSV files in order, return first with data."""
-    for csv_path, label in csv_candidates:
-        p = Path(csv_path)
-        if p.exists():
-            try:
-                df = pd.read_csv(p)
-                if len(df) > 0:
-                    # Use pandas to_json to safely convert NaN → null (valid JSON)
-                    # df.to_dict() with Python's json module would emit NaN literals (invalid JSON)
-                    records = json.loads(df.to_json(orient='records'))
-                    return jsonify({
-                        "data": records,
-                        "count": len(df),
-                        "source": label,
-                    })
-            except Exception:
-                continue
-    return jsonify({"data": [], "count": 0, "source": "none"})
+    """Smart fallback: try CSV files in order, return first with data.
+
+    Sirve el cuerpo cacheado con ETag (304 si el cliente ya lo tiene) y en
+    gzip si el cliente lo acepta.
+    """
+    return _payload_response(_PAYLOADS.get(csv_candidates))
+
+
+def _payload_response(payload):
+    """Respuesta de un Payload cacheado: 304 por ETag y gzip si se acepta."""
+    use_gzip = 'gzip' in (request.headers.get('Accept-Encoding') or '').lower()
+    etag = payload.etag + '-gz' if use_gzip else payload.etag
+
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    elif use_gzip:
+        resp = Response(payload.gzipped(), mimetype='application/json')
+        resp.headers['Content-Encoding'] = 'gzip'
+    else:
+        resp = Response(payload.body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'no-cache'   # revalidar siempre: el CSV cambia a diario
+    return resp
 
 
 @app.route('/api/value-opportunities')
@@ -1539,59 +1702,93 @@ def industry_groups():
     return jsonify({'data': [], 'count': 0})
 
 
-@app.route('/api/correlation-matrix')
-def correlation_matrix():
-    """Compute 60-day return correlation matrix for top VALUE picks."""
-    import yfinance as yf2
-    import pandas as pd2
-    from datetime import datetime as dt2, timedelta as td2
+# Límites de /api/correlation-matrix
+CORR_DEFAULT_WINDOW = 60
+CORR_MAX_WINDOW = 252
+CORR_DEFAULT_TOP = 15
+CORR_MAX_TOP = 500
+# Sin panel (p.ej. primer deploy) se descarga dentro de la petición: como
+# mucho los tickers que pedía el endpoint antes de existir el panel.
+CORR_LIVE_MAX_TOP = CORR_DEFAULT_TOP
+
 
-    # Load top value picks (conviction + unfiltered fallback)
-    tickers = []
+def _correlation_universe(top):
+    """Top `top` tickers por value_score de los CSVs value (conviction primero)."""
     for fname in ('value_conviction.csv', 'value_opportunities.csv'):
         p = DOCS / fname
         if p.exists():
             try:
-                df = pd2.read_csv(p)
+                df = pd.read_csv(p)
                 if 'ticker' in df.columns and 'value_score' in df.columns:
-                    top = df.nlargest(15, 'value_score')['ticker'].tolist()
-                    tickers = [str(t) for t in top if str(t).strip()]
-                    break
+                    top_df = df.nlargest(top, 'value_score')['ticker'].tolist()
+                    return [str(t).upper().strip() for t in top_df if str(t).strip()]
             except Exception:
                 pass
+    return []
+
+
+def _live_returns(tickers, window):
+    """Retornos descargados en el momento — solo si aún no hay panel en docs/."""
+    import yfinance as yf2
+    from datetime import timedelta
+
+    start = (datetime.now() - timedelta(days=int(window * 1.5) + 10)).strftime('%Y-%m-%d')
+    raw = yf2.download(tickers, start=start, progress=False, auto_adjust=True)
+    if isinstance(raw.columns, pd.MultiIndex):
+        close = raw['Close'] if 'Close' in raw.columns.get_level_values(0) else raw.iloc[:, 0]
+    else:
+        close = raw[['Close']] if 'Close' in raw.columns else raw
+    return close.pct_change().iloc[1:]
+
+
+@app.route('/api/correlation-matrix')
+def correlation_matrix():
+    """Return correlation matrix for the top VALUE picks.
+
+    Se calcula desde el panel de retornos que mantiene el pipeline
+    (docs/returns_panel.npz, ver returns_panel.py) — sin red en el worker.
+
+    Query params:
+      window     sesiones de retornos (default 60, máx 252)
+      top        nº de tickers por value_score (default 15, máx 500; sin
+                 panel se descarga en vivo y como mucho 15)
+      shrinkage  0-1, shrinkage hacia correlación constante (default 0)
+    """
+    from returns_panel import correlation_matrix as _corr
 
+    window = min(max(request.args.get('window', CORR_DEFAULT_WINDOW, type=int), 20), CORR_MAX_WINDOW)
+    top = min(max(request.args.get('top', CORR_DEFAULT_TOP, type=int), 3), CORR_MAX_TOP)
+    shrinkage = _sf(request.args.get('shrinkage'), 0.0)
+    shrinkage = min(shrinkage, 1.0) if shrinkage > 0 else 0.0   # NaN → 0
+
+    tickers = _correlation_universe(top)
     if len(tickers) < 3:
         return jsonify({'error': 'Not enough tickers for correlation', 'matrix': [], 'tickers': []}), 200
 
-    tickers = tickers[:15]
-    start = (dt2.now() - td2(days=90)).strftime('%Y-%m-%d')
-    try:
-        raw = yf2.download(tickers, start=start, progress=False, auto_adjust=True)
-        # Flatten MultiIndex if needed
-        if isinstance(raw.columns, pd2.MultiIndex):
-            close = raw['Close'] if 'Close' in raw.columns.get_level_values(0) else raw.iloc[:, 0]
-        else:
-            close = raw[['Close']] if 'Close' in raw.columns else raw
-
-        # Daily returns
-        returns = close.pct_change().dropna()
-        # Drop columns with too many NaN
-        valid = [c for c in returns.columns if returns[c].notna().sum() >= 30]
-        returns = returns[valid]
+    panel = RETURNS_PANEL
+    source = 'panel'
+    if sum(t in panel.columns for t in tickers) < 3:
+        tickers = tickers[:CORR_LIVE_MAX_TOP]
+        try:
+            panel = _live_returns(tickers, window)
+            source = 'live'
+        except Exception as e:
+            return jsonify({'error': str(e), 'matrix': [], 'tickers': []}), 200
 
-        corr = returns.corr().round(3)
-        matrix = []
-        for row_t in corr.index:
-            matrix.append({col_t: corr.at[row_t, col_t] for col_t in corr.columns})
+    corr, days = _corr(panel, tickers, window, shrinkage=shrinkage)
+    corr = corr.round(3).astype(object).where(corr.notna(), None)
+    matrix = [{col_t: corr.at[row_t, col_t] for col_t in corr.columns} for row_t in corr.index]
+    as_of = panel.index[-1] if len(panel.index) else datetime.now()
 
-        return jsonify({
-            'tickers': list(corr.index),
-            'matrix': matrix,
-            'days': len(returns),
-            'as_of': dt2.now().strftime('%Y-%m-%d'),
-        })
-    except Exception as e:
-        return jsonify({'error': str(e), 'matrix': [], 'tickers': []}), 200
+    return jsonify({
+        'tickers': list(corr.index),
+        'matrix': matrix,
+        'days': days,
+        'window': window,
+        'shrinkage': shrinkage,
+        'source': source,
+        'as_of': pd.Timestamp(as_of).strftime('%Y-%m-%d'),
+    })
 
 
 @app.route('/api/hedge-funds')
@@ -1661,82 +1858,11 @@ def portfolio_calibration():
 @app.route('/api/portfolio-tracker/timeseries')
 def portfolio_timeseries():
     """Temporal breakdown of signals: by week, month, quarter, weekday."""
-    import json as _json
-    csv_path = DOCS / 'portfolio_tracker' / 'recommendations.csv'
-    if not csv_path.exists():
-        return jsonify({'error': 'No data yet'}), 404
-
-    df = _load_csv(csv_path)
-    if df.empty:
-        return jsonify({'error': 'Empty data'}), 404
-
-    completed = df[df['status'] == 'COMPLETED'].copy()
-    if completed.empty:
-        return jsonify({'error': 'No completed signals yet'}), 404
-
-    completed['signal_date'] = pd.to_datetime(completed['signal_date'], errors='coerce')
-    completed = completed.dropna(subset=['signal_date'])
-    completed['week']    = completed['signal_date'].dt.to_period('W').apply(lambda p: str(p.start_time.date()))
-    completed['month']   = completed['signal_date'].dt.to_period('M').apply(lambda p: str(p.start_time.date()))
-    completed['quarter'] = completed['signal_date'].dt.to_period('Q').apply(lambda p: f"Q{p.quarter} {p.year}")
-    completed['weekday'] = completed['signal_date'].dt.day_name()
-
-    def _agg(group_col: str, label_col: str | None = None) -> list[dict]:
-        lc = label_col or group_col
-        out = []
-        for key, grp in completed.groupby(lc):
-            r14 = pd.to_numeric(grp['return_14d'], errors='coerce').dropna()
-            r30 = pd.to_numeric(grp['return_30d'], errors='coerce').dropna()
-            w14 = grp['win_14d'].map({'True': True, 'False': False, True: True, False: False})
-            w30 = grp['win_30d'].map({'True': True, 'False': False, True: True, False: False})
-            # strategy split
-            strat_counts = grp['strategy'].value_counts().to_dict()
-            out.append({
-                'label':          str(key),
-                'signals':        int(len(grp)),
-                'win_rate_14d':   round(float(w14.mean() * 100), 1) if len(w14) else None,
-                'win_rate_30d':   round(float(w30.mean() * 100), 1) if len(w30) else None,
-                'avg_return_14d': round(float(r14.mean()), 2) if len(r14) else None,
-                'avg_return_30d': round(float(r30.mean()), 2) if len(r30) else None,
-                'value_us':       int(strat_counts.get('VALUE', 0)),
-                'value_eu':       int(strat_counts.get('EU_VALUE', 0)),
-                'momentum':       int(strat_counts.get('MOMENTUM', 0)),
-            })
-        return out
-
-    # weekday order
-    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    by_weekday = sorted(_agg('weekday'), key=lambda x: weekday_order.index(x['label']) if x['label'] in weekday_order else 99)
-
-    # strategy overall comparison
-    strat_rows = []
-    for strat, grp in completed.groupby('strategy'):
-        r14 = pd.to_numeric(grp['return_14d'], errors='coerce').dropna()
-        r30 = pd.to_numeric(grp['return_30d'], errors='coerce').dropna()
-        w14 = grp['win_14d'].map({'True': True, 'False': False, True: True, False: False})
-        w30 = grp['win_30d'].map({'True': True, 'False': False, True: True, False: False})
-        strat_rows.append({
-            'strategy':       str(strat),
-            'signals':        int(len(grp)),
-            'win_rate_14d':   round(float(w14.mean() * 100), 1) if len(w14) else None,
-            'win_rate_30d':   round(float(w30.mean() * 100), 1) if len(w30) else None,
-            'avg_return_14d': round(float(r14.mean()), 2) if len(r14) else None,
-            'avg_return_30d': round(float(r30.mean()), 2) if len(r30) else None,
-            'avg_drawdown':   round(float(pd.to_numeric(grp['max_drawdown_30d'], errors='coerce').dropna().mean()), 2),
-        })
-
-    return jsonify({
-        'by_week':     sorted(_agg('week'),    key=lambda x: x['label']),
-        'by_month':    sorted(_agg('month'),   key=lambda x: x['label']),
-        'by_quarter':  sorted(_agg('quarter'), key=lambda x: x['label']),
-        'by_weekday':  by_weekday,
-        'by_strategy': strat_rows,
-        'total_completed': int(len(completed)),
-        'date_range': {
-            'from': str(completed['signal_date'].min().date()),
-            'to':   str(completed['signal_date'].max().date()),
-        },
-    })
+    # Memoizado hasta que cambie el CSV — ver ticker_api_timeseries.py
+    status, payload = _TIMESERIES.get(DOCS / 'portfolio_tracker' / 'recommendations.csv')
+    if status != 200:
+        return Response(payload.body, status=status, mimetype='application/json')
+    return _payload_response(payload)
 
 
 
@@ -2879,11 +3005,9 @@ def _build_earnings_expectation_snapshot(ticker: str, base_row: dict | None = No
 
 
 def _load_tikr_earnings_index() -> dict[str, dict]:
-    data = _load_json(DOCS / 'tikr_earnings_data.json')
-    if not isinstance(data, dict):
-        return {}
-    rows = data.get('data') or {}
-    return rows if isinstance(rows, dict) else {}
+    # Cargado con el resto de datasets (y recargado si cambia el fichero):
+    # parsear ~3 MB de JSON en cada /api/analyze dominaba la latencia
+    return TIKR_EARNINGS
 
 
 def _get_next_earnings_from_calendar(tk):
@@ -5,12 +5,17 @@ from __future__ import annotations
 
 import json
 import logging
-from dataclasses import dataclass
+import os
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Optional
 
 import pandas as pd
 
+from returns_panel import load_panel
+
 
 def _logger_or_default(logger: Optional[logging.Logger]) -> logging.Logger:
     return logger or logging.getLogger(__name__)
@@ -64,43 +69,234 @@ class StaticDatasets:
     df_positions: pd.DataFrame
     df_industries: pd.DataFrame
     ticker_cache: dict[str, Any]
+    # {TICKER: fila} de tikr_earnings_data.json (el 'data' del fichero)
+    tikr_earnings: dict[str, Any] = field(default_factory=dict)
+    # Retornos diarios fechas × tickers (returns_panel.py)
+    returns_panel: pd.DataFrame = field(default_factory=pd.DataFrame)
+    # {TICKER: registro unido} — ver build_ticker_index
+    ticker_index: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+
+# Ficheros de docs/ de los que sale cada dataset: la recarga en caliente
+# (DatasetRegistry) vigila sus mtimes y solo recarga los que cambiaron.
+# df_fund no aparece: se deriva de df_fund_us + df_fund_eu.
+DATASET_FILES: dict[str, tuple[str, ...]] = {
+    "df_5d": ("super_opportunities_5d_complete_with_earnings.csv",),
+    "df_ml": ("ml_scores.csv",),
+    "df_fund_us": ("fundamental_scores.csv",),
+    "df_fund_eu": ("european_fundamental_scores.csv",),
+    "df_scores": ("super_scores_ultimate.csv",),
+    "df_insiders": ("recurring_insiders.csv", "eu_recurring_insiders.csv"),
+    "df_reversion": ("mean_reversion_opportunities.csv",),
+    "df_options": ("options_flow.csv",),
+    "df_prices": ("super_opportunities_with_prices.csv",),
+    "df_positions": ("position_sizing.csv",),
+    "df_industries": ("industry_group_rankings.csv",),
+    "ticker_cache": ("ticker_data_cache.json",),
+    "tikr_earnings": ("tikr_earnings_data.json",),
+    "returns_panel": ("returns_panel.npz",),
+}
+
+
+def _load_dataset(name: str, docs: Path, logger: Optional[logging.Logger] = None):
+    files = [docs / f for f in DATASET_FILES[name]]
+    if name == "ticker_cache":
+        return load_json_file(files[0], logger=logger)
+    if name == "returns_panel":
+        return load_panel(files[0], logger=logger)
+    if name == "tikr_earnings":
+        rows = load_json_file(files[0], logger=logger).get("data") or {}
+        return rows if isinstance(rows, dict) else {}
+    if name == "df_insiders":
+        df_ins_us = load_csv_file(files[0], logger=logger)
+        df_ins_eu = load_csv_file(files[1], logger=logger)
+        if not df_ins_us.empty and "market" not in df_ins_us.columns:
+            df_ins_us["market"] = "US"
+        # Sin ignore_index: ambos vienen indexados por ticker y así se conserva
+        return pd.concat([df_ins_us, df_ins_eu]) if not df_ins_eu.empty else df_ins_us
+    return load_csv_file(files[0], logger=logger)
+
+
+# Registro por ticker: clave → campo de StaticDatasets del que sale la fila
+TICKER_RECORD_SOURCES = {
+    "r5d": "df_5d",
+    "rml": "df_ml",
+    "rfund": "df_fund",
+    "rscores": "df_scores",
+    "rprice": "df_prices",
+    "insider": "df_insiders",
+    "reversion": "df_reversion",
+    "options": "df_options",
+}
+
+
+def _rows_by_ticker(df: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    """{TICKER: fila como dict}. Con tickers repetidos (US+EU) gana la primera."""
+    if df.empty:
+        return {}
+    if df.index.name != "ticker" and "ticker" in df.columns:
+        keys = df["ticker"].astype(str).str.upper().str.strip()
+    else:
+        keys = df.index
+    rows: dict[str, dict[str, Any]] = {}
+    for key, record in zip(keys, df.to_dict("records")):
+        rows.setdefault(key, record)
+    return rows
+
+
+def build_ticker_index(datasets: StaticDatasets) -> dict[str, dict[str, Any]]:
+    """Une por ticker las filas de todos los datasets, una sola vez por carga.
+
+    Cada registro: una clave por TICKER_RECORD_SOURCES (dict de la fila o
+    None), 'tc' (entrada de ticker_cache, {} si no hay) e 'in_cache' (True si
+    el ticker está en 5D, ML, scores o ticker_cache — lo que decide si
+    /api/analyze responde desde el pipeline o en vivo).
+    """
+    sources = {key: _rows_by_ticker(getattr(datasets, attr))
+               for key, attr in TICKER_RECORD_SOURCES.items()}
+    cache = datasets.ticker_cache
+    tickers = set(cache).union(*sources.values())
+    index = {}
+    for ticker in tickers:
+        record = {key: rows.get(ticker) for key, rows in sources.items()}
+        tc = cache.get(ticker)
+        record["tc"] = tc if isinstance(tc, dict) else {}
+        record["in_cache"] = (record["r5d"] is not None or record["rml"] is not None
+                              or record["rscores"] is not None or ticker in cache)
+        index[ticker] = record
+    return index
+
+
+def _assemble_datasets(docs: Path, loaded: dict[str, Any]) -> StaticDatasets:
+    df_fund_us, df_fund_eu = loaded["df_fund_us"], loaded["df_fund_eu"]
+    df_fund = pd.concat([df_fund_us, df_fund_eu]) if not df_fund_eu.empty else df_fund_us
+    datasets = StaticDatasets(docs=docs, df_fund=df_fund, **loaded)
+    datasets.ticker_index = build_ticker_index(datasets)
+    return datasets
 
 
 def load_static_datasets(docs_root="docs", logger: Optional[logging.Logger] = None) -> StaticDatasets:
     docs = Path(docs_root)
-    df_5d = load_csv_file(docs / "super_opportunities_5d_complete_with_earnings.csv", logger=logger)
-    df_ml = load_csv_file(docs / "ml_scores.csv", logger=logger)
-    df_fund_us = load_csv_file(docs / "fundamental_scores.csv", logger=logger)
-    df_fund_eu = load_csv_file(docs / "european_fundamental_scores.csv", logger=logger)
-    df_fund = pd.concat([df_fund_us, df_fund_eu]) if not df_fund_eu.empty else df_fund_us
-    df_scores = load_csv_file(docs / "super_scores_ultimate.csv", logger=logger)
-    df_ins_us = load_csv_file(docs / "recurring_insiders.csv", logger=logger)
-    df_ins_eu = load_csv_file(docs / "eu_recurring_insiders.csv", logger=logger)
-    if not df_ins_us.empty and "market" not in df_ins_us.columns:
-        df_ins_us["market"] = "US"
-    df_insiders = pd.concat([df_ins_us, df_ins_eu], ignore_index=True) if not df_ins_eu.empty else df_ins_us
-    df_reversion = load_csv_file(docs / "mean_reversion_opportunities.csv", logger=logger)
-    df_options = load_csv_file(docs / "options_flow.csv", logger=logger)
-    df_prices = load_csv_file(docs / "super_opportunities_with_prices.csv", logger=logger)
-    df_positions = load_csv_file(docs / "position_sizing.csv", logger=logger)
-    df_industries = load_csv_file(docs / "industry_group_rankings.csv", logger=logger)
-    ticker_cache = load_json_file(docs / "ticker_data_cache.json", logger=logger)
-    return StaticDatasets(
-        docs=docs,
-        df_5d=df_5d,
-        df_ml=df_ml,
-        df_fund_us=df_fund_us,
-        df_fund_eu=df_fund_eu,
-        df_fund=df_fund,
-        df_scores=df_scores,
-        df_insiders=df_insiders,
-        df_reversion=df_reversion,
-        df_options=df_options,
-        df_prices=df_prices,
-        df_positions=df_positions,
-        df_industries=df_industries,
-        ticker_cache=ticker_cache,
-    )
+    loaded = {name: _load_dataset(name, docs, logger) for name in DATASET_FILES}
+    return _assemble_datasets(docs, loaded)
+
+
+class DatasetRegistry:
+    """StaticDatasets con recarga en caliente.
+
+    Un hilo en segundo plano mira cada `poll_seconds` el mtime/tamaño de los
+    ficheros de DATASET_FILES; recarga solo los datasets que cambiaron,
+    construye un StaticDatasets nuevo y lo publica de una vez (una sola
+    asignación de referencia). `on_swap(datasets)` se llama tras cada cambio.
+
+    - Un fichero escrito hace menos de `settle_seconds` se deja para la
+      siguiente vuelta: el pipeline puede estar aún escribiéndolo.
+    - Si un dataset que tenía filas vuelve vacío (fichero a medias, error de
+      parseo) se conserva el anterior y se reintenta en la siguiente vuelta.
+    - Cada worker de gunicorn tiene su propio registry; `ensure_started()`
+      arranca el hilo en el proceso que lo llama (tras un fork el hilo del
+      padre no existe).
+    """
+
+    def __init__(self, docs_root="docs", logger: Optional[logging.Logger] = None,
+                 poll_seconds: float = 60.0, settle_seconds: float = 2.0, on_swap=None):
+        self.docs = Path(docs_root)
+        self.logger = logger
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.on_swap = on_swap
+        self.generation = 0
+        self._signatures = {name: self._signature(name) for name in DATASET_FILES}
+        self._loaded = {name: _load_dataset(name, self.docs, logger) for name in DATASET_FILES}
+        self._current = _assemble_datasets(self.docs, self._loaded)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+    @property
+    def current(self) -> StaticDatasets:
+        return self._current
+
+    def _signature(self, name: str) -> tuple:
+        sig = []
+        for f in DATASET_FILES[name]:
+            try:
+                st = (self.docs / f).stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    @staticmethod
+    def _is_empty(value) -> bool:
+        return len(value) == 0
+
+    def refresh(self) -> list[str]:
+        """Recarga los datasets cuyos ficheros cambiaron. Devuelve sus nombres."""
+        log = _logger_or_default(self.logger)
+        with self._lock:
+            now_ns = time.time_ns()
+            settle_ns = int(self.settle_seconds * 1e9)
+            changed = {}
+            for name in DATASET_FILES:
+                sig = self._signature(name)
+                if sig == self._signatures[name]:
+                    continue
+                if any(s is not None and now_ns - s[0] < settle_ns for s in sig):
+                    continue
+                changed[name] = sig
+            if not changed:
+                return []
+
+            loaded = dict(self._loaded)
+            swapped = []
+            for name, sig in changed.items():
+                value = _load_dataset(name, self.docs, self.logger)
+                if self._is_empty(value) and not self._is_empty(self._loaded[name]) \
+                        and any(s is not None for s in sig):
+                    log.warning("Dataset %s vacío tras recargar; se conserva el anterior", name)
+                    continue
+                loaded[name] = value
+                self._signatures[name] = sig
+                swapped.append(name)
+            if not swapped:
+                return []
+
+            self._loaded = loaded
+            self._current = _assemble_datasets(self.docs, loaded)
+            self.generation += 1
+            current = self._current
+
+        log.info("Datasets recargados (gen %d): %s", self.generation, ", ".join(swapped))
+        if self.on_swap is not None:
+            self.on_swap(current)
+        return swapped
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                _logger_or_default(self.logger).exception("Error recargando datasets")
+
+    def ensure_started(self) -> None:
+        """Arranca el hilo de recarga en este proceso si no está corriendo."""
+        if self.poll_seconds <= 0:
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dataset-reload", daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
 
 
 def build_dataset_summary(datasets: StaticDatasets) -> str:
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Serialized JSON payloads for the ticker_api list endpoints.
+
+_csv_to_json_response used to re-read the CSV with pandas and round-trip
+df.to_json → json.loads → jsonify on every request. Now:
+
+- PayloadCache keeps the final body (bytes) per candidate list, keyed on
+  (path, mtime_ns, size) of each candidate: while no CSV changes, a request
+  only does a few stat() calls. Each entry carries its ETag and a gzip
+  variant compressed on first use.
+- On a miss it first tries the pre-rendered payload (PRERENDER_DIR) built by
+  the pipeline right after writing the CSVs: valid only if the sha1 of the
+  CSV still matches, so a stale render can never be served. If there is no
+  valid render, it falls back to pandas, exactly as before.
+
+Build step (daily pipeline, after the CSVs are written):
+    python3 ticker_api_payloads.py           # the LIST_ENDPOINT_CSVS
+    python3 ticker_api_payloads.py --all     # every docs/*.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+
+DOCS = Path("docs")
+PRERENDER_DIR = DOCS / "api_payloads"
+
+# CSVs that the list endpoints serve (first candidate that has rows wins)
+LIST_ENDPOINT_CSVS = (
+    "value_conviction.csv",
+    "value_opportunities_filtered.csv",
+    "value_opportunities.csv",
+    "european_value_conviction.csv",
+    "european_value_opportunities_filtered.csv",
+    "european_value_opportunities.csv",
+    "global_value_opportunities.csv",
+    "momentum_opportunities_filtered.csv",
+    "momentum_opportunities.csv",
+    "options_flow.csv",
+    "micro_cap_opportunities.csv",
+    "short_opportunities.csv",
+    "mean_reversion_opportunities.csv",
+    "bounce_setups_broad.csv",
+    "hedge_fund_holdings.csv",
+)
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class Payload:
+    body: bytes
+    etag: str
+    _gzipped: Optional[bytes] = field(default=None, repr=False)
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+
+def _sha1_file(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def render_records(path: Path) -> tuple[bytes, int]:
+    """(records JSON array, rows) of a CSV. to_json turns NaN into null."""
+    df = pd.read_csv(path)
+    return df.to_json(orient="records").encode(), len(df)
+
+
+def _envelope(records: bytes, count: int, source: str) -> bytes:
+    return b'{"count":%d,"data":%s,"source":%s}' % (count, records, json.dumps(source).encode())
+
+
+def _load_prerendered(path: Path, prerender_dir: Optional[Path]) -> Optional[tuple[bytes, int]]:
+    """Records from the pre-render if it is for exactly this CSV version."""
+    if prerender_dir is None:
+        return None
+    meta_path = prerender_dir / f"{path.stem}.meta.json"
+    records_path = prerender_dir / f"{path.stem}.json"
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get("sha1") != _sha1_file(path):
+            return None
+        return records_path.read_bytes(), int(meta["count"])
+    except Exception:
+        return None
+
+
+def build_payload(candidates: Sequence[tuple], prerender_dir: Optional[Path] = PRERENDER_DIR) -> Payload:
+    """Body of _csv_to_json_response: first candidate with rows, or an empty one."""
+    for csv_path, label in candidates:
+        p = Path(csv_path)
+        if not p.exists():
+            continue
+        try:
+            rendered = _load_prerendered(p, prerender_dir) or render_records(p)
+        except Exception:
+            continue
+        records, count = rendered
+        if count > 0:
+            body = _envelope(records, count, label)
+            break
+    else:
+        body = _envelope(b"[]", 0, "none")
+    return Payload(body=body, etag=hashlib.sha1(body).hexdigest()[:20])
+
+
+class PayloadCache:
+    """In-process LRU of payloads, invalidated by the CSVs' mtime/size."""
+
+    def __init__(self, prerender_dir: Optional[Path] = PRERENDER_DIR, max_entries: int = 64):
+        self.prerender_dir = prerender_dir
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _signature(candidates: Sequence[tuple]) -> tuple:
+        sig = []
+        for csv_path, _label in candidates:
+            try:
+                st = Path(csv_path).stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def get(self, candidates: Sequence[tuple]) -> Payload:
+        key = tuple((str(p), label) for p, label in candidates)
+        signature = self._signature(candidates)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+
+        # Se renderiza fuera del lock: dos peticiones simultáneas pueden
+        # renderizar a la vez, pero ninguna bloquea a los demás endpoints
+        payload = build_payload(candidates, self.prerender_dir)
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[key] = (signature, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def prerender(csv_paths: Iterable[Path], out_dir: Path = PRERENDER_DIR) -> int:
+    """Writes <stem>.json (records) + <stem>.meta.json (sha1, count) per CSV."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for path in csv_paths:
+        path = Path(path)
+        if not path.exists():
+            continue
+        try:
+            records, count = render_records(path)
+        except Exception:
+            _log.exception("No se pudo pre-renderizar %s", path)
+            continue
+        (out_dir / f"{path.stem}.json").write_bytes(records)
+        (out_dir / f"{path.stem}.meta.json").write_text(json.dumps({
+            "source": path.name,
+            "sha1": _sha1_file(path),
+            "count": count,
+        }))
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render ticker_api list payloads")
+    parser.add_argument("--all", action="store_true", help="Pre-render every docs/*.csv")
+    parser.add_argument("--docs", default=str(DOCS), help="Docs directory (default: docs)")
+    args = parser.parse_args()
+
+    docs = Path(args.docs)
+    paths = sorted(docs.glob("*.csv")) if args.all else [docs / name for name in LIST_ENDPOINT_CSVS]
+    written = prerender(paths, docs / PRERENDER_DIR.name)
+    print(f"✅ {written} payloads pre-renderizados en {docs / PRERENDER_DIR.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Temporal breakdown of portfolio-tracker signals for ticker_api.
+
+/api/portfolio-tracker/timeseries used to re-read recommendations.csv on
+every request, build the week/month/quarter labels with a per-row .apply
+over Period objects and run one Python groupby loop per dimension,
+re-mapping the win_* strings each time. Now:
+
+- typed_completed() parses the CSV once per version: dates, period labels,
+  numeric returns and win flags (1.0 / 0.0 / NaN) are vectorized columns.
+- aggregate() stacks every dimension (week, month, quarter, weekday,
+  strategy) into one long frame and runs a single groupby on
+  (dimension, label).
+- TimeseriesCache memoizes the serialized response per (mtime_ns, size) of
+  the CSV: while it does not change, a request is one stat() call.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ticker_api_payloads import Payload
+
+PERIOD_DIMENSIONS = ("week", "month", "quarter", "weekday")
+WEEKDAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Columna de conteo por estrategia → valor de 'strategy'
+STRATEGY_COUNTS = {"value_us": "VALUE", "value_eu": "EU_VALUE", "momentum": "MOMENTUM"}
+
+# El CSV guarda los win_* como bool o como texto según quién lo escribió
+_WIN_MAP = {"True": 1.0, "False": 0.0, True: 1.0, False: 0.0}
+
+_METRICS = {
+    "signals": ("return_14d", "size"),
+    "win_rate_14d": ("win_14d", "mean"),
+    "win_rate_30d": ("win_30d", "mean"),
+    "avg_return_14d": ("return_14d", "mean"),
+    "avg_return_30d": ("return_30d", "mean"),
+    "avg_drawdown": ("max_drawdown_30d", "mean"),
+    **{col: (col, "sum") for col in STRATEGY_COUNTS},
+}
+_PERIOD_FIELDS = ["signals", "win_rate_14d", "win_rate_30d", "avg_return_14d",
+                  "avg_return_30d", *STRATEGY_COUNTS]
+_STRATEGY_FIELDS = ["signals", "win_rate_14d", "win_rate_30d", "avg_return_14d",
+                    "avg_return_30d", "avg_drawdown"]
+
+
+def _numeric(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[col], errors="coerce")
+
+
+def typed_completed(df: pd.DataFrame) -> pd.DataFrame:
+    """COMPLETED signals with parsed dates, period labels, returns and win flags."""
+    if "status" not in df.columns or "signal_date" not in df.columns:
+        return pd.DataFrame()
+    done = df[df["status"] == "COMPLETED"]
+    date = pd.to_datetime(done["signal_date"], errors="coerce")
+    keep = date.notna().to_numpy()
+    done, date = done[keep], date[keep]
+
+    strategy = done["strategy"] if "strategy" in done.columns else pd.Series(np.nan, index=done.index)
+    typed = pd.DataFrame({
+        "signal_date": date,
+        # Lunes de la semana / día 1 del mes: mismas etiquetas que Period.start_time
+        "week": (date - pd.to_timedelta(date.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d"),
+        "month": date.dt.strftime("%Y-%m-01"),
+        "quarter": "Q" + date.dt.quarter.astype(str) + " " + date.dt.year.astype(str),
+        "weekday": date.dt.day_name(),
+        "strategy": strategy,
+        "return_14d": _numeric(done, "return_14d"),
+        "return_30d": _numeric(done, "return_30d"),
+        "max_drawdown_30d": _numeric(done, "max_drawdown_30d"),
+        "win_14d": done["win_14d"].map(_WIN_MAP) if "win_14d" in done.columns else np.nan,
+        "win_30d": done["win_30d"].map(_WIN_MAP) if "win_30d" in done.columns else np.nan,
+    })
+    for col, name in STRATEGY_COUNTS.items():
+        typed[col] = (strategy == name).astype(np.int64)
+    return typed.reset_index(drop=True)
+
+
+# Decimales por campo (round() de Python, no Series.round: mismas cifras
+# que la versión anterior del endpoint)
+_DECIMALS = {"win_rate_14d": 1, "win_rate_30d": 1, "avg_return_14d": 2,
+             "avg_return_30d": 2, "avg_drawdown": 2}
+
+
+def _records(stats: pd.DataFrame, label_key: str, fields: list[str]) -> list[dict]:
+    out = stats[fields].copy()
+    for col in ("win_rate_14d", "win_rate_30d"):
+        if col in out:
+            out[col] = out[col] * 100
+    records = []
+    for label, row in zip(out.index, out.to_dict("records")):
+        rec = {label_key: str(label)}
+        for col, val in row.items():
+            if col in _DECIMALS:
+                rec[col] = None if pd.isna(val) else round(float(val), _DECIMALS[col])
+            else:
+                rec[col] = int(val)
+        records.append(rec)
+    return records
+
+
+def aggregate(typed: pd.DataFrame) -> dict:
+    """Response body of /api/portfolio-tracker/timeseries from typed_completed()."""
+    dimensions = (*PERIOD_DIMENSIONS, "strategy")
+    value_cols = sorted({src for src, _ in _METRICS.values()})
+    long = pd.concat(
+        [typed[value_cols].assign(dimension=dim, label=typed[dim]) for dim in dimensions],
+        ignore_index=True,
+    )
+    stats = long.groupby(["dimension", "label"], sort=True).agg(**_METRICS)
+
+    def _dim(dim: str) -> pd.DataFrame:
+        return stats.xs(dim, level="dimension") if dim in stats.index.get_level_values(0) else stats.iloc[:0]
+
+    weekday = _dim("weekday")
+    weekday = weekday.reindex([d for d in WEEKDAY_ORDER if d in weekday.index])
+    return {
+        "by_week": _records(_dim("week"), "label", _PERIOD_FIELDS),
+        "by_month": _records(_dim("month"), "label", _PERIOD_FIELDS),
+        "by_quarter": _records(_dim("quarter"), "label", _PERIOD_FIELDS),
+        "by_weekday": _records(weekday, "label", _PERIOD_FIELDS),
+        "by_strategy": _records(_dim("strategy"), "strategy", _STRATEGY_FIELDS),
+        "total_completed": int(len(typed)),
+        "date_range": {
+            "from": str(typed["signal_date"].min().date()),
+            "to": str(typed["signal_date"].max().date()),
+        },
+    }
+
+
+def _payload(body: dict) -> Payload:
+    raw = json.dumps(body, separators=(",", ":"), allow_nan=False).encode()
+    return Payload(body=raw, etag=hashlib.sha1(raw).hexdigest()[:20])
+
+
+def build_timeseries(csv_path: Path) -> tuple[int, Payload]:
+    """(HTTP status, payload) — 404 with an error body when there is nothing to show."""
+    if not csv_path.exists():
+        return 404, _payload({"error": "No data yet"})
+    try:
+        df = pd.read_csv(csv_path)
+    except Exception:
+        df = pd.DataFrame()
+    if df.empty:
+        return 404, _payload({"error": "Empty data"})
+    typed = typed_completed(df)
+    if typed.empty:
+        return 404, _payload({"error": "No completed signals yet"})
+    return 200, _payload(aggregate(typed))
+
+
+class TimeseriesCache:
+    """Memoized build_timeseries, invalidated by the CSV's mtime/size."""
+
+    def __init__(self):
+        self._entry: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def _signature(csv_path: Path) -> tuple:
+        try:
+            st = csv_path.stat()
+            return (str(csv_path), st.st_mtime_ns, st.st_size)
+        except OSError:
+            return (str(csv_path), None)
+
+    def get(self, csv_path: Path) -> tuple[int, Payload]:
+        csv_path = Path(csv_path)
+        signature = self._signature(csv_path)
+        with self._lock:
+            if self._entry is not None and self._entry[0] == signature:
+                self.stats["hits"] += 1
+                return self._entry[1]
+        result = build_timeseries(csv_path)
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entry = (signature, result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
@@ -28,8 +28,6 @@ import json
 import math
 import os
 import re
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional
@@ -39,6 +37,10 @@ import pandas as pd
 import yfinance as yf
 import requests
 
+from options_math import flow_columns
+from scan_executor import run_scan
+from yfinance_client import acquire_rate_budget, option_chains
+
 # ── Rutas ──────────────────────────────────────────────────────────────────────
 ROOT = Path(__file__).parent
 DOCS = ROOT / 'docs'
@@ -49,8 +51,9 @@ LARGE_PREMIUM_USD  = 100_000  # notificar por Telegram si supera esto
 MIN_VOLUME         = 50       # mínimo contratos para no ser ruido
 MAX_DTE            = 45       # ignorar opciones a más de 45 días (larguísimas, poco signal)
 SPECULATIVE_DTE    = 14       # ≤14 días = apuesta especulativa/sweep
-MAX_WORKERS        = 6        # threads paralelos (respetar rate limit)
-SLEEP_BETWEEN      = 0.3      # segundos entre requests por thread
+MAX_WORKERS        = 6        # threads paralelos (el ritmo lo pone el token bucket de yfinance_client)
+TICKER_TIMEOUT     = 60       # segundos por ticker antes de abandonarlo
+SCAN_DEADLINE      = 20 * 60  # segundos para el scan completo (cancela la cola)
 TOP_N_PER_TICKER   = 3        # contratos top a guardar por ticker
 HISTORY_DAYS       = 5        # días de histórico para calcular vol_vs_avg
 
@@ -119,6 +122,53 @@ def _safe_float(val) -> Optional[float]:
         return None
 
 
+def _unusual_records(unusual: pd.DataFrame, side: str, exp_str: str, dte: int,
+                     barchart_oi: dict[str, int]) -> list[dict]:
+    """Filas de contratos inusuales → dicts de salida (OI y vol/OI por columnas)."""
+    if unusual.empty:
+        return []
+    idx = unusual.index
+
+    def _col(name, default=np.nan) -> pd.Series:
+        if name not in unusual:
+            return pd.Series(default, index=idx, dtype=float)
+        return pd.to_numeric(unusual[name], errors='coerce')
+
+    symbols = unusual['contractSymbol'].astype(str) if 'contractSymbol' in unusual else pd.Series('', index=idx)
+    # OI: preferir Barchart si yfinance devuelve 0 (o Barchart no tiene el contrato)
+    oi_yf = _col('openInterest', 0).fillna(0).astype(int)
+    oi = symbols.map(barchart_oi).fillna(0).astype(int)
+    oi = oi.where(oi != 0, oi_yf)
+    volume = _col('volume', 0).fillna(0).astype(int)
+    itm = (unusual['inTheMoney'].fillna(False).astype(bool) if 'inTheMoney' in unusual
+           else pd.Series(False, index=idx))
+    # Last trade date — key to know if trade is fresh (today) vs old
+    ltd = (pd.to_datetime(unusual['lastTradeDate'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M')
+           if 'lastTradeDate' in unusual else pd.Series(None, index=idx, dtype=object))
+
+    records = []
+    for strike, vol, oi_i, last, ltd_i, prem, iv, itm_i in zip(
+            _col('strike'), volume, oi, _col('lastPrice'), ltd, _col('premium_usd', 0),
+            _col('impliedVolatility'), itm):
+        iv = _safe_float(iv)
+        records.append({
+            'side':           side,
+            'strike':         _safe_float(strike),
+            'expiry':         exp_str,
+            'dte':            dte,
+            'volume':         int(vol),
+            'open_interest':  int(oi_i),
+            'vol_oi_ratio':   round(vol / oi_i, 2) if oi_i > 0 else None,
+            'last_price':     _safe_float(last),
+            'last_trade_date': ltd_i if isinstance(ltd_i, str) else None,
+            'premium_usd':    round(_safe_float(prem) or 0, 0),
+            'iv':             round(iv, 3) if iv else None,
+            'itm':            bool(itm_i),
+            'speculative':    dte <= SPECULATIVE_DTE,
+        })
+    return records
+
+
 def analyze_ticker_options(ticker: str) -> Optional[dict]:
     """
     Analiza las cadenas de opciones de un ticker.
@@ -126,7 +176,8 @@ def analyze_ticker_options(ticker: str) -> Optional[dict]:
     """
     try:
         t = yf.Ticker(ticker)
-        exps = t.options
+        chains = option_chains(ticker, t)
+        exps = chains.options
         if not exps:
             return None
 
@@ -148,8 +199,7 @@ def analyze_ticker_options(ticker: str) -> Optional[dict]:
                 if dte < 0 or dte > MAX_DTE:
                     continue
 
-                chain = t.option_chain(exp_str)
-                time.sleep(SLEEP_BETWEEN)
+                chain = chains.option_chain(exp_str)
 
                 for side, df in [('CALL', chain.calls), ('PUT', chain.puts)]:
                     if df is None or df.empty:
@@ -159,7 +209,7 @@ def analyze_ticker_options(ticker: str) -> Optional[dict]:
                     if df.empty:
                         continue
 
-                    df['premium_usd'] = df['volume'] * df['lastPrice'] * 100
+                    df['premium_usd'] = flow_columns(df)['premium_usd']
                     df['dte'] = dte
                     df['side'] = side
 
@@ -179,37 +229,8 @@ def analyze_ticker_options(ticker: str) -> Optional[dict]:
                         (df['premium_usd'] >= MIN_PREMIUM_USD) &
                         (df['volume'] >= MIN_VOLUME)
                     ]
-                    for _, row in unusual.iterrows():
-                        prem   = _safe_float(row.get('premium_usd', 0)) or 0
-                        iv     = _safe_float(row.get('impliedVolatility'))
-                        itm    = bool(row.get('inTheMoney', False))
-                        vol    = int(row.get('volume', 0))
-                        sym    = str(row.get('contractSymbol', ''))
-                        # OI: preferir Barchart si yfinance devuelve 0
-                        oi_yf  = int(row.get('openInterest', 0) or 0)
-                        oi     = barchart_oi.get(sym, oi_yf) or oi_yf
-                        vol_oi = round(vol / oi, 2) if oi > 0 else None
-                        # Last trade date — key to know if trade is fresh (today) vs old
-                        ltd_raw = row.get('lastTradeDate')
-                        try:
-                            ltd = pd.Timestamp(ltd_raw).strftime('%Y-%m-%d %H:%M') if ltd_raw else None
-                        except Exception:
-                            ltd = None
-                        unusual_contracts.append({
-                            'side':           side,
-                            'strike':         _safe_float(row.get('strike')),
-                            'expiry':         exp_str,
-                            'dte':            dte,
-                            'volume':         vol,
-                            'open_interest':  oi,
-                            'vol_oi_ratio':   vol_oi,
-                            'last_price':     _safe_float(row.get('lastPrice')),
-                            'last_trade_date': ltd,
-                            'premium_usd':    round(prem, 0),
-                            'iv':             round(iv, 3) if iv else None,
-                            'itm':            itm,
-                            'speculative':    dte <= SPECULATIVE_DTE,
-                        })
+                    unusual_contracts.extend(
+                        _unusual_records(unusual, side, exp_str, dte, barchart_oi))
 
             except Exception:
                 continue
@@ -224,6 +245,7 @@ def analyze_ticker_options(ticker: str) -> Optional[dict]:
         drawdown_pct   = None
         gain_from_low  = None
         try:
+            acquire_rate_budget()
             fi = t.fast_info
             current_price = _safe_float(fi.get('lastPrice'))
             high_52w      = _safe_float(fi.get('yearHigh'))
@@ -353,32 +375,21 @@ def analyze_ticker_options(ticker: str) -> Optional[dict]:
 # ─────────────────────────────────────────────────────────────────────────────
 
 def scan(tickers: list[str]) -> list[dict]:
-    """Escanea todos los tickers en paralelo."""
-    results = []
-    total   = len(tickers)
-    done    = 0
-
-    print(f'   Escaneando {total} tickers (threads={MAX_WORKERS})...')
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
-        futures = {pool.submit(analyze_ticker_options, t): t for t in tickers}
-        for future in as_completed(futures):
-            ticker = futures[future]
-            done  += 1
-            try:
-                result = future.result()
-                if result and result.get('total_premium', 0) > 0:
-                    results.append(result)
-                    sig  = result['signal']
-                    prem = result['total_premium']
-                    icon = '🟢' if sig == 'BULLISH' else '🔴' if sig == 'BEARISH' else '⚪'
-                    if prem >= MIN_PREMIUM_USD:
-                        print(f'   {icon} {ticker}: {sig} | ${prem/1000:.0f}k total | score={result["unusual_score"]}')
-            except Exception:
-                pass
-
-            if done % 50 == 0:
-                print(f'   Progreso: {done}/{total}')
+    """Escanea todos los tickers en paralelo (scan_executor.run_scan)."""
+    print(f'   Escaneando {len(tickers)} tickers (threads={MAX_WORKERS})...')
+
+    def _print_result(ticker: str, result: dict) -> None:
+        sig  = result['signal']
+        prem = result['total_premium']
+        icon = '🟢' if sig == 'BULLISH' else '🔴' if sig == 'BEARISH' else '⚪'
+        if prem >= MIN_PREMIUM_USD:
+            print(f'   {icon} {ticker}: {sig} | ${prem/1000:.0f}k total | score={result["unusual_score"]}')
+
+    found, report = run_scan(analyze_ticker_options, tickers, label='unusual_flow',
+                             max_workers=MAX_WORKERS, ticker_timeout=TICKER_TIMEOUT,
+                             deadline=SCAN_DEADLINE, on_result=_print_result, progress_every=50)
+    print(report.format())
+    results = [r for r in found.values() if r.get('total_premium', 0) > 0]
 
     # Ordenar por premium total descendente
     results.sort(key=lambda x: x.get('total_premium', 0), reverse=True)
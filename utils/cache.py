@@ -2,12 +2,49 @@
 """
 FUNDAMENTAL DATA CACHE
 Caches fundamental data to reduce API calls and improve coverage over time
+
+Storage: a single SQLite file (fundamentals.sqlite3) instead of one
+pretty-printed JSON per ticker:
+- cached_at is an indexed column → TTL checks and cleanup_expired are one
+  indexed query, no need to open and parse every entry
+- data is compact JSON compressed with zlib (BLOB)
+- WAL journal + busy timeout → several processes can read while another
+  writes (parallel scanners sharing the cache)
+- get_many / set_many resolve a whole universe in one transaction
+
+Legacy {TICKER}.json files found in cache_dir are imported on first open
+and removed.
 """
 import json
-import os
+import sqlite3
+import threading
+import zlib
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
+
+DB_FILENAME = "fundamentals.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ticker    TEXT PRIMARY KEY,
+    cached_at REAL NOT NULL,
+    data      BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_cached_at ON entries (cached_at);
+"""
+
+
+def _encode(data: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(data, separators=(',', ':'), default=str).encode())
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob))
+
+
+def _valid_ticker(ticker: Any) -> bool:
+    return isinstance(ticker, str) and bool(ticker) and ticker != 'nan'
 
 
 class FundamentalCache:
@@ -15,9 +52,10 @@ class FundamentalCache:
     Cache for fundamental data with TTL (Time To Live)
 
     Features:
-    - JSON file-based storage
+    - Single-file SQLite storage (WAL, safe for concurrent processes)
     - 24-hour TTL by default
     - Automatic cache invalidation
+    - Bulk get_many / set_many
     - Cache statistics
     """
 
@@ -26,11 +64,12 @@ class FundamentalCache:
         Initialize cache
 
         Args:
-            cache_dir: Directory for cache files
+            cache_dir: Directory for the cache database
             ttl_hours: Time to live in hours (default: 24)
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / DB_FILENAME
         self.ttl = timedelta(hours=ttl_hours)
 
         # Statistics
@@ -41,9 +80,45 @@ class FundamentalCache:
             'saved': 0
         }
 
-    def _get_cache_path(self, ticker: str) -> Path:
-        """Get cache file path for ticker"""
-        return self.cache_dir / f"{ticker.upper()}.json"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._import_legacy_json()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _cutoff(self) -> float:
+        """Entries cached before this timestamp are expired"""
+        return (datetime.now() - self.ttl).timestamp()
+
+    def _import_legacy_json(self) -> None:
+        """One-off migration from the old one-JSON-per-ticker layout"""
+        rows = []
+        legacy = list(self.cache_dir.glob("*.json"))
+        for path in legacy:
+            try:
+                with open(path, 'r') as f:
+                    cached = json.load(f)
+                cached_at = datetime.fromisoformat(cached.get('cached_at', '2000-01-01'))
+                rows.append((path.stem.upper(), cached_at.timestamp(), _encode(cached.get('data'))))
+            except Exception:
+                pass   # corrupted: dropped, same as the old get()
+        if rows:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO entries (ticker, cached_at, data) VALUES (?, ?, ?)", rows)
+        for path in legacy:
+            path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    # ── Single-ticker façade ──────────────────────────────────────────────────
 
     def get(self, ticker: str) -> Optional[Dict[str, Any]]:
         """
@@ -56,40 +131,9 @@ class FundamentalCache:
             Cached data dict or None if not found/expired
         """
         # Validate ticker type
-        if not isinstance(ticker, str) or not ticker or ticker == 'nan':
-            return None
-
-        cache_path = self._get_cache_path(ticker)
-
-        if not cache_path.exists():
-            self.stats['misses'] += 1
-            return None
-
-        try:
-            with open(cache_path, 'r') as f:
-                cached = json.load(f)
-
-            # Check expiration
-            cached_at = datetime.fromisoformat(cached.get('cached_at', '2000-01-01'))
-            age = datetime.now() - cached_at
-
-            if age > self.ttl:
-                # Cache expired
-                self.stats['invalidated'] += 1
-                self.stats['misses'] += 1
-                cache_path.unlink()  # Delete expired cache
-                return None
-
-            # Cache hit
-            self.stats['hits'] += 1
-            return cached.get('data')
-
-        except Exception as e:
-            # Corrupted cache file
-            self.stats['misses'] += 1
-            if cache_path.exists():
-                cache_path.unlink()
+        if not _valid_ticker(ticker):
             return None
+        return self.get_many([ticker]).get(ticker)
 
     def set(self, ticker: str, data: Dict[str, Any]) -> bool:
         """
@@ -103,27 +147,107 @@ class FundamentalCache:
             True if saved successfully
         """
         # Validate ticker type
-        if not isinstance(ticker, str) or not ticker or ticker == 'nan':
+        if not _valid_ticker(ticker):
             return False
+        return self.set_many({ticker: data}) == 1
 
-        try:
-            cache_path = self._get_cache_path(ticker)
+    # ── Bulk API ──────────────────────────────────────────────────────────────
 
-            cached_data = {
-                'ticker': ticker.upper(),
-                'cached_at': datetime.now().isoformat(),
-                'ttl_hours': self.ttl.total_seconds() / 3600,
-                'data': data
-            }
+    def get_many(self, tickers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get cached data for many tickers in one query
 
-            with open(cache_path, 'w') as f:
-                json.dump(cached_data, f, indent=2, default=str)
+        Args:
+            tickers: Stock ticker symbols (invalid ones are ignored)
 
-            self.stats['saved'] += 1
-            return True
+        Returns:
+            {ticker: data} for the hits only, keyed as requested
+        """
+        wanted = {}
+        for ticker in tickers:
+            if _valid_ticker(ticker):
+                wanted.setdefault(ticker.upper(), []).append(ticker)
+        if not wanted:
+            return {}
+
+        keys = list(wanted)
+        rows = []
+        with self._lock:
+            # SQLite limita los parámetros por consulta: por tandas
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ','.join('?' * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT ticker, cached_at, data FROM entries WHERE ticker IN ({marks})",
+                    chunk).fetchall())
+
+        cutoff = self._cutoff()
+        found: Dict[str, Dict[str, Any]] = {}
+        drop = []
+        for key, cached_at, blob in rows:
+            if cached_at < cutoff:
+                # Cache expired
+                self.stats['invalidated'] += 1
+                drop.append(key)
+                continue
+            try:
+                data = _decode(blob)
+            except Exception:
+                # Corrupted entry
+                drop.append(key)
+                continue
+            for ticker in wanted[key]:
+                found[ticker] = data
+
+        if drop:
+            with self._lock:
+                self._conn.executemany("DELETE FROM entries WHERE ticker = ?", [(k,) for k in drop])
+
+        requested = sum(len(v) for v in wanted.values())
+        self.stats['hits'] += len(found)
+        self.stats['misses'] += requested - len(found)
+        return found
+
+    def set_many(self, items: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Cache data for many tickers in one transaction
 
-        except Exception as e:
-            return False
+        Args:
+            items: {ticker: data}
+
+        Returns:
+            Number of entries saved
+        """
+        now = datetime.now().timestamp()
+        rows = []
+        for ticker, data in items.items():
+            if not _valid_ticker(ticker):
+                continue
+            try:
+                rows.append((ticker.upper(), now, _encode(data)))
+            except Exception:
+                continue
+        if not rows:
+            return 0
+
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO entries (ticker, cached_at, data) VALUES (?, ?, ?)",
+                        rows)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error:
+            return 0
+
+        self.stats['saved'] += len(rows)
+        return len(rows)
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
 
     def invalidate(self, ticker: str) -> bool:
         """
@@ -135,10 +259,13 @@ class FundamentalCache:
         Returns:
             True if cache was deleted
         """
-        cache_path = self._get_cache_path(ticker)
+        if not _valid_ticker(ticker):
+            return False
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM entries WHERE ticker = ?", (ticker.upper(),)).rowcount
 
-        if cache_path.exists():
-            cache_path.unlink()
+        if deleted:
             self.stats['invalidated'] += 1
             return True
 
@@ -149,12 +276,10 @@ class FundamentalCache:
         Clear all cached data
 
         Returns:
-            Number of files deleted
+            Number of entries deleted
         """
-        count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            cache_file.unlink()
-            count += 1
+        with self._lock:
+            count = self._conn.execute("DELETE FROM entries").rowcount
 
         self.stats['invalidated'] += count
         return count
@@ -166,8 +291,9 @@ class FundamentalCache:
         Returns:
             Dict with cache stats
         """
-        total_files = len(list(self.cache_dir.glob("*.json")))
-        total_size = sum(f.stat().st_size for f in self.cache_dir.glob("*.json"))
+        with self._lock:
+            total_entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        total_size = sum(p.stat().st_size for p in self.cache_dir.glob(DB_FILENAME + '*'))
 
         # Calculate hit rate
         total_requests = self.stats['hits'] + self.stats['misses']
@@ -176,7 +302,7 @@ class FundamentalCache:
         return {
             'cache_dir': str(self.cache_dir),
             'ttl_hours': self.ttl.total_seconds() / 3600,
-            'cached_tickers': total_files,
+            'cached_tickers': total_entries,
             'cache_size_kb': total_size / 1024,
             'stats': {
                 **self.stats,
@@ -187,30 +313,14 @@ class FundamentalCache:
 
     def cleanup_expired(self) -> int:
         """
-        Remove all expired cache files
+        Remove all expired entries
 
         Returns:
-            Number of expired files removed
+            Number of expired entries removed
         """
-        count = 0
-        now = datetime.now()
-
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r') as f:
-                    cached = json.load(f)
-
-                cached_at = datetime.fromisoformat(cached.get('cached_at', '2000-01-01'))
-                age = now - cached_at
-
-                if age > self.ttl:
-                    cache_file.unlink()
-                    count += 1
-
-            except Exception:
-                # Corrupted file, delete it
-                cache_file.unlink()
-                count += 1
+        with self._lock:
+            count = self._conn.execute(
+                "DELETE FROM entries WHERE cached_at < ?", (self._cutoff(),)).rowcount
 
         self.stats['invalidated'] += count
         return count
@@ -21,6 +21,7 @@ urllib3.disable_warnings()
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import time
 import ftplib
 import io
@@ -28,10 +29,16 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, Union
 import logging
-from multiprocessing import Pool, cpu_count
-from functools import partial
+import queue
+import threading
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from multiprocessing import cpu_count
 import argparse
 
+from yfinance_client import (BATCH_MAX_WORKERS, get_history, get_info, get_history_batch,
+                             get_info_batch, DataNotFoundError)
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -126,12 +133,36 @@ def safe_comparison(series, value, operator='>'):
         logger.error(f"Error en comparación segura: {e}")
         return pd.Series([False] * len(series), index=series.index)
 
+def _nanmean(values):
+    """Media ignorando NaN (como Series.mean); NaN si no queda ninguno"""
+    values = values[~np.isnan(values)]
+    return values.mean() if len(values) else np.nan
+
+def _is_clean(df):
+    """
+    True si df ya pasó por clean_dataframe_safe: precios float64 finitos y > 0,
+    Volume int64. El análisis VCP limpia el mismo frame 3-4 veces por ticker;
+    así las repeticiones cuestan una comprobación, no una conversión.
+    """
+    price_cols = [c for c in ['Open', 'High', 'Low', 'Close'] if c in df.columns]
+    if any(df[c].dtype != np.float64 for c in price_cols):
+        return False
+    if 'Volume' in df.columns and df['Volume'].dtype != np.int64:
+        return False
+    if not price_cols:
+        return True
+    prices = df[price_cols].to_numpy()
+    return bool((prices > 0).all() and np.isfinite(prices).all())
+
 def clean_dataframe_safe(df):
     """Limpieza segura de DataFrame completa"""
     if df is None or df.empty:
         return pd.DataFrame()
     
     try:
+        if _is_clean(df):
+            return df.copy()
+        
         df_clean = df.copy()
         
         # Procesar columnas numéricas una por una
@@ -141,16 +172,26 @@ def clean_dataframe_safe(df):
             if col not in df_clean.columns:
                 continue
             
-            if col == 'Volume':
+            if pd.api.types.is_numeric_dtype(df_clean[col]):
+                # Camino rápido (lo normal con yfinance): mismas reglas que
+                # safe_float/safe_int (NaN/inf → 0, int trunca) sin .apply por celda
+                values = df_clean[col].to_numpy(dtype=float)
+                values = np.where(np.isfinite(values), values, 0.0)
+                if col == 'Volume':
+                    df_clean[col] = np.trunc(values).astype('int64')
+                else:
+                    df_clean[col] = values
+            elif col == 'Volume':
                 df_clean[col] = safe_series_conversion(df_clean[col], 'int')
             else:
                 df_clean[col] = safe_series_conversion(df_clean[col], 'float')
         
-        # Filtrar filas con precios inválidos usando comparación segura
-        price_cols = ['Open', 'High', 'Low', 'Close']
-        for col in price_cols:
-            if col in df_clean.columns:
-                valid_mask = safe_comparison(df_clean[col], 0, '>')
+        # Filtrar filas con precios inválidos (todas ya son float64: una sola
+        # máscara equivale a filtrar columna a columna)
+        price_cols = [c for c in ['Open', 'High', 'Low', 'Close'] if c in df_clean.columns]
+        if price_cols:
+            valid_mask = (df_clean[price_cols].to_numpy() > 0).all(axis=1)
+            if not valid_mask.all():
                 df_clean = df_clean[valid_mask]
         
         return df_clean
@@ -188,6 +229,54 @@ class VCPResult:
         self.market_cap = safe_int(self.market_cap)
         self.contractions = [safe_float(c) for c in self.contractions]
 
+def _window_mean(values, length, back=0):
+    """
+    Media por columna de `length` filas que terminan `back` filas antes de
+    la última — lo mismo que rolling(length).mean().iloc[-1 - back] en
+    cada ticker. NaN si el ticker no tiene historia suficiente.
+    """
+    rows = values.shape[0]
+    stop = rows - back
+    if stop - length < 0:
+        return np.full(values.shape[1], np.nan)
+    return values[stop - length:stop].mean(axis=0)
+
+@dataclass
+class PricePanel:
+    """
+    Velas de muchos tickers como arrays 2-D (filas × tickers) alineados por
+    la DERECHA: la fila -1 es la última vela de cada ticker, la -2 la
+    anterior... Los tickers con menos historia llevan NaN arriba.
+
+    Alinear por posición y no por fecha reproduce exactamente los
+    .tail(n)/.iloc[-k] del análisis por ticker aunque cada uno tenga sus
+    festivos o huecos.
+    """
+    tickers: List[str]
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    volume: np.ndarray
+    n_rows: np.ndarray
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame]) -> 'PricePanel':
+        """Apila DataFrames OHLCV ya limpios (clean_dataframe_safe)"""
+        tickers = [t for t, df in frames.items() if df is not None and not df.empty]
+        depth = max((len(frames[t]) for t in tickers), default=0)
+        arrays = {col: np.full((depth, len(tickers)), np.nan)
+                  for col in ('Close', 'High', 'Low', 'Volume')}
+        n_rows = np.zeros(len(tickers), dtype=int)
+        
+        for j, ticker in enumerate(tickers):
+            df = frames[ticker]
+            n_rows[j] = len(df)
+            for col, values in arrays.items():
+                values[depth - len(df):, j] = df[col].to_numpy(dtype=float)
+        
+        return cls(tickers=tickers, close=arrays['Close'], high=arrays['High'],
+                   low=arrays['Low'], volume=arrays['Volume'], n_rows=n_rows)
+
 class UniverseManager:
     """Gestor completo de universos de acciones"""
     
@@ -305,20 +394,13 @@ class CalibratedVCPAnalyzer:
             if len(df) < window * 3:
                 return [], []
             
-            # Calcular pivots altos y bajos
-            highs = df['High'].rolling(window=window, center=True).max()
-            lows = df['Low'].rolling(window=window, center=True).min()
+            high_pos, low_pos = self._pivot_positions(
+                df['High'].to_numpy(dtype=float), df['Low'].to_numpy(dtype=float), window)
             
-            # Identificar pivots significativos
-            pivot_highs = []
-            pivot_lows = []
-            
-            for i in range(window, len(df) - window):
-                if df['High'].iloc[i] == highs.iloc[i]:
-                    pivot_highs.append((df.index[i], df['High'].iloc[i]))
-                
-                if df['Low'].iloc[i] == lows.iloc[i]:
-                    pivot_lows.append((df.index[i], df['Low'].iloc[i]))
+            highs = df['High'].to_numpy(dtype=float)
+            lows = df['Low'].to_numpy(dtype=float)
+            pivot_highs = list(zip(df.index[high_pos], highs[high_pos]))
+            pivot_lows = list(zip(df.index[low_pos], lows[low_pos]))
             
             return pivot_highs, pivot_lows
             
@@ -326,6 +408,26 @@ class CalibratedVCPAnalyzer:
             logger.error(f"Error identificando pivots: {e}")
             return [], []
     
+    @staticmethod
+    def _pivot_positions(highs, lows, window):
+        """
+        Posiciones de los pivots sobre arrays NumPy.
+        
+        Un bar es pivot alto si su High es el máximo de la ventana centrada
+        (misma alineación que rolling(window, center=True): [i - w//2, i - w//2 + w)).
+        Solo se consideran i en [window, n - window), como el bucle original.
+        """
+        n = len(highs)
+        if n < window * 3:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        
+        idx = np.arange(window, n - window)
+        starts = idx - window // 2
+        win_max = sliding_window_view(highs, window).max(axis=1)[starts]
+        win_min = sliding_window_view(lows, window).min(axis=1)[starts]
+        
+        return idx[highs[idx] == win_max], idx[lows[idx] == win_min]
+    
     def calculate_flexible_contractions(self, df):
         """Calcular contracciones con criterios flexibles completos"""
         try:
@@ -336,59 +438,62 @@ class CalibratedVCPAnalyzer:
             if df.empty:
                 return []
             
+            highs = df['High'].to_numpy(dtype=float)
+            lows = df['Low'].to_numpy(dtype=float)
+            volumes = df['Volume'].to_numpy(dtype=float)
+            
             # Identificar pivots con ventana más pequeña
-            pivot_highs, pivot_lows = self.identify_pivot_points(df, window=7)
+            pivot_pos, _ = self._pivot_positions(highs, lows, window=7)
             
-            if len(pivot_highs) < 3:
+            if len(pivot_pos) < 3:
                 return []
             
-            # Analizar base completa
-            recent_high = max([ph[1] for ph in pivot_highs[-5:]])  # Últimos 5 pivots
-            base_start_idx = None
-            
-            # Encontrar inicio de base (último gran avance)
-            for i, (date, price) in enumerate(pivot_highs):
-                if price >= recent_high * 0.90:  # Dentro del 90% del máximo
-                    base_start_idx = i
-                    break
+            # Analizar base completa: inicio = primer pivot dentro del 90% del
+            # máximo de los últimos 5 pivots (último gran avance)
+            pivot_prices = highs[pivot_pos]
+            recent_high = pivot_prices[-5:].max()
+            in_base = pivot_prices >= recent_high * 0.90
+            if not in_base.any():
+                return []
+            base_start_idx = int(np.argmax(in_base))
             
-            if base_start_idx is None or len(pivot_highs) - base_start_idx < 2:
+            if len(pivot_pos) - base_start_idx < 2:
                 return []
             
-            # Analizar contracciones en la base
-            base_highs = pivot_highs[base_start_idx:]
-            contractions = []
+            # Pares consecutivos de máximos de la base: [p1, p2] inclusivo
+            base_pos = pivot_pos[base_start_idx:]
+            p1, p2 = base_pos[:-1], base_pos[1:]
             
-            for i in range(len(base_highs) - 1):
-                high1_date, high1_price = base_highs[i]
-                high2_date, high2_price = base_highs[i + 1]
-                
-                # Encontrar el mínimo entre estos máximos
-                between_data = df.loc[high1_date:high2_date]
-                if len(between_data) < 5:
-                    continue
-                
-                low_price = safe_float(between_data['Low'].min())
-                
-                # Calcular contracción desde el primer máximo
-                if high1_price > 0:
-                    contraction_pct = ((high1_price - low_price) / high1_price) * 100
-                    
-                    # Criterios más flexibles
-                    if contraction_pct >= self.subsequent_min:
-                        # Analizar volumen durante la contracción
-                        volume_trend = self._analyze_volume_trend_flexible(between_data)
-                        
-                        contractions.append({
-                            'start_date': high1_date,
-                            'end_date': high2_date,
-                            'high_price': high1_price,
-                            'low_price': low_price,
-                            'contraction_pct': contraction_pct,
-                            'volume_trend': volume_trend,
-                            'duration_days': (high2_date - high1_date).days,
-                            'quality_score': self._score_contraction_quality(contraction_pct, volume_trend)
-                        })
+            # Mínimo entre máximos: fmin.reduceat da min(low[p1:p2]); falta p2.
+            # fmin ignora NaN igual que Series.min()
+            low_between = np.fmin(np.fmin.reduceat(lows, base_pos)[:-1], lows[p2])
+            low_between = np.where(np.isnan(low_between), 0.0, low_between)
+            
+            high_prices = highs[p1]
+            valid = ((p2 - p1 + 1) >= 5) & (high_prices > 0)
+            contraction_pct = np.zeros(len(p1))
+            np.divide((high_prices - low_between) * 100, high_prices,
+                      out=contraction_pct, where=high_prices > 0)
+            # Criterios más flexibles
+            keep = np.flatnonzero(valid & (contraction_pct >= self.subsequent_min))
+            
+            dates = df.index
+            contractions = []
+            for k in keep:
+                a, b = p1[k], p2[k]
+                # Analizar volumen durante la contracción
+                volume_trend = self._volume_trend_array(volumes[a:b + 1])
+                pct = float(contraction_pct[k])
+                contractions.append({
+                    'start_date': dates[a],
+                    'end_date': dates[b],
+                    'high_price': high_prices[k],
+                    'low_price': float(low_between[k]),
+                    'contraction_pct': pct,
+                    'volume_trend': volume_trend,
+                    'duration_days': (dates[b] - dates[a]).days,
+                    'quality_score': self._score_contraction_quality(pct, volume_trend)
+                })
             
             return contractions
             
@@ -401,27 +506,32 @@ class CalibratedVCPAnalyzer:
         try:
             if len(data) < 5:
                 return 0
-            
-            volumes = [safe_float(x) for x in data['Volume']]
-            volumes = [x for x in volumes if x > 0]
-            
-            if len(volumes) < 3:
-                return 0
-            
-            # Comparar primera mitad vs segunda mitad
-            mid_point = len(volumes) // 2
-            first_half_avg = np.mean(volumes[:mid_point])
-            second_half_avg = np.mean(volumes[mid_point:])
-            
-            if first_half_avg > 0:
-                volume_change = ((second_half_avg - first_half_avg) / first_half_avg) * 100
-                return safe_float(volume_change)
-            
-            return 0
-            
+            return self._volume_trend_array(
+                safe_series_conversion(data['Volume'], 'float').to_numpy())
         except:
             return 0
     
+    @staticmethod
+    def _volume_trend_array(volumes):
+        """% de cambio del volumen medio: segunda mitad vs primera (solo vol > 0)"""
+        if len(volumes) < 5:
+            return 0
+        
+        volumes = volumes[volumes > 0]   # NaN también fuera
+        if len(volumes) < 3:
+            return 0
+        
+        # Comparar primera mitad vs segunda mitad
+        mid_point = len(volumes) // 2
+        first_half_avg = volumes[:mid_point].mean()
+        second_half_avg = volumes[mid_point:].mean()
+        
+        if first_half_avg > 0:
+            volume_change = ((second_half_avg - first_half_avg) / first_half_avg) * 100
+            return safe_float(volume_change)
+        
+        return 0
+    
     def _score_contraction_quality(self, contraction_pct, volume_trend):
         """Puntuar calidad de contracción completa"""
         score = 50  # Base
@@ -585,35 +695,25 @@ class CalibratedVCPAnalyzer:
                 return 50  # Neutral
             
             # Analizar tendencia de volumen en contracciones
-            volume_scores = []
-            
-            for contraction in contractions:
-                trend = safe_float(contraction.get('volume_trend', 0))
-                quality = safe_float(contraction.get('quality_score', 50))
-                
-                # Puntuación basada en volumen seco
-                if trend < -15:      # Muy seco
-                    vol_score = 90
-                elif trend < -5:     # Seco
-                    vol_score = 75
-                elif trend < 5:      # Neutral
-                    vol_score = 60
-                elif trend < 15:     # Algo alto
-                    vol_score = 45
-                else:                # Muy alto
-                    vol_score = 30
-                
-                # Combinar con calidad de contracción
-                combined_score = (vol_score + quality) / 2
-                volume_scores.append(combined_score)
+            trend = np.array([safe_float(c.get('volume_trend', 0)) for c in contractions])
+            quality = np.array([safe_float(c.get('quality_score', 50)) for c in contractions])
+            
+            # Puntuación basada en volumen seco:
+            # muy seco / seco / neutral / algo alto / muy alto
+            vol_score = np.select(
+                [trend < -15, trend < -5, trend < 5, trend < 15],
+                [90, 75, 60, 45],
+                default=30,
+            )
             
-            # Promedio de puntuaciones
-            avg_score = np.mean(volume_scores) if volume_scores else 50
+            # Combinar con calidad de contracción y promediar
+            avg_score = float(((vol_score + quality) / 2).mean())
             
             # Ajuste por volumen reciente
             try:
-                recent_volume = safe_float(df['Volume'].tail(10).mean())
-                avg_volume = safe_float(df['Volume'].tail(60).mean())
+                volume = df['Volume'].to_numpy(dtype=float)
+                recent_volume = safe_float(_nanmean(volume[-10:]))
+                avg_volume = safe_float(_nanmean(volume[-60:]))
                 
                 if avg_volume > 0:
                     volume_ratio = recent_volume / avg_volume
@@ -716,8 +816,104 @@ class CalibratedVCPAnalyzer:
             logger.error(f"Error calculando breakout flexible: {e}")
             return 30
 
-    def analyze_vcp_pattern_calibrated(self, symbol, df):
-        """Análisis VCP calibrado completo con criterios realistas"""
+    def screen_panel(self, panel):
+        """
+        Etapa, trend template y volumen de TODO el universo en una pasada.
+        
+        Devuelve un DataFrame indexado por ticker con:
+          - stage_analysis / stage_score: idénticos a analyze_stage_and_trend
+          - trend_template_score / trend_template_pass: criterios de
+            MovingAverageFilter (Minervini) — pass = precio > MA150/200,
+            MA150 > MA200 y MA200 subiendo
+          - volume_ratio: volumen medio 10d / 60d (< 0.6 = volumen seco)
+          - passes_basic: historia, precio y volumen mínimos del análisis
+        """
+        close, high, low, volume = panel.close, panel.high, panel.low, panel.volume
+        n = panel.n_rows
+        current = close[-1] if len(close) else np.full(len(panel.tickers), np.nan)
+        
+        def _safe(values):
+            return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+        
+        # ── Stage (misma lógica que analyze_stage_and_trend) ──
+        sma_20 = _safe(_window_mean(close, 20))
+        sma_50 = _safe(_window_mean(close, 50))
+        sma_150 = np.where(n >= 150, _safe(_window_mean(close, 150)), sma_50)
+        sma_20_prev = _safe(_window_mean(close, 20, back=9))
+        sma_50_prev = _safe(_window_mean(close, 50, back=9))
+        
+        uptrend = (current > sma_20) & (sma_20 > sma_50)
+        strong = uptrend & (sma_20 > sma_20_prev) & (sma_50 > sma_50_prev)
+        early = ~uptrend & (current > sma_50) & (sma_50 > sma_150)
+        transition = ~uptrend & ~early & (current > sma_150)
+        
+        stage_score = np.select([strong, uptrend, early, transition], [60, 40, 25, 15], default=0)
+        stage_desc = np.select(
+            [strong, uptrend, early, transition],
+            ["Stage 2 Strong", "Stage 2 (Uptrend)", "Stage 2 Early", "Stage 1-2 Transition"],
+            default="Stage Unknown",
+        )
+        
+        recent_high = _safe(np.nanmax(high[-50:], axis=0)) if len(high) else np.zeros(len(n))
+        distance = np.full(len(n), np.inf)
+        np.divide((recent_high - current) * 100, recent_high, out=distance, where=recent_high > 0)
+        stage_score = stage_score + np.select(
+            [distance <= 5, distance <= 15, distance <= 25], [25, 15, 5], default=0)
+        stage_score = np.minimum(100, stage_score).astype(float)
+        
+        too_short = n < 50
+        stage_score[too_short] = 0
+        stage_desc[too_short] = "Stage Unknown"
+        
+        # ── Trend template (MovingAverageFilter) ──
+        ma_50 = _window_mean(close, 50)
+        ma_150 = _window_mean(close, 150)
+        ma_200 = _window_mean(close, 200)
+        ma_200_prev = _window_mean(close, 200, back=19)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            criteria = np.vstack([
+                (current > ma_150) & (current > ma_200),
+                ma_150 > ma_200,
+                ma_200 > ma_200_prev,
+                (ma_50 > ma_150) & (ma_150 > ma_200),
+                current >= np.nanmin(low, axis=0) * 1.30,
+                current >= np.nanmax(high, axis=0) * 0.75,
+            ]) if len(close) else np.zeros((6, len(n)), dtype=bool)
+        template_ok = n >= 200
+        template_score = np.where(template_ok, criteria.sum(axis=0) / 6 * 100, 0).astype(int)
+        template_pass = template_ok & criteria[0] & criteria[1] & criteria[2]
+        
+        # ── Volumen seco y filtros básicos ──
+        recent_volume = _safe(_window_mean(volume, 10))
+        avg_volume_60 = _safe(_window_mean(volume, 60))
+        volume_ratio = np.full(len(n), np.nan)
+        np.divide(recent_volume, avg_volume_60, out=volume_ratio, where=avg_volume_60 > 0)
+        avg_volume_30 = _safe(_window_mean(volume, 30))
+        
+        passes_basic = (
+            (n >= self.min_data_points)
+            & (_safe(current) >= 5.0)
+            & (avg_volume_30 >= 50000)
+        )
+        
+        return pd.DataFrame({
+            'current_price': _safe(current),
+            'avg_volume': avg_volume_30,
+            'stage_analysis': stage_desc,
+            'stage_score': stage_score,
+            'trend_template_score': template_score,
+            'trend_template_pass': template_pass,
+            'volume_ratio': volume_ratio,
+            'passes_basic': passes_basic,
+        }, index=pd.Index(panel.tickers, name='ticker'))
+    
+    def analyze_vcp_pattern_calibrated(self, symbol, df, stage=None):
+        """
+        Análisis VCP calibrado completo con criterios realistas
+        
+        stage: (descripción, score) ya calculados por screen_panel; si es
+               None se calcula con analyze_stage_and_trend
+        """
         try:
             if len(df) < self.min_data_points:
                 return None
@@ -747,7 +943,9 @@ class CalibratedVCPAnalyzer:
                 return None
             
             # Análisis de etapa y tendencia
-            stage_description, stage_score = self.analyze_stage_and_trend(df)
+            if stage is None:
+                stage = self.analyze_stage_and_trend(df)
+            stage_description, stage_score = stage
             
             # Calcular puntuación del patrón
             pattern_score, pattern_quality = self.calculate_pattern_score(contractions)
@@ -809,7 +1007,6 @@ class DataProvider:
     
     def __init__(self, alpha_vantage_key=None):
         self.alpha_vantage_key = alpha_vantage_key or "GPA37GJVIDCNNTRL"
-        self.last_request_time = 0
     
     def get_stock_data(self, symbol, as_of_date=None):
         """Obtener datos con período extendido - SIN ERRORES
@@ -820,13 +1017,8 @@ class DataProvider:
                        This prevents look-ahead bias in historical backtesting.
         """
         try:
-            # Rate limiting más conservador
-            elapsed = time.time() - self.last_request_time
-            if elapsed < 1.5:
-                time.sleep(1.5 - elapsed)
-            self.last_request_time = time.time()
-
-            ticker = yf.Ticker(symbol)
+            # Rate limiting: lo pone el bucket compartido de yfinance_client
+            # (get_history / get_info), no un sleep fijo por llamada.
 
             # 🔴 FIX LOOK-AHEAD BIAS: Use date range instead of period
             if as_of_date:
@@ -834,15 +1026,14 @@ class DataProvider:
                 end_date = datetime.strptime(as_of_date, '%Y-%m-%d')
                 start_date = end_date - timedelta(days=365)  # 1 year lookback
 
-                df = ticker.history(
+                df = get_history(
+                    symbol,
                     start=start_date.strftime('%Y-%m-%d'),
                     end=end_date.strftime('%Y-%m-%d'),
-                    interval='1d',
-                    timeout=30
                 )
             else:
                 # Current mode: use standard period
-                df = ticker.history(period='1y', interval='1d', timeout=30)
+                df = get_history(symbol, period='1y')
             
             if df.empty or len(df) < 150:
                 return None
@@ -854,7 +1045,7 @@ class DataProvider:
             
             # Metadata segura - ESTRUCTURA LIMPIA
             try:
-                info = ticker.info
+                info = get_info(symbol)
                 market_cap = safe_int(info.get('marketCap', 0))
                 metadata = {
                     'market_cap': market_cap,
@@ -872,10 +1063,78 @@ class DataProvider:
             
             return df, metadata
             
+        except DataNotFoundError:
+            return None
         except Exception as e:
             logger.error(f"Error obteniendo datos para {symbol}: {e}")
             return None
 
+_FETCH_DONE = object()   # centinela de fin de descarga en la cola de scan_parallel
+
+# Scanner del proceso de análisis (lo fija el initializer del pool: se
+# serializa una vez por proceso, no una vez por ticker)
+_WORKER_SCANNER = None
+
+def _init_analysis_worker(scanner):
+    global _WORKER_SCANNER
+    _WORKER_SCANNER = scanner
+
+def _worker_ready():
+    return True
+
+def _analyze_in_worker(symbol, df, metadata):
+    """Tarea del pool de análisis. Devuelve VCPResult, None o la excepción."""
+    try:
+        return _WORKER_SCANNER.evaluate_frame(symbol, df, metadata)
+    except Exception as e:
+        return e
+
+class _PipelineMetrics:
+    """Contadores de scan_parallel, actualizados desde varios hilos."""
+
+    def __init__(self, total):
+        self.total = total
+        self.fetched = 0
+        self.fetch_empty = 0
+        self.analyzed = 0
+        self.errors = 0
+        self.fetch_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def observe_queue(self, depth):
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def progress_line(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"descargados {self.fetched + self.fetch_empty}/{self.total} "
+                f"({self.fetch_empty} sin datos) | analizados {self.analyzed} | "
+                f"{self.analyzed / elapsed:.1f} tickers/s | cola máx {self.max_queue_depth} | "
+                f"backpressure {self.blocked_seconds:.1f}s")
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            'total': self.total,
+            'fetched': self.fetched,
+            'fetch_empty': self.fetch_empty,
+            'analyzed': self.analyzed,
+            'errors': self.errors,
+            'max_queue_depth': self.max_queue_depth,
+            'backpressure_seconds': round(self.blocked_seconds, 3),
+            'fetch_seconds': round(self.fetch_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'tickers_per_second': round(self.analyzed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
 class CalibratedVCPScanner:
     """Scanner VCP calibrado completo con criterios realistas"""
 
@@ -898,10 +1157,16 @@ class CalibratedVCPScanner:
         self.min_volume = 50_000       # Más bajo
         self.min_market_cap = 100_000_000  # Más bajo
 
+        # Modo panel: el análisis detallado solo corre sobre los tickers que
+        # pasan los filtros básicos y además están en etapa ≥ transición
+        # (stage_score ≥ 15) o cumplen el trend template
+        self.panel_min_stage_score = 15
+
         # Contadores
         self.processed_count = 0
         self.vcp_found_count = 0
         self.error_count = 0
+        self.last_scan_metrics = {}
     
     def process_single_ticker(self, symbol):
         """Procesar un ticker con criterios calibrados completos"""
@@ -915,24 +1180,9 @@ class CalibratedVCPScanner:
                 return None
             
             df, metadata = result
-            
-            # Filtros básicos flexibles
-            current_price = safe_float(df['Close'].iloc[-1])
-            avg_volume = safe_float(df['Volume'].tail(30).mean())
-            market_cap = safe_int(metadata.get('market_cap', 0))
-            
-            if (current_price < self.min_price or 
-                avg_volume < self.min_volume or 
-                (market_cap > 0 and market_cap < self.min_market_cap)):
-                return None
-            
-            # Análisis VCP calibrado
-            vcp_result = self.analyzer.analyze_vcp_pattern_calibrated(symbol, df)
+            vcp_result = self.evaluate_frame(symbol, df, metadata)
             
             if vcp_result:
-                vcp_result.sector = str(metadata.get('sector', 'Unknown'))
-                vcp_result.market_cap = market_cap
-                
                 self.vcp_found_count += 1
                 return vcp_result
             
@@ -945,6 +1195,102 @@ class CalibratedVCPScanner:
         finally:
             self.processed_count += 1
     
+    def evaluate_frame(self, symbol, df, metadata):
+        """
+        Filtros básicos + análisis VCP de un ticker ya descargado.
+        
+        Sin red ni contadores: es lo que corre en los procesos de análisis
+        de scan_parallel.
+        """
+        # Filtros básicos flexibles
+        current_price = safe_float(df['Close'].iloc[-1])
+        avg_volume = safe_float(df['Volume'].tail(30).mean())
+        market_cap = safe_int(metadata.get('market_cap', 0))
+        
+        if (current_price < self.min_price or 
+            avg_volume < self.min_volume or 
+            (market_cap > 0 and market_cap < self.min_market_cap)):
+            return None
+        
+        # Análisis VCP calibrado
+        vcp_result = self.analyzer.analyze_vcp_pattern_calibrated(symbol, df)
+        
+        if vcp_result:
+            vcp_result.sector = str(metadata.get('sector', 'Unknown'))
+            vcp_result.market_cap = market_cap
+        
+        return vcp_result
+    
+    def scan_panel(self, symbols):
+        """
+        Escaneo en modo PANEL: cribado vectorizado de todo el universo y
+        análisis detallado solo de los supervivientes.
+        
+        1. Historial de todos los símbolos con get_history_batch (concurrente,
+           price store, bucket compartido)
+        2. PricePanel + screen_panel: etapa, trend template y volumen seco de
+           todos a la vez con operaciones de matriz
+        3. Supervivientes (passes_basic y stage_score ≥ panel_min_stage_score
+           o trend template): info (market cap, sector) con get_info_batch y
+           análisis de contracciones por ticker, reutilizando la etapa ya
+           calculada
+        
+        A diferencia de scan_sequential/scan_parallel, descarta sin analizar
+        los tickers en Stage 1/4 lejos de máximos: no son VCP aunque la
+        puntuación combinada pudiera superar 45.
+        """
+        logger.info(f"🧮 Iniciando escaneo VCP en modo PANEL de {len(symbols)} símbolos")
+        
+        if self.as_of_date:
+            end_date = datetime.strptime(self.as_of_date, '%Y-%m-%d')
+            window = {'start': (end_date - timedelta(days=365)).strftime('%Y-%m-%d'),
+                      'end': end_date.strftime('%Y-%m-%d')}
+        else:
+            window = {'period': '1y'}
+        
+        raw, errors = get_history_batch(symbols, min_rows=self.analyzer.min_data_points, **window)
+        frames = {}
+        for symbol, df in raw.items():
+            df = clean_dataframe_safe(df)
+            if len(df) >= self.analyzer.min_data_points:
+                frames[symbol] = df
+        
+        panel = PricePanel.from_frames(frames)
+        screen = self.analyzer.screen_panel(panel)
+        survivors = screen[
+            screen['passes_basic']
+            & ((screen['stage_score'] >= self.panel_min_stage_score) | screen['trend_template_pass'])
+        ]
+        logger.info(
+            f"📊 Panel: {len(frames)}/{len(symbols)} con historia suficiente "
+            f"({len(errors)} errores de descarga) → {len(survivors)} supervivientes"
+        )
+        
+        infos, _ = get_info_batch(list(survivors.index))
+        
+        results = []
+        for symbol, row in survivors.iterrows():
+            self.processed_count += 1
+            info = infos.get(symbol, {})
+            market_cap = safe_int(info.get('marketCap', 0))
+            if market_cap > 0 and market_cap < self.min_market_cap:
+                continue
+            if row['current_price'] < self.min_price or row['avg_volume'] < self.min_volume:
+                continue
+            
+            vcp_result = self.analyzer.analyze_vcp_pattern_calibrated(
+                symbol, frames[symbol], stage=(row['stage_analysis'], row['stage_score']))
+            if vcp_result:
+                vcp_result.sector = str(info.get('sector', 'Unknown'))
+                vcp_result.market_cap = market_cap
+                self.vcp_found_count += 1
+                results.append(vcp_result)
+                status = "🟢 COMPRAR" if vcp_result.ready_to_buy else "🟡 VIGILAR"
+                logger.info(f"✅ {symbol}: VCP {vcp_result.vcp_score:.1f}% ({vcp_result.pattern_quality}) | {status}")
+        
+        logger.info(f"✅ Escaneo panel completado: {len(results)} patrones VCP detectados")
+        return results
+    
     def scan_sequential(self, symbols):
         """Escaneo secuencial calibrado completo"""
         logger.info(f"🚀 Iniciando escaneo VCP CALIBRADO de {len(symbols)} símbolos")
@@ -978,68 +1324,129 @@ class CalibratedVCPScanner:
 
         return results
 
-    def scan_parallel(self, symbols, num_workers=None):
+    def scan_parallel(self, symbols, num_workers=None, fetch_workers=None, queue_size=None):
         """
-        Escaneo PARALELO - 6-8x más rápido que secuencial
-
-        Usa multiprocessing para procesar múltiples tickers simultáneamente
-        Ideal para scans grandes (S&P 500, NASDAQ)
+        Escaneo PARALELO en dos etapas: descarga (hilos) → análisis (procesos)
+
+        - Descarga: `fetch_workers` hilos en ESTE proceso llaman a
+          DataProvider.get_stock_data. El ritmo lo marca el token bucket de
+          yfinance_client — un único presupuesto para todo el escaneo, sin
+          sleeps por worker.
+        - Cola acotada (`queue_size`): si el análisis va por detrás, los hilos
+          de descarga se bloquean al encolar (backpressure) en vez de acumular
+          cientos de DataFrames en memoria.
+        - Análisis: pool de `num_workers` procesos que solo reciben
+          (símbolo, DataFrame, metadata) y ejecutan evaluate_frame. Nunca
+          tocan la red. Como mucho hay 2 × num_workers tareas en vuelo.
+
+        Al terminar, self.last_scan_metrics resume el escaneo: descargados,
+        sin datos, analizados, errores, profundidad máxima de la cola,
+        segundos bloqueados por backpressure y throughput de cada etapa.
 
         Args:
             symbols: Lista de símbolos a escanear
-            num_workers: Número de workers (default: CPU count - 1)
+            num_workers: Procesos de análisis (default: CPU count - 1)
+            fetch_workers: Hilos de descarga (default: BATCH_MAX_WORKERS)
+            queue_size: Capacidad de la cola entre etapas (default: 4 × num_workers)
         """
         if num_workers is None:
             # Use all CPUs minus 1 to leave one free
             num_workers = max(1, cpu_count() - 1)
+        fetch_workers = fetch_workers or BATCH_MAX_WORKERS
+        queue_size = queue_size or num_workers * 4
+        max_inflight = num_workers * 2
 
         logger.info(f"⚡ Iniciando escaneo VCP PARALELO de {len(symbols)} símbolos")
-        logger.info(f"🚀 Usando {num_workers} workers paralelos")
+        logger.info(f"🚀 {fetch_workers} hilos de descarga → cola({queue_size}) → {num_workers} procesos de análisis")
         logger.info("📊 Criterios realistas basados en investigación profesional")
 
-        # Create partial function with self bound
-        process_func = partial(self._process_ticker_safe, self)
+        metrics = _PipelineMetrics(total=len(symbols))
+        frames = queue.Queue(maxsize=queue_size)
 
-        results = []
+        def _fetch(symbol):
+            t0 = time.monotonic()
+            try:
+                data = self.data_provider.get_stock_data(symbol, as_of_date=self.as_of_date)
+            except Exception as e:
+                logger.error(f"❌ {symbol}: error descargando - {e}")
+                data = None
+            metrics.add(fetch_seconds=time.monotonic() - t0)
+            if data is None:
+                metrics.add(fetch_empty=1)
+                return
+            t1 = time.monotonic()
+            frames.put((symbol, *data))   # bloquea si la cola está llena
+            metrics.add(fetched=1, blocked_seconds=time.monotonic() - t1)
+            metrics.observe_queue(frames.qsize())
+
+        def _producer():
+            try:
+                with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+                    list(pool.map(_fetch, symbols))
+            finally:
+                frames.put(_FETCH_DONE)
+
+        results = {}
         errors = 0
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 initializer=_init_analysis_worker,
+                                 initargs=(self,)) as pool:
+            # Arrancar los procesos ANTES que los hilos de descarga: con 'fork'
+            # el pool los crea todos en el primer submit, y hacer fork con
+            # hilos vivos (locks de logging, del bucket...) puede colgar al hijo
+            pool.submit(_worker_ready).result()
+            threading.Thread(target=_producer, name='vcp-fetch', daemon=True).start()
+
+            pending = {}
+            fetch_done = False
+            while not fetch_done or pending:
+                # Recoger de la cola solo si hay hueco en vuelo (backpressure)
+                while not fetch_done and len(pending) < max_inflight:
+                    try:
+                        item = frames.get(timeout=0.1) if pending else frames.get()
+                    except queue.Empty:
+                        break
+                    if item is _FETCH_DONE:
+                        fetch_done = True
+                        break
+                    symbol, df, metadata = item
+                    pending[pool.submit(_analyze_in_worker, symbol, df, metadata)] = symbol
+
+                if not pending:
+                    continue
+                done, _ = wait(list(pending), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:   # p.ej. un worker muerto
+                        result = e
+                    metrics.add(analyzed=1)
+                    self.processed_count += 1
 
-        # Process in parallel with progress tracking
-        with Pool(processes=num_workers) as pool:
-            # Use imap for ordered results with progress tracking
-            for i, result in enumerate(pool.imap(process_func, symbols), 1):
-                if result is not None:
                     if isinstance(result, Exception):
                         errors += 1
-                        logger.error(f"[{i:3d}/{len(symbols)}] ❌ Error: {result}")
-                    else:
-                        results.append(result)
+                        logger.error(f"[{metrics.analyzed:3d}/{len(symbols)}] ❌ {symbol}: Error: {result}")
+                    elif result is not None:
+                        results[symbol] = result
+                        self.vcp_found_count += 1
                         status = "🟢 COMPRAR" if result.ready_to_buy else "🟡 VIGILAR"
-                        logger.info(f"[{i:3d}/{len(symbols)}] ✅ {result.ticker}: VCP {result.vcp_score:.1f}% ({result.pattern_quality}) | {status}")
-                else:
-                    logger.debug(f"[{i:3d}/{len(symbols)}] ⚪ No cumple criterios VCP")
+                        logger.info(f"[{metrics.analyzed:3d}/{len(symbols)}] ✅ {symbol}: VCP {result.vcp_score:.1f}% ({result.pattern_quality}) | {status}")
+                    else:
+                        logger.debug(f"[{metrics.analyzed:3d}/{len(symbols)}] ⚪ {symbol}: No cumple criterios VCP")
 
-                # Progress update every 50 symbols
-                if i % 50 == 0:
-                    found_rate = (len(results) / i) * 100
-                    logger.info(f"📊 Progreso: {i}/{len(symbols)} | VCP: {len(results)} ({found_rate:.2f}%) | Errores: {errors}")
+                    # Progress update every 50 symbols
+                    if metrics.analyzed % 50 == 0:
+                        logger.info(f"📊 Progreso: {metrics.progress_line()} | VCP: {len(results)} | Errores: {errors}")
 
+        metrics.errors = errors
         self.error_count = errors
+        self.last_scan_metrics = metrics.summary()
+        logger.info(f"📊 Pipeline: {metrics.progress_line()}")
         logger.info(f"✅ Escaneo paralelo completado: {len(results)} patrones VCP detectados")
 
-        return results
-
-    @staticmethod
-    def _process_ticker_safe(scanner_instance, symbol):
-        """
-        Wrapper estático para process_single_ticker - safe para multiprocessing
-
-        Maneja excepciones y retorna None o Exception en lugar de fallar
-        """
-        try:
-            return scanner_instance.process_single_ticker(symbol)
-        except Exception as e:
-            # Return exception instead of None to distinguish errors
-            return e
+        # Mismo orden que la lista de entrada (como el antiguo Pool.imap)
+        return [results[s] for s in dict.fromkeys(symbols) if s in results]
 
     def generate_detailed_report(self, results):
         """Generar reporte detallado calibrado completo"""
@@ -1418,7 +1825,8 @@ class VCPScannerEnhanced:
         else:
             logger.info("✅ VCPScannerEnhanced inicializado")
     
-    def scan_market(self, symbol_list=None, quick_test=False, parallel=False, num_workers=None):
+    def scan_market(self, symbol_list=None, quick_test=False, parallel=False, num_workers=None,
+                    panel=False):
         """
         Escanear mercado - compatible con sistema_principal
 
@@ -1427,6 +1835,8 @@ class VCPScannerEnhanced:
             quick_test: Test rápido con 30 acciones
             parallel: Usar procesamiento paralelo (6-8x más rápido)
             num_workers: Número de workers para modo paralelo (default: CPU count - 1)
+            panel: Cribado vectorizado del universo; análisis detallado solo
+                   de los supervivientes (tiene prioridad sobre parallel)
         """
         try:
             if quick_test:
@@ -1446,7 +1856,10 @@ class VCPScannerEnhanced:
             logger.info(f"🚀 Escaneando {len(symbols)} símbolos...")
 
             # Choose scan mode
-            if parallel:
+            if panel:
+                logger.info("🧮 Modo PANEL activado - cribado vectorizado del universo")
+                results = self.scanner.scan_panel(symbols)
+            elif parallel:
                 logger.info("⚡ Modo PARALELO activado - velocidad 6-8x más rápida")
                 results = self.scanner.scan_parallel(symbols, num_workers=num_workers)
             else:
@@ -1776,6 +2189,7 @@ Examples:
   python3 vcp_scanner_usa.py --sp500                # Scan S&P 500 (sequential)
   python3 vcp_scanner_usa.py --sp500 --parallel     # ⚡ Scan S&P 500 (PARALLEL - 6x faster!)
   python3 vcp_scanner_usa.py --nasdaq --parallel    # ⚡ Scan NASDAQ (parallel)
+  python3 vcp_scanner_usa.py --nasdaq --panel       # 🧮 Scan NASDAQ (vectorized screen)
   python3 vcp_scanner_usa.py --quick                # Quick test (30 stocks)
   python3 vcp_scanner_usa.py --symbols AAPL,MSFT,NVDA --parallel
 
@@ -1795,6 +2209,8 @@ Performance:
                        help='Comma-separated list of symbols (e.g., AAPL,MSFT,NVDA)')
     parser.add_argument('--parallel', action='store_true',
                        help='⚡ Use parallel processing (6-8x faster)')
+    parser.add_argument('--panel', action='store_true',
+                       help='🧮 Vectorized universe screen; detailed analysis only for survivors')
     parser.add_argument('--workers', type=int, default=None,
                        help='Number of parallel workers (default: CPU count - 1)')
     parser.add_argument('--as-of-date', type=str, default=None,
@@ -1858,7 +2274,8 @@ if __name__ == "__main__":
             results = scanner_enhanced.scan_market(
                 symbol_list=symbols,
                 parallel=args.parallel,
-                num_workers=args.workers
+                num_workers=args.workers,
+                panel=args.panel
             )
 
             scanner.generate_detailed_report(results)
@@ -11,11 +11,19 @@ Soluciona:
   - Sin visibilidad agregada de cuántas llamadas fallan por día
 
 Features:
-  - Rate limit cushion compartido entre llamadas (min_gap_seconds)
+  - Token bucket compartido con backoff AIMD (rate_limiter.py): burst
+    configurable, frena solo ante 429 y se coordina entre procesos si
+    YF_RATE_LIMIT_FILE apunta a un fichero común
   - Clasificación explícita de errores: RateLimitError vs DataNotFoundError
   - Contador agregado accesible via get_stats() para telemetría
   - Compatible con el pattern existente (yf.Ticker(t).info / history / etc.)
   - No sustituye yfinance — lo envuelve con guardrails
+  - get_history diario consulta primero el price store en disco
+    (price_store.py): sirve el rango en local y solo descarga las velas
+    finales que falten
+  - option_chains(): .options / .option_chain(exp) desde el option store
+    (option_store.py) — cada cadena se descarga una vez por sesión y la
+    comparten todos los consumidores de opciones
 
 Uso:
     from yfinance_client import get_info, get_history, get_calendar, RateLimitError
@@ -26,19 +34,37 @@ Uso:
         # skip o reintenta más tarde — NO penalizar con -20pts
         ...
 
+    # Muchos tickers de golpe (scanners): frames + errores clasificados
+    frames, errors = get_history_batch(tickers, period='1y', min_rows=60)
+
+    # Cadenas de opciones compartidas (tk opcional: se reutiliza el Ticker)
+    chains = option_chains('AAPL', tk)
+    calls = chains.option_chain(chains.options[0]).calls
+    diff = option_activity_diff('AAPL', chains.options[0])   # OI vs ayer
+
 La migración se hace script a script cuando se tocan. NO es necesario
 tocar los 48 de una vez.
 """
 from __future__ import annotations
 
+import os
+import tempfile
 import time
 import logging
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from threading import Lock
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
 
+import pandas as pd
 import yfinance as yf
 
+from option_store import ChainSnapshot, OptionStore
+from price_store import PriceStore, StoredHistory, period_window, to_naive
+from rate_limiter import SHARED_STATE_ENV, TokenBucket
+
 _logger = logging.getLogger(__name__)
 
 
@@ -69,6 +95,7 @@ class _Stats:
     rate_limited: int = 0
     data_missing: int = 0
     other_errors: int = 0
+    store_hits: int = 0
     errors_by_ticker: dict[str, int] = field(default_factory=dict)
 
     def snapshot(self) -> dict:
@@ -78,6 +105,7 @@ class _Stats:
             'rate_limited':    self.rate_limited,
             'data_missing':    self.data_missing,
             'other_errors':    self.other_errors,
+            'store_hits':      self.store_hits,
             'ok_rate':         round(self.calls_ok / self.calls_total, 3) if self.calls_total else None,
             'top_failures':    dict(sorted(self.errors_by_ticker.items(), key=lambda kv: -kv[1])[:5]),
         }
@@ -85,20 +113,117 @@ class _Stats:
 
 _stats = _Stats()
 _stats_lock = Lock()
-_last_call_ts: float = 0.0
-_rate_lock = Lock()
 
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 
-# Default: 150ms entre llamadas — ajustable via set_min_gap_seconds()
-_MIN_GAP_SECONDS = 0.15
+# Default: ~6.7 llamadas/s (el antiguo gap de 150ms) con burst de 3 —
+# ajustable via configure_rate_limit() / set_min_gap_seconds()
+_DEFAULT_RATE = 1 / 0.15
+_DEFAULT_BURST = 3
+
+_limiter = TokenBucket(_DEFAULT_RATE, _DEFAULT_BURST,
+                       path=os.environ.get(SHARED_STATE_ENV) or None)
+
+
+# Price store diario compartido por todas las etapas. YF_PRICE_STORE=0 lo
+# desactiva (p.ej. para forzar datos 100% frescos en una depuración).
+_price_store: Optional[PriceStore] = (
+    None if os.environ.get('YF_PRICE_STORE', '1') == '0' else PriceStore()
+)
+
+
+def set_price_store(store: Optional[PriceStore]) -> None:
+    """Sustituye (o desactiva con None) el price store de get_history."""
+    global _price_store
+    _price_store = store
+
+
+# Snapshots de cadenas de opciones compartidos por todos los consumidores.
+# YF_OPTION_STORE=0 lo desactiva (option_chains va siempre a Yahoo).
+_option_store: Optional[OptionStore] = (
+    None if os.environ.get('YF_OPTION_STORE', '1') == '0' else OptionStore()
+)
+
+
+def set_option_store(store: Optional[OptionStore]) -> None:
+    """Sustituye (o desactiva con None) el option store de option_chains."""
+    global _option_store
+    _option_store = store
+
+
+def configure_rate_limit(rate: float, burst: float = _DEFAULT_BURST, *,
+                         shared_path: Optional[str] = None) -> None:
+    """
+    Presupuesto de llamadas a Yahoo: `rate` por segundo, `burst` seguidas.
+
+    :param shared_path: fichero de estado común. Todos los procesos que lo
+        compartan (workers de un Pool) gastan del MISMO bucket. Se exporta en
+        YF_RATE_LIMIT_FILE para que los hijos 'spawn' lo hereden al importar.
+    """
+    global _limiter
+    if shared_path:
+        os.environ[SHARED_STATE_ENV] = str(shared_path)
+    path = shared_path or os.environ.get(SHARED_STATE_ENV) or None
+    _limiter = TokenBucket(rate, burst, path=path)
+
+
+@contextmanager
+def share_rate_limit(path: Optional[str] = None) -> Iterator[str]:
+    """
+    Pasa el bucket actual (mismo rate y burst) a un fichero compartido y
+    devuelve su ruta. Usar alrededor del Pool: los workers — fork o spawn —
+    gastan del mismo presupuesto en vez de uno cada uno.
+
+        with share_rate_limit():
+            with ProcessPoolExecutor(...) as pool: ...
+
+    Al salir se restauran el bucket y YF_RATE_LIMIT_FILE anteriores (los
+    subprocesos posteriores no heredan un fichero muerto) y se borra el
+    fichero si lo creó esta llamada (path=None).
+    """
+    global _limiter
+    previous_limiter = _limiter
+    previous_env = os.environ.get(SHARED_STATE_ENV)
+    created = path is None
+    if created:
+        fd, path = tempfile.mkstemp(prefix='yf_rate_', suffix='.bucket')
+        os.close(fd)
+    try:
+        configure_rate_limit(_limiter.max_rate, _limiter.burst, shared_path=path)
+        yield path
+    finally:
+        _limiter = previous_limiter
+        if previous_env is None:
+            os.environ.pop(SHARED_STATE_ENV, None)
+        else:
+            os.environ[SHARED_STATE_ENV] = previous_env
+        if created:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def acquire_rate_budget(calls: int = 1) -> float:
+    """
+    Reserva `calls` llamadas del bucket compartido y devuelve los segundos
+    esperados. Para código que todavía usa yf.Ticker directamente (varias
+    llamadas por ticker: estados financieros, opciones...) y quiere gastar
+    del mismo presupuesto que el resto del pipeline.
+    """
+    return sum(_limiter.acquire() for _ in range(max(0, calls)))
+
+
+def report_rate_limited() -> None:
+    """Un 429 visto fuera del cliente: frena el bucket compartido igual."""
+    _limiter.on_rate_limit()
 
 
 def set_min_gap_seconds(gap: float) -> None:
-    """Ajusta el cushion entre llamadas consecutivas. Default 0.15s."""
-    global _MIN_GAP_SECONDS
-    _MIN_GAP_SECONDS = max(0.0, gap)
+    """Gap fijo entre llamadas consecutivas (burst 1). 0 = sin límite."""
+    gap = max(0.0, gap)
+    configure_rate_limit(1 / gap if gap > 0 else 0.0, burst=1)
 
 
 def get_stats() -> dict:
@@ -126,17 +251,15 @@ def _is_rate_limit_error(exc: BaseException) -> bool:
 
 
 def _wait_for_rate_cushion() -> None:
-    """Espera si la última llamada fue hace <_MIN_GAP_SECONDS."""
-    global _last_call_ts
-    with _rate_lock:
-        now = time.monotonic()
-        elapsed = now - _last_call_ts
-        if elapsed < _MIN_GAP_SECONDS:
-            time.sleep(_MIN_GAP_SECONDS - elapsed)
-        _last_call_ts = time.monotonic()
+    """Espera a tener token en el bucket compartido."""
+    _limiter.acquire()
 
 
 def _record(success: bool, error_type: str | None, ticker: str | None) -> None:
+    # AIMD: un 429 frena el bucket para todos (y para todos los procesos si
+    # es compartido). El aumento aditivo lo hace cada llamada de red OK.
+    if error_type == 'rate_limit':
+        _limiter.on_rate_limit()
     with _stats_lock:
         _stats.calls_total += 1
         if success:
@@ -152,6 +275,85 @@ def _record(success: bool, error_type: str | None, ticker: str | None) -> None:
             _stats.errors_by_ticker[ticker] = _stats.errors_by_ticker.get(ticker, 0) + 1
 
 
+def _fetch_history(ticker: str, *, period: Optional[str], start: Any, end: Any,
+                   interval: str, auto_adjust: bool) -> Any:
+    """Una llamada a Yahoo con cushion + clasificación de errores."""
+    _wait_for_rate_cushion()
+    try:
+        if start is not None:
+            df = yf.Ticker(ticker).history(
+                start=start, end=end,
+                interval=interval, auto_adjust=auto_adjust,
+            )
+        else:
+            df = yf.Ticker(ticker).history(
+                period=period or '1y',
+                interval=interval, auto_adjust=auto_adjust,
+            )
+    except Exception as exc:
+        if _is_rate_limit_error(exc):
+            _record(False, 'rate_limit', ticker)
+            raise RateLimitError(f"Rate limited fetching history for {ticker}") from exc
+        _record(False, 'other', ticker)
+        raise YFClientError(f"Failed to fetch history for {ticker}: {exc}") from exc
+    _limiter.on_success()
+    return df
+
+
+def _history_via_store(ticker: str, period: Optional[str], start: Any, end: Any,
+                       auto_adjust: bool) -> Any:
+    """
+    get_history diario a través del price store:
+      1. el store cubre el rango y está fresco → se sirve en local (0 llamadas)
+      2. el store cubre el inicio pero está viejo → solo velas finales
+      3. no hay store, o se pide más atrás de lo guardado, o Yahoo re-ajustó
+         la serie (dividendo/split) → rango completo una vez
+
+    La descarga pide siempre hasta HOY (sin end): así el store queda completo
+    para las etapas siguientes y el slice [start, end) se hace en local.
+    """
+    store = _price_store
+    tail_rows = None
+    if start is not None:
+        start_ts = to_naive(start).normalize()
+        end_ts = to_naive(end) if end is not None else None
+    else:
+        window = period_window(period or '1y')
+        if window is None:   # 'max' y compañía: directo a Yahoo
+            return _fetch_history(ticker, period=period, start=None, end=None,
+                                  interval='1d', auto_adjust=auto_adjust)
+        start_ts, tail_rows = window
+        end_ts = None
+
+    entry = store.read(ticker, auto_adjust)
+    if entry is not None and entry.covers(start_ts, end_ts, store.ttl_seconds):
+        with _stats_lock:
+            _stats.store_hits += 1
+        return entry.slice(start_ts, end_ts, tail_rows)
+
+    merged = None
+    covered_from = start_ts
+    if entry is not None and start_ts >= entry.covered_from:
+        covered_from = entry.covered_from
+        fresh = _fetch_history(ticker, period=None, start=entry.append_start().date(),
+                               end=None, interval='1d', auto_adjust=auto_adjust)
+        merged = entry.merge_trailing(fresh)
+    elif entry is not None:
+        covered_from = min(start_ts, entry.covered_from)
+
+    if merged is None:
+        merged = _fetch_history(ticker, period=None, start=covered_from.date(), end=None,
+                                interval='1d', auto_adjust=auto_adjust)
+        if merged is None or merged.empty:
+            return merged
+        if not isinstance(merged.index, pd.DatetimeIndex):
+            return merged
+
+    fetched = StoredHistory(frame=merged, covered_from=covered_from, fetched_at=time.time())
+    store.write(ticker, fetched, auto_adjust)
+    return fetched.slice(start_ts, end_ts, tail_rows)
+
+
 # ── Public API ────────────────────────────────────────────────────────────────
 
 def get_ticker(ticker: str) -> yf.Ticker:
@@ -177,6 +379,7 @@ def get_info(ticker: str, *, required_fields: Optional[list[str]] = None) -> dic
             raise RateLimitError(f"Rate limited fetching info for {ticker}") from exc
         _record(False, 'other', ticker)
         raise YFClientError(f"Failed to fetch info for {ticker}: {exc}") from exc
+    _limiter.on_success()
 
     if not info:
         _record(False, 'missing', ticker)
@@ -212,24 +415,11 @@ def get_history(
 
     :param min_rows: si se pasa y el df tiene menos, lanza DataNotFoundError.
     """
-    _wait_for_rate_cushion()
-    try:
-        if start is not None:
-            df = yf.Ticker(ticker).history(
-                start=start, end=end,
-                interval=interval, auto_adjust=auto_adjust,
-            )
-        else:
-            df = yf.Ticker(ticker).history(
-                period=period or '1y',
-                interval=interval, auto_adjust=auto_adjust,
-            )
-    except Exception as exc:
-        if _is_rate_limit_error(exc):
-            _record(False, 'rate_limit', ticker)
-            raise RateLimitError(f"Rate limited fetching history for {ticker}") from exc
-        _record(False, 'other', ticker)
-        raise YFClientError(f"Failed to fetch history for {ticker}: {exc}") from exc
+    if interval == '1d' and _price_store is not None:
+        df = _history_via_store(ticker, period, start, end, auto_adjust)
+    else:
+        df = _fetch_history(ticker, period=period, start=start, end=end,
+                            interval=interval, auto_adjust=auto_adjust)
 
     if df is None or df.empty:
         _record(False, 'missing', ticker)
@@ -245,6 +435,215 @@ def get_history(
     return df
 
 
+# Tickers por tanda en get_history_batch: el progreso se loguea por tanda y
+# una tanda rate-limitada entera no arrastra a las siguientes sin aviso.
+BATCH_CHUNK_SIZE = 100
+BATCH_MAX_WORKERS = 8
+
+
+def get_history_batch(
+    tickers: list[str],
+    *,
+    period: Optional[str] = '1y',
+    interval: str = '1d',
+    auto_adjust: bool = True,
+    min_rows: Optional[int] = None,
+    start: Optional[Any] = None,
+    end: Optional[Any] = None,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    max_workers: int = BATCH_MAX_WORKERS,
+) -> tuple[dict[str, Any], dict[str, YFClientError]]:
+    """
+    Historial de muchos tickers en tandas concurrentes. NO lanza por ticker.
+
+    Devuelve (frames, errors):
+      - frames: {ticker: DataFrame} de los que trajeron datos suficientes
+      - errors: {ticker: excepción} clasificada igual que get_history
+        (RateLimitError / DataNotFoundError / YFClientError) — el caller
+        decide si un rate-limit merece reintento o simplemente se salta
+
+    Cada ticker pasa por get_history: mismo price store, mismo cushion de
+    rate limit y mismos contadores en get_stats(). Los que ya están en el
+    store se sirven en local sin gastar llamada.
+
+    Por qué no yf.download(group_by='ticker'): en yfinance ≥1.x es un bucle
+    de Ticker.history por hilos (Yahoo no tiene endpoint multi-ticker de
+    velas), se salta cualquier cushion propio, convierte todas las zonas
+    horarias a la mayoritaria (desplaza fechas de tickers EU) y deja los
+    errores por ticker solo en el log.
+    """
+    def _one(ticker: str) -> Any:
+        return get_history(ticker, period=period, interval=interval,
+                           auto_adjust=auto_adjust, min_rows=min_rows,
+                           start=start, end=end)
+
+    return _run_batch('get_history_batch', _one, tickers,
+                      chunk_size=chunk_size, max_workers=max_workers)
+
+
+def get_info_batch(
+    tickers: list[str],
+    *,
+    required_fields: Optional[list[str]] = None,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    max_workers: int = BATCH_MAX_WORKERS,
+) -> tuple[dict[str, dict[str, Any]], dict[str, YFClientError]]:
+    """
+    ticker.info de muchos tickers en tandas concurrentes. NO lanza por ticker.
+
+    Mismo contrato que get_history_batch: devuelve (infos, errors) y cada
+    ticker pasa por get_info (mismo token bucket, mismos contadores).
+    """
+    def _one(ticker: str) -> dict[str, Any]:
+        return get_info(ticker, required_fields=required_fields)
+
+    return _run_batch('get_info_batch', _one, tickers,
+                      chunk_size=chunk_size, max_workers=max_workers)
+
+
+def _run_batch(
+    label: str,
+    fetch: Callable[[str], Any],
+    tickers: list[str],
+    *,
+    chunk_size: int,
+    max_workers: int,
+) -> tuple[dict[str, Any], dict[str, YFClientError]]:
+    """Ejecuta fetch(ticker) por tandas en un pool de hilos; errores por ticker."""
+    unique = list(dict.fromkeys(t for t in tickers if t))
+    results: dict[str, Any] = {}
+    errors: dict[str, YFClientError] = {}
+
+    def _one(ticker: str) -> tuple[str, Any, Optional[YFClientError]]:
+        try:
+            return ticker, fetch(ticker), None
+        except YFClientError as exc:
+            return ticker, None, exc
+
+    workers = max(1, min(max_workers, chunk_size))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(0, len(unique), chunk_size):
+            chunk = unique[i:i + chunk_size]
+            for ticker, value, exc in pool.map(_one, chunk):
+                if exc is None:
+                    results[ticker] = value
+                else:
+                    errors[ticker] = exc
+            _logger.info(
+                "%s: %d/%d tickers (%d ok, %d rate-limited, %d errores)",
+                label, min(i + chunk_size, len(unique)), len(unique), len(results),
+                sum(isinstance(e, RateLimitError) for e in errors.values()),
+                len(errors),
+            )
+    return results, errors
+
+
+# ── Option chains ─────────────────────────────────────────────────────────────
+
+OptionChain = namedtuple('OptionChain', ['calls', 'puts'])
+
+_option_locks: dict[tuple[str, str], Lock] = {}
+_option_locks_guard = Lock()
+
+
+def _option_lock(ticker: str, expiry: str) -> Lock:
+    """Un lock por (ticker, vencimiento): dos threads que piden la misma
+    cadena a la vez esperan a la primera descarga en vez de repetirla."""
+    with _option_locks_guard:
+        return _option_locks.setdefault((ticker.upper(), expiry), Lock())
+
+
+class OptionChains:
+    """
+    Sustituto de yf.Ticker para `.options` y `.option_chain(exp)`, servido
+    desde el option store: cada (ticker, vencimiento) se descarga una vez
+    mientras el snapshot del día esté fresco (TTL del store) y lo comparten
+    todos los consumidores de la sesión.
+
+    Las excepciones de Yahoo se propagan tal cual: los callers ya tienen su
+    gestión (reintento ante 429, saltar el ticker...). Lo que SÍ cambia es
+    que cada descarga gasta del token bucket compartido y cuenta en get_stats().
+    """
+
+    def __init__(self, ticker: str, tk: Any = None):
+        self.ticker = ticker
+        self._tk = tk
+
+    @property
+    def tk(self) -> Any:
+        if self._tk is None:
+            self._tk = yf.Ticker(self.ticker)
+        return self._tk
+
+    def _fetch(self, fn: Callable[[], Any]) -> Any:
+        _wait_for_rate_cushion()
+        try:
+            value = fn()
+        except Exception as exc:
+            _record(False, 'rate_limit' if _is_rate_limit_error(exc) else 'other', self.ticker)
+            raise
+        _limiter.on_success()
+        _record(True, None, self.ticker)
+        return value
+
+    @staticmethod
+    def _store_hit() -> None:
+        with _stats_lock:
+            _stats.store_hits += 1
+
+    @property
+    def options(self) -> tuple[str, ...]:
+        store = _option_store
+        if store is None:
+            return tuple(self._fetch(lambda: self.tk.options) or ())
+        with _option_lock(self.ticker, ''):
+            cached = store.read_expirations(self.ticker)
+            if cached is not None and time.time() - cached[1] < store.ttl_seconds:
+                self._store_hit()
+                return cached[0]
+            expirations = tuple(self._fetch(lambda: self.tk.options) or ())
+            store.write_expirations(self.ticker, expirations)
+            return expirations
+
+    def _download_chain(self, expiry: str) -> OptionChain:
+        chain = self._fetch(lambda: self.tk.option_chain(expiry))
+        # Un lado ausente (mocks, vencimientos sin puts) cuenta como vacío
+        return OptionChain(getattr(chain, 'calls', pd.DataFrame()),
+                           getattr(chain, 'puts', pd.DataFrame()))
+
+    def option_chain(self, expiry: str) -> OptionChain:
+        store = _option_store
+        if store is None:
+            return self._download_chain(expiry)
+        with _option_lock(self.ticker, expiry):
+            snap = store.read_chain(self.ticker, expiry)
+            if snap is not None and snap.is_fresh(store.ttl_seconds):
+                self._store_hit()
+                return OptionChain(snap.calls, snap.puts)
+            chain = self._download_chain(expiry)
+            store.write_chain(self.ticker, expiry,
+                              ChainSnapshot(chain.calls, chain.puts, fetched_at=time.time()))
+            return chain
+
+
+def option_chains(ticker: str, tk: Any = None) -> OptionChains:
+    """
+    Cadenas de opciones de `ticker` a través del option store. `tk` es el
+    yf.Ticker que el caller ya tenga (se usa solo si hay que descargar).
+    """
+    return OptionChains(ticker, tk)
+
+
+def option_activity_diff(ticker: str, expiry: str) -> Optional[pd.DataFrame]:
+    """
+    Cambio de OI y volumen por contrato de hoy contra el snapshot anterior
+    del option store (OptionStore.activity_diff). Sin llamadas a Yahoo.
+    None si el store está desactivado o no hay día previo guardado.
+    """
+    store = _option_store
+    return store.activity_diff(ticker, expiry) if store is not None else None
+
+
 def get_calendar(ticker: str) -> dict[str, Any]:
     """Obtiene ticker.calendar (dict). Lanza DataNotFoundError si está vacío."""
     _wait_for_rate_cushion()
@@ -256,6 +655,7 @@ def get_calendar(ticker: str) -> dict[str, Any]:
             raise RateLimitError(f"Rate limited fetching calendar for {ticker}") from exc
         _record(False, 'other', ticker)
         raise YFClientError(f"Failed to fetch calendar for {ticker}: {exc}") from exc
+    _limiter.on_success()
 
     if not isinstance(cal, dict) or not cal:
         _record(False, 'missing', ticker)